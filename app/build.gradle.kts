@@ -30,6 +30,14 @@ android {
         jvmTarget = "1.8"
     }
     
+    testOptions {
+        unitTests.all {
+            // JVM 基准测试默认跳过，用 -Pbench 启用（见 TESTING.md）
+            it.systemProperty("panda.bench", project.hasProperty("bench").toString())
+            it.testLogging.showStandardStreams = true
+        }
+    }
+    
     lint {
         // 禁用 BlockedPrivateApi 检查（系统工具需要访问私有 API）
         disable.add("BlockedPrivateApi")
@@ -41,5 +49,6 @@ android {
 dependencies {
     implementation("androidx.core:core-ktx:1.10.1")
     implementation("androidx.test.uiautomator:uiautomator:2.3.0")
+    testImplementation("junit:junit:4.13.2")
 }
 
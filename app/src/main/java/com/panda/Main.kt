@@ -1,14 +1,16 @@
 package com.panda
 
 import android.net.LocalServerSocket
-import android.net.LocalSocket
 import android.system.Os
+import com.panda.core.ClientTransport
 import com.panda.core.CommandDispatcher
+import com.panda.core.LocalSocketTransport
 import com.panda.core.TcpProxyServer
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
 import java.io.BufferedReader
 import java.io.File
+import java.io.InputStream
 import java.io.InputStreamReader
 
 /**
@@ -23,10 +25,16 @@ object Main {
     private const val ARG_DAEMON = "daemon"
     private const val ARG_DEBUG = "debug"
     private const val ARG_TCP_PORT = "--tcp-port"
+    private const val ARG_LOG_LEVEL = "--log-level"
+    private const val ARG_LOG_FILE = "--log-file"
     private const val DEFAULT_TCP_PORT = 43305
     
+    // 每条命令的日志按调用点限流（每秒最多一条，附带被省略的条数）
+    private val commandLog = Logger.RateLimit(1000)
+    
     @JvmStatic
     fun main(args: Array<String>) {
+        configureLogger(args)
         val firstArg = args.firstOrNull()
         if (firstArg == ARG_CHILD || firstArg == "fork") {
             // 子进程 - 运行服务
@@ -42,7 +50,7 @@ object Main {
         
         if (runAsDaemon) {
             // 主进程 - 按需 fork
-            forkChildProcess(debugMode, tcpPort)
+            forkChildProcess(debugMode, tcpPort, args)
         } else {
             // 默认前台运行，便于 Ctrl+C 直接终止
             runService(true, tcpPort)
@@ -86,7 +94,24 @@ object Main {
         return DEFAULT_TCP_PORT
     }
     
-    private fun forkChildProcess(debugChild: Boolean, tcpPort: Int) {
+    /**
+     * 配置日志
+     * --log-level=debug|info|warn|error|off（或环境变量 PANDA_LOG_LEVEL），默认 info
+     * --log-file=<路径>，默认 /data/local/tmp/panda.log，--log-file= 表示不写文件
+     */
+    private fun configureLogger(args: Array<String>) {
+        val levelArg = args.firstOrNull { it.startsWith("$ARG_LOG_LEVEL=") }?.substringAfter("=")
+            ?: System.getenv("PANDA_LOG_LEVEL")
+        val level = levelArg?.let { Logger.parseLevel(it) } ?: Logger.Level.INFO
+        val file = args.firstOrNull { it.startsWith("$ARG_LOG_FILE=") }?.substringAfter("=")
+            ?: Logger.DEFAULT_LOG_FILE
+        Logger.configure(level, file)
+        if (levelArg != null && Logger.parseLevel(levelArg) == null) {
+            Logger.error("Invalid log level: $levelArg")
+        }
+    }
+    
+    private fun forkChildProcess(debugChild: Boolean, tcpPort: Int, args: Array<String>) {
         Logger.log("Main process start $VERSION")
         val classPath = System.getProperty("java.class.path") ?: ""
         Logger.log("[fork] class path: $classPath")
@@ -104,6 +129,8 @@ object Main {
         if (tcpPort != DEFAULT_TCP_PORT) {
             command.add("$ARG_TCP_PORT=$tcpPort")
         }
+        // 日志参数原样传给子进程
+        args.filterTo(command) { it.startsWith("$ARG_LOG_LEVEL=") || it.startsWith("$ARG_LOG_FILE=") }
         val processBuilder = ProcessBuilder(command)
         processBuilder.environment()["CLASSPATH"] = classPath.split(File.pathSeparator)[0]
         
@@ -123,6 +150,7 @@ object Main {
         }.start()
         
         Logger.log("Main process exit")
+        Logger.flush()
     }
     
     private fun runService(debug: Boolean, tcpPort: Int = DEFAULT_TCP_PORT) {
@@ -160,21 +188,18 @@ object Main {
                 
                 Logger.log("Client connected (#$connectionCount)")
                 
-                // 配置 socket
-                client.sendBufferSize = 524288  // 512KB
-                
-                // 创建输出流
-                val output = BufferedOutputStream(client.outputStream, 524288)
+                // 配置 socket 并创建输出流
+                val transport = LocalSocketTransport(client)
                 
                 // 在新线程中处理客户端请求
                 Thread {
                     try {
-                        handleClient(client, output, connectionCount)
+                        handleClient(transport, connectionCount)
                     } catch (e: Exception) {
                         Logger.error("Error handling client #$connectionCount", e)
                     } finally {
                         try {
-                            client.close()
+                            transport.close()
                         } catch (e: Exception) {
                             // Ignore
                         }
@@ -191,15 +216,27 @@ object Main {
         }
     }
     
-    private fun handleClient(client: LocalSocket, output: BufferedOutputStream, clientId: Int) {
-        val input = client.inputStream
-        val dispatcher = CommandDispatcher(client, output)
+    private fun handleClient(transport: ClientTransport, clientId: Int) {
+        val dispatcher = CommandDispatcher(transport)
         
-        // 持续处理命令
+        try {
+            processCommands(transport.input, transport.output, dispatcher, clientId)
+        } finally {
+            dispatcher.close()
+        }
+    }
+    
+    private fun processCommands(
+        input: InputStream,
+        output: BinaryEncoder,
+        dispatcher: CommandDispatcher,
+        clientId: Int
+    ) {
+        // 持续处理命令（命令码缓冲区复用）
+        val commandBytes = ByteArray(4)
         while (!Thread.interrupted()) {
             try {
                 // 读取命令码 (4 bytes, big-endian)
-                val commandBytes = ByteArray(4)
                 var offset = 0
                 while (offset < 4) {
                     val read = input.read(commandBytes, offset, 4 - offset)
@@ -217,13 +254,13 @@ object Main {
                               ((commandBytes[2].toInt() and 0xFF) shl 8) or
                               (commandBytes[3].toInt() and 0xFF)
                 
-                Logger.log("Client #$clientId - Command: $command")
+                Logger.log(commandLog) { "Client #$clientId - Command: $command" }
                 
                 // 分发命令
                 dispatcher.dispatch(command)
                 
-                // 刷新输出
-                output.flush()
+                // 刷新输出（推送线程会并发写同一连接）
+                synchronized(output) { output.flush() }
                 
             } catch (e: Exception) {
                 if (e is java.io.EOFException || e.message?.contains("Connection reset") == true) {
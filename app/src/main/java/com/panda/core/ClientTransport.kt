@@ -0,0 +1,43 @@
+package com.panda.core
+
+import com.panda.utils.BinaryEncoder
+import java.io.Closeable
+import java.io.InputStream
+import java.net.Socket
+
+/**
+ * 客户端连接的传输层
+ * CommandDispatcher 只依赖请求输入流和响应输出流，不依赖具体的 socket 类型：
+ * - LocalSocketTransport: LocalSocket（adb forward localabstract）
+ * - TcpProxyServer 的事件循环连接: TCP 直接分发，不再经过 LocalSocket 转发
+ * - SocketTransport: 普通 java.net.Socket，可在 Linux JVM 上直接驱动 CommandDispatcher
+ * 本文件不依赖 Android API（BinaryEncoder 同样是纯 JVM 实现）
+ */
+interface ClientTransport : Closeable {
+    /** 请求输入流（阻塞读取） */
+    val input: InputStream
+
+    /** 响应编码器（带缓冲），每条命令处理完成后由调用方 flush；流式命令可自行 flush */
+    val output: BinaryEncoder
+}
+
+/**
+ * java.net.Socket 传输
+ */
+class SocketTransport(private val socket: Socket) : ClientTransport {
+
+    init {
+        socket.tcpNoDelay = true
+    }
+
+    override val input: InputStream = socket.getInputStream()
+    override val output = BinaryEncoder(socket.getOutputStream(), BUFFER_SIZE)
+
+    override fun close() {
+        socket.close()
+    }
+
+    companion object {
+        private const val BUFFER_SIZE = 65536
+    }
+}
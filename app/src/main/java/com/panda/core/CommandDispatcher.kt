@@ -1,21 +1,20 @@
 package com.panda.core
 
-import android.net.LocalSocket
 import com.panda.modules.*
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.IOUtils
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
-import java.io.InputStream
 
 /**
  * 命令分发器
  * 负责接收客户端命令并调用相应的功能模块处理
+ * 只依赖传输层的输入输出流，LocalSocket 与 TCP 连接共用
  */
-class CommandDispatcher(
-    private val client: LocalSocket,
-    private val output: BufferedOutputStream
-) {
-    private val input: InputStream = client.inputStream
+class CommandDispatcher(transport: ClientTransport) {
+    // 每个连接复用同一个解码器和编码器，读写字段不再分配临时对象
+    private val input = BinaryDecoder(transport.input)
+    private val output: BinaryEncoder = transport.output
     
     // 各功能模块
     private val appModule = AppModule()
@@ -26,12 +25,18 @@ class CommandDispatcher(
     private val audioModule = AudioModule()
     private val systemModule = SystemModule()
     private val autoClickModule = AutoClickModule.getInstance()
-    private val cpuModule = CpuModule()
-    private val gpuModule = GpuModule()
-    private val fpsModule = FpsModule()
-    private val memoryModule = MemoryModule()
-    private val batteryModule = BatteryModule()
-    private val networkStatsModule = NetworkStatsModule()
+    private val metricsModule = MetricsModule()
+    private val screenStreamModule = ScreenStreamModule()
+    
+    // 性能采集模块进程内共享，指标结果由 MetricSampler 按 TTL 缓存后分发给所有连接
+    private val sampler = MetricSampler.getInstance()
+    private val cpuModule = sampler.cpuModule
+    private val fpsModule = sampler.fpsModule
+    private val batteryModule = sampler.batteryModule
+    private val networkStatsModule = sampler.networkStatsModule
+    
+    // 本连接通过 208 开启、尚未通过 209 关闭的性能分析次数，断开时释放
+    private var profilingStarts = 0
     
     /**
      * 分发命令到相应模块
@@ -49,17 +54,18 @@ class CommandDispatcher(
                 12 -> appModule.getCameraStatus(input, output)
                 13 -> appModule.getCameraList(input, output)
                 14 -> appModule.launchApp(input, output)
+                15 -> appModule.getAppListDelta(input, output)
                 
                 // 系统信息 (20-21)
                 20 -> storageModule.getStorageList(output)
                 21 -> appModule.getCameraServiceInfo(output)
                 
                 // 音频捕获 (30-31) - Android 11+
-                30 -> audioModule.captureSystemAudio(client)
-                31 -> audioModule.captureMicAudio(input, client)
+                30 -> audioModule.captureSystemAudio(output)
+                31 -> audioModule.captureMicAudio(input, output)
                 
                 // 文件传输 (40)
-                40 -> systemModule.fileTransfer(input, client.outputStream)
+                40 -> systemModule.fileTransfer(input, output)
                 
                 // WiFi 管理 (50-58)
                 50 -> wifiModule.getWifiState(output)
@@ -74,10 +80,10 @@ class CommandDispatcher(
                 
                 // 系统操作 (60-65)
                 60 -> systemModule.getSystemProperties(output)
-                61 -> systemModule.fileOperation(input, client.outputStream)
+                61 -> systemModule.fileOperation(input, output)
                 62 -> systemModule.systemOperationA(output)
                 63 -> systemModule.systemOperationB(output)
-                64 -> systemModule.systemOperationC(client.outputStream)
+                64 -> systemModule.systemOperationC(output)
                 65 -> systemModule.systemOperationD(output)
                 
                 // 剪贴板 (70-73)
@@ -92,34 +98,57 @@ class CommandDispatcher(
                 82 -> notificationModule.openNotification(input)
                 83 -> notificationModule.clearAllNotifications()
                 
-                // 截图 (90, 120)
+                // 截图 (90, 120, 121)
                 90 -> systemModule.screenshotWallpaper(output)
                 120 -> systemModule.screenshot(output)
+                121 -> systemModule.screenshotWithOptions(input, output)
+                
+                // 屏幕帧推送 (122-123)
+                122 -> screenStreamModule.start(input, output)
+                123 -> screenStreamModule.stop(output)
                 
                 // Shell 命令 (100)
-                100 -> systemModule.executeCommand(input, client)
+                100 -> systemModule.executeCommand(input, output)
                 
                 // 性能数据采集 (200-209)
-                200 -> cpuModule.getCpuUsage(output)
-                201 -> cpuModule.getCpuCoreUsage(output)
-                202 -> cpuModule.getCpuFreq(output)
-                203 -> gpuModule.getGpuUsage(output)
-                204 -> fpsModule.getFps(output)
-                205 -> memoryModule.getMemoryUsage(input, output)
-                206 -> cpuModule.getCpuTemperature(output)
-                207 -> cpuModule.getThreadCpuUsage(input, output)
-                208 -> fpsModule.startProfiling(input, output)
-                209 -> fpsModule.stopProfiling(output)
+                200, 201, 202, 203, 204, 206 -> sampler.write(output, command)
+                205 -> sampler.write(output, command, input.readInt())
+                207 -> sampler.write(output, command, input.readInt(), input.readInt())
+                208 -> {
+                    fpsModule.startProfiling(input, output)
+                    profilingStarts++
+                }
+                209 -> {
+                    if (profilingStarts > 0) {
+                        profilingStarts--
+                        fpsModule.stopProfiling(output)
+                    } else {
+                        output.writeInt(1)
+                    }
+                }
+                
+                // 指标订阅推送与批量查询 (210-212)
+                210 -> metricsModule.subscribe(input, output)
+                211 -> metricsModule.unsubscribe(output)
+                212 -> metricsModule.queryBatch(input, output)
+                
+                // CPU 拓扑使用率与线程 CPU 表 (213-214)
+                213 -> sampler.write(output, command)
+                214 -> cpuModule.getThreadCpuTable(input, output)
+                
+                // 帧时间统计与帧率跟踪目标 (215-216)
+                215 -> sampler.write(output, command, input.readInt())
+                216 -> fpsModule.setFpsTarget(input, output)
                 
                 // 电池信息 (220-222)
-                220 -> batteryModule.getBatteryInfo(output)
-                221 -> batteryModule.getBatteryLevel(output)
+                220, 221 -> sampler.write(output, command)
                 222 -> batteryModule.isBatteryMonitoringSupported(output)
                 
-                // 网络流量统计 (230-232)
-                230 -> networkStatsModule.getNetworkUsage(input, output)
-                231 -> networkStatsModule.getTotalNetworkUsage(output)
+                // 网络流量统计 (230-233)
+                230 -> sampler.write(output, command, input.readInt())
+                231 -> sampler.write(output, command)
                 232 -> networkStatsModule.getNetworkUsageByPackage(input, output)
+                233 -> networkStatsModule.getNetworkUsageBulk(input, output)
                 
                 // 自动点击 (110-119)
                 110 -> autoClickModule.clickByText(input, output)
@@ -135,17 +164,28 @@ class CommandDispatcher(
                 
                 else -> {
                     Logger.log("Unknown command: $command")
-                    IOUtils.writeError(output, -1, "Unknown command: $command")
+                    output.writeError(-1, "Unknown command: $command")
                 }
             }
         } catch (e: Exception) {
             Logger.error("Error dispatching command $command", e)
             try {
-                IOUtils.writeError(output, -1, IOUtils.getStackTrace(e))
+                output.writeError(-1, IOUtils.getStackTrace(e))
             } catch (ex: Exception) {
                 // Ignore
             }
         }
     }
+    
+    /**
+     * 连接关闭时释放资源（停止指标与屏幕帧推送，释放本连接开启的性能分析）
+     */
+    fun close() {
+        metricsModule.close()
+        screenStreamModule.close()
+        while (profilingStarts > 0) {
+            profilingStarts--
+            fpsModule.releaseProfiling()
+        }
+    }
 }
-
@@ -0,0 +1,26 @@
+package com.panda.core
+
+import android.net.LocalSocket
+import com.panda.utils.BinaryEncoder
+import java.io.InputStream
+
+/**
+ * LocalSocket 传输
+ */
+class LocalSocketTransport(private val socket: LocalSocket) : ClientTransport {
+
+    init {
+        socket.sendBufferSize = BUFFER_SIZE
+    }
+
+    override val input: InputStream = socket.inputStream
+    override val output = BinaryEncoder(socket.outputStream, BUFFER_SIZE)
+
+    override fun close() {
+        socket.close()
+    }
+
+    companion object {
+        private const val BUFFER_SIZE = 524288  // 512KB
+    }
+}
@@ -1,28 +1,212 @@
 package com.panda.core
 
-import android.net.LocalSocket
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
+import com.panda.utils.BufferPool
 import com.panda.utils.Logger
-import java.io.BufferedInputStream
-import java.io.BufferedOutputStream
+import java.io.IOException
 import java.io.InputStream
 import java.io.OutputStream
-import java.net.ServerSocket
-import java.net.Socket
+import java.net.InetSocketAddress
+import java.nio.ByteBuffer
+import java.nio.channels.SelectionKey
+import java.nio.channels.Selector
+import java.nio.channels.ServerSocketChannel
+import java.nio.channels.SocketChannel
+import java.util.ArrayDeque
+import java.util.concurrent.ConcurrentLinkedQueue
+import java.util.concurrent.ExecutorService
+import java.util.concurrent.Executors
+import java.util.concurrent.atomic.AtomicBoolean
+import java.util.concurrent.locks.ReentrantLock
+import kotlin.concurrent.withLock
 
 /**
- * TCP 反向代理服务器
- * 监听 TCP 端口，将请求转发到 LocalSocket
- * 实现反向代理功能，支持远程访问
+ * TCP 代理服务器
+ * 监听 TCP 端口，直接在 TCP 连接上提供与 LocalSocket 相同的二进制协议，支持远程访问
+ *
+ * 事件驱动实现：
+ * - tcp-proxy: NIO Selector，负责 accept 和所有 TCP 读写，线程数与客户端数量无关
+ * - tcp-dispatch: 固定大小（CPU 核数）的分发线程池，只在连接上有完整命令头时运行 CommandDispatcher，
+ *   空闲连接不占用线程
+ * - tcp-dispatch-slow: 固定大小的慢命令线程池（截图、Shell、UI 自动化、带图标的应用列表、214/233 等），
+ *   慢命令交给它执行，不占用分发线程，其余连接的快命令不被阻塞
+ * 两个线程池都有上限，线程数与连接数无关；池满时任务排队等待
+ * 请求和响应都放在池化的直接缓冲区中排队，响应用聚集写（gathering write）一次写出多个缓冲区；
+ * 每个方向在途缓冲区超过上限时暂停读取 TCP / 阻塞分发线程的写入（背压），空闲连接不持有缓冲区。
+ * 命令直接分发，不再经过 LocalSocket 转发（省去两次拷贝和两次线程切换）
  */
 object TcpProxyServer {
     private const val DEFAULT_TCP_PORT = 43305
-    private const val BUFFER_SIZE = 524288  // 512KB
-    private const val SOCKET_NAME = "panda-1.1.0"
-    
-    private var serverSocket: ServerSocket? = null
+
+    // 池化缓冲区：每个 16KB，池中最多保留 256 个（4MB）
+    private const val BUFFER_SIZE = 16384
+    private const val MAX_POOLED_BUFFERS = 256
+    // 每个方向最多排队的缓冲区数量（256KB），超过后暂停读取或阻塞写入
+    private const val MAX_PENDING_BUFFERS = 16
+    private const val RESUME_PENDING_BUFFERS = MAX_PENDING_BUFFERS / 2
+    // 分发线程一侧的响应缓冲（合并小字段写入），第一条命令到达时才分配
+    private const val OUTPUT_BUFFER_SIZE = 8192
+
+    private val bufferPool = BufferPool(BUFFER_SIZE, MAX_POOLED_BUFFERS)
+
+    @Volatile
     private var isRunning = false
     private var tcpPort = DEFAULT_TCP_PORT
-    
+    @Volatile
+    private var selector: Selector? = null
+
+    // 需要 TCP 线程处理的连接（有待写响应、恢复读取或关闭）
+    private val tcpPending = ConcurrentLinkedQueue<Connection>()
+
+    // 每条命令的日志按调用点限流
+    private val commandLog = Logger.RateLimit(1000)
+
+    // 分发线程数与 CPU 核数相同；慢命令大多在等待 Binder、子进程或编码，单独限制数量
+    private val DISPATCH_THREADS = Runtime.getRuntime().availableProcessors().coerceAtLeast(2)
+    private const val SLOW_DISPATCH_THREADS = 4
+
+    // 可能长时间运行的命令：应用列表（含图标）、WiFi 扫描、截图、Shell、UI 自动化、线程 CPU 表、批量采样
+    private val SLOW_COMMANDS = setOf(10, 15, 52, 90, 100, 110, 111, 113, 114, 119, 120, 121, 214, 233)
+
+    private val dispatchExecutor: ExecutorService = Executors.newFixedThreadPool(DISPATCH_THREADS) { runnable ->
+        Thread(runnable, "tcp-dispatch").apply { isDaemon = true }
+    }
+
+    private val slowExecutor: ExecutorService = Executors.newFixedThreadPool(SLOW_DISPATCH_THREADS) { runnable ->
+        Thread(runnable, "tcp-dispatch-slow").apply { isDaemon = true }
+    }
+
+    /**
+     * 一个 TCP 客户端连接，同时作为 CommandDispatcher 的传输层
+     * requests 由 TCP 线程追加、分发线程读取；responses 由分发线程追加、TCP 线程写出；两者都由 lock 保护
+     */
+    private class Connection(val id: Int, val channel: SocketChannel) : ClientTransport {
+        val lock = ReentrantLock()
+        val dataAvailable = lock.newCondition()
+        val spaceAvailable = lock.newCondition()
+        val requests = ArrayDeque<ByteBuffer>()
+        var requestBytes = 0
+        val responses = ArrayDeque<ByteBuffer>()
+        // 有分发任务在运行（或分发已结束，不再调度）
+        var dispatching = false
+        // 分发已结束，剩余响应写完后关闭
+        var outputFinished = false
+
+        // 以下只在 TCP 线程使用
+        val gather = arrayOfNulls<ByteBuffer>(MAX_PENDING_BUFFERS + 1)
+        var key: SelectionKey? = null
+
+        val closed = AtomicBoolean(false)
+        @Volatile
+        var inputEof = false     // 客户端已关闭写方向
+        @Volatile
+        var readPaused = false
+
+        // 只在分发线程使用，第一条命令到达时创建
+        var dispatcher: CommandDispatcher? = null
+
+        override val input: InputStream = RequestStream()
+        // 分发线程读取命令码
+        val commands = BinaryDecoder(input)
+        override val output: BinaryEncoder by lazy {
+            BinaryEncoder(ResponseStream(), OUTPUT_BUFFER_SIZE)
+        }
+
+        override fun close() {
+            close(this)
+        }
+
+        /**
+         * 请求流：读取 TCP 线程排队的缓冲区，没有数据时阻塞
+         */
+        inner class RequestStream : InputStream() {
+            override fun read(): Int {
+                val single = ByteArray(1)
+                return if (read(single, 0, 1) == -1) -1 else single[0].toInt() and 0xFF
+            }
+
+            override fun read(b: ByteArray, off: Int, len: Int): Int {
+                if (len == 0) return 0
+                var copied = 0
+                var resume = false
+                lock.withLock {
+                    while (requests.isEmpty()) {
+                        if (inputEof || closed.get()) return -1
+                        dataAvailable.await()
+                    }
+                    while (copied < len && requests.isNotEmpty()) {
+                        val head = requests.peekFirst()
+                        val count = minOf(len - copied, head.remaining())
+                        head.get(b, off + copied, count)
+                        copied += count
+                        if (!head.hasRemaining()) {
+                            requests.pollFirst()
+                            bufferPool.release(head)
+                        }
+                    }
+                    requestBytes -= copied
+                    resume = readPaused && requests.size <= RESUME_PENDING_BUFFERS
+                }
+                if (resume) notifyTcp(this@Connection)
+                return copied
+            }
+
+            override fun available(): Int = lock.withLock { requestBytes }
+        }
+
+        /**
+         * 响应流：写入池化缓冲区，写满或 flush 时交给 TCP 线程
+         * 只通过 output 访问（并发写入方对 output 加锁）
+         */
+        inner class ResponseStream : OutputStream() {
+            private var current: ByteBuffer? = null
+
+            override fun write(b: Int) {
+                write(byteArrayOf(b.toByte()), 0, 1)
+            }
+
+            override fun write(b: ByteArray, off: Int, len: Int) {
+                var offset = off
+                var remaining = len
+                while (remaining > 0) {
+                    val buffer = current ?: bufferPool.acquire().also { current = it }
+                    val count = minOf(remaining, buffer.remaining())
+                    buffer.put(b, offset, count)
+                    offset += count
+                    remaining -= count
+                    if (!buffer.hasRemaining()) enqueue()
+                }
+            }
+
+            override fun flush() {
+                enqueue()
+            }
+
+            private fun enqueue() {
+                val buffer = current
+                if (buffer == null || buffer.position() == 0) {
+                    if (closed.get()) throw IOException("Connection closed")
+                    return
+                }
+                current = null
+                buffer.flip()
+                val first = lock.withLock {
+                    while (responses.size >= MAX_PENDING_BUFFERS && !closed.get()) {
+                        spaceAvailable.await()
+                    }
+                    if (closed.get()) {
+                        bufferPool.release(buffer)
+                        throw IOException("Connection closed")
+                    }
+                    responses.addLast(buffer)
+                    responses.size == 1
+                }
+                if (first) notifyTcp(this@Connection)
+            }
+        }
+    }
+
     /**
      * 启动 TCP 代理服务器
      * @param port TCP 监听端口，默认 43305
@@ -32,165 +216,334 @@ object TcpProxyServer {
             Logger.log("TCP proxy server already running on port $tcpPort")
             return
         }
-        
+
         tcpPort = port
-        
-        Thread {
+
+        Thread({
             try {
-                serverSocket = ServerSocket(port, 128)
+                val server = ServerSocketChannel.open()
+                server.socket().reuseAddress = true
+                server.socket().bind(InetSocketAddress(port), 128)
+                server.configureBlocking(false)
+                val eventSelector = Selector.open()
+                server.register(eventSelector, SelectionKey.OP_ACCEPT)
+                selector = eventSelector
                 isRunning = true
+
                 Logger.log("TCP proxy server started on port $port")
-                Logger.log("Forwarding TCP connections to LocalSocket: $SOCKET_NAME")
-                
-                var connectionCount = 0
-                
-                while (isRunning) {
-                    try {
-                        val tcpClient = serverSocket?.accept()
-                        if (tcpClient != null) {
-                            connectionCount++
-                            Logger.log("TCP client connected (#$connectionCount) from ${tcpClient.remoteSocketAddress}")
-                            
-                            // 在新线程中处理 TCP 客户端
-                            Thread {
-                                handleTcpClient(tcpClient, connectionCount)
-                            }.start()
-                        }
-                    } catch (e: Exception) {
-                        if (isRunning) {
-                            Logger.error("Error accepting TCP client", e)
-                        }
-                    }
-                }
+                Logger.log("Dispatching TCP connections directly to CommandDispatcher")
+
+                runTcpLoop(server, eventSelector)
             } catch (e: Exception) {
                 Logger.error("Error starting TCP proxy server", e)
                 isRunning = false
             }
-        }.start()
+        }, "tcp-proxy").start()
     }
-    
+
     /**
      * 停止 TCP 代理服务器
      */
     fun stop() {
         isRunning = false
         try {
-            serverSocket?.close()
-            serverSocket = null
+            selector?.wakeup()
             Logger.log("TCP proxy server stopped")
         } catch (e: Exception) {
             Logger.error("Error stopping TCP proxy server", e)
         }
     }
-    
+
     /**
      * 检查服务器是否运行中
      */
     fun isRunning(): Boolean = isRunning
-    
+
     /**
      * 获取当前监听端口
      */
     fun getPort(): Int = tcpPort
-    
-    /**
-     * 处理 TCP 客户端连接
-     * 将 TCP 数据转发到 LocalSocket，将 LocalSocket 响应转发回 TCP
-     */
-    private fun handleTcpClient(tcpClient: Socket, clientId: Int) {
-        var localSocket: LocalSocket? = null
-        
+
+    // ========== TCP 线程 ==========
+
+    private fun runTcpLoop(server: ServerSocketChannel, eventSelector: Selector) {
+        var connectionCount = 0
         try {
-            // 连接到 LocalSocket
-            localSocket = LocalSocket()
-            localSocket.connect(android.net.LocalSocketAddress(SOCKET_NAME))
-            localSocket.sendBufferSize = BUFFER_SIZE
-            localSocket.receiveBufferSize = BUFFER_SIZE
-            
-            Logger.log("TCP client #$clientId: Connected to LocalSocket")
-            
-            // 配置 TCP socket
-            tcpClient.sendBufferSize = BUFFER_SIZE
-            tcpClient.receiveBufferSize = BUFFER_SIZE
-            tcpClient.tcpNoDelay = true  // 禁用 Nagle 算法，降低延迟
-            
-            val tcpInput = BufferedInputStream(tcpClient.getInputStream(), BUFFER_SIZE)
-            val tcpOutput = BufferedOutputStream(tcpClient.getOutputStream(), BUFFER_SIZE)
-            val localInput = BufferedInputStream(localSocket.inputStream, BUFFER_SIZE)
-            val localOutput = BufferedOutputStream(localSocket.outputStream, BUFFER_SIZE)
-            
-            // 启动双向转发
-            val tcpToLocal = Thread {
-                forwardStream(tcpInput, localOutput, "TCP->Local", clientId)
-            }
-            val localToTcp = Thread {
-                forwardStream(localInput, tcpOutput, "Local->TCP", clientId)
-            }
-            
-            tcpToLocal.start()
-            localToTcp.start()
-            
-            // 等待任一方向完成
-            tcpToLocal.join()
-            localToTcp.join()
-            
-            Logger.log("TCP client #$clientId: Connection closed")
-            
+            while (isRunning) {
+                eventSelector.select()
+
+                // 其他线程提交的连接：写出新响应、恢复读取或关闭
+                while (true) {
+                    val connection = tcpPending.poll() ?: break
+                    if (connection.closed.get()) {
+                        closeTcp(connection)
+                        continue
+                    }
+                    writeTcp(connection)
+                    val resume = connection.lock.withLock {
+                        connection.readPaused && !connection.inputEof &&
+                            connection.requests.size <= RESUME_PENDING_BUFFERS
+                    }
+                    if (resume) {
+                        connection.readPaused = false
+                        updateInterest(connection)
+                    }
+                }
+
+                val keys = eventSelector.selectedKeys().iterator()
+                while (keys.hasNext()) {
+                    val key = keys.next()
+                    keys.remove()
+                    if (!key.isValid) continue
+
+                    if (key.isAcceptable) {
+                        val channel = server.accept() ?: continue
+                        connectionCount++
+                        accept(channel, connectionCount, eventSelector)
+                        continue
+                    }
+
+                    val connection = key.attachment() as Connection
+                    if (key.isWritable) writeTcp(connection)
+                    if (key.isValid && key.isReadable) readTcp(connection)
+                }
+            }
         } catch (e: Exception) {
-            Logger.error("Error handling TCP client #$clientId", e)
+            Logger.error("TCP proxy event loop failed", e)
         } finally {
-            try {
-                tcpClient.close()
-            } catch (e: Exception) {
-                // Ignore
+            isRunning = false
+            for (key in eventSelector.keys()) {
+                val connection = key.attachment() as? Connection ?: continue
+                close(connection)
+                closeTcp(connection)
             }
-            try {
-                localSocket?.close()
-            } catch (e: Exception) {
-                // Ignore
+            closeQuietly { server.close() }
+            closeQuietly { eventSelector.close() }
+            selector = null
+        }
+    }
+
+    private fun accept(channel: SocketChannel, clientId: Int, eventSelector: Selector) {
+        Logger.log("TCP client connected (#$clientId) from ${channel.socket().remoteSocketAddress}")
+        try {
+            channel.configureBlocking(false)
+            channel.socket().tcpNoDelay = true  // 禁用 Nagle 算法，降低延迟
+        } catch (e: IOException) {
+            Logger.error("TCP client #$clientId: Cannot configure socket", e)
+            closeQuietly { channel.close() }
+            return
+        }
+        val connection = Connection(clientId, channel)
+        connection.key = channel.register(eventSelector, SelectionKey.OP_READ, connection)
+    }
+
+    /**
+     * 读取请求到池化缓冲区，有完整命令头时调度分发
+     */
+    private fun readTcp(connection: Connection) {
+        val buffer = bufferPool.acquire()
+        val read = try {
+            connection.channel.read(buffer)
+        } catch (e: IOException) {
+            -1
+        }
+        if (read <= 0) {
+            bufferPool.release(buffer)
+            if (read < 0) {
+                // 客户端关闭写方向：处理完已收到的命令后关闭
+                connection.readPaused = true
+                updateInterest(connection)
+                connection.lock.withLock {
+                    connection.inputEof = true
+                    connection.dataAvailable.signalAll()
+                }
+                scheduleDispatch(connection)
             }
+            return
         }
+
+        buffer.flip()
+        val pending = connection.lock.withLock {
+            connection.requests.addLast(buffer)
+            connection.requestBytes += read
+            connection.dataAvailable.signalAll()
+            connection.requests.size
+        }
+        if (pending >= MAX_PENDING_BUFFERS) {
+            connection.readPaused = true
+            updateInterest(connection)
+        }
+        scheduleDispatch(connection)
     }
-    
+
     /**
-     * 转发数据流
+     * 一次聚集写出所有排队的响应，写不完时注册 OP_WRITE
      */
-    private fun forwardStream(
-        input: InputStream,
-        output: OutputStream,
-        direction: String,
-        clientId: Int
-    ) {
-        val buffer = ByteArray(8192)  // 8KB buffer
-        
-        try {
-            while (true) {
-                val bytesRead = input.read(buffer)
-                if (bytesRead == -1) {
-                    break  // EOF
+    private fun writeTcp(connection: Connection) {
+        if (connection.closed.get()) return
+        val gather = connection.gather
+        var count = 0
+        connection.lock.withLock {
+            for (buffer in connection.responses) {
+                if (count == gather.size) break
+                gather[count++] = buffer
+            }
+        }
+
+        if (count > 0) {
+            try {
+                connection.channel.write(gather, 0, count)
+            } catch (e: IOException) {
+                for (i in 0 until count) gather[i] = null
+                close(connection)
+                closeTcp(connection)
+                return
+            }
+            var written = 0
+            while (written < count && !gather[written]!!.hasRemaining()) written++
+            for (i in 0 until count) gather[i] = null
+            connection.lock.withLock {
+                for (i in 0 until written) {
+                    bufferPool.release(connection.responses.pollFirst())
                 }
-                if (bytesRead > 0) {
-                    output.write(buffer, 0, bytesRead)
-                    output.flush()
+                if (connection.responses.size < MAX_PENDING_BUFFERS) {
+                    connection.spaceAvailable.signalAll()
                 }
             }
-        } catch (e: Exception) {
-            if (e.message?.contains("Connection reset") == true ||
-                e.message?.contains("Broken pipe") == true ||
-                e is java.io.EOFException) {
-                // 正常关闭，不记录错误
-            } else {
-                Logger.error("Error forwarding $direction for client #$clientId", e)
+        }
+
+        val finished = connection.lock.withLock {
+            connection.outputFinished && connection.responses.isEmpty()
+        }
+        if (finished) {
+            // 分发已结束，剩余响应已全部写出
+            close(connection)
+            closeTcp(connection)
+            return
+        }
+        updateInterest(connection)
+    }
+
+    private fun updateInterest(connection: Connection) {
+        val key = connection.key ?: return
+        if (!key.isValid) return
+        var ops = 0
+        if (!connection.readPaused) ops = ops or SelectionKey.OP_READ
+        if (connection.lock.withLock { connection.responses.isNotEmpty() }) ops = ops or SelectionKey.OP_WRITE
+        key.interestOps(ops)
+    }
+
+    private fun notifyTcp(connection: Connection) {
+        tcpPending.offer(connection)
+        selector?.wakeup()
+    }
+
+    /**
+     * 标记连接关闭：唤醒阻塞的分发线程，TCP 线程关闭 socket，分发线程释放 CommandDispatcher
+     */
+    private fun close(connection: Connection) {
+        if (!connection.closed.compareAndSet(false, true)) return
+        Logger.log("TCP client #${connection.id}: Connection closed")
+        connection.lock.withLock {
+            connection.dataAvailable.signalAll()
+            connection.spaceAvailable.signalAll()
+        }
+        notifyTcp(connection)
+        scheduleDispatch(connection)
+    }
+
+    /** 在 TCP 线程中关闭 socket 并归还排队的缓冲区 */
+    private fun closeTcp(connection: Connection) {
+        connection.key?.cancel()
+        closeQuietly { connection.channel.close() }
+        connection.lock.withLock {
+            while (connection.requests.isNotEmpty()) {
+                bufferPool.release(connection.requests.pollFirst())
             }
-        } finally {
-            try {
-                // 关闭输出流以通知另一端
-                output.close()
-            } catch (e: Exception) {
-                // Ignore
+            connection.requestBytes = 0
+            while (connection.responses.isNotEmpty()) {
+                bufferPool.release(connection.responses.pollFirst())
             }
         }
     }
-}
 
+    // ========== 分发线程 ==========
 
+    /**
+     * 有完整命令头（或连接已结束）且没有分发任务在运行时，提交一个分发任务
+     */
+    private fun scheduleDispatch(connection: Connection) {
+        connection.lock.withLock {
+            if (connection.dispatching) return
+            if (!connection.closed.get() && !connection.inputEof && connection.requestBytes < 4) return
+            connection.dispatching = true
+        }
+        try {
+            dispatchExecutor.execute { runDispatch(connection) }
+        } catch (e: Exception) {
+            Logger.error("TCP client #${connection.id}: Cannot schedule dispatch", e)
+            close(connection)
+        }
+    }
+
+    /**
+     * 依次处理已到达的命令，没有完整命令头时退出（下次数据到达时重新调度）
+     * 命令参数未到齐时阻塞等待，与 LocalSocket 连接的行为相同
+     * 读到的命令与当前线程池不符（慢命令在分发线程上，或快命令在慢命令线程上）时，
+     * 把该命令连同后续处理交给另一个线程池；同一连接始终只有一个任务在运行，命令顺序不变
+     * @param slow 是否运行在慢命令线程池
+     * @param handedOff 另一个线程池已读出、待执行的命令
+     */
+    private fun runDispatch(connection: Connection, slow: Boolean = false, handedOff: Int? = null) {
+        try {
+            var pending = handedOff
+            while (true) {
+                val command = pending ?: run {
+                    var finished = false
+                    connection.lock.withLock {
+                        if (connection.closed.get() || (connection.inputEof && connection.requestBytes < 4)) {
+                            finished = true
+                        } else if (connection.requestBytes < 4) {
+                            connection.dispatching = false
+                            return
+                        }
+                    }
+                    if (finished) null else connection.commands.readInt()
+                } ?: break
+                pending = null
+
+                if ((command in SLOW_COMMANDS) != slow) {
+                    val executor = if (slow) dispatchExecutor else slowExecutor
+                    executor.execute { runDispatch(connection, !slow, command) }
+                    return
+                }
+
+                val dispatcher = connection.dispatcher
+                    ?: CommandDispatcher(connection).also { connection.dispatcher = it }
+                Logger.log(commandLog) { "TCP client #${connection.id} - Command: $command" }
+                dispatcher.dispatch(command)
+                // 推送线程（指标、屏幕帧）会并发写同一连接
+                synchronized(connection.output) { connection.output.flush() }
+            }
+        } catch (e: IOException) {
+            // 连接已关闭或请求不完整
+        } catch (e: Exception) {
+            // 包括线程池拒绝任务
+            Logger.error("Error processing command for TCP client #${connection.id}", e)
+        }
+
+        // 连接结束：释放分发器（停止指标推送等），剩余响应写完后由 TCP 线程关闭
+        connection.dispatcher?.close()
+        connection.dispatcher = null
+        connection.lock.withLock { connection.outputFinished = true }
+        notifyTcp(connection)
+    }
+
+    private fun closeQuietly(block: () -> Unit) {
+        try {
+            block()
+        } catch (e: Exception) {
+            // Ignore
+        }
+    }
+}
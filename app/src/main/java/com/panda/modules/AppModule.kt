@@ -4,6 +4,7 @@ import android.annotation.SuppressLint
 import android.app.ActivityOptions
 import android.content.Intent
 import android.content.pm.ApplicationInfo
+import android.content.pm.PackageInfo
 import android.content.pm.PackageManager
 import android.graphics.Bitmap
 import android.graphics.Canvas
@@ -11,13 +12,19 @@ import android.graphics.drawable.Drawable
 import android.hardware.camera2.CameraCharacteristics
 import android.hardware.camera2.CameraManager
 import android.os.Build
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.FakeContext
-import com.panda.utils.IOUtils
+import com.panda.utils.IconCache
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
 import java.io.ByteArrayOutputStream
 import java.io.File
-import java.io.InputStream
+import java.util.concurrent.Callable
+import java.util.concurrent.ExecutorService
+import java.util.concurrent.Executors
+import java.util.concurrent.Future
+import java.util.concurrent.atomic.AtomicBoolean
+import java.util.zip.CRC32
 
 /**
  * 应用管理模块
@@ -29,14 +36,14 @@ class AppModule {
     /**
      * 命令 0: 创建虚拟显示器
      */
-    fun createVirtualDisplay(output: BufferedOutputStream) {
+    fun createVirtualDisplay(output: BinaryEncoder) {
         try {
             // 这里简化实现，实际需要创建 VirtualDisplay
-            IOUtils.writeSuccess(output)
+            output.writeSuccess()
             Logger.log("Virtual display created")
         } catch (e: Exception) {
             Logger.error("Error creating virtual display", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
@@ -55,203 +62,434 @@ class AppModule {
     /**
      * 命令 10: 获取应用列表（包含图标）
      * 使用 PackageManager API 快速获取应用图标
+     * 名称、安装器与图标由渲染线程池并行加载，按列表顺序流式写出；图标优先取自缓存
      */
-    fun getAppList(input: InputStream, output: BufferedOutputStream) {
+    fun getAppList(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val flags = IOUtils.readInt(input)
-            val iconSize = IOUtils.readInt(input)
+            val flags = input.readInt()
+            val iconSize = input.readInt()
             
             val pm = FakeContext.get().packageManager
-            var packages = pm.getInstalledPackages(0)
-            
-            // 过滤系统应用
-            if (flags and 1 == 0) {
-                packages = packages.filter { (it.applicationInfo.flags and ApplicationInfo.FLAG_SYSTEM) != 0 }
-            }
-            
-            // 过滤第三方应用
-            if (flags and 2 == 0) {
-                packages = packages.filter { (it.applicationInfo.flags and ApplicationInfo.FLAG_SYSTEM) == 0 }
-            }
-            
-            // 过滤无启动器的应用
-            if (flags and 4 == 0) {
-                packages = packages.filter { pm.getLaunchIntentForPackage(it.packageName) != null }
-            }
+            val apps = queryPackages(pm, flags)
             
             // 发送默认图标
-            val defaultIcon = pm.defaultActivityIcon
-            val defaultBitmap = drawableToBitmap(defaultIcon, iconSize)
-            writeBitmap(output, defaultBitmap, iconSize)
+            writeIcon(output, loadDefaultIcon(pm, iconSize))
             
             // 发送应用数量
-            IOUtils.writeInt(output, packages.size)
+            output.writeInt(apps.size)
             
             var lastFlushTime = System.currentTimeMillis()
             
-            // 遍历所有应用
-            for (pkg in packages) {
-                // 包名
-                IOUtils.writeString(output, pkg.packageName)
-                // 版本名
-                IOUtils.writeString(output, pkg.versionName ?: "")
-                // 版本号
-                val versionCode = if (Build.VERSION.SDK_INT >= 28) {
-                    pkg.longVersionCode
-                } else {
-                    pkg.versionCode.toLong()
-                }
-                IOUtils.writeLong(output, versionCode)
-                
-                // 应用名称
-                val label = pm.getApplicationLabel(pkg.applicationInfo).toString()
-                IOUtils.writeString(output, label)
-                
-                // 安装时间
-                IOUtils.writeInt(output, (pkg.firstInstallTime / 1000).toInt())
-                // 更新时间
-                IOUtils.writeInt(output, (pkg.lastUpdateTime / 1000).toInt())
-                // 最后使用时间 (这里简化为0)
-                IOUtils.writeInt(output, 0)
+            // 遍历所有应用（详情已在渲染线程中并行加载）
+            forEachDetails(pm, apps, iconSize) { app, details ->
+                writeAppInfo(output, app, details)
+                writeIcon(output, details.icon)
                 
-                // 安装器包名
-                val installer = pm.getInstallerPackageName(pkg.packageName) ?: ""
-                IOUtils.writeString(output, installer)
-                
-                // CPU 架构
-                IOUtils.writeString(output, "")
-                
-                // Target SDK
-                IOUtils.writeInt(output, pkg.applicationInfo.targetSdkVersion)
-                // Min SDK
-                val minSdk = if (Build.VERSION.SDK_INT >= 24) {
-                    pkg.applicationInfo.minSdkVersion
-                } else {
-                    21
+                // 每 100ms 刷新一次缓冲区（优化性能）
+                if (System.currentTimeMillis() - lastFlushTime > 100) {
+                    output.flush()
+                    lastFlushTime = System.currentTimeMillis()
                 }
-                IOUtils.writeInt(output, minSdk)
-                
-                // Flags
-                IOUtils.writeInt(output, pkg.applicationInfo.flags)
-                
-                // 是否有分包
-                val hasSplits = !pkg.applicationInfo.splitPublicSourceDirs.isNullOrEmpty()
-                IOUtils.writeBoolean(output, hasSplits)
-                
-                // 是否可启动
-                val canLaunch = pm.getLaunchIntentForPackage(pkg.packageName) != null
-                IOUtils.writeBoolean(output, canLaunch)
-                
-                // 应用大小（简化实现）
-                val appSize = File(pkg.applicationInfo.sourceDir).length()
-                IOUtils.writeLong(output, appSize)
-                IOUtils.writeLong(output, 0)  // 数据大小
-                IOUtils.writeLong(output, 0)  // 缓存大小
+            }
+            
+            output.flush()
+            Logger.log("Sent ${apps.size} apps")
+            
+        } catch (e: Exception) {
+            Logger.error("Error getting app list", e)
+            output.writeError(-1, e.message ?: "Unknown error")
+        }
+    }
+    
+    /**
+     * 命令 15: 增量获取应用列表
+     * 客户端发送已缓存的 (包名, 版本号, 更新时间, 图标尺寸, 图标 CRC32)，
+     * 服务端只返回新增/变化的应用和已卸载的包名：
+     *   请求: flags, iconSize, knownCount, knownCount × (string 包名, long 版本号, int 更新时间(秒), int 图标尺寸, int 图标CRC32)
+     *   响应: 默认图标（knownCount > 0 时客户端已缓存，大小写 0）
+     *         int 变化数量, 每个应用同命令 10 的记录，其中图标与客户端 CRC32 相同时大小写 ICON_UNCHANGED
+     *         int 已移除数量, 每个为 string 包名
+     */
+    fun getAppListDelta(input: BinaryDecoder, output: BinaryEncoder) {
+        try {
+            val flags = input.readInt()
+            val iconSize = input.readInt()
+            val knownCount = input.readInt()
+            val known = HashMap<String, KnownApp>(knownCount * 2)
+            for (i in 0 until knownCount) {
+                val packageName = input.readString()
+                known[packageName] = KnownApp(
+                    versionCode = input.readLong(),
+                    lastUpdateTime = input.readInt(),
+                    iconSize = input.readInt(),
+                    iconCrc = input.readInt()
+                )
+            }
+            
+            val pm = FakeContext.get().packageManager
+            val apps = queryPackages(pm, flags)
+            
+            // 先只比较元数据，确定需要发送的应用
+            val changed = apps.filter { app ->
+                val pkg = app.pkg
+                val entry = known[pkg.packageName]
+                entry == null ||
+                    entry.versionCode != getVersionCode(pkg) ||
+                    entry.lastUpdateTime != (pkg.lastUpdateTime / 1000).toInt() ||
+                    entry.iconSize != iconSize
+            }
+            val installed = HashSet<String>(apps.size * 2)
+            apps.mapTo(installed) { it.pkg.packageName }
+            val removed = known.keys.filter { it !in installed }
+            
+            // 默认图标只在首次同步时发送
+            if (knownCount == 0) {
+                writeIcon(output, loadDefaultIcon(pm, iconSize))
+            } else {
+                output.writeInt(0)
+            }
+            
+            output.writeInt(changed.size)
+            var lastFlushTime = System.currentTimeMillis()
+            forEachDetails(pm, changed, iconSize) { app, details ->
+                writeAppInfo(output, app, details)
                 
-                // 获取并发送图标 - 核心代码！
-                try {
-                    val iconId = pkg.applicationInfo.icon
-                    if (iconId != 0) {
-                        val icon = pm.getDrawable(pkg.packageName, iconId, pkg.applicationInfo)
-                        val bitmap = drawableToBitmap(icon, iconSize)
-                        writeBitmap(output, bitmap, iconSize)
-                    } else {
-                        IOUtils.writeInt(output, 0)  // 无图标
-                    }
-                } catch (e: Exception) {
-                    Logger.error("Error loading icon for ${pkg.packageName}", e)
-                    IOUtils.writeInt(output, 0)
+                val pngData = details.icon
+                val knownCrc = known[app.pkg.packageName]?.iconCrc ?: 0
+                when {
+                    pngData == null -> output.writeInt(0)
+                    knownCrc != 0 && knownCrc == crc32(pngData) -> output.writeInt(ICON_UNCHANGED)
+                    else -> output.writeBytes(pngData)
                 }
                 
-                // 每 100ms 刷新一次缓冲区（优化性能）
                 if (System.currentTimeMillis() - lastFlushTime > 100) {
                     output.flush()
                     lastFlushTime = System.currentTimeMillis()
                 }
             }
             
+            output.writeInt(removed.size)
+            for (packageName in removed) {
+                output.writeString(packageName)
+            }
+            
             output.flush()
-            Logger.log("Sent ${packages.size} apps")
+            Logger.log("App list delta: ${changed.size} changed, ${removed.size} removed, ${apps.size - changed.size} unchanged")
             
         } catch (e: Exception) {
-            Logger.error("Error getting app list", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            Logger.error("Error getting app list delta", e)
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
+    /**
+     * 已安装应用及一次性查询的元数据
+     */
+    private class AppEntry(val pkg: PackageInfo, val canLaunch: Boolean)
+    
+    /**
+     * 在渲染线程中加载的应用详情（名称、安装器、图标 PNG）
+     */
+    private class AppDetails(val label: String, val installer: String, val icon: ByteArray?)
+    
+    /**
+     * 按 flags 过滤已安装应用
+     * bit0=包含系统应用, bit1=包含第三方应用, bit2=包含无启动器应用
+     * 可启动的包名由一次 queryIntentActivities 得到，不再为每个应用调用 getLaunchIntentForPackage
+     */
+    private fun queryPackages(pm: PackageManager, flags: Int): List<AppEntry> {
+        val packages = pm.getInstalledPackages(0)
+        pruneIconCache(packages)
+        val launchable = queryLaunchablePackages(pm)
+        
+        val includeSystem = flags and 1 != 0
+        val includeThirdParty = flags and 2 != 0
+        val includeNoLauncher = flags and 4 != 0
+        
+        val apps = ArrayList<AppEntry>(packages.size)
+        for (pkg in packages) {
+            val isSystem = (pkg.applicationInfo.flags and ApplicationInfo.FLAG_SYSTEM) != 0
+            // 过滤系统应用 / 第三方应用
+            if (!includeSystem && isSystem) continue
+            if (!includeThirdParty && !isSystem) continue
+            // 过滤无启动器的应用
+            val canLaunch = pkg.packageName in launchable
+            if (!includeNoLauncher && !canLaunch) continue
+            apps.add(AppEntry(pkg, canLaunch))
+        }
+        return apps
+    }
+    
+    /**
+     * 有启动入口的包名，与 getLaunchIntentForPackage 相同：CATEGORY_INFO 或 CATEGORY_LAUNCHER
+     */
+    private fun queryLaunchablePackages(pm: PackageManager): Set<String> {
+        val launchable = HashSet<String>()
+        for (category in arrayOf(Intent.CATEGORY_INFO, Intent.CATEGORY_LAUNCHER)) {
+            val intent = Intent(Intent.ACTION_MAIN).addCategory(category)
+            pm.queryIntentActivities(intent, 0).mapTo(launchable) { it.activityInfo.packageName }
+        }
+        return launchable
+    }
+    
+    private fun getVersionCode(pkg: PackageInfo): Long {
+        return if (Build.VERSION.SDK_INT >= 28) {
+            pkg.longVersionCode
+        } else {
+            pkg.versionCode.toLong()
+        }
+    }
+    
+    /**
+     * 在渲染线程池中并行加载应用详情，按列表顺序回调 action（调用线程）
+     * 最多提前提交 MAX_IN_FLIGHT 个任务，限制未写出的图标占用的内存
+     */
+    private fun forEachDetails(
+        pm: PackageManager,
+        apps: List<AppEntry>,
+        iconSize: Int,
+        action: (AppEntry, AppDetails) -> Unit
+    ) {
+        val futures = arrayOfNulls<Future<AppDetails>>(apps.size)
+        var submitted = 0
+        try {
+            for (i in apps.indices) {
+                val limit = minOf(apps.size, i + MAX_IN_FLIGHT)
+                while (submitted < limit) {
+                    val app = apps[submitted]
+                    futures[submitted] = iconExecutor.submit(Callable { loadDetails(pm, app, iconSize) })
+                    submitted++
+                }
+                val details = futures[i]!!.get()
+                futures[i] = null
+                action(apps[i], details)
+            }
+        } finally {
+            // 写出失败（连接断开）时取消未完成的任务
+            for (i in 0 until submitted) futures[i]?.cancel(false)
+        }
+    }
+    
+    /**
+     * 加载单个应用的名称、安装器与图标（在渲染线程中执行）
+     */
+    private fun loadDetails(pm: PackageManager, app: AppEntry, iconSize: Int): AppDetails {
+        val pkg = app.pkg
+        val label = try {
+            pm.getApplicationLabel(pkg.applicationInfo).toString()
+        } catch (e: Exception) {
+            pkg.packageName
+        }
+        return AppDetails(label, getInstaller(pm, pkg), loadIconPng(pm, pkg, iconSize))
+    }
+    
+    /**
+     * 写入单个应用的元数据（命令 10 / 15 共用，不含图标）
+     */
+    private fun writeAppInfo(output: BinaryEncoder, app: AppEntry, details: AppDetails) {
+        val pkg = app.pkg
+        // 包名
+        output.writeString(pkg.packageName)
+        // 版本名
+        output.writeString(pkg.versionName ?: "")
+        // 版本号
+        output.writeLong(getVersionCode(pkg))
+        
+        // 应用名称
+        output.writeString(details.label)
+        
+        // 安装时间
+        output.writeInt((pkg.firstInstallTime / 1000).toInt())
+        // 更新时间
+        output.writeInt((pkg.lastUpdateTime / 1000).toInt())
+        // 最后使用时间 (这里简化为0)
+        output.writeInt(0)
+        
+        // 安装器包名
+        output.writeString(details.installer)
+        
+        // CPU 架构
+        output.writeString("")
+        
+        // Target SDK
+        output.writeInt(pkg.applicationInfo.targetSdkVersion)
+        // Min SDK
+        val minSdk = if (Build.VERSION.SDK_INT >= 24) {
+            pkg.applicationInfo.minSdkVersion
+        } else {
+            21
+        }
+        output.writeInt(minSdk)
+        
+        // Flags
+        output.writeInt(pkg.applicationInfo.flags)
+        
+        // 是否有分包
+        val hasSplits = !pkg.applicationInfo.splitPublicSourceDirs.isNullOrEmpty()
+        output.writeBoolean(hasSplits)
+        
+        // 是否可启动
+        output.writeBoolean(app.canLaunch)
+        
+        // 应用大小（简化实现）
+        val appSize = File(pkg.applicationInfo.sourceDir).length()
+        output.writeLong(appSize)
+        output.writeLong(0)  // 数据大小
+        output.writeLong(0)  // 缓存大小
+    }
+    
+    /**
+     * 安装器包名，按 (包名, 更新时间) 在进程内缓存
+     */
+    @Suppress("DEPRECATION")
+    private fun getInstaller(pm: PackageManager, pkg: PackageInfo): String {
+        synchronized(installerCache) {
+            val cached = installerCache[pkg.packageName]
+            if (cached != null && cached.first == pkg.lastUpdateTime) return cached.second
+        }
+        val installer = try {
+            pm.getInstallerPackageName(pkg.packageName) ?: ""
+        } catch (e: Exception) {
+            ""
+        }
+        synchronized(installerCache) {
+            installerCache[pkg.packageName] = Pair(pkg.lastUpdateTime, installer)
+        }
+        return installer
+    }
+    
+    /**
+     * 渲染应用图标并编码为 PNG，无图标或加载失败时返回 null
+     * 结果按 (包名, 版本号, 图标尺寸) 缓存
+     */
+    private fun loadIconPng(pm: PackageManager, pkg: PackageInfo, iconSize: Int): ByteArray? {
+        return try {
+            val iconId = pkg.applicationInfo.icon
+            if (iconId != 0) {
+                val versionCode = getVersionCode(pkg)
+                iconCache.get(pkg.packageName, versionCode, iconSize)?.let { return it }
+                val icon = pm.getDrawable(pkg.packageName, iconId, pkg.applicationInfo)
+                encodeBitmap(drawableToBitmap(icon, iconSize), iconSize)
+                    ?.also { iconCache.put(pkg.packageName, versionCode, iconSize, it) }
+            } else {
+                null
+            }
+        } catch (e: Exception) {
+            Logger.error("Error loading icon for ${pkg.packageName}", e)
+            null
+        }
+    }
+    
+    /**
+     * 默认图标，按系统版本缓存
+     */
+    private fun loadDefaultIcon(pm: PackageManager, iconSize: Int): ByteArray? {
+        val versionCode = Build.VERSION.SDK_INT.toLong()
+        iconCache.get(DEFAULT_ICON_KEY, versionCode, iconSize)?.let { return it }
+        return encodeBitmap(drawableToBitmap(pm.defaultActivityIcon, iconSize), iconSize)
+            ?.also { iconCache.put(DEFAULT_ICON_KEY, versionCode, iconSize, it) }
+    }
+    
+    /**
+     * 每个进程首次查询时清理已卸载应用的缓存文件
+     */
+    private fun pruneIconCache(packages: List<PackageInfo>) {
+        if (!iconCachePruned.compareAndSet(false, true)) return
+        val installed = HashSet<String>(packages.size * 2)
+        packages.mapTo(installed) { it.packageName }
+        installed.add(DEFAULT_ICON_KEY)
+        iconExecutor.execute { iconCache.prune(installed) }
+    }
+    
+    private fun crc32(data: ByteArray): Int {
+        val crc = CRC32()
+        crc.update(data)
+        return crc.value.toInt()
+    }
+    
+    /**
+     * 客户端已缓存的应用信息（命令 15）
+     */
+    private data class KnownApp(
+        val versionCode: Long,
+        val lastUpdateTime: Int,
+        val iconSize: Int,
+        val iconCrc: Int
+    )
+    
     /**
      * 命令 11: 获取应用的 APK 文件路径和大小
      */
-    fun getApkPath(input: InputStream, output: BufferedOutputStream) {
+    fun getApkPath(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val packageName = IOUtils.readString(input)
+            val packageName = input.readString()
             val pm = FakeContext.get().packageManager
             val appInfo = pm.getApplicationInfo(packageName, 0)
             
             // 发送主 APK 路径
-            IOUtils.writeString(output, appInfo.publicSourceDir)
+            output.writeString(appInfo.publicSourceDir)
             // 发送文件大小
-            IOUtils.writeLong(output, File(appInfo.publicSourceDir).length())
+            output.writeLong(File(appInfo.publicSourceDir).length())
             
             // 发送分包信息
             val splitPaths = appInfo.splitPublicSourceDirs
             if (splitPaths.isNullOrEmpty()) {
-                IOUtils.writeInt(output, 0)
+                output.writeInt(0)
             } else {
-                IOUtils.writeInt(output, splitPaths.size)
+                output.writeInt(splitPaths.size)
                 for (path in splitPaths) {
-                    IOUtils.writeString(output, path)
-                    IOUtils.writeLong(output, File(path).length())
+                    output.writeString(path)
+                    output.writeLong(File(path).length())
                 }
             }
             
             Logger.log("APK path for $packageName: ${appInfo.publicSourceDir}")
         } catch (e: Exception) {
             Logger.error("Error getting APK path", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 12: 获取相机状态
      */
-    fun getCameraStatus(input: InputStream, output: BufferedOutputStream) {
+    fun getCameraStatus(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val cameraId = IOUtils.readInt(input)
+            val cameraId = input.readInt()
             // 简化实现
-            IOUtils.writeInt(output, 1)  // 状态：可用
+            output.writeInt(1)  // 状态：可用
             Logger.log("Camera $cameraId status: available")
         } catch (e: Exception) {
             Logger.error("Error getting camera status", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 13: 获取设备上所有可用相机列表及其特性
      */
-    fun getCameraList(input: InputStream, output: BufferedOutputStream) {
+    fun getCameraList(input: BinaryDecoder, output: BinaryEncoder) {
         try {
             val cameraManager = FakeContext.get().getSystemService(CameraManager::class.java)
             val cameraIds = cameraManager.cameraIdList
             
-            IOUtils.writeInt(output, cameraIds.size)
+            output.writeInt(cameraIds.size)
             
             for (id in cameraIds) {
                 try {
                     val characteristics = cameraManager.getCameraCharacteristics(id)
                     
                     // 相机ID
-                    IOUtils.writeString(output, id)
+                    output.writeString(id)
                     
                     // 镜头方向
                     val lensFacing = characteristics.get(CameraCharacteristics.LENS_FACING) ?: 0
-                    IOUtils.writeInt(output, lensFacing)
+                    output.writeInt(lensFacing)
                     
                     // 传感器尺寸
                     val sensorSize = characteristics.get(CameraCharacteristics.SENSOR_INFO_PIXEL_ARRAY_SIZE)
-                    IOUtils.writeInt(output, sensorSize?.width ?: 0)
-                    IOUtils.writeInt(output, sensorSize?.height ?: 0)
+                    output.writeInt(sensorSize?.width ?: 0)
+                    output.writeInt(sensorSize?.height ?: 0)
                 } catch (e: Exception) {
                     Logger.error("Error getting camera $id characteristics", e)
                 }
@@ -260,17 +498,17 @@ class AppModule {
             Logger.log("Camera list: ${cameraIds.size} cameras")
         } catch (e: Exception) {
             Logger.error("Error getting camera list", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
     /**
      * 命令 14: 在指定显示器上启动应用
      */
-    fun launchApp(input: InputStream, output: BufferedOutputStream) {
+    fun launchApp(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val packageName = IOUtils.readString(input)
-            val displayId = IOUtils.readInt(input)
+            val packageName = input.readString()
+            val displayId = input.readInt()
             
             val pm = FakeContext.get().packageManager
             var intent = pm.getLaunchIntentForPackage(packageName)
@@ -289,21 +527,21 @@ class AppModule {
                     // 启动应用
                 }
                 
-                IOUtils.writeSuccess(output)
+                output.writeSuccess()
                 Logger.log("Launched app: $packageName on display $displayId")
             } else {
-                IOUtils.writeError(output, -1, "No launch intent found")
+                output.writeError(-1, "No launch intent found")
             }
         } catch (e: Exception) {
             Logger.error("Error launching app", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 21: 获取相机服务信息
      */
-    fun getCameraServiceInfo(output: BufferedOutputStream) {
+    fun getCameraServiceInfo(output: BinaryEncoder) {
         // 简化实现
         Logger.log("Camera service info requested")
     }
@@ -342,14 +580,26 @@ class AppModule {
     }
     
     /**
-     * 将 Bitmap 压缩为 PNG 并写入输出流
+     * 写入图标 (大小 + PNG 数据)，无图标时大小为 0
      */
-    private fun writeBitmap(output: BufferedOutputStream, bitmap: Bitmap?, maxSize: Int?) {
-        if (bitmap == null) {
-            IOUtils.writeInt(output, 0)
+    private fun writeIcon(output: BinaryEncoder, pngData: ByteArray?) {
+        if (pngData == null) {
+            output.writeInt(0)
             return
         }
         
+        // 发送数据
+        output.writeBytes(pngData)
+    }
+    
+    /**
+     * 按需缩放并压缩为 PNG，同时回收 Bitmap
+     */
+    private fun encodeBitmap(bitmap: Bitmap?, maxSize: Int?): ByteArray? {
+        if (bitmap == null) {
+            return null
+        }
+        
         var finalBitmap = bitmap
         
         // 如果需要再次缩放
@@ -374,10 +624,27 @@ class AppModule {
         }
         bitmap.recycle()
         
-        // 发送数据
-        val pngData = byteStream.toByteArray()
-        IOUtils.writeInt(output, pngData.size)
-        output.write(pngData)
+        return byteStream.toByteArray()
+    }
+    
+    companion object {
+        /** 命令 15: 图标与客户端缓存相同（CRC32 一致），不重复发送 */
+        const val ICON_UNCHANGED = -2
+        
+        /** 每个请求最多提前渲染的应用数 */
+        private const val MAX_IN_FLIGHT = 32
+        private const val DEFAULT_ICON_KEY = "android.default"
+        
+        /** 图标渲染线程池，所有连接共享，线程数不超过 4 */
+        private val iconExecutor: ExecutorService =
+            Executors.newFixedThreadPool(Runtime.getRuntime().availableProcessors().coerceIn(1, 4)) { runnable ->
+                Thread(runnable, "icon-render").apply { isDaemon = true }
+            }
+        
+        private val iconCache = IconCache(File(IconCache.DEFAULT_DIRECTORY))
+        private val iconCachePruned = AtomicBoolean(false)
+        
+        /** 包名 -> (更新时间, 安装器包名) */
+        private val installerCache = HashMap<String, Pair<Long, String>>()
     }
 }
-
@@ -4,11 +4,10 @@ import android.annotation.SuppressLint
 import android.media.AudioFormat
 import android.media.AudioRecord
 import android.media.MediaRecorder
-import android.net.LocalSocket
 import android.os.Build
-import com.panda.utils.IOUtils
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.Logger
-import java.io.InputStream
 
 /**
  * 音频捕获模块
@@ -21,15 +20,15 @@ class AudioModule {
     /**
      * 命令 30: 捕获系统播放音频流
      */
-    fun captureSystemAudio(client: LocalSocket) {
+    fun captureSystemAudio(output: BinaryEncoder) {
         if (Build.VERSION.SDK_INT < 30) {
-            IOUtils.writeError(client.outputStream, -1, "Audio capturing requires Android 11+")
+            output.writeError(-1, "Audio capturing requires Android 11+")
             return
         }
         
         try {
             // 简化实现 - 实际需要使用 AudioPlaybackCapture API
-            IOUtils.writeSuccess(client.outputStream)
+            output.writeSuccess()
             Logger.log("System audio capture started (simplified)")
             
             // 这里应该实现音频捕获和编码逻辑
@@ -37,22 +36,22 @@ class AudioModule {
             
         } catch (e: Exception) {
             Logger.error("Error capturing system audio", e)
-            IOUtils.writeError(client.outputStream, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 31: 捕获麦克风音频流
      */
-    fun captureMicAudio(input: InputStream, client: LocalSocket) {
+    fun captureMicAudio(input: BinaryDecoder, output: BinaryEncoder) {
         if (Build.VERSION.SDK_INT < 30) {
-            IOUtils.writeError(client.outputStream, -1, "Audio capturing requires Android 11+")
+            output.writeError(-1, "Audio capturing requires Android 11+")
             return
         }
         
         try {
-            val audioSource = IOUtils.readInt(input)
-            val playback = IOUtils.readInt(input) != 0
+            val audioSource = input.readInt()
+            val playback = input.readInt() != 0
             
             // 创建 AudioRecord
             val audioFormat = AudioFormat.Builder()
@@ -62,12 +61,12 @@ class AudioModule {
                 .build()
             
             // 这里应该实现音频捕获逻辑
-            IOUtils.writeSuccess(client.outputStream)
+            output.writeSuccess()
             Logger.log("Mic audio capture started (source: $audioSource, playback: $playback)")
             
         } catch (e: Exception) {
             Logger.error("Error capturing mic audio", e)
-            IOUtils.writeError(client.outputStream, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
 }
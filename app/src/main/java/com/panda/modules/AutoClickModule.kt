@@ -5,10 +5,9 @@ import androidx.test.uiautomator.By
 import androidx.test.uiautomator.UiDevice
 import androidx.test.uiautomator.UiObject2
 import com.panda.core.InstrumentShellWrapper
-import com.panda.utils.IOUtils
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
-import java.io.InputStream
 import java.util.regex.Pattern
 
 /**
@@ -51,10 +50,10 @@ class AutoClickModule private constructor() {
      * 请求: 文本(string), 超时(int ms)
      * 响应: 成功(int 1) 或 失败(int 0)
      */
-    fun clickByText(input: InputStream, output: BufferedOutputStream) {
+    fun clickByText(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val text = IOUtils.readString(input)
-            val timeout = IOUtils.readInt(input)
+            val text = input.readString()
+            val timeout = input.readInt()
             
             Logger.log("Click by text: '$text', timeout: ${timeout}ms")
             
@@ -74,7 +73,7 @@ class AutoClickModule private constructor() {
                     Logger.log("Clicking: '${it.text}'")
                     it.click()
                     Thread.sleep(300)
-                    IOUtils.writeInt(output, 1)
+                    output.writeInt(1)
                     return
                 }
             }
@@ -91,7 +90,7 @@ class AutoClickModule private constructor() {
                         Logger.log("Clicking parent of: '${element.text}'")
                         parent.click()
                         Thread.sleep(300)
-                        IOUtils.writeInt(output, 1)
+                        output.writeInt(1)
                         return
                     }
                     parent = parent.parent
@@ -100,11 +99,11 @@ class AutoClickModule private constructor() {
             }
             
             Logger.log("Element not found: '$text'")
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
             
         } catch (e: Exception) {
             Logger.error("Error in clickByText", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -113,10 +112,10 @@ class AutoClickModule private constructor() {
      * 请求: 文本(string), 超时(int ms)
      * 响应: 成功(int 1) 或 失败(int 0)
      */
-    fun clickByExactText(input: InputStream, output: BufferedOutputStream) {
+    fun clickByExactText(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val text = IOUtils.readString(input)
-            val timeout = IOUtils.readInt(input)
+            val text = input.readString()
+            val timeout = input.readInt()
             
             val device = getUiDevice()
             val element = device.findObject(By.text(text))
@@ -124,14 +123,14 @@ class AutoClickModule private constructor() {
             if (element != null) {
                 Logger.log("Exact click: '$text'")
                 element.click()
-                IOUtils.writeInt(output, 1)
+                output.writeInt(1)
             } else {
                 Logger.log("Element not found: '$text'")
-                IOUtils.writeInt(output, 0)
+                output.writeInt(0)
             }
         } catch (e: Exception) {
             Logger.error("Error in clickByExactText", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -140,19 +139,19 @@ class AutoClickModule private constructor() {
      * 请求: x(int), y(int)
      * 响应: 成功(int 1) 或 失败(int 0)
      */
-    fun clickAtCoordinate(input: InputStream, output: BufferedOutputStream) {
+    fun clickAtCoordinate(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val x = IOUtils.readInt(input)
-            val y = IOUtils.readInt(input)
+            val x = input.readInt()
+            val y = input.readInt()
             
             val device = getUiDevice()
             val success = device.click(x, y)
             
             Logger.log("Click at ($x, $y): $success")
-            IOUtils.writeInt(output, if (success) 1 else 0)
+            output.writeInt(if (success) 1 else 0)
         } catch (e: Exception) {
             Logger.error("Error in clickAtCoordinate", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -160,7 +159,7 @@ class AutoClickModule private constructor() {
      * 命令 113: 获取屏幕上所有可点击元素的文本
      * 响应: 数量(int), 对于每个元素: 文本(string)
      */
-    fun getClickableTexts(output: BufferedOutputStream) {
+    fun getClickableTexts(output: BinaryEncoder) {
         try {
             val device = getUiDevice()
             val elements = device.findObjects(By.clickable(true))
@@ -173,13 +172,13 @@ class AutoClickModule private constructor() {
                 }
             }
             
-            IOUtils.writeInt(output, texts.size)
-            texts.forEach { IOUtils.writeString(output, it) }
+            output.writeInt(texts.size)
+            texts.forEach { output.writeString(it) }
             
             Logger.log("Found ${texts.size} clickable texts")
         } catch (e: Exception) {
             Logger.error("Error in getClickableTexts", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -188,28 +187,28 @@ class AutoClickModule private constructor() {
      * 请求: 关键词数量(int), 关键词列表(string[])
      * 响应: 成功(int 1) 或 失败(int 0)
      */
-    fun startAutoClickMonitor(input: InputStream, output: BufferedOutputStream) {
+    fun startAutoClickMonitor(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val count = IOUtils.readInt(input)
+            val count = input.readInt()
             monitorKeywords.clear()
             
             repeat(count) {
-                monitorKeywords.add(IOUtils.readString(input))
+                monitorKeywords.add(input.readString())
             }
             
             if (isMonitoring) {
                 Logger.log("Monitor already running")
-                IOUtils.writeInt(output, 1)
+                output.writeInt(1)
                 return
             }
             
             startMonitoring()
-            IOUtils.writeInt(output, 1)
+            output.writeInt(1)
             Logger.log("Auto-click monitor started with ${monitorKeywords.size} keywords")
             
         } catch (e: Exception) {
             Logger.error("Error starting monitor", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -217,14 +216,14 @@ class AutoClickModule private constructor() {
      * 命令 115: 停止自动点击监控
      * 响应: 成功(int 1)
      */
-    fun stopAutoClickMonitor(output: BufferedOutputStream) {
+    fun stopAutoClickMonitor(output: BinaryEncoder) {
         try {
             stopMonitoring()
-            IOUtils.writeInt(output, 1)
+            output.writeInt(1)
             Logger.log("Auto-click monitor stopped")
         } catch (e: Exception) {
             Logger.error("Error stopping monitor", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -232,15 +231,15 @@ class AutoClickModule private constructor() {
      * 命令 116: 获取监控状态
      * 响应: 状态(int 1=运行中, 0=已停止), 关键词数量(int), 关键词列表(string[])
      */
-    fun getMonitorStatus(output: BufferedOutputStream) {
+    fun getMonitorStatus(output: BinaryEncoder) {
         try {
-            IOUtils.writeInt(output, if (isMonitoring) 1 else 0)
-            IOUtils.writeInt(output, monitorKeywords.size)
-            monitorKeywords.forEach { IOUtils.writeString(output, it) }
+            output.writeInt(if (isMonitoring) 1 else 0)
+            output.writeInt(monitorKeywords.size)
+            monitorKeywords.forEach { output.writeString(it) }
         } catch (e: Exception) {
             Logger.error("Error getting monitor status", e)
-            IOUtils.writeInt(output, 0)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
+            output.writeInt(0)
         }
     }
     
@@ -248,15 +247,15 @@ class AutoClickModule private constructor() {
      * 命令 117: 按返回键
      * 响应: 成功(int 1) 或 失败(int 0)
      */
-    fun pressBack(output: BufferedOutputStream) {
+    fun pressBack(output: BinaryEncoder) {
         try {
             val device = getUiDevice()
             val success = device.pressBack()
-            IOUtils.writeInt(output, if (success) 1 else 0)
+            output.writeInt(if (success) 1 else 0)
             Logger.log("Press back: $success")
         } catch (e: Exception) {
             Logger.error("Error in pressBack", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -264,15 +263,15 @@ class AutoClickModule private constructor() {
      * 命令 118: 按 Home 键
      * 响应: 成功(int 1) 或 失败(int 0)
      */
-    fun pressHome(output: BufferedOutputStream) {
+    fun pressHome(output: BinaryEncoder) {
         try {
             val device = getUiDevice()
             val success = device.pressHome()
-            IOUtils.writeInt(output, if (success) 1 else 0)
+            output.writeInt(if (success) 1 else 0)
             Logger.log("Press home: $success")
         } catch (e: Exception) {
             Logger.error("Error in pressHome", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -281,17 +280,17 @@ class AutoClickModule private constructor() {
      * 请求: 文本(string)
      * 响应: 存在(int 1) 或 不存在(int 0)
      */
-    fun hasText(input: InputStream, output: BufferedOutputStream) {
+    fun hasText(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val text = IOUtils.readString(input)
+            val text = input.readString()
             val device = getUiDevice()
             val element = device.findObject(By.textContains(text))
             
-            IOUtils.writeInt(output, if (element != null) 1 else 0)
+            output.writeInt(if (element != null) 1 else 0)
             Logger.log("Has text '$text': ${element != null}")
         } catch (e: Exception) {
             Logger.error("Error in hasText", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -8,11 +8,10 @@ import android.os.Build
 import android.os.IBinder
 import android.os.ParcelFileDescriptor
 import com.panda.mirror.ServiceManagerMirror
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.FakeContext
-import com.panda.utils.IOUtils
 import com.panda.utils.Logger
 import java.io.BufferedReader
-import java.io.BufferedOutputStream
 import java.io.InputStreamReader
 
 /**
@@ -28,15 +27,15 @@ class BatteryModule {
      * 命令 220: 获取完整电池信息
      * 响应: 电流(int 毫安), 电压(int 毫伏), 电量(int 0-100), 充电状态(int 0=未充电, 1=充电中), 时间戳(long)
      */
-    fun getBatteryInfo(output: BufferedOutputStream) {
+    fun getBatteryInfo(output: BinaryEncoder) {
         try {
             if (Build.VERSION.SDK_INT < 21) {
                 // Android 5.0 以下不支持
-                IOUtils.writeInt(output, 0)
-                IOUtils.writeInt(output, 0)
-                IOUtils.writeInt(output, 0)
-                IOUtils.writeInt(output, 0)
-                IOUtils.writeLong(output, 0)
+                output.writeInt(0)
+                output.writeInt(0)
+                output.writeInt(0)
+                output.writeInt(0)
+                output.writeLong(0)
                 return
             }
             
@@ -67,22 +66,22 @@ class BatteryModule {
             val timestamp = System.currentTimeMillis()
             
             // 发送数据
-            IOUtils.writeInt(output, currentNow)  // 电流（毫安）
-            IOUtils.writeInt(output, voltage)      // 电压（毫伏）
-            IOUtils.writeInt(output, level)        // 电量（0-100）
-            IOUtils.writeInt(output, if (isCharging) 1 else 0)  // 充电状态
-            IOUtils.writeLong(output, timestamp)   // 时间戳
+            output.writeInt(currentNow)  // 电流（毫安）
+            output.writeInt(voltage)      // 电压（毫伏）
+            output.writeInt(level)        // 电量（0-100）
+            output.writeInt(if (isCharging) 1 else 0)  // 充电状态
+            output.writeLong(timestamp)   // 时间戳
             output.flush()  // 确保数据发送
             
-            Logger.log("Battery info: current=${currentNow}mA, voltage=${voltage}mV, level=$level%, charging=$isCharging")
+            Logger.debug { "Battery info: current=${currentNow}mA, voltage=${voltage}mV, level=$level%, charging=$isCharging" }
             
         } catch (e: Exception) {
             Logger.error("Error getting battery info", e)
-            IOUtils.writeInt(output, 0)
-            IOUtils.writeInt(output, 0)
-            IOUtils.writeInt(output, 0)
-            IOUtils.writeInt(output, 0)
-            IOUtils.writeLong(output, 0)
+            output.writeInt(0)
+            output.writeInt(0)
+            output.writeInt(0)
+            output.writeInt(0)
+            output.writeLong(0)
             output.flush()
         }
     }
@@ -91,14 +90,14 @@ class BatteryModule {
      * 命令 221: 获取电池电量
      * 响应: 电量(int 0-100)
      */
-    fun getBatteryLevel(output: BufferedOutputStream) {
+    fun getBatteryLevel(output: BinaryEncoder) {
         try {
             val level = getBatteryLevel()
-            IOUtils.writeInt(output, level)
-            Logger.log("Battery level: $level%")
+            output.writeInt(level)
+            Logger.debug { "Battery level: $level%" }
         } catch (e: Exception) {
             Logger.error("Error getting battery level", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -106,14 +105,14 @@ class BatteryModule {
      * 命令 222: 检查是否支持电池监控
      * 响应: 支持(int 1=支持, 0=不支持)
      */
-    fun isBatteryMonitoringSupported(output: BufferedOutputStream) {
+    fun isBatteryMonitoringSupported(output: BinaryEncoder) {
         try {
             val supported = checkBatteryMonitoringSupport()
-            IOUtils.writeInt(output, if (supported) 1 else 0)
+            output.writeInt(if (supported) 1 else 0)
             Logger.log("Battery monitoring supported: $supported")
         } catch (e: Exception) {
             Logger.error("Error checking battery monitoring support", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
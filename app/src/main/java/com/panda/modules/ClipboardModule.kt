@@ -3,13 +3,12 @@ package com.panda.modules
 import android.content.ClipData
 import android.content.ClipboardManager
 import android.net.Uri
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.FakeContext
-import com.panda.utils.IOUtils
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
 import java.io.File
 import java.io.FileOutputStream
-import java.io.InputStream
 
 /**
  * 剪贴板管理模块
@@ -31,37 +30,37 @@ class ClipboardModule {
     /**
      * 命令 70: 读取剪贴板内容
      */
-    fun getClipboard(output: BufferedOutputStream) {
+    fun getClipboard(output: BinaryEncoder) {
         try {
             val clipboard = getCurrentClipboard()
             
             if (clipboard == null) {
-                IOUtils.writeInt(output, -1)
+                output.writeInt(-1)
                 return
             }
             
             // 状态码 0 表示成功
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
             // 写入 MIME 类型
-            IOUtils.writeString(output, clipboard.mimeType)
+            output.writeString(clipboard.mimeType)
             // 写入数据
-            IOUtils.writeBytes(output, clipboard.data)
+            output.writeBytes(clipboard.data)
             
             Logger.log("Clipboard read: ${clipboard.mimeType}, ${clipboard.data.size} bytes")
         } catch (e: Exception) {
             Logger.error("Error reading clipboard", e)
-            IOUtils.writeInt(output, -2)
-            IOUtils.writeString(output, e.message ?: "Unknown error")
+            output.writeInt(-2)
+            output.writeString(e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 71: 设置剪贴板内容
      */
-    fun setClipboard(input: InputStream, output: BufferedOutputStream) {
+    fun setClipboard(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val mimeType = IOUtils.readString(input)
-            val data = IOUtils.readBytes(input)
+            val mimeType = input.readString()
+            val data = input.readBytes()
             
             Logger.log("Setting clipboard: $mimeType, ${data.size} bytes")
             
@@ -95,18 +94,18 @@ class ClipboardModule {
             }
             
             lastClipboard = ClipboardData(mimeType, data)
-            IOUtils.writeSuccess(output)
+            output.writeSuccess()
             
         } catch (e: Exception) {
             Logger.error("Error setting clipboard", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 72: 监听剪贴板变化
      */
-    fun watchClipboard(output: BufferedOutputStream) {
+    fun watchClipboard(output: BinaryEncoder) {
         try {
             val clipboardManager = getClipboardManager()
             
@@ -119,8 +118,8 @@ class ClipboardModule {
                         lastClipboard = clipboard
                         
                         // 发送变化通知
-                        IOUtils.writeString(output, clipboard.mimeType)
-                        IOUtils.writeBytes(output, clipboard.data)
+                        output.writeString(clipboard.mimeType)
+                        output.writeBytes(clipboard.data)
                         output.flush()
                     }
                 } catch (e: Exception) {
@@ -131,14 +130,14 @@ class ClipboardModule {
             Logger.log("Clipboard listener registered")
         } catch (e: Exception) {
             Logger.error("Error watching clipboard", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 73: 剪贴板扩展操作
      */
-    fun clipboardOperation(input: InputStream, output: BufferedOutputStream) {
+    fun clipboardOperation(input: BinaryDecoder, output: BinaryEncoder) {
         // 可以扩展其他剪贴板操作
         Logger.log("Clipboard operation called")
     }
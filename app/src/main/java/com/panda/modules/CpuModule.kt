@@ -1,13 +1,13 @@
 package com.panda.modules
 
 import android.annotation.SuppressLint
-import com.panda.utils.IOUtils
+import android.system.Os
+import android.system.OsConstants
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.Logger
-import java.io.BufferedReader
-import java.io.BufferedOutputStream
+import com.panda.utils.ProcReader
 import java.io.File
-import java.io.FileReader
-import java.io.InputStream
 import java.util.concurrent.atomic.AtomicLong
 
 /**
@@ -20,22 +20,123 @@ class CpuModule {
     // CPU 数据缓存
     private var lastCpuTime: Long = 0
     private var lastCpuIdle: Long = 0
-    private val cpuUsageCache = mutableMapOf<Int, Float>()
+    private var lastCpuUsage = 0f
     private val lastUpdateTime = AtomicLong(0)
     
+    // 各核心增量状态（按核心编号）：上一次的总 jiffies / 空闲 jiffies，valid 为 false 表示没有基准
+    private var lastCoreTotal = LongArray(0)
+    private var lastCoreIdle = LongArray(0)
+    private var lastCoreValid = BooleanArray(0)
+    private var lastCoreSnapshot: ProcStat? = null
+    private var lastCoreTick = CoreTick(0)
+    @Volatile
+    private var topology: CpuTopology? = null
+    
+    // /proc 与 sysfs 读取共用一个读取器，使用时对其加锁
+    private val reader = ProcReader(8192)
+    // 解析 /proc/stat 时的临时数组（按核心编号），核心数增加时扩容
+    private var scratchTotal = LongArray(16)
+    private var scratchIdle = LongArray(16)
+    private var scratchOnline = BooleanArray(16)
+    // CPU 温度所在的 thermal_zone temp 路径，首次读取时查找
+    @Volatile
+    private var thermalPath: String? = null
+    
+    // 线程 stat 读取（207/214），线程数量多，单独的读取器缓存更多文件
+    private val threadReader = ProcReader(1024, 512)
+    // 207: (PID << 32 | TID) -> 上一次的 CPU 时间
+    private val threadCpuTimes = HashMap<Long, ThreadCpuTime>()
+    // 214: PID -> 上一次扫描结果
+    private val threadScans = HashMap<Int, ThreadScan>()
+    
+    private class ThreadCpuTime(var cpuTime: Long, var sampledAt: Long) {
+        var usage = 0f
+    }
+    
+    /**
+     * 线程 CPU 表中的一行
+     * cpuTime 为 utime + stime（jiffies），state 为状态字符的 ASCII 码
+     */
+    private class ThreadCpu(val tid: Int, val name: String, val state: Int, val cpuTime: Long, val lastCpu: Int) {
+        var usage = 0f
+    }
+    
+    /**
+     * 一次 /proc/[pid]/task 扫描：线程按使用率降序排列，interval 为与上一次扫描的间隔（ms）
+     */
+    private class ThreadScan(val scannedAt: Long, val interval: Long, val threads: List<ThreadCpu>) {
+        val cpuTimes = HashMap<Int, Long>(threads.size * 2).also { map ->
+            threads.forEach { map[it.tid] = it.cpuTime }
+        }
+    }
+    
+    /**
+     * 一次 /proc/stat 读取结果：总体与各核心（按核心编号）的总 jiffies 和空闲 jiffies
+     * 离线核心不出现在 /proc/stat 中，online 为 false
+     * 总时间为 user/nice/system/idle/iowait/irq/softirq/steal 之和，空闲时间为 idle + iowait
+     */
+    class ProcStat(
+        val total: Long,
+        val idle: Long,
+        val coreTotal: LongArray,
+        val coreIdle: LongArray,
+        val coreOnline: BooleanArray
+    ) {
+        val coreCount: Int get() = coreTotal.size
+        
+        companion object {
+            val EMPTY = ProcStat(0L, 0L, LongArray(0), LongArray(0), BooleanArray(0))
+        }
+    }
+    
+    /**
+     * 一次快照相对上一次快照的各核心 jiffies 增量（按核心编号，包含离线核心）
+     */
+    private class CoreTick(val coreCount: Int) {
+        val online = BooleanArray(coreCount)
+        val busy = LongArray(coreCount)
+        val total = LongArray(coreCount)
+        // 各核心使用率（0-100），增量计算完成后填充
+        val usage = FloatArray(coreCount)
+    }
+    
+    /**
+     * CPU 簇：共用一个 cpufreq 策略的核心
+     */
+    private class CpuCluster(val policy: Int, val cores: IntArray, val curFreqPath: String?, val maxFreq: Int)
+    
+    private class CpuTopology(val coreCount: Int, val clusters: List<CpuCluster>) {
+        // 预先拼好各核心的频率路径，采样时不再构造字符串
+        val scalingFreqPaths = Array(coreCount) { "$CPU_DIR/cpu$it/cpufreq/scaling_cur_freq" }
+        val cpuinfoFreqPaths = Array(coreCount) { "$CPU_DIR/cpu$it/cpufreq/cpuinfo_cur_freq" }
+        
+        private val clusterIndex = IntArray(coreCount) { -1 }.also { index ->
+            clusters.forEachIndexed { i, cluster -> cluster.cores.forEach { index[it] = i } }
+        }
+        
+        fun clusterOf(core: Int): Int = if (core < coreCount) clusterIndex[core] else -1
+    }
+    
     /**
      * 命令 200: 获取整体 CPU 使用率
      * 响应: CPU 使用率(float, 0-100)
      */
-    fun getCpuUsage(output: BufferedOutputStream) {
+    fun getCpuUsage(output: BinaryEncoder) {
+        writeCpuUsage(readProcStat(), output)
+    }
+    
+    /**
+     * 用已读取的 /proc/stat 写入整体 CPU 使用率（命令 200 的响应格式）
+     */
+    fun writeCpuUsage(procStat: ProcStat, output: BinaryEncoder) {
         try {
-            val usage = calculateCpuUsage()
-            IOUtils.writeFloat(output, usage)
+            val usage = calculateCpuUsage(procStat)
+            output.writeFloat(usage)
             output.flush()  // 确保数据发送
-            Logger.log("CPU usage: ${usage}%")
+            Logger.debug { "CPU usage: ${usage}%" }
         } catch (e: Exception) {
             Logger.error("Error getting CPU usage", e)
-            IOUtils.writeFloat(output, 0f)
+            output.writeFloat(0f)
             output.flush()
         }
     }
@@ -44,17 +145,22 @@ class CpuModule {
      * 命令 201: 获取 CPU 核心使用率
      * 响应: 核心数量(int), 每个核心的使用率(float[])
      */
-    fun getCpuCoreUsage(output: BufferedOutputStream) {
+    fun getCpuCoreUsage(output: BinaryEncoder) {
+        writeCpuCoreUsage(readProcStat(), output)
+    }
+    
+    /**
+     * 用已读取的 /proc/stat 写入各核心使用率（命令 201 的响应格式）
+     */
+    fun writeCpuCoreUsage(procStat: ProcStat, output: BinaryEncoder) {
         try {
-            val coreUsages = getCpuCoreUsages()
-            IOUtils.writeInt(output, coreUsages.size)
-            coreUsages.forEach { usage ->
-                IOUtils.writeFloat(output, usage)
-            }
-            Logger.log("CPU core usage: ${coreUsages.size} cores")
+            val tick = coreTick(procStat)
+            output.writeInt(tick.coreCount)
+            output.writeFloatArray(tick.usage)
+            Logger.debug { "CPU core usage: ${tick.coreCount} cores" }
         } catch (e: Exception) {
             Logger.error("Error getting CPU core usage", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -62,17 +168,15 @@ class CpuModule {
      * 命令 202: 获取 CPU 频率
      * 响应: 核心数量(int), 每个核心的频率(int[] kHz)
      */
-    fun getCpuFreq(output: BufferedOutputStream) {
+    fun getCpuFreq(output: BinaryEncoder) {
         try {
             val frequencies = getCpuFrequencies()
-            IOUtils.writeInt(output, frequencies.size)
-            frequencies.forEach { freq ->
-                IOUtils.writeInt(output, freq)
-            }
-            Logger.log("CPU frequencies: ${frequencies.size} cores")
+            output.writeInt(frequencies.size)
+            output.writeIntArray(frequencies)
+            Logger.debug { "CPU frequencies: ${frequencies.size} cores" }
         } catch (e: Exception) {
             Logger.error("Error getting CPU frequencies", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
@@ -80,14 +184,14 @@ class CpuModule {
      * 命令 206: 获取 CPU 温度
      * 响应: 温度(float 摄氏度)
      */
-    fun getCpuTemperature(output: BufferedOutputStream) {
+    fun getCpuTemperature(output: BinaryEncoder) {
         try {
             val temp = getCpuTemperatureValue()
-            IOUtils.writeFloat(output, temp)
-            Logger.log("CPU temperature: ${temp}°C")
+            output.writeFloat(temp)
+            Logger.debug { "CPU temperature: ${temp}°C" }
         } catch (e: Exception) {
             Logger.error("Error getting CPU temperature", e)
-            IOUtils.writeFloat(output, 0f)
+            output.writeFloat(0f)
         }
     }
     
@@ -96,16 +200,60 @@ class CpuModule {
      * 请求: PID(int), TID(int)
      * 响应: CPU 使用率(float 0-100)
      */
-    fun getThreadCpuUsage(input: InputStream, output: BufferedOutputStream) {
+    fun getThreadCpuUsage(input: BinaryDecoder, output: BinaryEncoder) {
+        val pid = input.readInt()
+        val tid = input.readInt()
+        writeThreadCpuUsage(pid, tid, output)
+    }
+    
+    /**
+     * 写入线程 CPU 使用率（命令 207 的响应格式）
+     * 使用率为与上一次查询之间的 CPU 时间占 (间隔 × 在线核心数) 的百分比，首次查询返回 0
+     */
+    fun writeThreadCpuUsage(pid: Int, tid: Int, output: BinaryEncoder) {
         try {
-            val pid = IOUtils.readInt(input)
-            val tid = IOUtils.readInt(input)
             val usage = getThreadCpuUsageValue(pid, tid)
-            IOUtils.writeFloat(output, usage)
-            Logger.log("Thread $tid CPU usage: ${usage}%")
+            output.writeFloat(usage)
+            Logger.debug { "Thread $tid CPU usage: ${usage}%" }
         } catch (e: Exception) {
             Logger.error("Error getting thread CPU usage", e)
-            IOUtils.writeFloat(output, 0f)
+            output.writeFloat(0f)
+        }
+    }
+    
+    /**
+     * 命令 214: 获取进程的线程 CPU 表（类似 top -H）
+     * 请求: PID(int, <=0 表示 Panda 服务自身), 返回行数上限(int, <=0 表示全部)
+     * 响应: 线程总数(int), 采样间隔(int ms, 0 表示首次扫描、使用率均为 0), 行数(int),
+     *   每行: TID(int), 线程名(string), 状态(int, ASCII 字符如 'R' 'S' 'D'), CPU 使用率(float 0-100), 最近运行的 CPU(int)
+     * 每次请求扫描一遍 /proc/[pid]/task，使用率为两次扫描之间的 CPU 时间占 (间隔 × 在线核心数) 的百分比，
+     * 按使用率降序排列；同一进程 200ms 内的重复请求复用上一次扫描；进程不存在时为 writeError
+     */
+    fun getThreadCpuTable(input: BinaryDecoder, output: BinaryEncoder) {
+        val pid = input.readInt().let { if (it <= 0) Os.getpid() else it }
+        val limit = input.readInt()
+        try {
+            val scan = scanThreads(pid)
+            if (scan == null) {
+                output.writeError(-1, "Process not found: $pid")
+                return
+            }
+            val rows = if (limit > 0) minOf(limit, scan.threads.size) else scan.threads.size
+            output.writeInt(scan.threads.size)
+            output.writeInt(scan.interval.toInt())
+            output.writeInt(rows)
+            for (i in 0 until rows) {
+                val thread = scan.threads[i]
+                output.writeInt(thread.tid)
+                output.writeString(thread.name)
+                output.writeInt(thread.state)
+                output.writeFloat(thread.usage)
+                output.writeInt(thread.lastCpu)
+            }
+            Logger.debug { "Thread CPU table: pid $pid, ${scan.threads.size} threads, ${scan.interval}ms" }
+        } catch (e: Exception) {
+            Logger.error("Error getting thread CPU table", e)
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
@@ -122,37 +270,21 @@ class CpuModule {
      * - 需要计算增量（两次读取的差值）才能得到准确的使用率
      * - 第一次调用会返回 0%，需要第二次调用才能得到准确值
      */
-    private fun calculateCpuUsage(): Float {
+    private fun calculateCpuUsage(procStat: ProcStat): Float {
         try {
-            val statFile = File("/proc/stat")
-            if (!statFile.exists()) {
+            if (procStat.total == 0L) {
                 Logger.log("Warning: /proc/stat not found, CPU usage unavailable")
                 return 0f
             }
             
-            val reader = BufferedReader(FileReader(statFile))
-            val line = reader.readLine() ?: run {
-                reader.close()
-                return 0f
-            }
-            reader.close()
-            
-            // 格式: cpu user nice system idle iowait irq softirq
-            val parts = line.trim().split(Regex("\\s+"))
-            if (parts.size < 5) return 0f
-            
-            val user = parts[1].toLongOrNull() ?: 0L
-            val nice = parts[2].toLongOrNull() ?: 0L
-            val system = parts[3].toLongOrNull() ?: 0L
-            val idle = parts[4].toLongOrNull() ?: 0L
-            
-            val total = user + nice + system + idle
+            val total = procStat.total
+            val idle = procStat.idle
             
             // 计算增量
             val currentTime = System.currentTimeMillis()
             if (lastCpuTime > 0 && currentTime - lastUpdateTime.get() < 1000) {
                 // 使用缓存（1秒内）
-                return cpuUsageCache.getOrDefault(-1, 0f)
+                return lastCpuUsage
             }
             
             // 如果是第一次调用，只记录当前值，返回 0
@@ -169,17 +301,17 @@ class CpuModule {
             
             if (totalDiff <= 0) {
                 // 没有变化，返回缓存值或 0
-                return cpuUsageCache.getOrDefault(-1, 0f)
+                return lastCpuUsage
             }
             
-            val usage = ((totalDiff - idleDiff).toFloat() / totalDiff) * 100f
+            val usage = (((totalDiff - idleDiff).toFloat() / totalDiff) * 100f).coerceIn(0f, 100f)
             
             lastCpuTime = total
             lastCpuIdle = idle
             lastUpdateTime.set(currentTime)
-            cpuUsageCache[-1] = usage
+            lastCpuUsage = usage
             
-            return usage.coerceIn(0f, 100f)
+            return usage
         } catch (e: Exception) {
             Logger.error("Error calculating CPU usage", e)
             return 0f
@@ -187,166 +319,474 @@ class CpuModule {
     }
     
     /**
-     * 获取各核心 CPU 使用率
+     * 计算本次 /proc/stat 快照相对上一次快照的各核心增量
+     * 
+     * 注意：
+     * - 核心编号按完整数字解析（cpu10 及以上），不限制核心数
+     * - 忙碌时间包含 user/nice/system/irq/softirq/steal，空闲时间包含 idle/iowait
+     * - 离线核心不出现在 /proc/stat 中：标记为离线，丢弃其旧值，重新上线后从新基准开始
+     * - 同一份快照（采样器缓存）只计算一次，201/213 共用
+     * - 两次快照之间某核心没有走过任何 jiffies 时沿用上一次的增量
      */
-    private fun getCpuCoreUsages(): List<Float> {
-        val usages = mutableListOf<Float>()
-        val statFile = File("/proc/stat")
-        if (!statFile.exists()) return usages
+    @Synchronized
+    private fun coreTick(procStat: ProcStat): CoreTick {
+        if (procStat === lastCoreSnapshot) return lastCoreTick
         
+        var topology = getTopology()
+        if (procStat.coreCount > topology.coreCount) {
+            // 出现了拓扑中没有的核心（热插拔），重新读取拓扑
+            topology = loadTopology(procStat.coreCount).also { this.topology = it }
+        }
+        if (lastCoreTotal.size < topology.coreCount) {
+            lastCoreTotal = lastCoreTotal.copyOf(topology.coreCount)
+            lastCoreIdle = lastCoreIdle.copyOf(topology.coreCount)
+            lastCoreValid = lastCoreValid.copyOf(topology.coreCount)
+        }
+        
+        val previousTick = lastCoreTick
+        val tick = CoreTick(topology.coreCount)
+        for (core in 0 until topology.coreCount) {
+            if (core >= procStat.coreCount || !procStat.coreOnline[core]) {
+                // 离线：丢弃旧基准，重新上线后从新基准开始
+                lastCoreValid[core] = false
+                continue
+            }
+            tick.online[core] = true
+            val total = procStat.coreTotal[core]
+            val idle = procStat.coreIdle[core]
+            if (!lastCoreValid[core] || total < lastCoreTotal[core] || idle < lastCoreIdle[core]) {
+                // 新上线的核心或计数器回绕：只记录基准
+                lastCoreTotal[core] = total
+                lastCoreIdle[core] = idle
+                lastCoreValid[core] = true
+            } else if (total == lastCoreTotal[core]) {
+                if (core < previousTick.coreCount) {
+                    tick.busy[core] = previousTick.busy[core]
+                    tick.total[core] = previousTick.total[core]
+                }
+            } else {
+                val totalDiff = total - lastCoreTotal[core]
+                tick.total[core] = totalDiff
+                tick.busy[core] = (totalDiff - (idle - lastCoreIdle[core])).coerceAtLeast(0L)
+                lastCoreTotal[core] = total
+                lastCoreIdle[core] = idle
+            }
+        }
+        
+        for (core in 0 until tick.coreCount) {
+            if (tick.total[core] > 0) {
+                tick.usage[core] = (tick.busy[core].toFloat() / tick.total[core] * 100f).coerceIn(0f, 100f)
+            }
+        }
+        
+        lastCoreSnapshot = procStat
+        lastCoreTick = tick
+        return tick
+    }
+    
+    /**
+     * 命令 213: 获取按核心与按簇的 CPU 使用率
+     * 响应:
+     *   核心数量(int), 每个核心: 使用率(float 0-100), 在线(int 0/1), 所属簇序号(int, -1 表示未知), 当前频率(int kHz)
+     *   簇数量(int), 每个簇: cpufreq 策略编号(int, -1 表示未知), 使用率(float 0-100),
+     *     在线核心数(int), 核心数(int), 当前频率(int kHz), 最高频率(int kHz)
+     * 核心按编号排列（包含离线核心），簇使用率为簇内在线核心的 jiffies 加权平均
+     */
+    fun getCpuTopologyUsage(output: BinaryEncoder) {
+        writeCpuTopologyUsage(readProcStat(), output)
+    }
+    
+    /**
+     * 用已读取的 /proc/stat 写入按核心与按簇的使用率（命令 213 的响应格式）
+     */
+    fun writeCpuTopologyUsage(procStat: ProcStat, output: BinaryEncoder) {
         try {
-            val reader = BufferedReader(FileReader(statFile))
-            var line: String?
-            val maxCores = 16  // 限制最大核心数
+            val tick = coreTick(procStat)
+            val topology = getTopology()
+            output.writeInt(tick.coreCount)
+            for (core in 0 until tick.coreCount) {
+                output.writeFloat(tick.usage[core])
+                output.writeInt(if (tick.online[core]) 1 else 0)
+                output.writeInt(topology.clusterOf(core))
+                output.writeInt(if (tick.online[core]) readCoreFrequency(topology, core) else 0)
+            }
             
-            while (reader.readLine().also { line = it } != null && usages.size < maxCores) {
-                val trimmed = line!!.trim()
-                // 匹配 cpu0, cpu1, cpu2 等格式（必须是 "cpu" + 单个数字 + 空格）
-                if (trimmed.startsWith("cpu") && trimmed.length > 4) {
-                    // 检查是否是 cpu0, cpu1 格式（不是 cpu 总体）
-                    if (trimmed[3].isDigit() && trimmed[4] == ' ') {
-                        val coreIndex = trimmed[3].toString().toIntOrNull()
-                        if (coreIndex != null && coreIndex < maxCores) {
-                            val parts = trimmed.split(Regex("\\s+"))
-                            if (parts.size >= 5) {
-                                val user = parts[1].toLongOrNull() ?: 0L
-                                val nice = parts[2].toLongOrNull() ?: 0L
-                                val system = parts[3].toLongOrNull() ?: 0L
-                                val idle = parts[4].toLongOrNull() ?: 0L
-                                
-                                val total = user + nice + system + idle
-                                
-                                // 简化计算（实际应该计算增量）
-                                val usage = if (total > 0) {
-                                    ((user + nice + system).toFloat() / total) * 100f
-                                } else {
-                                    0f
-                                }
-                                usages.add(usage.coerceIn(0f, 100f))
-                            }
-                        }
-                    } else if (trimmed == "cpu" || trimmed.startsWith("cpu ")) {
-                        // 这是总体 CPU 行，跳过
-                        continue
-                    } else {
-                        // 其他格式，停止
-                        break
-                    }
-                } else {
-                    // 不是 cpu 相关的行，停止
-                    break
+            output.writeInt(topology.clusters.size)
+            for (cluster in topology.clusters) {
+                var busy = 0L
+                var total = 0L
+                var online = 0
+                for (core in cluster.cores) {
+                    if (core >= tick.coreCount || !tick.online[core]) continue
+                    busy += tick.busy[core]
+                    total += tick.total[core]
+                    online++
                 }
+                output.writeInt(cluster.policy)
+                output.writeFloat(if (total > 0) (busy.toFloat() / total * 100f).coerceIn(0f, 100f) else 0f)
+                output.writeInt(online)
+                output.writeInt(cluster.cores.size)
+                output.writeInt(if (online > 0) readSysfsInt(cluster.curFreqPath) else 0)
+                output.writeInt(cluster.maxFreq)
             }
-            reader.close()
+            Logger.debug { "CPU topology usage: ${tick.coreCount} cores, ${topology.clusters.size} clusters" }
         } catch (e: Exception) {
-            Logger.error("Error reading CPU core usage", e)
+            Logger.error("Error getting CPU topology usage", e)
+            output.writeInt(0)
+            output.writeInt(0)
         }
-        
-        return usages
     }
     
     /**
-     * 获取 CPU 频率
+     * 读取 /proc/stat 开头的 cpu 行（总体行 + 各核心行）
+     * 批量查询和订阅推送中 200/201/213 共用同一次读取
+     * 直接从字节解析，核心编号按完整数字解析（cpu10 及以上），旧内核缺少的字段按 0 处理；
+     * guest/guest_nice 已计入 user/nice，不重复累加
+     */
+    fun readProcStat(): ProcStat {
+        synchronized(reader) {
+            if (!reader.read(PROC_STAT)) {
+                Logger.error("Error reading /proc/stat")
+                return ProcStat.EMPTY
+            }
+            
+            var total = 0L
+            var idle = 0L
+            var coreCount = 0
+            scratchOnline.fill(false)
+            // 格式: cpuN user nice system idle iowait irq softirq steal guest guest_nice
+            while (reader.startsWith(CPU_PREFIX)) {
+                reader.position += CPU_PREFIX.size
+                val core = if (reader.peekDigit()) reader.nextInt() else -1
+                var lineTotal = 0L
+                var lineIdle = 0L
+                for (field in 1..8) {
+                    if (reader.atLineEnd()) break
+                    val value = reader.nextLong()
+                    lineTotal += value
+                    if (field == 4 || field == 5) lineIdle += value
+                }
+                reader.nextLine()
+                
+                if (core < 0) {
+                    total = lineTotal
+                    idle = lineIdle
+                    continue
+                }
+                if (core >= scratchTotal.size) {
+                    val size = maxOf(core + 1, scratchTotal.size * 2)
+                    scratchTotal = scratchTotal.copyOf(size)
+                    scratchIdle = scratchIdle.copyOf(size)
+                    scratchOnline = scratchOnline.copyOf(size)
+                }
+                scratchTotal[core] = lineTotal
+                scratchIdle[core] = lineIdle
+                scratchOnline[core] = true
+                if (core >= coreCount) coreCount = core + 1
+            }
+            
+            return ProcStat(
+                total,
+                idle,
+                scratchTotal.copyOf(coreCount),
+                scratchIdle.copyOf(coreCount),
+                scratchOnline.copyOf(coreCount)
+            )
+        }
+    }
+    
+    /**
+     * 获取 CPU 频率（按核心编号，离线核心为 0）
      * 读取 /sys/devices/system/cpu/cpu[core]/cpufreq/scaling_cur_freq
      * 
      * 注意：
      * - 这是 Linux 系统获取 CPU 频率的标准方法
      * - 与 FPS 不同，CPU 频率没有对应的系统服务
      * - /sys/devices/system/cpu/ 是内核提供的标准接口，性能很好
-     * - 某些设备可能使用不同的路径（如 time_in_state）
+     * - 核心范围来自拓扑（present/possible），中间的离线核心不会截断后续核心
+     */
+    private fun getCpuFrequencies(): IntArray {
+        val topology = getTopology()
+        return IntArray(topology.coreCount) { core -> readCoreFrequency(topology, core) }
+    }
+    
+    /**
+     * 读取单个核心的当前频率（kHz），离线或无频率信息时返回 0
      */
-    private fun getCpuFrequencies(): List<Int> {
-        val frequencies = mutableListOf<Int>()
-        var coreIndex = 0
-        val maxCores = 16  // 限制最大核心数
+    private fun readCoreFrequency(topology: CpuTopology, core: Int): Int {
+        // 优先使用 scaling_cur_freq（当前频率），不存在时尝试 cpuinfo_cur_freq
+        val freq = readSysfsInt(topology.scalingFreqPaths[core])
+        return if (freq > 0) freq else readSysfsInt(topology.cpuinfoFreqPaths[core])
+    }
+    
+    // ========== CPU 拓扑 ==========
+    
+    private fun getTopology(): CpuTopology {
+        return topology ?: loadTopology(0).also { topology = it }
+    }
+    
+    /**
+     * 读取 CPU 拓扑
+     * - 核心数取 present（回退 possible）的最大编号 + 1，包含当前离线的核心
+     * - 按 cpufreq/policyN/related_cpus 分簇（related_cpus 包含离线核心）；
+     *   没有 policy 目录的旧内核按各核心的 cpufreq/related_cpus 分簇；
+     *   仍无法归属的核心归入策略编号为 -1 的簇
+     */
+    private fun loadTopology(minCores: Int): CpuTopology {
+        val present = parseCpuList(readSysfsText("$CPU_DIR/present"))
+            .ifEmpty { parseCpuList(readSysfsText("$CPU_DIR/possible")) }
+        val coreCount = maxOf((present.maxOrNull() ?: -1) + 1, minCores, Runtime.getRuntime().availableProcessors())
         
-        while (coreIndex < maxCores) {
-            // 优先使用 scaling_cur_freq（当前频率）
-            var freqFile = File("/sys/devices/system/cpu/cpu$coreIndex/cpufreq/scaling_cur_freq")
-            
-            // 如果不存在，尝试 cpuinfo_cur_freq
-            if (!freqFile.exists()) {
-                freqFile = File("/sys/devices/system/cpu/cpu$coreIndex/cpufreq/cpuinfo_cur_freq")
-            }
-            
-            // 如果还是不存在，说明这个核心不存在或没有频率信息
-            if (!freqFile.exists()) {
-                break
-            }
-            
-            try {
-                val freq = freqFile.readText().trim().toIntOrNull() ?: 0
-                if (freq > 0) {
-                    frequencies.add(freq / 1000) // 转换为 kHz（文件中的单位是 Hz）
-                } else {
-                    frequencies.add(0)
-                }
-            } catch (e: Exception) {
-                Logger.error("Error reading CPU frequency for core $coreIndex", e)
-                frequencies.add(0)
-            }
-            coreIndex++
+        val clusters = mutableListOf<CpuCluster>()
+        val assigned = BooleanArray(coreCount)
+        fun addCluster(policy: Int, related: List<Int>, dir: String) {
+            val cores = related.filter { it in 0 until coreCount && !assigned[it] }
+            if (cores.isEmpty()) return
+            cores.forEach { assigned[it] = true }
+            val maxFreq = readSysfsInt("$dir/cpuinfo_max_freq")
+            clusters.add(CpuCluster(policy, cores.toIntArray(), "$dir/scaling_cur_freq", maxFreq))
+        }
+        
+        val policies = File("$CPU_DIR/cpufreq").listFiles()
+            ?.mapNotNull { dir -> dir.name.removePrefix("policy").takeIf { dir.name.startsWith("policy") }?.toIntOrNull()?.let { it to dir.path } }
+            ?.sortedBy { it.first }
+            ?: emptyList()
+        for ((policy, dir) in policies) {
+            addCluster(policy, parseCpuList(readSysfsText("$dir/related_cpus")), dir)
+        }
+        for (core in 0 until coreCount) {
+            if (assigned[core]) continue
+            val dir = "$CPU_DIR/cpu$core/cpufreq"
+            val related = parseCpuList(readSysfsText("$dir/related_cpus"))
+            if (core in related) addCluster(core, related, dir)
+        }
+        val unknown = (0 until coreCount).filter { !assigned[it] }
+        if (unknown.isNotEmpty()) {
+            clusters.add(CpuCluster(-1, unknown.toIntArray(), null, 0))
         }
         
-        return frequencies
+        Logger.log("CPU topology: $coreCount cores, clusters ${clusters.joinToString { "${it.policy}:${it.cores.joinToString(",")}" }}")
+        return CpuTopology(coreCount, clusters)
+    }
+    
+    /**
+     * 解析内核的 CPU 列表格式，如 "0-3,6"（present/possible）或 "0 1 2 3"（related_cpus）
+     */
+    private fun parseCpuList(text: String?): List<Int> {
+        if (text.isNullOrEmpty()) return emptyList()
+        val cpus = mutableListOf<Int>()
+        for (token in text.split(',', ' ', '\t', '\n')) {
+            if (token.isEmpty()) continue
+            val dash = token.indexOf('-')
+            if (dash < 0) {
+                token.toIntOrNull()?.let { cpus.add(it) }
+            } else {
+                val from = token.substring(0, dash).toIntOrNull() ?: continue
+                val to = token.substring(dash + 1).toIntOrNull() ?: continue
+                for (cpu in from..to) cpus.add(cpu)
+            }
+        }
+        return cpus
+    }
+    
+    private fun readSysfsText(path: String?): String? {
+        if (path == null) return null
+        return try {
+            File(path).readText().trim()
+        } catch (e: Exception) {
+            null
+        }
+    }
+    
+    private fun readSysfsInt(path: String?): Int {
+        if (path == null) return 0
+        synchronized(reader) {
+            return reader.readLong(path, 0L).toInt()
+        }
     }
     
     /**
      * 获取 CPU 温度
      * 读取 /sys/class/thermal/thermal_zone[zone]/temp
+     * 首次调用时查找类型含 cpu/tsens 的 thermal_zone 并缓存其路径，之后每次只读取该文件
      */
     private fun getCpuTemperatureValue(): Float {
         try {
-            val thermalDir = File("/sys/class/thermal")
-            if (thermalDir.exists()) {
-                thermalDir.listFiles()?.forEach { zone ->
-                    if (zone.name.startsWith("thermal_zone")) {
-                        val typeFile = File(zone, "type")
-                        val tempFile = File(zone, "temp")
-                        
-                        if (typeFile.exists() && tempFile.exists()) {
-                            val type = typeFile.readText().trim()
-                            if (type.contains("cpu", ignoreCase = true) || 
-                                type.contains("tsens", ignoreCase = true)) {
-                                val temp = tempFile.readText().trim().toIntOrNull() ?: 0
-                                return temp / 1000f // 转换为摄氏度
-                            }
-                        }
-                    }
+            val path = thermalPath ?: findThermalPath() ?: return 0f
+            synchronized(reader) {
+                if (reader.read(path)) {
+                    return reader.nextLong(0L) / 1000f // 转换为摄氏度
                 }
             }
+            // thermal_zone 消失（驱动重新加载等），下次重新查找
+            thermalPath = null
         } catch (e: Exception) {
             Logger.error("Error reading CPU temperature", e)
         }
         return 0f
     }
     
+    private fun findThermalPath(): String? {
+        val zones = File("/sys/class/thermal").listFiles { file -> file.name.startsWith("thermal_zone") }
+            ?.sortedBy { it.name.removePrefix("thermal_zone").toIntOrNull() ?: Int.MAX_VALUE }
+            ?: return null
+        synchronized(reader) {
+            for (zone in zones) {
+                if (!reader.read(File(zone, "type").path)) continue
+                if (reader.containsIgnoreCase(THERMAL_CPU) || reader.containsIgnoreCase(THERMAL_TSENS)) {
+                    val path = File(zone, "temp").path
+                    Logger.log("CPU temperature source: $path")
+                    thermalPath = path
+                    return path
+                }
+            }
+        }
+        return null
+    }
+    
     /**
      * 获取线程 CPU 使用率
-     * 读取 /proc/[pid]/task/[tid]/stat
+     * 读取 /proc/[pid]/task/[tid]/stat，与上一次查询的 CPU 时间做差
+     * 两次查询间隔不足 200ms 时返回上一次的结果，避免窗口过短导致 jiffies 量化误差
      */
     private fun getThreadCpuUsageValue(pid: Int, tid: Int): Float {
-        try {
-            val statFile = File("/proc/$pid/task/$tid/stat")
-            if (!statFile.exists()) return 0f
+        val key = (pid.toLong() shl 32) or (tid.toLong() and 0xFFFFFFFFL)
+        synchronized(threadReader) {
+            val cpuTime = readThreadCpuTime(pid, tid)
+            if (cpuTime < 0) {
+                threadCpuTimes.remove(key)
+                return 0f
+            }
+            val now = System.nanoTime()
+            val previous = threadCpuTimes[key]
+            if (previous == null) {
+                if (threadCpuTimes.size >= MAX_THREAD_ENTRIES) {
+                    threadCpuTimes.values.removeAll { now - it.sampledAt > STALE_THREAD_NANOS }
+                }
+                threadCpuTimes[key] = ThreadCpuTime(cpuTime, now)
+                return 0f
+            }
+            val elapsed = now - previous.sampledAt
+            if (elapsed < MIN_THREAD_WINDOW_NANOS) return previous.usage
+            previous.usage = threadUsage(cpuTime - previous.cpuTime, elapsed)
+            previous.cpuTime = cpuTime
+            previous.sampledAt = now
+            return previous.usage
+        }
+    }
+    
+    /**
+     * 读取线程的 utime + stime（jiffies），线程不存在时返回 -1
+     */
+    private fun readThreadCpuTime(pid: Int, tid: Int): Long {
+        val reader = threadReader
+        if (!reader.read("/proc/$pid/task/$tid/stat")) return -1L
+        
+        // stat 格式: pid (comm) state ppid ... utime stime ...
+        // comm 可能包含空格和括号，从最后一个 ')' 之后开始数：state 为第 3 个字段，utime/stime 为第 14/15 个
+        val commEnd = reader.lastIndexOf(CLOSE_PAREN)
+        if (commEnd < 0) return -1L
+        reader.position = commEnd + 1
+        reader.skipTokens(11)
+        val utime = reader.nextLong()
+        val stime = reader.nextLong()
+        return utime + stime
+    }
+    
+    /**
+     * 读取线程的名称、状态、CPU 时间和最近运行的 CPU（第 39 个字段），线程已退出时返回 null
+     */
+    private fun readThreadStat(pid: Int, tid: Int): ThreadCpu? {
+        val reader = threadReader
+        if (!reader.read("/proc/$pid/task/$tid/stat")) return null
+        
+        val commStart = reader.indexOf(OPEN_PAREN)
+        val commEnd = reader.lastIndexOf(CLOSE_PAREN)
+        if (commStart < 0 || commEnd <= commStart) return null
+        val name = String(reader.buffer, commStart + 1, commEnd - commStart - 1, Charsets.UTF_8)
+        reader.position = commEnd + 1
+        reader.skipSpaces()
+        val state = if (reader.hasRemaining()) reader.buffer[reader.position].toInt() else UNKNOWN_STATE
+        reader.skipTokens(11)
+        val utime = reader.nextLong()
+        val stime = reader.nextLong()
+        reader.skipTokens(23)
+        val lastCpu = reader.nextInt(-1)
+        return ThreadCpu(tid, name, state, utime + stime, lastCpu)
+    }
+    
+    /**
+     * 扫描 /proc/[pid]/task 下所有线程并计算与上一次扫描之间的使用率，进程不存在时返回 null
+     * 上一次扫描中没有的线程（期间新建）其 CPU 时间全部计入本次间隔
+     */
+    private fun scanThreads(pid: Int): ThreadScan? {
+        synchronized(threadScans) {
+            val now = System.nanoTime()
+            val previous = threadScans[pid]
+            if (previous != null && now - previous.scannedAt < MIN_THREAD_WINDOW_NANOS) return previous
             
-            val stat = statFile.readText()
-            val parts = stat.split(Regex("\\s+"))
+            val tids = File("/proc/$pid/task").list()
+            if (tids == null) {
+                threadScans.remove(pid)
+                return null
+            }
+            val threads = ArrayList<ThreadCpu>(tids.size)
+            synchronized(threadReader) {
+                for (name in tids) {
+                    val tid = name.toIntOrNull() ?: continue
+                    readThreadStat(pid, tid)?.let { threads.add(it) }
+                }
+            }
             
-            // stat 格式: pid comm state ppid ... utime stime ...
-            // utime 在索引 13, stime 在索引 14 (从 0 开始)
-            if (parts.size >= 15) {
-                val utime = parts[13].toLongOrNull() ?: 0L
-                val stime = parts[14].toLongOrNull() ?: 0L
-                val totalTime = utime + stime
-                
-                // 需要计算增量，这里简化返回
-                return (totalTime / 100f).toFloat().coerceIn(0f, 100f)
+            val elapsed = if (previous != null) now - previous.scannedAt else 0L
+            if (previous != null) {
+                for (thread in threads) {
+                    val last = previous.cpuTimes[thread.tid] ?: 0L
+                    thread.usage = threadUsage(thread.cpuTime - last, elapsed)
+                }
+            }
+            threads.sortWith(compareByDescending<ThreadCpu> { it.usage }.thenBy { it.tid })
+            
+            val scan = ThreadScan(now, elapsed / 1_000_000L, threads)
+            if (previous == null && threadScans.size >= MAX_THREAD_SCANS) {
+                threadScans.values.removeAll { now - it.scannedAt > STALE_THREAD_NANOS }
+            }
+            threadScans[pid] = scan
+            return scan
+        }
+    }
+    
+    /**
+     * CPU 时间增量（jiffies）占 (间隔 × 在线核心数) 的百分比
+     */
+    private fun threadUsage(cpuTimeDelta: Long, elapsedNanos: Long): Float {
+        if (cpuTimeDelta <= 0 || elapsedNanos <= 0) return 0f
+        val capacity = elapsedNanos / 1e9 * CLOCK_TICKS * Runtime.getRuntime().availableProcessors()
+        return (cpuTimeDelta / capacity * 100).toFloat().coerceIn(0f, 100f)
+    }
+    
+    companion object {
+        private const val CPU_DIR = "/sys/devices/system/cpu"
+        private const val PROC_STAT = "/proc/stat"
+        private val CPU_PREFIX = ProcReader.ascii("cpu")
+        private val THERMAL_CPU = ProcReader.ascii("cpu")
+        private val THERMAL_TSENS = ProcReader.ascii("tsens")
+        private const val OPEN_PAREN: Byte = 0x28
+        private const val CLOSE_PAREN: Byte = 0x29
+        private const val UNKNOWN_STATE = 0x3F  // '?'
+        
+        private const val MIN_THREAD_WINDOW_NANOS = 200_000_000L
+        private const val STALE_THREAD_NANOS = 60_000_000_000L
+        private const val MAX_THREAD_ENTRIES = 256
+        private const val MAX_THREAD_SCANS = 16
+        
+        // 每秒 jiffies 数（USER_HZ），Android 上通常为 100
+        private val CLOCK_TICKS: Long by lazy {
+            try {
+                Os.sysconf(OsConstants._SC_CLK_TCK).takeIf { it > 0 } ?: 100L
+            } catch (e: Exception) {
+                100L
             }
-        } catch (e: Exception) {
-            Logger.error("Error reading thread CPU usage", e)
         }
-        return 0f
     }
 }
-
@@ -1,41 +1,68 @@
 package com.panda.modules
 
 import android.annotation.SuppressLint
-import com.panda.utils.IOUtils
+import android.os.IBinder
+import android.os.ParcelFileDescriptor
+import com.panda.mirror.ServiceManagerMirror
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.Logger
-import java.io.BufferedReader
-import java.io.BufferedOutputStream
-import java.io.InputStream
-import java.io.InputStreamReader
-import java.util.concurrent.FutureTask
+import java.util.concurrent.Callable
+import java.util.concurrent.Executors
+import java.util.concurrent.ScheduledExecutorService
 import java.util.concurrent.TimeUnit
-import java.util.concurrent.TimeoutException
 import java.util.concurrent.atomic.AtomicBoolean
 import java.util.concurrent.atomic.AtomicInteger
 import java.util.concurrent.atomic.AtomicLong
-import android.os.IBinder
-import com.panda.mirror.ServiceManagerMirror
 
 /**
  * FPS 数据采集模块
  * 提供帧率监控功能
  * 参考 PerfDog Console 实现
+ * 
+ * 帧率来自 SurfaceFlinger 的帧延迟数据（dumpsys SurfaceFlinger --latency <图层>）：
+ * - 跟踪目标图层（指定包名或自动选择最近提交帧最多的应用图层）每一帧的实际显示时间
+ * - 每次轮询只接收上一次之后的新帧；有请求期间后台每 400ms 轮询一次，避免 128 帧的环形缓冲区被覆盖
+ * - Binder dump 可能耗时较长，在锁外执行且同一时间只有一个线程在轮询；
+ *   其他请求不等待 dump，直接使用已跟踪的帧，latencyLock 只在合并结果和计算统计时持有
+ * - 按窗口计算 FPS、帧时间百分位和 Jank/BigJank（见 FrameStats.kt）
+ * - 通过 Binder dump 直接调用 SurfaceFlinger，不启动 dumpsys 进程
  */
 @SuppressLint("PrivateApi", "DiscouragedPrivateApi")
 class FpsModule {
     
     // FPS 监控
     private val isCollecting = AtomicBoolean(false)
+    private val profilingClients = AtomicInteger(0)
     
-    // FPS 缓存（用于 SurfaceFlinger 方法）
-    private var surfaceFlingerFps = AtomicLong(0)
-    private var lastSurfaceFlingerCheck = AtomicLong(0)
-    private val SURFACE_FLINGER_CACHE_DURATION = 2000L // 缓存 2 秒
-    private val REFRESH_RATE_REGEX = Regex("(?:refresh-rate|Refresh rate)[:\\s]+(\\d+(?:\\.\\d+)?)")
-    private val FPS_VALUE_REGEX = Regex("(\\d+(?:\\.\\d+)?)\\s*fps", RegexOption.IGNORE_CASE)
+    // 帧延迟跟踪（由 latencyLock 保护）
+    private val latencyLock = Any()
+    private val frameTracker = FrameTracker(FrameTracker.capacityFor(MAX_WINDOW_MS))
+    private var targetPackage = ""
+    private var layer: String? = null
+    // 目标或跟踪状态重置时递增，丢弃在此之前开始的 dump 结果
+    private var generation = 0
+    private var refreshPeriodNanos = 0L
+    private var lastNewFrameAt = 0L
+    // 同一时间只有一个线程执行 dump（请求线程或后台轮询线程）
+    private val polling = AtomicBoolean(false)
+    @Volatile
+    private var lastPollAt = 0L
+    @Volatile
+    private var lastSelectAt = 0L
+    @Volatile
+    private var lastDemandAt = 0L
+    @Volatile
+    private var poller: ScheduledExecutorService? = null
+    @Volatile
+    private var surfaceFlinger: IBinder? = null
+    // 读取 dump 管道的线程（常驻，避免每次 dump 新建线程）
+    private val dumpReader = Executors.newSingleThreadExecutor { runnable ->
+        Thread(runnable, "fps-sf-reader").apply { isDaemon = true }
+    }
     
     // FPS 获取方法标记
-    private var fpsMethod = "none"  // "choreographer", "reflection", "dumpsys"
+    private var fpsMethod = "none"  // "latency", "choreographer"
     
     private var fpsValue = 0
     private var frameCount = AtomicLong(0)
@@ -46,80 +73,143 @@ class FpsModule {
      * 命令 204: 获取 FPS（帧率）
      * 响应: FPS(int)
      */
-    fun getFps(output: BufferedOutputStream) {
+    fun getFps(output: BinaryEncoder) {
         try {
             val fps = getCurrentFps()
-            IOUtils.writeInt(output, fps)
+            output.writeInt(fps)
             output.flush()
             // 只在调试模式下输出详细日志，减少日志量
             // Logger.log("FPS: $fps")  // 已移除，避免日志过多
         } catch (e: Exception) {
             Logger.error("Error getting FPS", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
             output.flush()
         }
     }
     
+    /**
+     * 命令 215: 获取帧时间统计
+     * 请求: 窗口(int ms)
+     * 响应: FPS(float), 帧数(int), 帧时间 P50/P90/P95/P99/最大(float ms), Jank(int), BigJank(int),
+     *       刷新周期(float ms), 图层名(string, 未找到图层时为空)
+     * Jank/BigJank 按 PerfDog 定义：帧时间超过前 3 帧平均值的 2 倍，且超过 83.3ms / 125ms
+     * 由 MetricSampler 调用，窗口作为缓存键参数
+     */
+    fun writeFrameStats(windowMs: Int, output: BinaryEncoder) {
+        val window = windowMs.coerceIn(MIN_WINDOW_MS, MAX_WINDOW_MS) * 1_000_000L
+        var layerName = ""
+        var refreshPeriod = 0f
+        val stats = try {
+            pollLatency(force = false)
+            synchronized(latencyLock) {
+                layerName = layer ?: ""
+                refreshPeriod = refreshPeriodNanos / 1_000_000f
+                frameTracker.stats(System.nanoTime(), window)
+            }
+        } catch (e: Exception) {
+            Logger.error("Error getting frame stats", e)
+            FrameStats.EMPTY
+        }
+        output.writeFloat(stats.fps)
+        output.writeInt(stats.frames)
+        output.writeFloat(stats.p50)
+        output.writeFloat(stats.p90)
+        output.writeFloat(stats.p95)
+        output.writeFloat(stats.p99)
+        output.writeFloat(stats.max)
+        output.writeInt(stats.jank)
+        output.writeInt(stats.bigJank)
+        output.writeFloat(refreshPeriod)
+        output.writeString(layerName)
+    }
+    
+    /**
+     * 命令 216: 设置帧率跟踪的目标
+     * 请求: 包名或图层名(string, 空字符串表示自动选择最近提交帧最多的应用图层)
+     * 响应: 状态(int 0=成功)
+     */
+    fun setFpsTarget(input: BinaryDecoder, output: BinaryEncoder) {
+        val target = input.readString().trim()
+        synchronized(latencyLock) {
+            targetPackage = target
+            layer = null
+            generation++
+            lastSelectAt = 0L
+            frameTracker.reset()
+        }
+        output.writeSuccess()
+        Logger.log("FPS target: ${if (target.isEmpty()) "auto" else target}")
+    }
+    
     /**
      * 命令 208: 开始性能分析（启动 FPS 监控等）
      * 请求: 监控间隔(int ms)
      */
-    fun startProfiling(input: InputStream, output: BufferedOutputStream) {
+    fun startProfiling(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val interval = IOUtils.readInt(input)
-            isCollecting.set(true)
-            startFpsMonitoring(interval)
-            IOUtils.writeInt(output, 1)
-            Logger.log("Profiling started with interval: ${interval}ms")
+            val interval = input.readInt()
+            // 模块在连接间共享：第一个开启者启动监控，其余只增加引用计数
+            synchronized(profilingClients) {
+                if (profilingClients.getAndIncrement() == 0) {
+                    isCollecting.set(true)
+                    startFpsMonitoring(interval)
+                }
+            }
+            output.writeInt(1)
+            Logger.log("Profiling started with interval: ${interval}ms (clients: ${profilingClients.get()})")
         } catch (e: Exception) {
             Logger.error("Error starting profiling", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
     /**
      * 命令 209: 停止性能分析
      */
-    fun stopProfiling(output: BufferedOutputStream) {
+    fun stopProfiling(output: BinaryEncoder) {
         try {
-            isCollecting.set(false)
-            stopFpsMonitoring()
-            IOUtils.writeInt(output, 1)
-            Logger.log("Profiling stopped")
+            releaseProfiling()
+            output.writeInt(1)
+            Logger.log("Profiling stopped (clients: ${profilingClients.get()})")
         } catch (e: Exception) {
             Logger.error("Error stopping profiling", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
+        }
+    }
+    
+    /**
+     * 释放一次性能分析引用，最后一个使用者释放时停止监控
+     * 连接断开而未发送 209 时由 CommandDispatcher 调用
+     */
+    fun releaseProfiling() {
+        synchronized(profilingClients) {
+            if (profilingClients.get() > 0 && profilingClients.decrementAndGet() == 0) {
+                isCollecting.set(false)
+                stopFpsMonitoring()
+            }
         }
     }
     
     // ========== 内部实现方法 ==========
     
     /**
-     * 获取当前 FPS，按照新的优先级顺序：
-     * 1. Choreographer
-     * 2. SurfaceFlinger Reflection
-     * 3. dumpsys SurfaceFlinger
+     * 获取当前 FPS，按照优先级顺序：
+     * 1. SurfaceFlinger 帧延迟数据（最近 1 秒内目标图层实际显示的帧数）
+     * 2. Choreographer（只反映 VSync 节奏，仅在找不到图层时使用）
      */
     private fun getCurrentFps(): Int {
-        // 1) Choreographer
-        if (fpsValue > 0) {
-            return notifyFpsMethod("choreographer", fpsValue)
+        // 1) SurfaceFlinger 帧延迟
+        pollLatency(force = false)
+        val fps = synchronized(latencyLock) {
+            if (layer == null) -1 else Math.round(frameTracker.stats(System.nanoTime(), FPS_WINDOW_NANOS).fps)
         }
-
-        // 2) SurfaceFlinger Reflection（带缓存 + 超时保护）
-        val reflectionFps = getFpsFromSurfaceFlingerReflectionSafe()
-        if (reflectionFps > 0) {
-            surfaceFlingerFps.set(reflectionFps.toLong())
-            lastSurfaceFlingerCheck.set(System.currentTimeMillis())
-            return notifyFpsMethod("reflection", reflectionFps)
+        if (fps >= 0) {
+            return notifyFpsMethod("latency", fps)
         }
 
-        // 3) dumpsys SurfaceFlinger 作为降级方案
-        val dumpsysFps = getFpsFromSurfaceFlingerDumpsys()
-        if (dumpsysFps > 0) {
-            surfaceFlingerFps.set(dumpsysFps.toLong())
-            lastSurfaceFlingerCheck.set(System.currentTimeMillis())
-            return notifyFpsMethod("dumpsys", dumpsysFps)
+        // 2) Choreographer
+        if (fpsValue > 0) {
+            return notifyFpsMethod("choreographer", fpsValue)
         }
 
         return notifyFpsMethod("none", 0)
@@ -133,8 +223,7 @@ class FpsModule {
             fpsMethod = method
             val readable = when (method) {
                 "choreographer" -> "Choreographer callback"
-                "reflection" -> "SurfaceFlinger reflection"
-                "dumpsys" -> "dumpsys SurfaceFlinger"
+                "latency" -> "SurfaceFlinger latency ($layer)"
                 else -> "no available method"
             }
             Logger.log("Using $readable for FPS (method=$method, FPS=$fps)")
@@ -142,95 +231,163 @@ class FpsModule {
         return fps
     }
 
+    // ========== SurfaceFlinger 帧延迟 ==========
+
     /**
-     * 带缓存 + 超时保护的 SurfaceFlinger 反射方法
+     * 读取目标图层的新帧（调用方不持有 latencyLock）
+     * force=false 时距上次轮询不足 MIN_POLL_NANOS 直接复用已有数据
+     * 每次请求都会让后台轮询保持运行，直到 IDLE_STOP_NANOS 内没有请求
+     * 已有线程在轮询时直接返回，不等待其 dump 完成
      */
-    private fun getFpsFromSurfaceFlingerReflectionSafe(): Int {
-        val currentTime = System.currentTimeMillis()
-        val cachedFps = surfaceFlingerFps.get()
-        val lastCheck = lastSurfaceFlingerCheck.get()
+    private fun pollLatency(force: Boolean) {
+        val now = System.nanoTime()
+        if (!force) {
+            lastDemandAt = now
+            ensurePoller()
+            if (now - lastPollAt < MIN_POLL_NANOS) return
+        }
+        if (!polling.compareAndSet(false, true)) return
+        try {
+            lastPollAt = now
+            val (current, startGeneration) = synchronized(latencyLock) { Pair(layer, generation) }
 
-        if (cachedFps > 0 && (currentTime - lastCheck) < SURFACE_FLINGER_CACHE_DURATION) {
-            return cachedFps.toInt()
+            val dump = current?.let { readLatency(it) }
+            if (dump == null) {
+                // 图层不存在（应用切换/退出）或尚未选择：限频重新选择
+                if (now - lastSelectAt >= RESELECT_NANOS) selectLayer(now)
+                return
+            }
+            val reselect = synchronized(latencyLock) {
+                // dump 期间目标已改变：丢弃结果
+                if (generation != startGeneration) return
+                refreshPeriodNanos = dump.refreshPeriodNanos
+                if (frameTracker.ingest(dump.presentTimes, now) > 0) {
+                    lastNewFrameAt = now
+                    false
+                } else {
+                    // 自动模式下当前图层长时间没有新帧：可能切换到了其他应用
+                    targetPackage.isEmpty() && now - lastNewFrameAt >= RESELECT_NANOS && now - lastSelectAt >= RESELECT_NANOS
+                }
+            }
+            if (reselect) selectLayer(now)
+        } finally {
+            polling.set(false)
         }
+    }
 
-        val future = FutureTask {
-            getFpsFromSurfaceFlingerReflection()
+    /**
+     * 选择目标图层：在候选图层中选最近 1 秒提交帧最多的一个（见 SurfaceFlingerLatency.selectBusiest）
+     * 由正在轮询的线程调用，各图层的 dump 在锁外执行
+     */
+    private fun selectLayer(now: Long) {
+        lastSelectAt = now
+        val (target, startGeneration) = synchronized(latencyLock) { Pair(targetPackage, generation) }
+        val list = dumpSurfaceFlinger("--list") ?: return
+        val candidates = SurfaceFlingerLatency.candidates(list, target)
+        val dumps = ArrayList<Pair<String, SurfaceFlingerLatency.LatencyDump>>(candidates.size)
+        for (name in candidates) {
+            readLatency(name)?.let { dumps.add(Pair(name, it)) }
         }
-        val thread = Thread(future, "fps-reflection")
-        thread.start()
+        val selected = SurfaceFlingerLatency.selectBusiest(dumps, now, SELECT_WINDOW_NANOS)
+        val best = if (selected >= 0) dumps[selected].first else null
+        val bestDump = if (selected >= 0) dumps[selected].second else null
 
-        return try {
-            future.get(1500, TimeUnit.MILLISECONDS)
-        } catch (e: TimeoutException) {
-            Logger.log("SurfaceFlinger reflection timeout (1.5s)")
-            future.cancel(true)
-            thread.interrupt()
-            0
-        } catch (e: Exception) {
-            Logger.error("Error executing SurfaceFlinger reflection", e)
-            future.cancel(true)
-            thread.interrupt()
-            0
+        synchronized(latencyLock) {
+            // 选择期间目标已改变：丢弃结果，下次轮询重新选择
+            if (generation != startGeneration) return
+            if (best != layer) {
+                Logger.log("FPS layer: ${best ?: "not found"} (${candidates.size} candidates, target=${target.ifEmpty { "auto" }})")
+                layer = best
+                frameTracker.reset()
+            }
+            if (bestDump != null) {
+                refreshPeriodNanos = bestDump.refreshPeriodNanos
+                if (frameTracker.ingest(bestDump.presentTimes, now) > 0) lastNewFrameAt = now
+            }
         }
     }
 
+    private fun readLatency(layerName: String): SurfaceFlingerLatency.LatencyDump? {
+        val text = dumpSurfaceFlinger("--latency", layerName) ?: return null
+        return SurfaceFlingerLatency.parse(text)
+    }
+
     /**
-     * dumpsys SurfaceFlinger 作为降级方案
+     * 通过 Binder dump 获取 SurfaceFlinger 输出（等同于 dumpsys SurfaceFlinger <args>）
+     * 需要 shell 或系统权限；管道由常驻线程读取，避免输出超过管道容量时阻塞 dump
      */
-    private fun getFpsFromSurfaceFlingerDumpsys(): Int {
-        var process: Process? = null
-        return try {
-            process = Runtime.getRuntime().exec(arrayOf("sh", "-c", "dumpsys SurfaceFlinger --display-id 0"))
-            if (!process.waitFor(1500, TimeUnit.MILLISECONDS)) {
-                Logger.log("dumpsys SurfaceFlinger timeout (1.5s)")
-                process.destroy()
-                return 0
-            }
+    private fun dumpSurfaceFlinger(vararg args: String): String? {
+        val service = surfaceFlinger
+            ?: (ServiceManagerMirror.getService.call("SurfaceFlinger") as? IBinder)?.also { surfaceFlinger = it }
+        if (service == null) {
+            Logger.log("SurfaceFlinger service not available")
+            return null
+        }
 
-            var foundFps = 0
-            val reader = process.inputStream.bufferedReader()
+        val pipe = ParcelFileDescriptor.createPipe()
+        val readFd = pipe[0]
+        val writeFd = pipe[1]
+        val future = dumpReader.submit(Callable {
+            ParcelFileDescriptor.AutoCloseInputStream(readFd).use { it.readBytes() }
+        })
+        return try {
             try {
-                var line: String?
-                while (reader.readLine().also { line = it } != null) {
-                    val trimmed = line!!.trim()
-                    val parsed = parseFpsFromLine(trimmed)
-                    if (parsed != null) {
-                        foundFps = parsed
-                        break
-                    }
-                }
+                service.dump(writeFd.fileDescriptor, args)
             } finally {
-                reader.close()
+                writeFd.close()
             }
-            process.errorStream.close()
-            process.destroy()
-
-            if (foundFps > 0) {
-                Logger.log("Using dumpsys SurfaceFlinger for FPS (method=dumpsys, FPS=$foundFps)")
-            } else {
-                Logger.log("dumpsys SurfaceFlinger output did not contain FPS")
-            }
-            foundFps
+            String(future.get(DUMP_TIMEOUT_MS, TimeUnit.MILLISECONDS), Charsets.UTF_8)
         } catch (e: Exception) {
-            Logger.error("Error getting FPS via dumpsys SurfaceFlinger", e)
-            0
-        } finally {
-            process?.destroy()
+            Logger.error("Error dumping SurfaceFlinger ${args.joinToString(" ")}", e)
+            future.cancel(true)
+            try {
+                readFd.close()
+            } catch (ignored: Exception) {
+                // 忽略
+            }
+            // Binder 可能已失效（SurfaceFlinger 重启），下次重新获取
+            surfaceFlinger = null
+            null
         }
     }
 
     /**
-     * 从文本行中解析 FPS 或 refresh-rate
+     * 有请求期间后台定期轮询，防止两次请求之间的帧被 SurfaceFlinger 的 128 帧环形缓冲区覆盖
      */
-    private fun parseFpsFromLine(line: String): Int? {
-        REFRESH_RATE_REGEX.find(line)?.groupValues?.getOrNull(1)?.toFloatOrNull()?.toInt()?.let {
-            if (it in 1..240) return it
+    private fun ensurePoller() {
+        if (poller != null) return
+        synchronized(latencyLock) {
+            if (poller != null) return
+            val executor = Executors.newSingleThreadScheduledExecutor { runnable ->
+                Thread(runnable, "fps-latency").apply { isDaemon = true }
+            }
+            poller = executor
+            executor.scheduleWithFixedDelay({ pollInBackground(executor) }, POLL_INTERVAL_MS, POLL_INTERVAL_MS, TimeUnit.MILLISECONDS)
         }
-        FPS_VALUE_REGEX.find(line)?.groupValues?.getOrNull(1)?.toFloatOrNull()?.toInt()?.let {
-            if (it in 1..240) return it
+    }
+
+    private fun pollInBackground(executor: ScheduledExecutorService) {
+        try {
+            val idle = synchronized(latencyLock) {
+                if (System.nanoTime() - lastDemandAt > IDLE_STOP_NANOS) {
+                    // 长时间没有请求：停止轮询，下次请求时重新开始
+                    poller = null
+                    executor.shutdown()
+                    generation++
+                    frameTracker.reset()
+                    true
+                } else {
+                    false
+                }
+            }
+            if (idle) {
+                Logger.log("FPS latency polling stopped (idle)")
+            } else {
+                pollLatency(force = true)
+            }
+        } catch (e: Exception) {
+            Logger.error("Error polling SurfaceFlinger latency", e)
         }
-        return null
     }
     
     /**
@@ -258,7 +415,7 @@ class FpsModule {
                         } else {
                             0
                         }
-                        Logger.log("FPS calculated: ${fpsValue} (frames: ${frameCount.get()}, elapsed: ${elapsed}ms)")
+                        Logger.debug { "FPS calculated: ${fpsValue} (frames: ${frameCount.get()}, elapsed: ${elapsed}ms)" }
                         frameCount.set(0)
                         lastFpsTime = currentTime
                     }
@@ -268,13 +425,13 @@ class FpsModule {
                 }
             }
             choreographer.postFrameCallback(frameCallback!!)
-            Logger.log("FPS monitoring started (interval: ${interval}ms). Note: FPS will use SurfaceFlinger if no UI is rendering.")
+            Logger.log("FPS monitoring started (interval: ${interval}ms). Note: FPS will use SurfaceFlinger latency if no UI is rendering.")
             
             // 启动一个线程来检查是否有帧回调被触发
             Thread {
                 Thread.sleep(interval.toLong() + 500) // 等待一个间隔 + 500ms
                 if (frameCount.get() == 0L && fpsValue == 0) {
-                    Logger.log("Choreographer not receiving callbacks, will use SurfaceFlinger reflection for FPS")
+                    Logger.log("Choreographer not receiving callbacks, will use SurfaceFlinger latency for FPS")
                 }
             }.start()
         } catch (e: Exception) {
@@ -300,122 +457,15 @@ class FpsModule {
         }
     }
     
-    /**
-     * 通过反射 SurfaceFlinger API 获取系统级 FPS
-     * 需要系统权限
-     * 
-     * 方法：通过 ServiceManager 获取 SurfaceFlinger 服务，调用相关方法获取刷新率
-     * 
-     * 优势：
-     * - 性能最好（直接 API 调用，无需启动进程）
-     * - 实时性好（直接获取系统服务数据）
-     * - 资源占用少（不需要解析文本输出）
-     */
-    @SuppressLint("PrivateApi", "DiscouragedPrivateApi")
-    private fun getFpsFromSurfaceFlingerReflection(): Int {
-        try {
-            // 获取 SurfaceFlinger 服务
-            val service = ServiceManagerMirror.getService.call("SurfaceFlinger") as? IBinder
-            if (service == null) {
-                Logger.log("SurfaceFlinger service not available")
-                return 0
-            }
-            
-            // 尝试通过 dump 方法获取信息
-            val pipe = android.os.ParcelFileDescriptor.createPipe()
-            val readFd = pipe[0]
-            val writeFd = pipe[1]
-            val foundFps = AtomicInteger(0)
-            val readerThread = Thread({
-                var reader: BufferedReader? = null
-                try {
-                    reader = BufferedReader(
-                        InputStreamReader(
-                            android.os.ParcelFileDescriptor.AutoCloseInputStream(readFd)
-                        )
-                    )
-                    var line: String?
-                    var lineCount = 0
-                    val maxLines = 1000
-                    val startTime = System.currentTimeMillis()
-                    val timeout = 2000L
-                    while (lineCount < maxLines && (System.currentTimeMillis() - startTime) < timeout) {
-                        line = reader.readLine() ?: break
-                        lineCount++
-                        val parsed = parseFpsFromLine(line!!.trim())
-                        if (parsed != null) {
-                            foundFps.set(parsed)
-                            break
-                        }
-                    }
-                } catch (e: Exception) {
-                    Logger.log("Error reading SurfaceFlinger output: ${e.message}")
-                } finally {
-                    try {
-                        reader?.close()
-                    } catch (_: Exception) {
-                    }
-                }
-            }, "fps-sf-reader")
-
-            try {
-                readerThread.start()
-                try {
-                    val dumpMethod = service.javaClass.getMethod(
-                        "dump",
-                        java.io.FileDescriptor::class.java,
-                        Array<String>::class.java
-                    )
-                    dumpMethod.invoke(service, writeFd.fileDescriptor, arrayOf<String>())
-                } catch (e: Exception) {
-                    try {
-                        val dumpMethod = service.javaClass.getMethod(
-                            "dump",
-                            java.io.FileDescriptor::class.java
-                        )
-                        dumpMethod.invoke(service, writeFd.fileDescriptor)
-                    } catch (e2: Exception) {
-                        Logger.log("SurfaceFlinger dump method not available: ${e2.message}")
-                        readerThread.interrupt()
-                        try {
-                            readerThread.join(100)
-                        } catch (_: InterruptedException) {
-                        }
-                        return 0
-                    }
-                } finally {
-                    try {
-                        writeFd.close()
-                    } catch (_: Exception) {
-                    }
-                }
-
-                readerThread.join(2200)
-                if (readerThread.isAlive) {
-                    readerThread.interrupt()
-                }
-
-                val fps = foundFps.get()
-                if (fps > 0) {
-                    Logger.log("SurfaceFlinger reflection FPS=$fps")
-                    return fps
-                } else {
-                    Logger.log("FPS not found in SurfaceFlinger dump output")
-                }
-            } finally {
-                try {
-                    readFd.close()
-                } catch (_: Exception) {
-                }
-                try {
-                    writeFd.close()
-                } catch (_: Exception) {
-                }
-            }
-        } catch (e: Exception) {
-            Logger.error("Error getting FPS from SurfaceFlinger reflection", e)
-        }
-        return 0
+    companion object {
+        private const val FPS_WINDOW_NANOS = 1_000_000_000L
+        private const val SELECT_WINDOW_NANOS = 1_000_000_000L
+        private const val MIN_POLL_NANOS = 100_000_000L
+        private const val POLL_INTERVAL_MS = 400L
+        private const val RESELECT_NANOS = 3_000_000_000L
+        private const val IDLE_STOP_NANOS = 10_000_000_000L
+        private const val DUMP_TIMEOUT_MS = 1500L
+        private const val MIN_WINDOW_MS = 100
+        private const val MAX_WINDOW_MS = 60_000
     }
 }
-
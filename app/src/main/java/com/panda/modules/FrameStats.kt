@@ -0,0 +1,234 @@
+package com.panda.modules
+
+/**
+ * 帧时间统计（纯 Kotlin，不依赖 Android，可直接用录制的 dump 文本在 JVM 上验证）
+ *
+ * 数据来源为 `dumpsys SurfaceFlinger --latency <图层>`：
+ *   第一行: 刷新周期(ns)
+ *   之后每行: desiredPresentTime actualPresentTime frameReadyTime（ns，CLOCK_MONOTONIC）
+ * SurfaceFlinger 只保留最近 128 帧，未完成的帧 actualPresentTime 为 0 或 INT64_MAX
+ */
+object SurfaceFlingerLatency {
+
+    /**
+     * 一次 --latency 输出：刷新周期和已完成帧的实际显示时间（升序）
+     */
+    class LatencyDump(val refreshPeriodNanos: Long, val presentTimes: LongArray)
+
+    /**
+     * 解析 --latency 输出，图层不存在（只有刷新周期行或为空）时返回 null
+     */
+    fun parse(text: String): LatencyDump? {
+        val lines = text.lineSequence().map { it.trim() }.filter { it.isNotEmpty() }.iterator()
+        if (!lines.hasNext()) return null
+        val refreshPeriod = lines.next().toLongOrNull() ?: return null
+
+        var seenFrameLine = false
+        val presents = ArrayList<Long>(128)
+        while (lines.hasNext()) {
+            val parts = lines.next().split(' ', '\t').filter { it.isNotEmpty() }
+            if (parts.size < 3) continue
+            seenFrameLine = true
+            val actual = parts[1].toLongOrNull() ?: continue
+            if (actual <= 0L || actual == PENDING) continue
+            presents.add(actual)
+        }
+        if (!seenFrameLine) return null
+
+        val presentTimes = presents.toLongArray()
+        presentTimes.sort()
+        return LatencyDump(refreshPeriod, presentTimes)
+    }
+
+    /**
+     * 从 --list 输出中筛选候选图层
+     * 指定了目标时为名称包含目标的图层，否则为应用窗口（含 '/'）和 SurfaceView 图层，排除系统图层
+     */
+    fun candidates(list: String, target: String): List<String> {
+        return list.lineSequence().map { it.trim() }.filter { name ->
+            name.isNotEmpty() && if (target.isNotEmpty()) {
+                name.contains(target)
+            } else {
+                (name.contains('/') || name.startsWith(SURFACE_VIEW)) && SYSTEM_LAYERS.none { name.contains(it) }
+            }
+        }.toList()
+    }
+
+    /**
+     * 选择 [now - windowNanos, now] 内显示帧最多的图层
+     * 帧数相同时优先 SurfaceView（游戏通常在 SurfaceView 上渲染）
+     * @return 所选图层在 layers 中的下标，layers 为空时返回 -1
+     */
+    fun selectBusiest(layers: List<Pair<String, LatencyDump>>, now: Long, windowNanos: Long): Int {
+        var best = -1
+        var bestFrames = -1
+        for ((index, layer) in layers.withIndex()) {
+            val frames = layer.second.presentTimes.count { now - it < windowNanos }
+            val surfaceView = layer.first.startsWith(SURFACE_VIEW)
+            if (frames > bestFrames ||
+                (frames == bestFrames && surfaceView && !layers[best].first.startsWith(SURFACE_VIEW))) {
+                best = index
+                bestFrames = frames
+            }
+        }
+        return best
+    }
+
+    private const val PENDING = Long.MAX_VALUE
+    private const val SURFACE_VIEW = "SurfaceView"
+
+    // 自动选择时排除的系统图层
+    private val SYSTEM_LAYERS = listOf(
+        "StatusBar", "NavigationBar", "com.android.systemui", "InputMethod", "ScreenDecor",
+        "Wallpaper", "PointerLocation", "Splash Screen"
+    )
+}
+
+/**
+ * 一个窗口内的帧统计
+ * 帧时间单位为 ms；jank/bigJank 按 PerfDog 定义：
+ * - Jank: 帧时间 > 前 3 帧平均帧时间 × 2，且 > 两帧电影帧时间（1000/24 × 2 ≈ 83.3ms）
+ * - BigJank: 帧时间 > 前 3 帧平均帧时间 × 2，且 > 三帧电影帧时间（125ms）
+ */
+class FrameStats(
+    val fps: Float,
+    val frames: Int,
+    val p50: Float,
+    val p90: Float,
+    val p95: Float,
+    val p99: Float,
+    val max: Float,
+    val jank: Int,
+    val bigJank: Int
+) {
+    companion object {
+        val EMPTY = FrameStats(0f, 0, 0f, 0f, 0f, 0f, 0f, 0, 0)
+    }
+}
+
+/**
+ * 增量帧跟踪：每次只接收比上一次更新的帧，在环形缓冲区中保留最近的显示时间，按窗口计算统计
+ * 容量用 capacityFor(最大窗口) 计算；窗口超出缓冲区覆盖的时长时按覆盖的时长计算 FPS
+ * 非线程安全，由调用方加锁
+ */
+class FrameTracker(capacity: Int) {
+
+    private val presents = LongArray(capacity)
+    private var start = 0
+    private var size = 0
+    // 开始跟踪的时间：窗口长于跟踪时长时按跟踪时长计算 FPS
+    private var trackingSince = 0L
+    private var scratch = LongArray(256)
+
+    /** 最新一帧的显示时间，没有帧时为 0 */
+    val lastPresent: Long
+        get() = if (size == 0) 0L else presents[(start + size - 1) % presents.size]
+
+    /**
+     * 接收一次 --latency 的显示时间（升序），只保留比已有最新帧更晚的帧，返回新增帧数
+     */
+    fun ingest(presentTimes: LongArray, now: Long): Int {
+        if (trackingSince == 0L) {
+            trackingSince = if (presentTimes.isNotEmpty()) minOf(presentTimes[0], now) else now
+        }
+        val last = lastPresent
+        var added = 0
+        for (present in presentTimes) {
+            if (present <= last) continue
+            if (size == presents.size) {
+                start = (start + 1) % presents.size
+                size--
+            }
+            presents[(start + size) % presents.size] = present
+            size++
+            added++
+        }
+        return added
+    }
+
+    fun reset() {
+        start = 0
+        size = 0
+        trackingSince = 0L
+    }
+
+    /**
+     * 统计 [now - window, now] 内显示的帧
+     * 帧时间为相邻两帧显示时间之差，窗口内第一帧与窗口前最后一帧做差
+     */
+    fun stats(now: Long, windowNanos: Long): FrameStats {
+        if (size == 0 || trackingSince == 0L) return FrameStats.EMPTY
+        val from = now - windowNanos
+
+        // 窗口内第一帧的位置
+        var first = size
+        while (first > 0 && get(first - 1) >= from) first--
+        val frames = size - first
+        if (frames == 0) return FrameStats.EMPTY
+
+        // 帧时间 = 与前一帧显示时间之差；窗口前的帧只用作第一帧的起点和 jank 判断的前 3 帧
+        if (scratch.size < frames) scratch = LongArray(maxOf(frames, scratch.size * 2))
+        var count = 0
+        var jank = 0
+        var bigJank = 0
+        var previous1 = -1L
+        var previous2 = -1L
+        var previous3 = -1L
+        for (index in maxOf(1, first - 3) until size) {
+            val frameTime = get(index) - get(index - 1)
+            if (index >= first) {
+                scratch[count++] = frameTime
+                if (previous3 >= 0 && frameTime > (previous1 + previous2 + previous3) / 3 * 2) {
+                    if (frameTime > JANK_NANOS) jank++
+                    if (frameTime > BIG_JANK_NANOS) bigJank++
+                }
+            }
+            previous3 = previous2
+            previous2 = previous1
+            previous1 = frameTime
+        }
+
+        // 缓冲区已满时最早的帧之前的数据已被覆盖，只按缓冲区覆盖的时长计算
+        val covered = if (size == presents.size) now - get(0) else now - trackingSince
+        val span = minOf(windowNanos, covered).coerceAtLeast(1L)
+        val fps = frames * 1_000_000_000f / span
+        if (count == 0) {
+            return FrameStats(fps, frames, 0f, 0f, 0f, 0f, 0f, 0, 0)
+        }
+        java.util.Arrays.sort(scratch, 0, count)
+        return FrameStats(
+            fps,
+            frames,
+            percentile(count, 50),
+            percentile(count, 90),
+            percentile(count, 95),
+            percentile(count, 99),
+            scratch[count - 1] / NANOS_PER_MS,
+            jank,
+            bigJank
+        )
+    }
+
+    private fun get(index: Int): Long = presents[(start + index) % presents.size]
+
+    /** 最近秩百分位（scratch[0, count) 已排序），单位 ms */
+    private fun percentile(count: Int, p: Int): Float {
+        val rank = ((count * p + 99) / 100).coerceIn(1, count)
+        return scratch[rank - 1] / NANOS_PER_MS
+    }
+
+    companion object {
+        /** 按此刷新率计算缓冲区容量（覆盖 165Hz 及以下的屏幕） */
+        const val MAX_REFRESH_RATE = 165
+        // 一次 --latency 最多返回的帧数，作为余量
+        private const val LATENCY_FRAMES = 128
+
+        /** 保留 windowMs 内全部帧所需的容量 */
+        fun capacityFor(windowMs: Int): Int = (windowMs.toLong() * MAX_REFRESH_RATE / 1000).toInt() + LATENCY_FRAMES
+
+        private const val NANOS_PER_MS = 1_000_000f
+        // 电影帧时间 1000/24 ms 的 2 倍 / 3 倍
+        private const val JANK_NANOS = 83_333_333L
+        private const val BIG_JANK_NANOS = 125_000_000L
+    }
+}
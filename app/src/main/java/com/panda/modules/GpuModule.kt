@@ -1,9 +1,9 @@
 package com.panda.modules
 
 import android.annotation.SuppressLint
-import com.panda.utils.IOUtils
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
+import com.panda.utils.ProcReader
 import java.io.File
 
 /**
@@ -14,21 +14,27 @@ import java.io.File
 @SuppressLint("PrivateApi", "DiscouragedPrivateApi")
 class GpuModule {
     
+    private val reader = ProcReader(256)
+    
+    // 首次使用时按厂商顺序选定存在的 sysfs 节点
+    private val usagePath: String? by lazy { findPath(USAGE_PATHS, "usage") }
+    private val freqPath: String? by lazy { findPath(FREQ_PATHS, "frequency") }
+    
     /**
      * 命令 203: 获取 GPU 使用率和频率
      * 响应: 使用率(float 0-100), 频率(int kHz)
      */
-    fun getGpuUsage(output: BufferedOutputStream) {
+    fun getGpuUsage(output: BinaryEncoder) {
         try {
             val usage = getGpuUsageValue()
             val freq = getGpuFrequency()
-            IOUtils.writeFloat(output, usage)
-            IOUtils.writeInt(output, freq)
-            Logger.log("GPU usage: ${usage}%, freq: ${freq} kHz")
+            output.writeFloat(usage)
+            output.writeInt(freq)
+            Logger.debug { "GPU usage: ${usage}%, freq: ${freq} kHz" }
         } catch (e: Exception) {
             Logger.error("Error getting GPU usage", e)
-            IOUtils.writeFloat(output, 0f)
-            IOUtils.writeInt(output, 0)
+            output.writeFloat(0f)
+            output.writeInt(0)
         }
     }
     
@@ -37,118 +43,60 @@ class GpuModule {
     /**
      * 获取 GPU 使用率
      * 支持多种 GPU 厂商：
-     * - Qualcomm Adreno: /sys/class/kgsl/kgsl-3d0/gpu_busy_percentage
+     * - Qualcomm Adreno: /sys/class/kgsl/kgsl-3d0/gpu_busy_percentage（格式如 "45 %"）
      * - ARM Mali: /sys/class/misc/mali0/device/utilization
      * - PowerVR: /sys/devices/platform/pvrsrvkm.0/sgx_dvfs_utilization
      * 
-     * 注意：不同设备的路径可能不同，这里实现常见路径
+     * 注意：不同设备的路径可能不同，这里实现常见路径；首次调用时选定存在的路径，之后只读取该文件
      */
     private fun getGpuUsageValue(): Float {
-        try {
-            // 1. Qualcomm Adreno (kgsl)
-            val kgslDir = File("/sys/class/kgsl/kgsl-3d0")
-            if (kgslDir.exists()) {
-                val usageFile = File(kgslDir, "gpu_busy_percentage")
-                if (usageFile.exists()) {
-                    val usage = usageFile.readText().trim().toFloatOrNull() ?: 0f
-                    if (usage > 0) {
-                        Logger.log("GPU usage from kgsl: $usage%")
-                        return usage
-                    }
-                }
-            }
-            
-            // 2. ARM Mali
-            val maliFile = File("/sys/class/misc/mali0/device/utilization")
-            if (maliFile.exists()) {
-                val usage = maliFile.readText().trim().toFloatOrNull() ?: 0f
-                if (usage > 0) {
-                    Logger.log("GPU usage from Mali: $usage%")
-                    return usage
-                }
-            }
-            
-            // 3. PowerVR
-            val pvrFile = File("/sys/devices/platform/pvrsrvkm.0/sgx_dvfs_utilization")
-            if (pvrFile.exists()) {
-                val usage = pvrFile.readText().trim().toFloatOrNull() ?: 0f
-                if (usage > 0) {
-                    Logger.log("GPU usage from PowerVR: $usage%")
-                    return usage
-                }
-            }
-            
-            // 4. 尝试其他可能的路径
-            val otherPaths = listOf(
-                "/sys/class/kgsl/kgsl-3d0/gpu_busy",
-                "/sys/devices/platform/*/gpu/utilization",
-            )
-            
-            // 如果都不存在，返回 0（某些设备可能不支持）
-            Logger.log("GPU usage not available (device may not support)")
-        } catch (e: Exception) {
-            Logger.error("Error getting GPU usage", e)
+        val path = usagePath ?: return 0f
+        synchronized(reader) {
+            return reader.readFloat(path, 0f)
         }
-        return 0f
     }
     
     /**
      * 获取 GPU 频率
      * 支持多种 GPU 厂商：
-     * - Qualcomm Adreno: /sys/class/kgsl/kgsl-3d0/gpuclk
-     * - ARM Mali: /sys/class/misc/mali0/device/clock
-     * - PowerVR: /sys/devices/platform/pvrsrvkm.0/sgx_dvfs_clock
+     * - Qualcomm Adreno: /sys/class/kgsl/kgsl-3d0/gpuclk（Hz）
+     * - ARM Mali: /sys/class/misc/mali0/device/clock（通常为 MHz）
+     * - PowerVR: /sys/devices/platform/pvrsrvkm.0/sgx_dvfs_clock（Hz）
      * 
      * 注意：返回值为 kHz
      */
     private fun getGpuFrequency(): Int {
-        try {
-            // 1. Qualcomm Adreno (kgsl) - 单位已经是 Hz，需要转换为 kHz
-            val kgslFreqFile = File("/sys/class/kgsl/kgsl-3d0/gpuclk")
-            if (kgslFreqFile.exists()) {
-                val freqHz = kgslFreqFile.readText().trim().toLongOrNull() ?: 0L
-                if (freqHz > 0) {
-                    val freqKHz = (freqHz / 1000).toInt()
-                    Logger.log("GPU frequency from kgsl: $freqKHz kHz")
-                    return freqKHz
-                }
-            }
-            
-            // 2. ARM Mali - 单位可能是 MHz，需要转换为 kHz
-            val maliFreqFile = File("/sys/class/misc/mali0/device/clock")
-            if (maliFreqFile.exists()) {
-                val freq = maliFreqFile.readText().trim().toLongOrNull() ?: 0L
-                if (freq > 0) {
-                    // Mali 通常以 MHz 为单位，转换为 kHz
-                    val freqKHz = if (freq < 10000) freq * 1000 else freq
-                    Logger.log("GPU frequency from Mali: $freqKHz kHz")
-                    return freqKHz.toInt()
-                }
-            }
-            
-            // 3. PowerVR
-            val pvrFreqFile = File("/sys/devices/platform/pvrsrvkm.0/sgx_dvfs_clock")
-            if (pvrFreqFile.exists()) {
-                val freqHz = pvrFreqFile.readText().trim().toLongOrNull() ?: 0L
-                if (freqHz > 0) {
-                    val freqKHz = (freqHz / 1000).toInt()
-                    Logger.log("GPU frequency from PowerVR: $freqKHz kHz")
-                    return freqKHz
-                }
-            }
-            
-            // 4. 尝试其他可能的路径
-            val otherPaths = listOf(
-                "/sys/class/kgsl/kgsl-3d0/devfreq/kgsl-3d0/cur_freq",
-                "/sys/devices/platform/*/gpu/clock",
-            )
-            
+        val path = freqPath ?: return 0
+        val freq = synchronized(reader) { reader.readLong(path, 0L) }
+        if (freq <= 0) return 0
+        return if (path == MALI_CLOCK) {
+            // Mali 通常以 MHz 为单位，转换为 kHz
+            (if (freq < 10000) freq * 1000 else freq).toInt()
+        } else {
+            (freq / 1000).toInt()
+        }
+    }
+    
+    companion object {
+        private const val MALI_CLOCK = "/sys/class/misc/mali0/device/clock"
+        
+        private val USAGE_PATHS = arrayOf(
+            "/sys/class/kgsl/kgsl-3d0/gpu_busy_percentage",
+            "/sys/class/misc/mali0/device/utilization",
+            "/sys/devices/platform/pvrsrvkm.0/sgx_dvfs_utilization"
+        )
+        
+        private val FREQ_PATHS = arrayOf(
+            "/sys/class/kgsl/kgsl-3d0/gpuclk",
+            MALI_CLOCK,
+            "/sys/devices/platform/pvrsrvkm.0/sgx_dvfs_clock"
+        )
+        
+        private fun findPath(paths: Array<String>, name: String): String? {
+            val path = paths.firstOrNull { File(it).exists() }
             // 如果都不存在，返回 0（某些设备可能不支持）
-            Logger.log("GPU frequency not available (device may not support)")
-        } catch (e: Exception) {
-            Logger.error("Error getting GPU frequency", e)
+            Logger.log(if (path != null) "GPU $name source: $path" else "GPU $name not available (device may not support)")
+            return path
         }
-        return 0
     }
 }
-
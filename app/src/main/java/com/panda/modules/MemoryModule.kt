@@ -3,11 +3,10 @@ package com.panda.modules
 import android.annotation.SuppressLint
 import android.app.ActivityManager
 import android.os.Debug
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.FakeContext
-import com.panda.utils.IOUtils
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
-import java.io.InputStream
 
 /**
  * 内存数据采集模块
@@ -22,22 +21,28 @@ class MemoryModule {
      * 请求: PID(int)
      * 响应: PSS(long KB), PrivateDirty(long KB), SharedDirty(long KB)
      */
-    fun getMemoryUsage(input: InputStream, output: BufferedOutputStream) {
+    fun getMemoryUsage(input: BinaryDecoder, output: BinaryEncoder) {
+        writeMemoryUsage(input.readInt(), output)
+    }
+    
+    /**
+     * 写入指定进程的内存使用（命令 205 的响应格式，供订阅推送复用）
+     */
+    fun writeMemoryUsage(pid: Int, output: BinaryEncoder) {
         try {
-            val pid = IOUtils.readInt(input)
             val memoryInfo = getProcessMemoryInfo(pid)
             
-            IOUtils.writeLong(output, memoryInfo.pss)
-            IOUtils.writeLong(output, memoryInfo.privateDirty)
-            IOUtils.writeLong(output, memoryInfo.sharedDirty)
+            output.writeLong(memoryInfo.pss)
+            output.writeLong(memoryInfo.privateDirty)
+            output.writeLong(memoryInfo.sharedDirty)
             output.flush()
             
-            Logger.log("Memory for PID $pid: PSS=${memoryInfo.pss}KB, Private=${memoryInfo.privateDirty}KB, Shared=${memoryInfo.sharedDirty}KB")
+            Logger.debug { "Memory for PID $pid: PSS=${memoryInfo.pss}KB, Private=${memoryInfo.privateDirty}KB, Shared=${memoryInfo.sharedDirty}KB" }
         } catch (e: Exception) {
             Logger.error("Error getting memory usage", e)
-            IOUtils.writeLong(output, 0)
-            IOUtils.writeLong(output, 0)
-            IOUtils.writeLong(output, 0)
+            output.writeLong(0)
+            output.writeLong(0)
+            output.writeLong(0)
             output.flush()
         }
     }
@@ -71,16 +76,20 @@ class MemoryModule {
                 val advancedInfo = getAdvancedMemoryInfo(memInfo)
                 
                 // 记录系统内存信息（用于调试）
-                Logger.log("System memory - Total: ${systemMemInfo.totalMem / 1024 / 1024}MB, " +
-                          "Available: ${systemMemInfo.availMem / 1024 / 1024}MB, " +
-                          "Threshold: ${systemMemInfo.threshold / 1024 / 1024}MB, " +
-                          "LowMemory: ${systemMemInfo.lowMemory}")
+                Logger.debug {
+                    "System memory - Total: ${systemMemInfo.totalMem / 1024 / 1024}MB, " +
+                        "Available: ${systemMemInfo.availMem / 1024 / 1024}MB, " +
+                        "Threshold: ${systemMemInfo.threshold / 1024 / 1024}MB, " +
+                        "LowMemory: ${systemMemInfo.lowMemory}"
+                }
                 
                 // 记录高级内存信息（如果可用）
                 if (advancedInfo != null) {
-                    Logger.log("Advanced memory info - SwappedOut: ${advancedInfo.totalSwappedOut}KB, " +
-                              "SwappedOutPss: ${advancedInfo.totalSwappedOutPss}KB, " +
-                              "HasSwappedOutPss: ${advancedInfo.hasSwappedOutPss}")
+                    Logger.debug {
+                        "Advanced memory info - SwappedOut: ${advancedInfo.totalSwappedOut}KB, " +
+                            "SwappedOutPss: ${advancedInfo.totalSwappedOutPss}KB, " +
+                            "HasSwappedOutPss: ${advancedInfo.hasSwappedOutPss}"
+                    }
                 }
                 
                 return MemoryInfo(
@@ -0,0 +1,164 @@
+package com.panda.modules
+
+import com.panda.utils.BinaryEncoder
+import com.panda.utils.Logger
+import java.util.concurrent.ConcurrentHashMap
+
+/**
+ * 进程级共享指标采样器
+ * 所有连接共用同一组采集模块，避免每个连接各自维护增量状态、重复读取 /proc 和 sysfs：
+ * - 每个指标（及其 PID/TID/UID 参数）的结果缓存为编码后的响应字节，带采样时间戳
+ * - 缓存按指标设置 TTL，TTL 内的请求直接复用同一份结果；
+ *   订阅推送（命令 210）按自己的间隔限制样本的最大年龄，间隔短于 TTL 时每次推送仍是新样本
+ * - 单飞保护：同一指标同时只有一个线程在采集，其余请求等待并复用该次结果
+ * - 200/201/213 共用同一次 /proc/stat 读取，201/213 共用同一次各核心增量计算
+ */
+class MetricSampler private constructor() {
+
+    // 共享的采集模块（进程内唯一）
+    val cpuModule = CpuModule()
+    val gpuModule = GpuModule()
+    val fpsModule = FpsModule()
+    val memoryModule = MemoryModule()
+    val batteryModule = BatteryModule()
+    val networkStatsModule = NetworkStatsModule()
+
+    /**
+     * 一次采样结果：与对应命令响应格式相同的字节，以及采样时间（ms）
+     */
+    class Sample(val data: ByteArray, val timestamp: Long)
+
+    private data class Key(val metric: Int, val arg1: Int, val arg2: Int)
+
+    private class Entry {
+        @Volatile
+        var sample: Sample? = null
+        @Volatile
+        var sampledAt = 0L  // System.nanoTime()
+    }
+
+    private val entries = ConcurrentHashMap<Key, Entry>()
+
+    private val procStatLock = Any()
+    @Volatile
+    private var procStat: CpuModule.ProcStat? = null
+    @Volatile
+    private var procStatAt = 0L
+
+    /**
+     * 写入指标的缓存结果
+     * arg1/arg2: 205 为 PID, 207 为 PID + TID, 215 为窗口(ms), 230 为 UID, 其余指标忽略
+     * @param maxAgeNanos 可复用的缓存结果的最大年龄，与指标的 TTL 取较小值
+     */
+    fun write(output: BinaryEncoder, metric: Int, arg1: Int = 0, arg2: Int = 0, maxAgeNanos: Long = Long.MAX_VALUE) {
+        output.write(sample(metric, arg1, arg2, maxAgeNanos).data)
+    }
+
+    /**
+     * 获取指标结果，缓存未过期时直接返回，否则由一个线程采集、其余线程等待
+     */
+    fun sample(metric: Int, arg1: Int = 0, arg2: Int = 0, maxAgeNanos: Long = Long.MAX_VALUE): Sample {
+        val key = Key(metric, arg1, arg2)
+        val entry = entries[key] ?: Entry().let { entries.putIfAbsent(key, it) ?: it }
+        val ttl = minOf(ttlNanos(metric), maxAgeNanos)
+
+        entry.sample?.let { if (System.nanoTime() - entry.sampledAt < ttl) return it }
+        synchronized(entry) {
+            // 等待期间可能已被其他线程刷新
+            entry.sample?.let { if (System.nanoTime() - entry.sampledAt < ttl) return it }
+            val start = System.nanoTime()
+            val sample = Sample(produce(metric, arg1, arg2, ttl), System.currentTimeMillis())
+            entry.sample = sample
+            entry.sampledAt = start
+            if (entries.size > MAX_ENTRIES) {
+                evictStale(start)
+            }
+            return sample
+        }
+    }
+
+    /**
+     * /proc/stat 的 cpu 行，按 CPU 指标的 TTL（或更小的 maxAgeNanos）缓存
+     */
+    fun procStat(maxAgeNanos: Long = Long.MAX_VALUE): CpuModule.ProcStat {
+        val ttl = minOf(ttlNanos(200), maxAgeNanos)
+        procStat?.let { if (System.nanoTime() - procStatAt < ttl) return it }
+        synchronized(procStatLock) {
+            val now = System.nanoTime()
+            procStat?.let { if (now - procStatAt < ttl) return it }
+            return cpuModule.readProcStat().also {
+                procStat = it
+                procStatAt = now
+            }
+        }
+    }
+
+    private fun produce(metric: Int, arg1: Int, arg2: Int, maxAgeNanos: Long): ByteArray {
+        val output = BinaryEncoder(bufferSize = 256)
+        when (metric) {
+            200 -> cpuModule.writeCpuUsage(procStat(maxAgeNanos), output)
+            201 -> cpuModule.writeCpuCoreUsage(procStat(maxAgeNanos), output)
+            202 -> cpuModule.getCpuFreq(output)
+            203 -> gpuModule.getGpuUsage(output)
+            204 -> fpsModule.getFps(output)
+            205 -> memoryModule.writeMemoryUsage(arg1, output)
+            206 -> cpuModule.getCpuTemperature(output)
+            207 -> cpuModule.writeThreadCpuUsage(arg1, arg2, output)
+            213 -> cpuModule.writeCpuTopologyUsage(procStat(maxAgeNanos), output)
+            215 -> fpsModule.writeFrameStats(arg1, output)
+            220 -> batteryModule.getBatteryInfo(output)
+            221 -> batteryModule.getBatteryLevel(output)
+            230 -> networkStatsModule.writeNetworkUsage(arg1, output)
+            231 -> networkStatsModule.getTotalNetworkUsage(output)
+            else -> throw IllegalArgumentException("Unsupported metric: $metric")
+        }
+        return output.toByteArray()
+    }
+
+    /**
+     * 清理长时间未访问的按 PID/UID 缓存项
+     */
+    private fun evictStale(now: Long) {
+        val iterator = entries.values.iterator()
+        var removed = 0
+        while (iterator.hasNext()) {
+            if (now - iterator.next().sampledAt > STALE_NANOS) {
+                iterator.remove()
+                removed++
+            }
+        }
+        Logger.log("MetricSampler: evicted $removed stale entries")
+    }
+
+    companion object {
+        val SUPPORTED_METRICS = setOf(200, 201, 202, 203, 204, 205, 206, 207, 213, 215, 220, 221, 230, 231)
+
+        private const val MAX_ENTRIES = 256
+        private const val STALE_NANOS = 60_000_000_000L
+
+        @Volatile
+        private var instance: MetricSampler? = null
+
+        fun getInstance(): MetricSampler {
+            return instance ?: synchronized(this) {
+                instance ?: MetricSampler().also { instance = it }
+            }
+        }
+
+        /**
+         * 各指标的缓存时间：sysfs/proc 读取便宜，TTL 短；
+         * 内存（Binder 调用）较贵，TTL 长；
+         * 网络统计的查询结果已由 NetworkStatsModule 的全 UID 快照缓存（500ms），这里只缓存编码后的字节
+         */
+        private fun ttlNanos(metric: Int): Long {
+            val ms = when (metric) {
+                200, 201, 202, 203, 207, 213, 230, 231 -> 50L
+                204, 215 -> 100L
+                205, 220 -> 200L
+                206, 221 -> 1000L
+                else -> 0L
+            }
+            return ms * 1_000_000L
+        }
+    }
+}
@@ -0,0 +1,237 @@
+package com.panda.modules
+
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
+import com.panda.utils.Logger
+import java.io.ByteArrayInputStream
+import java.io.EOFException
+import java.util.concurrent.Executors
+import java.util.concurrent.ScheduledExecutorService
+import java.util.concurrent.TimeUnit
+
+/**
+ * 性能指标订阅与批量查询模块
+ * 客户端订阅一组指标后，由服务端调度线程按固定间隔采样并主动推送快照，
+ * 省去逐条请求的往返，采样节奏也不受客户端计时抖动影响；
+ * 仍需轮询的客户端可用批量查询一次取回多个指标
+ */
+class MetricsModule {
+
+    private val sampler = MetricSampler.getInstance()
+
+    @Volatile
+    private var scheduler: ScheduledExecutorService? = null
+
+    /**
+     * 命令 210: 订阅性能指标
+     * 请求: 间隔(int ms), PID(int 205 使用), UID(int 230 使用), 指标数量(int), 指标命令码(int[])
+     * 响应: 状态(int 0=成功)，之后按间隔推送帧，直到命令 211:
+     *   帧长度(int) + 时间戳(long ms) + 序号(int) + 各指标数据
+     *   各指标数据与对应命令的响应格式相同，按订阅顺序排列
+     *   采样出错时推送在帧长度位置写入 writeError 后结束，客户端仍需发送 211 取得结束帧
+     * 支持的指标: 200, 201, 202, 203, 204, 205, 206, 213, 220, 221, 230, 231
+     * 指标数量须为 1 到支持的指标数，否则不读取指标命令码直接返回错误（与 233 相同）
+     * 间隔不小于 MIN_INTERVAL_MS；每次推送的样本距推送时不超过半个间隔（不复用更早的共享缓存），
+     * 但部分指标本身的分辨率更粗：CPU 使用率以 jiffy（10ms）计，204 为最近 1 秒的平均帧率，
+     * 230/231 来自 500ms 的全 UID 快照，温度和电量取决于驱动的更新频率
+     * 订阅期间该连接只应再发送命令 211
+     */
+    fun subscribe(input: BinaryDecoder, output: BinaryEncoder) {
+        val interval = input.readInt()
+        val pid = input.readInt()
+        val uid = input.readInt()
+        val count = input.readInt()
+        // 先校验数量再分配和读取：过大的值会 OOM 或一直阻塞等待不存在的数据
+        if (count < 1 || count > SUPPORTED_METRICS.size) {
+            output.writeError(-1, "Invalid metric count: $count")
+            return
+        }
+        val metrics = IntArray(count)
+        input.readIntArray(metrics)
+
+        val unsupported = metrics.firstOrNull { it !in SUPPORTED_METRICS }
+        if (unsupported != null) {
+            output.writeError(-1, "Unsupported metric: $unsupported")
+            return
+        }
+        if (interval < MIN_INTERVAL_MS) {
+            output.writeError(-1, "Invalid subscription interval: ${interval}ms")
+            return
+        }
+
+        stopScheduler()
+        output.writeSuccess()
+        output.flush()
+
+        // 推送帧在内存中编码（帧长度 + 内容），采样不持有连接的锁
+        val frame = BinaryEncoder(bufferSize = 256)
+        var sequence = 0
+        // 只复用半个间隔内的共享样本：间隔短于采样器 TTL 时不会重复推送同一份结果
+        val maxAgeNanos = interval * 1_000_000L / 2
+        val executor = Executors.newSingleThreadScheduledExecutor { runnable ->
+            Thread(runnable, "metrics-push").apply { isDaemon = true }
+        }
+        scheduler = executor
+        executor.scheduleAtFixedRate({
+            try {
+                frame.reset()
+                frame.frame {
+                    frame.writeLong(System.currentTimeMillis())
+                    frame.writeInt(sequence++)
+                    for (metric in metrics) {
+                        writeMetric(metric, pid, 0, uid, frame, maxAgeNanos)
+                    }
+                }
+            } catch (e: Exception) {
+                // 采样失败：帧长度位置写入错误（-1 + 错误信息）并结束推送，
+                // 否则异常会使调度静默取消，客户端一直等不到下一帧
+                Logger.error("Metrics subscription sampling failed", e)
+                frame.reset()
+                frame.writeError(-1, "Sampling failed: ${e.message ?: e.javaClass.simpleName}")
+                executor.shutdown()
+            }
+            try {
+                synchronized(output) {
+                    frame.writeTo(output)
+                    output.flush()
+                }
+            } catch (e: Exception) {
+                // 连接已断开：停止调度（关闭后周期任务不再执行）
+                Logger.log("Metrics subscription closed: ${e.message}")
+                executor.shutdown()
+            }
+        }, 0, interval.toLong(), TimeUnit.MILLISECONDS)
+
+        Logger.log("Metrics subscribed: ${metrics.joinToString()} every ${interval}ms (pid=$pid, uid=$uid)")
+    }
+
+    /**
+     * 命令 211: 取消订阅
+     * 等待正在进行的采样推送完成后写入长度为 0 的结束帧，此后连接可继续正常使用
+     */
+    fun unsubscribe(output: BinaryEncoder) {
+        stopScheduler()
+        synchronized(output) {
+            output.writeInt(0)
+        }
+        Logger.log("Metrics unsubscribed")
+    }
+
+    /**
+     * 命令 212: 批量查询指标
+     * 请求: 请求体长度(int) + 请求体: 指标数量(int), 每个指标为 命令码(int) + 参数:
+     *   205: PID(int), 207: PID(int) + TID(int), 215: 窗口(int ms), 230: UID(int), 其余无参数
+     * 响应: 数据长度(int) + 各指标数据（与对应命令的响应格式相同，按请求顺序），出错时为 writeError
+     * 参数个数取决于命令码，遇到不支持的指标时无法跳过该项；请求体整体读入后再解析，
+     * 出错时剩余部分已经读完，连接不会错位
+     * 一次分发、一次刷新；结果来自共享采样器，200/201/213 共用同一次 /proc/stat 读取
+     */
+    fun queryBatch(input: BinaryDecoder, output: BinaryEncoder) {
+        val length = input.readInt()
+        if (length < 4 || length > MAX_BATCH_BYTES) {
+            if (length > 0) discard(input, length)
+            output.writeError(-1, "Invalid batch request size: $length")
+            return
+        }
+        val body = ByteArray(length)
+        input.readFully(body, 0, length)
+
+        val requests = try {
+            parseBatch(BinaryDecoder(ByteArrayInputStream(body)), length)
+        } catch (e: IllegalArgumentException) {
+            output.writeError(-1, e.message ?: "Invalid batch request")
+            return
+        } catch (e: EOFException) {
+            output.writeError(-1, "Truncated batch request")
+            return
+        }
+
+        output.frame {
+            for (request in requests) {
+                writeMetric(request[0], request[1], request[2], request[3], output)
+            }
+        }
+        output.flush()
+        Logger.debug { "Metrics batch: ${requests.joinToString { it[0].toString() }}" }
+    }
+
+    /**
+     * 连接关闭时停止推送
+     */
+    fun close() {
+        stopScheduler()
+    }
+
+    /**
+     * 从共享采样器写入单个指标，格式与对应命令的响应相同
+     */
+    private fun writeMetric(
+        metric: Int,
+        pid: Int,
+        tid: Int,
+        uid: Int,
+        output: BinaryEncoder,
+        maxAgeNanos: Long = Long.MAX_VALUE
+    ) {
+        when (metric) {
+            205 -> sampler.write(output, metric, pid, maxAgeNanos = maxAgeNanos)
+            207 -> sampler.write(output, metric, pid, tid, maxAgeNanos)
+            215, 230 -> sampler.write(output, metric, uid, maxAgeNanos = maxAgeNanos)
+            else -> sampler.write(output, metric, maxAgeNanos = maxAgeNanos)
+        }
+    }
+
+    /**
+     * 解析 212 的请求体，返回 [命令码, PID, TID, UID/窗口]
+     */
+    private fun parseBatch(body: BinaryDecoder, length: Int): List<IntArray> {
+        val count = body.readInt()
+        // 每个指标至少占 4 字节
+        require(count >= 0 && count <= (length - 4) / 4) { "Invalid metric count: $count" }
+        val requests = ArrayList<IntArray>(count)
+        for (i in 0 until count) {
+            val metric = body.readInt()
+            require(metric in BATCH_METRICS) { "Unsupported metric: $metric" }
+            val pid = if (metric == 205 || metric == 207) body.readInt() else 0
+            val tid = if (metric == 207) body.readInt() else 0
+            val uid = if (metric == 230 || metric == 215) body.readInt() else 0
+            requests.add(intArrayOf(metric, pid, tid, uid))
+        }
+        return requests
+    }
+
+    /**
+     * 读取并丢弃 length 字节（超出上限的请求体），保持连接同步
+     */
+    private fun discard(input: BinaryDecoder, length: Int) {
+        val buffer = ByteArray(minOf(length, 8192))
+        var remaining = length
+        while (remaining > 0) {
+            val chunk = minOf(remaining, buffer.size)
+            input.readFully(buffer, 0, chunk)
+            remaining -= chunk
+        }
+    }
+
+    private fun stopScheduler() {
+        val executor = scheduler ?: return
+        scheduler = null
+        executor.shutdown()
+        try {
+            if (!executor.awaitTermination(5, TimeUnit.SECONDS)) {
+                executor.shutdownNow()
+            }
+        } catch (e: InterruptedException) {
+            executor.shutdownNow()
+        }
+    }
+
+    companion object {
+        val SUPPORTED_METRICS = setOf(200, 201, 202, 203, 204, 205, 206, 213, 220, 221, 230, 231)
+        val BATCH_METRICS = MetricSampler.SUPPORTED_METRICS
+        // /proc/stat 以 jiffy（10ms）计，更短的间隔内每个核心不足 5 个 jiffy，使用率的量化误差过大
+        const val MIN_INTERVAL_MS = 50
+        // 212 请求体上限：每个指标最多 12 字节，远超实际需要
+        const val MAX_BATCH_BYTES = 64 * 1024
+    }
+}
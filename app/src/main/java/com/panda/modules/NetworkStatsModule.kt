@@ -5,122 +5,96 @@ import android.app.usage.NetworkStats
 import android.app.usage.NetworkStatsManager
 import android.content.Context
 import android.os.Build
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.FakeContext
-import com.panda.utils.IOUtils
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
-import java.io.InputStream
 import java.lang.reflect.Field
+import java.util.Arrays
 
 /**
  * 网络流量统计模块
  * 提供按 UID 统计应用网络流量功能
  * 支持移动网络和 WiFi
  * 参考 PerfDog Console 实现
+ *
+ * 所有命令共用一份按 UID 索引的快照（进程内共享，见 MetricSampler）：
+ * 每个快照只强制刷新一次、每种网络只查询一次 querySummary，
+ * 之后任意多个 UID 的查询都是数组查找；相邻两个快照之差即为速率
  */
 @SuppressLint("PrivateApi", "DiscouragedPrivateApi")
 class NetworkStatsModule {
     
     private var networkStatsManager: NetworkStatsManager? = null
     
+    /**
+     * 一次全 UID 流量快照
+     * uids 升序排列，counters 每个 UID 4 个值：WiFi 接收, WiFi 发送, 移动接收, 移动发送
+     */
+    class Snapshot(
+        val timestamp: Long,      // System.currentTimeMillis()
+        val sampledAt: Long,      // System.nanoTime()
+        val uids: IntArray,
+        val counters: LongArray
+    ) {
+        /** UID 在快照中的下标，不存在返回负数 */
+        fun indexOf(uid: Int): Int = Arrays.binarySearch(uids, uid)
+        
+        fun counter(index: Int, field: Int): Long = if (index < 0) 0L else counters[index * FIELDS + field]
+        
+        fun rx(index: Int): Long = counter(index, WIFI_RX) + counter(index, MOBILE_RX)
+        
+        fun tx(index: Int): Long = counter(index, WIFI_TX) + counter(index, MOBILE_TX)
+    }
+    
+    private val snapshotLock = Any()
+    @Volatile
+    private var current: Snapshot? = null
+    @Volatile
+    private var previous: Snapshot? = null
+    
     /**
      * 命令 230: 获取指定 UID 的网络流量
      * 请求: UID(int)
      * 响应: 接收字节数(long), 发送字节数(long), WiFi接收(long), WiFi发送(long), 移动接收(long), 移动发送(long)
      */
-    fun getNetworkUsage(input: InputStream, output: BufferedOutputStream) {
-        try {
-            if (Build.VERSION.SDK_INT < 23) {
-                // 需要 Android 6.0+
-                Logger.log("Network stats requires Android 6.0+")
-                writeEmptyNetworkStats(output)
-                return
-            }
-            
-            val uid = IOUtils.readInt(input)
-            val context = FakeContext.get()
-            
-            // 获取 NetworkStatsManager
-            if (networkStatsManager == null) {
-                networkStatsManager = context.getSystemService(Context.NETWORK_STATS_SERVICE) as? NetworkStatsManager
-            }
-            
-            val statsManager = networkStatsManager ?: run {
-                Logger.error("NetworkStatsManager is null", null)
-                writeEmptyNetworkStats(output)
-                return
-            }
-            
-            // 通过反射设置 Context（某些版本需要）
-            try {
-                val field: Field = statsManager.javaClass.getDeclaredField("mContext")
-                field.isAccessible = true
-                field.set(statsManager, context)
-            } catch (e: Exception) {
-                // 某些版本可能没有这个字段，忽略
-                Logger.log("Could not set mContext field: ${e.message}")
-            }
-            
-            // 获取 WiFi 流量 (TYPE_WIFI = 1)
-            val wifiStats = getNetworkStatsForUid(statsManager, 1, uid)
-            
-            // 获取移动网络流量 (TYPE_MOBILE = 0)
-            val mobileStats = getNetworkStatsForUid(statsManager, 0, uid)
-            
-            // 发送数据
-            IOUtils.writeLong(output, wifiStats.rxBytes + mobileStats.rxBytes)  // 总接收
-            IOUtils.writeLong(output, wifiStats.txBytes + mobileStats.txBytes)  // 总发送
-            IOUtils.writeLong(output, wifiStats.rxBytes)  // WiFi 接收
-            IOUtils.writeLong(output, wifiStats.txBytes)  // WiFi 发送
-            IOUtils.writeLong(output, mobileStats.rxBytes)  // 移动接收
-            IOUtils.writeLong(output, mobileStats.txBytes)  // 移动发送
-            output.flush()
-            
-            Logger.log("Network stats for UID $uid: Total RX=${wifiStats.rxBytes + mobileStats.rxBytes}, TX=${wifiStats.txBytes + mobileStats.txBytes}")
-            
-        } catch (e: Exception) {
-            Logger.error("Error getting network usage", e)
-            writeEmptyNetworkStats(output)
-        }
+    fun getNetworkUsage(input: BinaryDecoder, output: BinaryEncoder) {
+        writeNetworkUsage(input.readInt(), output)
+    }
+    
+    /**
+     * 写入指定 UID 的网络流量（命令 230 的响应格式，供订阅推送复用）
+     */
+    fun writeNetworkUsage(uid: Int, output: BinaryEncoder) {
+        val snapshot = snapshot()
+        val index = snapshot.indexOf(uid)
+        output.writeLong(snapshot.rx(index))  // 总接收
+        output.writeLong(snapshot.tx(index))  // 总发送
+        output.writeLong(snapshot.counter(index, WIFI_RX))  // WiFi 接收
+        output.writeLong(snapshot.counter(index, WIFI_TX))  // WiFi 发送
+        output.writeLong(snapshot.counter(index, MOBILE_RX))  // 移动接收
+        output.writeLong(snapshot.counter(index, MOBILE_TX))  // 移动发送
+        
+        Logger.debug { "Network stats for UID $uid: Total RX=${snapshot.rx(index)}, TX=${snapshot.tx(index)}" }
     }
     
     /**
      * 命令 231: 获取总网络流量（所有 UID）
      * 响应: 接收字节数(long), 发送字节数(long)
      */
-    fun getTotalNetworkUsage(output: BufferedOutputStream) {
-        try {
-            if (Build.VERSION.SDK_INT < 23) {
-                IOUtils.writeLong(output, 0)
-                IOUtils.writeLong(output, 0)
-                return
-            }
-            
-            val context = FakeContext.get()
-            val statsManager = context.getSystemService(Context.NETWORK_STATS_SERVICE) as? NetworkStatsManager
-                ?: run {
-                    IOUtils.writeLong(output, 0)
-                    IOUtils.writeLong(output, 0)
-                    return
-                }
-            
-            // 获取所有 UID 的流量
-            val wifiStats = getAllNetworkStats(statsManager, 1)  // TYPE_WIFI = 1
-            val mobileStats = getAllNetworkStats(statsManager, 0)  // TYPE_MOBILE = 0
-            
-            val totalRx = wifiStats.rxBytes + mobileStats.rxBytes
-            val totalTx = wifiStats.txBytes + mobileStats.txBytes
-            
-            IOUtils.writeLong(output, totalRx)
-            IOUtils.writeLong(output, totalTx)
-            
-            Logger.log("Total network usage: RX=$totalRx, TX=$totalTx")
-            
-        } catch (e: Exception) {
-            Logger.error("Error getting total network usage", e)
-            IOUtils.writeLong(output, 0)
-            IOUtils.writeLong(output, 0)
+    fun getTotalNetworkUsage(output: BinaryEncoder) {
+        val snapshot = snapshot()
+        var totalRx = 0L
+        var totalTx = 0L
+        for (index in snapshot.uids.indices) {
+            totalRx += snapshot.rx(index)
+            totalTx += snapshot.tx(index)
         }
+        
+        output.writeLong(totalRx)
+        output.writeLong(totalTx)
+        
+        Logger.debug { "Total network usage: RX=$totalRx, TX=$totalTx" }
     }
     
     /**
@@ -128,184 +102,219 @@ class NetworkStatsModule {
      * 请求: 包名(string)
      * 响应: UID(int), 接收字节数(long), 发送字节数(long)
      */
-    fun getNetworkUsageByPackage(input: InputStream, output: BufferedOutputStream) {
-        try {
-            if (Build.VERSION.SDK_INT < 23) {
-                IOUtils.writeInt(output, 0)
-                IOUtils.writeLong(output, 0)
-                IOUtils.writeLong(output, 0)
-                return
+    fun getNetworkUsageByPackage(input: BinaryDecoder, output: BinaryEncoder) {
+        val packageName = input.readString()
+        
+        // 获取 UID
+        val uid = try {
+            FakeContext.get().packageManager.getApplicationInfo(packageName, 0).uid
+        } catch (e: Exception) {
+            Logger.error("Package not found: $packageName", e)
+            output.writeInt(0)
+            output.writeLong(0)
+            output.writeLong(0)
+            return
+        }
+        
+        val snapshot = snapshot()
+        val index = snapshot.indexOf(uid)
+        output.writeInt(uid)
+        output.writeLong(snapshot.rx(index))
+        output.writeLong(snapshot.tx(index))
+        
+        Logger.debug { "Network stats for $packageName (UID $uid): RX=${snapshot.rx(index)}, TX=${snapshot.tx(index)}" }
+    }
+    
+    /**
+     * 命令 233: 批量获取 UID 网络流量及速率
+     * 请求: UID 数量(int, 0 表示快照中的全部 UID), UID(int[])
+     * 响应: 行数(int), 快照时间戳(long ms), 与上一快照的间隔(int ms, 无上一快照时为 0),
+     *   每行: UID(int), WiFi接收(long), WiFi发送(long), 移动接收(long), 移动发送(long),
+     *         接收速率(float 字节/秒), 发送速率(float 字节/秒)
+     * 请求的 UID 不在快照中时该行计数为 0；速率按与上一快照的差值计算，上一快照中没有的 UID 为 0
+     */
+    fun getNetworkUsageBulk(input: BinaryDecoder, output: BinaryEncoder) {
+        val count = input.readInt()
+        if (count < 0 || count > MAX_BULK_UIDS) {
+            output.writeError(-1, "Invalid UID count: $count")
+            return
+        }
+        val requested = IntArray(count)
+        input.readIntArray(requested)
+        
+        val (snapshot, last) = synchronized(snapshotLock) {
+            val snapshot = snapshot()
+            Pair(snapshot, previous)
+        }
+        val uids = if (count == 0) snapshot.uids else requested
+        val seconds = if (last != null) (snapshot.sampledAt - last.sampledAt) / 1e9 else 0.0
+        
+        output.writeInt(uids.size)
+        output.writeLong(snapshot.timestamp)
+        output.writeInt((seconds * 1000).toInt())
+        for (uid in uids) {
+            val index = snapshot.indexOf(uid)
+            output.writeInt(uid)
+            output.writeLong(snapshot.counter(index, WIFI_RX))
+            output.writeLong(snapshot.counter(index, WIFI_TX))
+            output.writeLong(snapshot.counter(index, MOBILE_RX))
+            output.writeLong(snapshot.counter(index, MOBILE_TX))
+            
+            val lastIndex = last?.indexOf(uid) ?: -1
+            if (last != null && index >= 0 && lastIndex >= 0 && seconds > 0) {
+                // 计数器重置时差值为负，速率记为 0
+                output.writeFloat((maxOf(0L, snapshot.rx(index) - last.rx(lastIndex)) / seconds).toFloat())
+                output.writeFloat((maxOf(0L, snapshot.tx(index) - last.tx(lastIndex)) / seconds).toFloat())
+            } else {
+                output.writeFloat(0f)
+                output.writeFloat(0f)
             }
-            
-            val packageName = IOUtils.readString(input)
-            val context = FakeContext.get()
-            val pm = context.packageManager
-            
-            // 获取 UID
-            val appInfo = try {
-                pm.getApplicationInfo(packageName, 0)
+        }
+        
+        Logger.debug { "Network bulk: ${uids.size} UIDs, interval ${(seconds * 1000).toInt()}ms" }
+    }
+    
+    /**
+     * 当前快照，超过 500ms 时由一个线程重新采集，其余线程等待并复用
+     * 不抛出异常：采集失败时返回空快照
+     */
+    fun snapshot(): Snapshot {
+        current?.let { if (System.nanoTime() - it.sampledAt < SNAPSHOT_TTL_NANOS) return it }
+        synchronized(snapshotLock) {
+            current?.let { if (System.nanoTime() - it.sampledAt < SNAPSHOT_TTL_NANOS) return it }
+            val snapshot = try {
+                takeSnapshot()
             } catch (e: Exception) {
-                Logger.error("Package not found: $packageName", e)
-                IOUtils.writeInt(output, 0)
-                IOUtils.writeLong(output, 0)
-                IOUtils.writeLong(output, 0)
-                return
+                // 采集失败时所有 UID 计数为 0，不缓存，也不影响速率的基准快照；
+                // 230/231 在订阅推送中使用，异常不能传播到推送线程
+                Logger.error("Error taking network stats snapshot", e)
+                return Snapshot(System.currentTimeMillis(), System.nanoTime(), IntArray(0), LongArray(0))
             }
-            
-            val uid = appInfo.uid
-            
-            // 获取流量
-            val statsManager = context.getSystemService(Context.NETWORK_STATS_SERVICE) as? NetworkStatsManager
-                ?: run {
-                    IOUtils.writeInt(output, uid)
-                    IOUtils.writeLong(output, 0)
-                    IOUtils.writeLong(output, 0)
-                    return
-                }
-            
-            val wifiStats = getNetworkStatsForUid(statsManager, 1, uid)  // TYPE_WIFI = 1
-            val mobileStats = getNetworkStatsForUid(statsManager, 0, uid)  // TYPE_MOBILE = 0
-            
-            IOUtils.writeInt(output, uid)
-            IOUtils.writeLong(output, wifiStats.rxBytes + mobileStats.rxBytes)
-            IOUtils.writeLong(output, wifiStats.txBytes + mobileStats.txBytes)
-            
-            Logger.log("Network stats for $packageName (UID $uid): RX=${wifiStats.rxBytes + mobileStats.rxBytes}, TX=${wifiStats.txBytes + mobileStats.txBytes}")
-            
-        } catch (e: Exception) {
-            Logger.error("Error getting network usage by package", e)
-            IOUtils.writeInt(output, 0)
-            IOUtils.writeLong(output, 0)
-            IOUtils.writeLong(output, 0)
+            previous = current
+            current = snapshot
+            return snapshot
         }
     }
     
     // ========== 内部实现方法 ==========
     
     /**
-     * 获取指定 UID 的网络流量
-     * 参考 PerfDog Console 实现：
-     * 1. 强制刷新统计数据 (setPollForce(true))
-     * 2. 查询并立即关闭以触发刷新
-     * 3. 恢复正常轮询 (setPollForce(false))
-     * 4. 再次查询用于统计指定 UID 的流量
-     * 
-     * @param networkType 网络类型：0=TYPE_MOBILE, 1=TYPE_WIFI
-     * @param uid 应用 UID
+     * 采集全 UID 快照
+     * 参考 PerfDog Console 实现：setPollForce(true) 后的查询会先强制刷新统计数据，
+     * 因此只需在第一次查询前开启、之后恢复正常轮询；每种网络只遍历一次全部 bucket
      */
-    private fun getNetworkStatsForUid(
-        statsManager: NetworkStatsManager,
-        networkType: Int,
-        uid: Int
-    ): NetworkStatsData {
-        var rxBytes = 0L
-        var txBytes = 0L
+    private fun takeSnapshot(): Snapshot {
+        val timestamp = System.currentTimeMillis()
+        val sampledAt = System.nanoTime()
+        val statsManager = loadStatsManager()
+        if (statsManager == null) {
+            return Snapshot(timestamp, sampledAt, IntArray(0), LongArray(0))
+        }
         
+        // UID -> [WiFi 接收, WiFi 发送, 移动接收, 移动发送]
+        val index = HashMap<Int, LongArray>(256)
+        setPollForce(statsManager, true)
         try {
-            // 强制刷新统计数据（参考 PerfDog Console）
-            try {
-                val setPollForceMethod = statsManager.javaClass.getMethod("setPollForce", Boolean::class.javaPrimitiveType)
-                setPollForceMethod.invoke(statsManager, true)
-            } catch (e: Exception) {
-                // 某些版本可能没有这个方法，忽略
-            }
-            
-            // 先查询并关闭以触发刷新（参考 PerfDog Console 流程）
-            val refreshStats = statsManager.querySummary(
-                networkType,
-                null,  // subscriberId
-                Long.MIN_VALUE,  // startTime
-                Long.MAX_VALUE   // endTime
-            )
-            refreshStats.close()
-            
+            collect(statsManager, 1, WIFI_RX, index)    // TYPE_WIFI = 1
+        } finally {
             // 恢复正常轮询
-            try {
-                val setPollForceMethod = statsManager.javaClass.getMethod("setPollForce", Boolean::class.javaPrimitiveType)
-                setPollForceMethod.invoke(statsManager, false)
-            } catch (e: Exception) {
-                // 忽略
-            }
-            
-            // 再次查询用于统计（参考 PerfDog Console）
-            val networkStats = statsManager.querySummary(
-                networkType,
-                null,
-                Long.MIN_VALUE,
-                Long.MAX_VALUE
-            )
-            
-            val bucket = NetworkStats.Bucket()
-            while (networkStats.getNextBucket(bucket)) {
-                if (bucket.uid == uid && bucket.tag == 0) {
-                    // tag == 0 表示应用流量（不包括系统标签的流量）
-                    rxBytes += bucket.rxBytes
-                    txBytes += bucket.txBytes
-                }
-            }
-            
-            networkStats.close()
-            
-        } catch (e: Exception) {
-            Logger.error("Error querying network stats for UID $uid, type $networkType", e)
+            setPollForce(statsManager, false)
         }
+        collect(statsManager, 0, MOBILE_RX, index)      // TYPE_MOBILE = 0
         
-        return NetworkStatsData(rxBytes, txBytes)
+        val uids = index.keys.toIntArray()
+        uids.sort()
+        val counters = LongArray(uids.size * FIELDS)
+        for (i in uids.indices) {
+            System.arraycopy(index[uids[i]]!!, 0, counters, i * FIELDS, FIELDS)
+        }
+        Logger.debug { "Network snapshot: ${uids.size} UIDs in ${(System.nanoTime() - sampledAt) / 1_000_000}ms" }
+        return Snapshot(timestamp, sampledAt, uids, counters)
     }
     
     /**
-     * 获取所有 UID 的网络流量总和
+     * 累加一种网络的全部 bucket（tag == 0 表示应用流量，不包括系统标签的流量）
+     * @param rxField 该网络接收字节在计数数组中的位置，发送字节紧随其后
      */
-    private fun getAllNetworkStats(
+    private fun collect(
         statsManager: NetworkStatsManager,
-        networkType: Int
-    ): NetworkStatsData {
-        var rxBytes = 0L
-        var txBytes = 0L
-        
+        networkType: Int,
+        rxField: Int,
+        index: HashMap<Int, LongArray>
+    ) {
         try {
             val networkStats = statsManager.querySummary(
                 networkType,
-                null,
-                Long.MIN_VALUE,
-                Long.MAX_VALUE
+                null,  // subscriberId
+                Long.MIN_VALUE,  // startTime
+                Long.MAX_VALUE   // endTime
             )
             
-            val bucket = NetworkStats.Bucket()
-            while (networkStats.getNextBucket(bucket)) {
-                if (bucket.tag == 0) {
-                    rxBytes += bucket.rxBytes
-                    txBytes += bucket.txBytes
+            try {
+                val bucket = NetworkStats.Bucket()
+                while (networkStats.getNextBucket(bucket)) {
+                    if (bucket.tag != 0) continue
+                    var counters = index[bucket.uid]
+                    if (counters == null) {
+                        counters = LongArray(FIELDS)
+                        index[bucket.uid] = counters
+                    }
+                    counters[rxField] += bucket.rxBytes
+                    counters[rxField + 1] += bucket.txBytes
                 }
+            } finally {
+                networkStats.close()
             }
-            
-            networkStats.close()
-            
         } catch (e: Exception) {
-            Logger.error("Error querying all network stats for type $networkType", e)
+            Logger.error("Error querying network stats for type $networkType", e)
+        }
+    }
+    
+    private fun loadStatsManager(): NetworkStatsManager? {
+        if (Build.VERSION.SDK_INT < 23) {
+            // 需要 Android 6.0+
+            Logger.log("Network stats requires Android 6.0+")
+            return null
         }
+        networkStatsManager?.let { return it }
         
-        return NetworkStatsData(rxBytes, txBytes)
+        val context = FakeContext.get()
+        val statsManager = context.getSystemService(Context.NETWORK_STATS_SERVICE) as? NetworkStatsManager
+        if (statsManager == null) {
+            Logger.error("NetworkStatsManager is null", null)
+            return null
+        }
+        
+        // 通过反射设置 Context（某些版本需要）
+        try {
+            val field: Field = statsManager.javaClass.getDeclaredField("mContext")
+            field.isAccessible = true
+            field.set(statsManager, context)
+        } catch (e: Exception) {
+            // 某些版本可能没有这个字段，忽略
+            Logger.log("Could not set mContext field: ${e.message}")
+        }
+        networkStatsManager = statsManager
+        return statsManager
     }
     
-    /**
-     * 写入空的网络统计数据
-     */
-    private fun writeEmptyNetworkStats(output: BufferedOutputStream) {
-        IOUtils.writeLong(output, 0)
-        IOUtils.writeLong(output, 0)
-        IOUtils.writeLong(output, 0)
-        IOUtils.writeLong(output, 0)
-        IOUtils.writeLong(output, 0)
-        IOUtils.writeLong(output, 0)
+    private fun setPollForce(statsManager: NetworkStatsManager, force: Boolean) {
+        try {
+            val setPollForceMethod = statsManager.javaClass.getMethod("setPollForce", Boolean::class.javaPrimitiveType)
+            setPollForceMethod.invoke(statsManager, force)
+        } catch (e: Exception) {
+            // 某些版本可能没有这个方法，忽略
+        }
     }
     
-    /**
-     * 网络统计数据类
-     */
-    private data class NetworkStatsData(
-        val rxBytes: Long,
-        val txBytes: Long
-    )
+    companion object {
+        const val WIFI_RX = 0
+        const val WIFI_TX = 1
+        const val MOBILE_RX = 2
+        const val MOBILE_TX = 3
+        private const val FIELDS = 4
+        
+        private const val SNAPSHOT_TTL_NANOS = 500_000_000L
+        private const val MAX_BULK_UIDS = 65536
+    }
 }
-
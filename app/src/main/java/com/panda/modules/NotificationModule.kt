@@ -6,10 +6,9 @@ import android.content.ComponentName
 import android.service.notification.StatusBarNotification
 import com.panda.mirror.INotificationManagerMirror
 import com.panda.mirror.ServiceManagerMirror
-import com.panda.utils.IOUtils
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
-import java.io.InputStream
 
 /**
  * 通知管理模块
@@ -32,7 +31,7 @@ class NotificationModule {
     /**
      * 命令 80: 获取所有活动通知列表
      */
-    fun getNotifications(input: InputStream, output: BufferedOutputStream) {
+    fun getNotifications(input: BinaryDecoder, output: BinaryEncoder) {
         try {
             val nm = getNotificationManager()
             
@@ -48,7 +47,7 @@ class NotificationModule {
             val notifications = getActiveNotifications(nm, notificationListener)
             
             // 发送通知数量
-            IOUtils.writeInt(output, notifications.size)
+            output.writeInt(notifications.size)
             
             // 发送每个通知的详细信息
             for (notification in notifications) {
@@ -68,16 +67,16 @@ class NotificationModule {
             
         } catch (e: Exception) {
             Logger.error("Error getting notifications", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
     /**
      * 命令 81: 取消指定通知
      */
-    fun cancelNotification(input: InputStream) {
+    fun cancelNotification(input: BinaryDecoder) {
         try {
-            val key = IOUtils.readString(input)
+            val key = input.readString()
             val nm = getNotificationManager()
             
             INotificationManagerMirror.cancelNotificationsFromListener.call(
@@ -95,10 +94,10 @@ class NotificationModule {
     /**
      * 命令 82: 打开或响应通知
      */
-    fun openNotification(input: InputStream) {
+    fun openNotification(input: BinaryDecoder) {
         try {
-            val key = IOUtils.readString(input)
-            val actionType = IOUtils.readInt(input)
+            val key = input.readString()
+            val actionType = input.readInt()
             
             val nm = getNotificationManager()
             
@@ -122,8 +121,8 @@ class NotificationModule {
                 }
                 1 -> {
                     // 执行动作
-                    val actionIndex = IOUtils.readInt(input)
-                    val inputText = IOUtils.readString(input)
+                    val actionIndex = input.readInt()
+                    val inputText = input.readString()
                     
                     val action = notification.notification.actions?.getOrNull(actionIndex)
                     if (action != null) {
@@ -186,33 +185,33 @@ class NotificationModule {
     /**
      * 写入通知信息
      */
-    private fun writeNotification(output: BufferedOutputStream, sbn: StatusBarNotification) {
+    private fun writeNotification(output: BinaryEncoder, sbn: StatusBarNotification) {
         val notification = sbn.notification
         
         // Key
-        IOUtils.writeString(output, sbn.key)
+        output.writeString(sbn.key)
         // 包名
-        IOUtils.writeString(output, sbn.packageName)
+        output.writeString(sbn.packageName)
         // 标题
         val title = notification.extras.getCharSequence("android.title")?.toString() ?: ""
-        IOUtils.writeString(output, title)
+        output.writeString(title)
         // 内容
         val text = notification.extras.getCharSequence("android.text")?.toString() ?: ""
-        IOUtils.writeString(output, text)
+        output.writeString(text)
         // 时间戳
-        IOUtils.writeLong(output, sbn.postTime)
+        output.writeLong(sbn.postTime)
         // 是否可清除
-        IOUtils.writeBoolean(output, sbn.isClearable)
+        output.writeBoolean(sbn.isClearable)
         
         // 动作数量
         val actions = notification.actions ?: emptyArray()
-        IOUtils.writeInt(output, actions.size)
+        output.writeInt(actions.size)
         
         // 每个动作的信息
         for (action in actions) {
-            IOUtils.writeString(output, action.title?.toString() ?: "")
+            output.writeString(action.title?.toString() ?: "")
             val hasInput = action.remoteInputs != null && action.remoteInputs.isNotEmpty()
-            IOUtils.writeBoolean(output, hasInput)
+            output.writeBoolean(hasInput)
         }
     }
     
@@ -0,0 +1,163 @@
+package com.panda.modules
+
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
+import com.panda.utils.DisplayCaptureSource
+import com.panda.utils.FrameStream
+import com.panda.utils.ImageFormat
+import com.panda.utils.Logger
+import java.io.IOException
+import java.util.concurrent.atomic.AtomicBoolean
+import java.util.concurrent.locks.LockSupport
+
+/**
+ * 屏幕帧推送模块
+ * 客户端开始推送后，由推送线程按目标帧率连续截图并推送长度前缀帧：
+ * - 截图目标（显示 Token、尺寸）与像素/帧缓冲区在推送期间复用，不再每帧反射查询
+ * - 内容未变化的帧不编码也不发送
+ * - 背压：帧直接写入连接，客户端读取不及时时写入阻塞，推送线程不会堆积帧；
+ *   错过的周期不补发，计数后附在下一帧中
+ * - 每个推送线程有自己的运行标志：停止时 join 超时的旧线程也不会在新推送开始后恢复写入
+ */
+class ScreenStreamModule {
+
+    /** 推送线程及其运行标志（标志由线程捕获，只对该线程有效） */
+    private class Worker(val thread: Thread, val running: AtomicBoolean)
+
+    @Volatile
+    private var worker: Worker? = null
+
+    private val failureLog = Logger.RateLimit(5000)
+
+    /**
+     * 命令 122: 开始推送屏幕帧
+     * 请求: 格式(int, 同命令 121), 质量(int), 最长边上限(int), 目标帧率(int 1-60)
+     * 响应: 状态(int 0=成功)，之后推送帧（格式见 FrameStream.next），直到命令 123
+     * 推送期间该连接只应再发送命令 123
+     */
+    fun start(input: BinaryDecoder, output: BinaryEncoder) {
+        val formatCode = input.readInt()
+        val quality = input.readInt()
+        val maxSize = input.readInt()
+        val fps = input.readInt()
+
+        val format = ImageFormat.fromCode(formatCode)
+        if (format == null) {
+            output.writeError(-1, "Unsupported image format: $formatCode")
+            return
+        }
+        if (fps < 1 || fps > MAX_FPS) {
+            output.writeError(-1, "Invalid frame rate: $fps")
+            return
+        }
+
+        stopWorker()
+        output.writeSuccess()
+        output.flush()
+
+        val context = com.panda.utils.FakeContext.get()
+        val stream = FrameStream(
+            listOf(DisplayCaptureSource(context, DISPLAY_REFRESH_MS), UiAutomationCaptureSource),
+            format, quality, maxSize
+        )
+        val intervalNanos = 1_000_000_000L / fps
+        val running = AtomicBoolean(true)
+        val thread = Thread({ run(stream, intervalNanos, output, running) }, "screen-stream")
+        thread.isDaemon = true
+        worker = Worker(thread, running)
+        thread.start()
+
+        Logger.log("Screen stream started: $format q=$quality maxSize=$maxSize ${fps}fps")
+    }
+
+    /**
+     * 命令 123: 停止推送
+     * 等待正在推送的帧写完后写入长度为 0 的结束帧，此后连接可继续正常使用
+     */
+    fun stop(output: BinaryEncoder) {
+        stopWorker()
+        synchronized(output) {
+            output.writeInt(0)
+        }
+        Logger.log("Screen stream stopped")
+    }
+
+    /**
+     * 连接关闭时停止推送
+     */
+    fun close() {
+        stopWorker()
+    }
+
+    private fun run(stream: FrameStream, intervalNanos: Long, output: BinaryEncoder, running: AtomicBoolean) {
+        var next = System.nanoTime()
+        var late = 0
+        var sent = 0
+        try {
+            while (running.get()) {
+                val wait = next - System.nanoTime()
+                if (wait > 0) {
+                    LockSupport.parkNanos(this, wait)
+                    continue
+                }
+
+                val encoded = try {
+                    stream.next(late)
+                } catch (e: Exception) {
+                    Logger.error("Screen stream frame failed", e)
+                    false
+                }
+                if (encoded) {
+                    synchronized(output) {
+                        // 结束帧写入后不再推送
+                        if (!running.get()) return
+                        stream.frame.writeTo(output)
+                        output.flush()
+                    }
+                    late = 0
+                    sent++
+                } else {
+                    Logger.debug(failureLog) { "Screen stream: no new frame (unchanged or capture failed)" }
+                }
+
+                // 推送跟不上目标帧率时不补发：跳过错过的周期并计数
+                next += intervalNanos
+                val behind = System.nanoTime() - next
+                if (behind >= intervalNanos) {
+                    val missed = behind / intervalNanos
+                    late += missed.toInt()
+                    next += missed * intervalNanos
+                }
+            }
+        } catch (e: IOException) {
+            // 连接已断开
+            Logger.log("Screen stream closed: ${e.message}")
+            running.set(false)
+        } finally {
+            Logger.log("Screen stream finished: $sent frames sent")
+        }
+    }
+
+    /**
+     * 停止当前推送线程
+     * 线程在 output 锁内检查自己的标志后才写入，标志清除后不会再开始写入新帧；
+     * join 超时（如正阻塞在截图中）时线程稍后自行退出，不影响之后启动的推送
+     */
+    private fun stopWorker() {
+        val current = worker ?: return
+        worker = null
+        current.running.set(false)
+        LockSupport.unpark(current.thread)
+        try {
+            current.thread.join(5000)
+        } catch (e: InterruptedException) {
+            Thread.currentThread().interrupt()
+        }
+    }
+
+    companion object {
+        const val MAX_FPS = 60
+        // 截图目标复用 1 秒，之后重新查询以跟随屏幕旋转
+        const val DISPLAY_REFRESH_MS = 1000L
+    }
+}
@@ -2,10 +2,9 @@ package com.panda.modules
 
 import android.annotation.SuppressLint
 import android.os.Build
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.FakeContext
-import com.panda.utils.IOUtils
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
 
 /**
  * 存储设备管理模块
@@ -17,9 +16,9 @@ class StorageModule {
     /**
      * 命令 20: 获取所有挂载的存储设备列表
      */
-    fun getStorageList(output: BufferedOutputStream) {
+    fun getStorageList(output: BinaryEncoder) {
         if (Build.VERSION.SDK_INT < 24) {
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
             return
         }
         
@@ -30,7 +29,7 @@ class StorageModule {
             val volumes = storageManager?.storageVolumes ?: emptyList()
             val mountedVolumes = volumes.filter { it.state == "mounted" }
             
-            IOUtils.writeInt(output, mountedVolumes.size)
+            output.writeInt(mountedVolumes.size)
             
             for (volume in mountedVolumes) {
                 // 类型判断
@@ -41,11 +40,11 @@ class StorageModule {
                 }
                 
                 // 写入类型
-                IOUtils.writeInt(output, type)
+                output.writeInt(type)
                 
                 // 写入标签
                 val label = volume.getDescription(context)
-                IOUtils.writeString(output, label)
+                output.writeString(label)
                 
                 // 写入路径
                 val path = if (Build.VERSION.SDK_INT >= 30) {
@@ -59,14 +58,14 @@ class StorageModule {
                         ""
                     }
                 }
-                IOUtils.writeString(output, path)
+                output.writeString(path)
             }
             
             Logger.log("Storage list: ${mountedVolumes.size} volumes")
             
         } catch (e: Exception) {
             Logger.error("Error getting storage list", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
 }
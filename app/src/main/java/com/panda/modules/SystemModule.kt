@@ -2,12 +2,17 @@ package com.panda.modules
 
 import android.annotation.SuppressLint
 import android.graphics.Bitmap
-import android.net.LocalSocket
 import com.panda.mirror.IWindowManagerMirror
 import com.panda.mirror.ServiceManagerMirror
-import com.panda.utils.IOUtils
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
+import com.panda.utils.BitmapImage
+import com.panda.utils.CaptureSource
+import com.panda.utils.CapturedImage
+import com.panda.utils.DisplayCaptureSource
+import com.panda.utils.ImageFormat
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
+import com.panda.utils.ScreenshotEncoder
 import java.io.ByteArrayOutputStream
 import java.io.InputStream
 import java.io.OutputStream
@@ -22,7 +27,7 @@ class SystemModule {
     /**
      * 命令 40: 文件传输
      */
-    fun fileTransfer(input: InputStream, output: OutputStream) {
+    fun fileTransfer(input: BinaryDecoder, output: BinaryEncoder) {
         try {
             // 双向文件传输逻辑
             Logger.log("File transfer started")
@@ -35,7 +40,7 @@ class SystemModule {
     /**
      * 命令 60: 获取系统属性
      */
-    fun getSystemProperties(output: BufferedOutputStream) {
+    fun getSystemProperties(output: BinaryEncoder) {
         try {
             Logger.log("Get system properties")
             // 简化实现
@@ -47,33 +52,33 @@ class SystemModule {
     /**
      * 命令 61: 文件操作
      */
-    fun fileOperation(input: InputStream, output: OutputStream) {
+    fun fileOperation(input: BinaryDecoder, output: BinaryEncoder) {
         Logger.log("File operation")
     }
     
     /**
      * 命令 62-65: 系统操作
      */
-    fun systemOperationA(output: BufferedOutputStream) {
+    fun systemOperationA(output: BinaryEncoder) {
         Logger.log("System operation A")
     }
     
-    fun systemOperationB(output: BufferedOutputStream) {
+    fun systemOperationB(output: BinaryEncoder) {
         Logger.log("System operation B")
     }
     
-    fun systemOperationC(output: OutputStream) {
+    fun systemOperationC(output: BinaryEncoder) {
         Logger.log("System operation C")
     }
     
-    fun systemOperationD(output: BufferedOutputStream) {
+    fun systemOperationD(output: BinaryEncoder) {
         Logger.log("System operation D")
     }
     
     /**
      * 命令 90: 截取当前壁纸（锁屏或桌面壁纸）
      */
-    fun screenshotWallpaper(output: BufferedOutputStream) {
+    fun screenshotWallpaper(output: BinaryEncoder) {
         try {
             // 获取 WindowManager 服务
             val binder = ServiceManagerMirror.getService.call("window")
@@ -122,7 +127,7 @@ class SystemModule {
      * 命令 120: 截取完整屏幕（当前显示内容）
      * 优先使用 ScreenCapture API（高性能），失败时降级到 UiAutomation API
      */
-    fun screenshot(output: BufferedOutputStream) {
+    fun screenshot(output: BinaryEncoder) {
         try {
             val context = com.panda.utils.FakeContext.get()
             
@@ -131,8 +136,7 @@ class SystemModule {
             
             if (pngData != null) {
                 // 发送数据：先发送大小，再发送数据
-                IOUtils.writeInt(output, pngData.size)
-                output.write(pngData)
+                output.writeBytes(pngData)
                 output.flush()
                 
                 Logger.log("Screenshot sent (ScreenCapture): ${pngData.size} bytes")
@@ -145,45 +149,78 @@ class SystemModule {
                     val bitmap = automation.takeScreenshot()
                     
                     if (bitmap != null) {
-                        // 压缩为 PNG
-                        val byteStream = ByteArrayOutputStream()
-                        bitmap.compress(Bitmap.CompressFormat.PNG, 90, byteStream)
-                        bitmap.recycle()
-                        
-                        // 发送数据：先发送大小，再发送数据
-                        val fallbackPngData = byteStream.toByteArray()
-                        IOUtils.writeInt(output, fallbackPngData.size)
-                        output.write(fallbackPngData)
+                        // 直接压缩为 PNG 帧（大小 + 数据），不经过中间字节数组
+                        val size = try {
+                            output.frame {
+                                check(bitmap.compress(Bitmap.CompressFormat.PNG, 90, output)) { "PNG compression failed" }
+                            }
+                        } finally {
+                            bitmap.recycle()
+                        }
                         output.flush()
                         
-                        Logger.log("Screenshot sent (UiAutomation): ${fallbackPngData.size} bytes")
+                        Logger.log("Screenshot sent (UiAutomation): $size bytes")
                     } else {
-                        IOUtils.writeInt(output, 0)
+                        // 大小为 0 时始终跟随错误信息，保证客户端可以按固定格式解析
+                        output.writeInt(0)
+                        output.writeString("bitmap is null")
                         Logger.log("Screenshot failed: bitmap is null")
                     }
                 } catch (fallbackException: Exception) {
                     Logger.error("UiAutomation fallback also failed", fallbackException)
-                    IOUtils.writeInt(output, 0)
-                    IOUtils.writeString(output, fallbackException.message ?: "Unknown error")
+                    output.writeInt(0)
+                    output.writeString(fallbackException.message ?: "Unknown error")
                 }
             }
         } catch (e: Exception) {
             Logger.error("Error taking screenshot", e)
             try {
-                IOUtils.writeInt(output, 0)
-                IOUtils.writeString(output, e.message ?: "Unknown error")
+                output.writeInt(0)
+                output.writeString(e.message ?: "Unknown error")
             } catch (ex: Exception) {
                 // Ignore
             }
         }
     }
     
+    /**
+     * 命令 121: 按指定格式截图
+     * 请求: 格式(int, 0=PNG 1=JPEG 2=WebP 3=RGBA), 质量(int, 0-100), 最长边上限(int, 0 表示原始分辨率)
+     * 响应: 见 ScreenshotEncoder.write，截图与编码耗时分别返回
+     * 缩放在截图时完成（ScreenCapture），JPEG/WebP/RGBA 比 PNG 100 编码快得多
+     */
+    fun screenshotWithOptions(input: BinaryDecoder, output: BinaryEncoder) {
+        val formatCode = input.readInt()
+        val quality = input.readInt()
+        val maxSize = input.readInt()
+        try {
+            val format = ImageFormat.fromCode(formatCode)
+            if (format == null) {
+                output.writeError(-1, "Unsupported image format: $formatCode")
+                output.flush()
+                return
+            }
+            val context = com.panda.utils.FakeContext.get()
+            val sources = listOf(DisplayCaptureSource(context), UiAutomationCaptureSource)
+            val result = ScreenshotEncoder.write(sources, format, quality, maxSize, output)
+            output.flush()
+            if (result != null) {
+                Logger.log(
+                    "Screenshot sent ($format q=$quality): ${result.width}x${result.height}, ${result.bytes} bytes, " +
+                    "capture ${result.captureMicros / 1000}ms, encode ${result.encodeMicros / 1000}ms"
+                )
+            }
+        } catch (e: Exception) {
+            Logger.error("Error taking screenshot", e)
+        }
+    }
+    
     /**
      * 命令 100: 执行 Shell 命令并返回输出
      */
-    fun executeCommand(input: InputStream, client: LocalSocket) {
+    fun executeCommand(input: BinaryDecoder, output: BinaryEncoder) {
         try {
-            val command = IOUtils.readString(input)
+            val command = input.readString()
             Logger.log("Executing command: $command")
             
             // 执行命令
@@ -192,10 +229,10 @@ class SystemModule {
             
             Logger.log("Process $pid started: $command")
             
-            // 将输出重定向到 socket
+            // 将输出重定向到连接（输出流可能带缓冲，每块数据后刷新）
             val outputThread = Thread {
                 try {
-                    process.inputStream.copyTo(client.outputStream)
+                    copyAndFlush(process.inputStream, output)
                 } catch (e: Exception) {
                     Logger.error("Error copying stdout", e)
                 }
@@ -203,7 +240,7 @@ class SystemModule {
             
             val errorThread = Thread {
                 try {
-                    process.errorStream.copyTo(client.outputStream)
+                    copyAndFlush(process.errorStream, output)
                 } catch (e: Exception) {
                     Logger.error("Error copying stderr", e)
                 }
@@ -225,6 +262,18 @@ class SystemModule {
         }
     }
     
+    private fun copyAndFlush(source: InputStream, output: OutputStream) {
+        val buffer = ByteArray(8192)
+        while (true) {
+            val read = source.read(buffer)
+            if (read == -1) break
+            synchronized(output) {
+                output.write(buffer, 0, read)
+                output.flush()
+            }
+        }
+    }
+    
     private fun getPid(process: Process): Int {
         return try {
             val field = process.javaClass.getDeclaredField("pid")
@@ -236,3 +285,13 @@ class SystemModule {
     }
 }
 
+/**
+ * UiAutomation 截图来源（ScreenCapture API 不可用时降级），截图后再缩放
+ */
+internal object UiAutomationCaptureSource : CaptureSource {
+    override fun capture(maxSize: Int): CapturedImage? {
+        val automation = com.panda.core.InstrumentShellWrapper.getInstance().getUiAutomation()
+        val bitmap = automation.takeScreenshot() ?: return null
+        return BitmapImage(BitmapImage.scaled(bitmap, maxSize))
+    }
+}
@@ -6,11 +6,10 @@ import android.net.wifi.ScanResult
 import android.net.wifi.WifiConfiguration
 import android.net.wifi.WifiManager
 import android.os.Build
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
 import com.panda.utils.FakeContext
-import com.panda.utils.IOUtils
 import com.panda.utils.Logger
-import java.io.BufferedOutputStream
-import java.io.InputStream
 import java.util.concurrent.Executors
 
 /**
@@ -27,24 +26,24 @@ class WiFiModule {
     /**
      * 命令 50: 获取 WiFi 状态
      */
-    fun getWifiState(output: BufferedOutputStream) {
+    fun getWifiState(output: BinaryEncoder) {
         try {
             val wifiManager = getWifiManager()
             val state = wifiManager.wifiState
-            IOUtils.writeInt(output, state)
+            output.writeInt(state)
             Logger.log("WiFi state: $state")
         } catch (e: Exception) {
             Logger.error("Error getting WiFi state", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 51: 设置 WiFi 开关
      */
-    fun setWifiEnabled(input: InputStream) {
+    fun setWifiEnabled(input: BinaryDecoder) {
         try {
-            val enabled = IOUtils.readInt(input) != 0
+            val enabled = input.readInt() != 0
             val wifiManager = getWifiManager()
             wifiManager.isWifiEnabled = enabled
             Logger.log("WiFi enabled: $enabled")
@@ -56,7 +55,7 @@ class WiFiModule {
     /**
      * 命令 52: 扫描 WiFi 网络
      */
-    fun scanWifi(output: BufferedOutputStream) {
+    fun scanWifi(output: BinaryEncoder) {
         try {
             val wifiManager = getWifiManager()
             
@@ -81,31 +80,31 @@ class WiFiModule {
             }
         } catch (e: Exception) {
             Logger.error("Error scanning WiFi", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
-    private fun writeScanResults(wifiManager: WifiManager, output: BufferedOutputStream) {
+    private fun writeScanResults(wifiManager: WifiManager, output: BinaryEncoder) {
         val results = wifiManager.scanResults.distinctBy { it.SSID }
-        IOUtils.writeInt(output, results.size)
+        output.writeInt(results.size)
         
         for (result in results) {
             val ssid = result.SSID?.trim('"') ?: ""
-            IOUtils.writeString(output, ssid)
+            output.writeString(ssid)
             val bssid = result.BSSID ?: ""
-            IOUtils.writeString(output, bssid)
+            output.writeString(bssid)
             // 写入频率
-            IOUtils.writeInt(output, result.frequency)
+            output.writeInt(result.frequency)
             // 写入 WiFi 标准
             val standard = if (Build.VERSION.SDK_INT >= 30) {
                 result.wifiStandard
             } else {
                 0
             }
-            IOUtils.writeInt(output, standard)
+            output.writeInt(standard)
             // 写入信号等级 (0-4)
             val level = WifiManager.calculateSignalLevel(result.level, 5)
-            IOUtils.writeInt(output, level)
+            output.writeInt(level)
         }
         
         output.flush()
@@ -115,52 +114,52 @@ class WiFiModule {
     /**
      * 命令 53: 获取当前连接的 WiFi 详细信息
      */
-    fun getWifiInfo(output: BufferedOutputStream) {
+    fun getWifiInfo(output: BinaryEncoder) {
         try {
             val wifiManager = getWifiManager()
             val connectionInfo = wifiManager.connectionInfo
             
             // 写入连接信息
-            IOUtils.writeString(output, connectionInfo.ssid.trim('"'))
-            IOUtils.writeString(output, connectionInfo.bssid ?: "")
-            IOUtils.writeInt(output, connectionInfo.networkId)
-            IOUtils.writeInt(output, connectionInfo.linkSpeed)
-            IOUtils.writeInt(output, connectionInfo.rssi)
+            output.writeString(connectionInfo.ssid.trim('"'))
+            output.writeString(connectionInfo.bssid ?: "")
+            output.writeInt(connectionInfo.networkId)
+            output.writeInt(connectionInfo.linkSpeed)
+            output.writeInt(connectionInfo.rssi)
             
             output.flush()
         } catch (e: Exception) {
             Logger.error("Error getting WiFi info", e)
-            IOUtils.writeError(output, -1, e.message ?: "Unknown error")
+            output.writeError(-1, e.message ?: "Unknown error")
         }
     }
     
     /**
      * 命令 54: 获取已配置的网络列表
      */
-    fun getConfiguredNetworks(output: BufferedOutputStream) {
+    fun getConfiguredNetworks(output: BinaryEncoder) {
         try {
             val wifiManager = getWifiManager()
             val networks = wifiManager.configuredNetworks
             
-            IOUtils.writeInt(output, networks.size)
+            output.writeInt(networks.size)
             for (network in networks) {
-                IOUtils.writeInt(output, network.networkId)
-                IOUtils.writeString(output, network.SSID.trim('"'))
+                output.writeInt(network.networkId)
+                output.writeString(network.SSID.trim('"'))
             }
             
             Logger.log("Configured networks: ${networks.size}")
         } catch (e: Exception) {
             Logger.error("Error getting configured networks", e)
-            IOUtils.writeInt(output, 0)
+            output.writeInt(0)
         }
     }
     
     /**
      * 命令 55: 连接到指定网络
      */
-    fun connectToNetwork(input: InputStream) {
+    fun connectToNetwork(input: BinaryDecoder) {
         try {
-            val networkId = IOUtils.readInt(input)
+            val networkId = input.readInt()
             val wifiManager = getWifiManager()
             wifiManager.enableNetwork(networkId, true)
             wifiManager.reconnect()
@@ -173,11 +172,11 @@ class WiFiModule {
     /**
      * 命令 56: 添加新的 WiFi 网络配置
      */
-    fun addNetwork(input: InputStream) {
+    fun addNetwork(input: BinaryDecoder) {
         try {
-            val ssid = IOUtils.readString(input)
-            val password = IOUtils.readString(input)
-            val autoJoin = IOUtils.readInt(input) != 0
+            val ssid = input.readString()
+            val password = input.readString()
+            val autoJoin = input.readInt() != 0
             
             val wifiManager = getWifiManager()
             val config = WifiConfiguration().apply {
@@ -208,10 +207,10 @@ class WiFiModule {
     /**
      * 命令 57: 设置网络自动重连选项
      */
-    fun setAutoJoin(input: InputStream) {
+    fun setAutoJoin(input: BinaryDecoder) {
         try {
-            val networkId = IOUtils.readInt(input)
-            val autoJoin = IOUtils.readInt(input) != 0
+            val networkId = input.readInt()
+            val autoJoin = input.readInt() != 0
             
             if (Build.VERSION.SDK_INT >= 29) {
                 val wifiManager = getWifiManager()
@@ -231,9 +230,9 @@ class WiFiModule {
     /**
      * 命令 58: 删除已保存的网络配置
      */
-    fun removeNetwork(input: InputStream) {
+    fun removeNetwork(input: BinaryDecoder) {
         try {
-            val networkId = IOUtils.readInt(input)
+            val networkId = input.readInt()
             val wifiManager = getWifiManager()
             wifiManager.removeNetwork(networkId)
             wifiManager.saveConfiguration()
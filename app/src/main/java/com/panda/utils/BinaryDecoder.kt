@@ -0,0 +1,107 @@
+package com.panda.utils
+
+import java.io.EOFException
+import java.io.IOException
+import java.io.InputStream
+
+/**
+ * 二进制协议解码器（Big Endian）
+ * 每个连接一个，定长字段读入复用的临时数组，字符串复用同一块缓冲区，只分配最终的 String；
+ * 不预读：只从 source 读取当前字段需要的字节，其他代码可继续直接读取该流
+ *
+ * 非线程安全：只应由处理该连接命令的线程使用
+ */
+class BinaryDecoder(private val source: InputStream) : InputStream() {
+
+    private val scratch = ByteArray(8)
+    private var stringBuffer = ByteArray(256)
+
+    fun readInt(): Int {
+        readFully(scratch, 0, 4)
+        val bytes = scratch
+        return ((bytes[0].toInt() and 0xFF) shl 24) or
+               ((bytes[1].toInt() and 0xFF) shl 16) or
+               ((bytes[2].toInt() and 0xFF) shl 8) or
+               (bytes[3].toInt() and 0xFF)
+    }
+
+    fun readLong(): Long {
+        val high = readInt().toLong()
+        val low = readInt().toLong() and 0xFFFFFFFFL
+        return (high shl 32) or low
+    }
+
+    fun readFloat(): Float = java.lang.Float.intBitsToFloat(readInt())
+
+    fun readBoolean(): Boolean = readInt() != 0
+
+    /**
+     * 读取字符串 (长度 + UTF-8 数据)
+     */
+    fun readString(): String {
+        val length = readLength()
+        if (length == 0) return ""
+        if (length > MAX_RETAINED_STRING) {
+            // 超长字符串不保留缓冲区
+            val bytes = ByteArray(length)
+            readFully(bytes, 0, length)
+            return String(bytes, Charsets.UTF_8)
+        }
+        if (length > stringBuffer.size) {
+            stringBuffer = ByteArray(maxOf(length, stringBuffer.size * 2).coerceAtMost(MAX_RETAINED_STRING))
+        }
+        readFully(stringBuffer, 0, length)
+        return String(stringBuffer, 0, length, Charsets.UTF_8)
+    }
+
+    /**
+     * 读取字节数组 (长度 + 数据)
+     */
+    fun readBytes(): ByteArray {
+        val length = readLength()
+        val bytes = ByteArray(length)
+        readFully(bytes, 0, length)
+        return bytes
+    }
+
+    /**
+     * 读取 length 个 int 到 values
+     */
+    fun readIntArray(values: IntArray, offset: Int = 0, length: Int = values.size - offset) {
+        for (i in offset until offset + length) values[i] = readInt()
+    }
+
+    /**
+     * 读满 len 字节，流提前结束时抛出 EOFException
+     */
+    fun readFully(b: ByteArray, off: Int, len: Int) {
+        var offset = 0
+        while (offset < len) {
+            val read = source.read(b, off + offset, len - offset)
+            if (read == -1) throw EOFException("Unexpected end of stream")
+            offset += read
+        }
+    }
+
+    // ========== InputStream ==========
+
+    override fun read(): Int = source.read()
+
+    override fun read(b: ByteArray, off: Int, len: Int): Int = source.read(b, off, len)
+
+    override fun available(): Int = source.available()
+
+    override fun close() {
+        source.close()
+    }
+
+    private fun readLength(): Int {
+        val length = readInt()
+        if (length < 0) throw IOException("Invalid length: $length")
+        return length
+    }
+
+    companion object {
+        private const val MAX_RETAINED_STRING = 65536
+    }
+}
@@ -0,0 +1,291 @@
+package com.panda.utils
+
+import java.io.OutputStream
+
+/**
+ * 二进制协议编码器（Big Endian）
+ * 每个连接一个，字段直接编码进可增长的字节数组，不再为每个字段分配 ByteBuffer 和临时数组：
+ * - 有 sink 时相当于 BufferedOutputStream：缓冲区写满或 flush 时写出到 sink，超过缓冲区的大块数据直接写出
+ * - 没有 sink 时整体保存在内存中（用于缓存编码后的响应），通过 toByteArray / writeTo 取出
+ * - 长度前缀帧：beginFrame 预留 4 字节长度，endFrame 回填；帧内数据不会提前写出，缓冲区按需增长
+ *
+ * 非线程安全：多个线程写同一连接时（指标推送、Shell 输出），写入方需 synchronized(encoder)
+ */
+class BinaryEncoder(
+    private val sink: OutputStream? = null,
+    bufferSize: Int = DEFAULT_BUFFER_SIZE
+) : OutputStream() {
+
+    private val initialSize = bufferSize
+    private var buffer = ByteArray(bufferSize)
+    private var count = 0
+
+    // 未结束帧的起始位置（长度字段所在位置）
+    private var frameStarts = IntArray(4)
+    private var frameDepth = 0
+
+    /** 当前缓冲的字节数 */
+    fun size(): Int = count
+
+    // ========== 基本类型 ==========
+
+    fun writeInt(value: Int) {
+        ensureCapacity(4)
+        putInt(value)
+    }
+
+    fun writeLong(value: Long) {
+        ensureCapacity(8)
+        putInt((value ushr 32).toInt())
+        putInt(value.toInt())
+    }
+
+    fun writeFloat(value: Float) {
+        writeInt(java.lang.Float.floatToIntBits(value))
+    }
+
+    fun writeBoolean(value: Boolean) {
+        writeInt(if (value) 1 else 0)
+    }
+
+    /**
+     * 写入字符串 (长度 + UTF-8 数据)，直接编码进缓冲区，不创建中间字节数组
+     * 非法的代理字符编码为 '?'，与 String.toByteArray(UTF_8) 相同
+     */
+    fun writeString(value: String) {
+        val length = utf8Length(value)
+        ensureCapacity(4 + length)
+        putInt(length)
+        val bytes = buffer
+        var position = count
+        var i = 0
+        val end = value.length
+        while (i < end) {
+            val c = value[i].code
+            if (c < 0x80) {
+                bytes[position++] = c.toByte()
+            } else if (c < 0x800) {
+                bytes[position++] = (0xC0 or (c shr 6)).toByte()
+                bytes[position++] = (0x80 or (c and 0x3F)).toByte()
+            } else if (c in 0xD800..0xDBFF && i + 1 < end && value[i + 1].code in 0xDC00..0xDFFF) {
+                val codePoint = 0x10000 + ((c - 0xD800) shl 10) + (value[++i].code - 0xDC00)
+                bytes[position++] = (0xF0 or (codePoint shr 18)).toByte()
+                bytes[position++] = (0x80 or ((codePoint shr 12) and 0x3F)).toByte()
+                bytes[position++] = (0x80 or ((codePoint shr 6) and 0x3F)).toByte()
+                bytes[position++] = (0x80 or (codePoint and 0x3F)).toByte()
+            } else if (c in 0xD800..0xDFFF) {
+                bytes[position++] = '?'.code.toByte()
+            } else {
+                bytes[position++] = (0xE0 or (c shr 12)).toByte()
+                bytes[position++] = (0x80 or ((c shr 6) and 0x3F)).toByte()
+                bytes[position++] = (0x80 or (c and 0x3F)).toByte()
+            }
+            i++
+        }
+        count = position
+    }
+
+    /** 写入字节数组 (长度 + 数据) */
+    fun writeBytes(data: ByteArray) {
+        writeInt(data.size)
+        write(data, 0, data.size)
+    }
+
+    /** 写入错误信息 (错误码 + 消息) */
+    fun writeError(errorCode: Int, message: String) {
+        writeInt(errorCode)
+        writeString(message)
+    }
+
+    /** 写入成功状态 */
+    fun writeSuccess() {
+        writeInt(0)
+    }
+
+    // ========== 批量写入（只写元素，数量由调用方按协议写入） ==========
+
+    fun writeIntArray(values: IntArray, offset: Int = 0, length: Int = values.size - offset) {
+        ensureCapacity(length * 4)
+        for (i in offset until offset + length) putInt(values[i])
+    }
+
+    fun writeLongArray(values: LongArray, offset: Int = 0, length: Int = values.size - offset) {
+        ensureCapacity(length * 8)
+        for (i in offset until offset + length) {
+            val value = values[i]
+            putInt((value ushr 32).toInt())
+            putInt(value.toInt())
+        }
+    }
+
+    fun writeFloatArray(values: FloatArray, offset: Int = 0, length: Int = values.size - offset) {
+        ensureCapacity(length * 4)
+        for (i in offset until offset + length) putInt(java.lang.Float.floatToIntBits(values[i]))
+    }
+
+    // ========== 长度前缀帧 ==========
+
+    /**
+     * 开始一个长度前缀帧：预留 4 字节长度，帧内数据在 endFrame 前不会写出到 sink
+     * 帧可以嵌套
+     */
+    fun beginFrame() {
+        if (frameDepth == frameStarts.size) frameStarts = frameStarts.copyOf(frameDepth * 2)
+        ensureCapacity(4)
+        frameStarts[frameDepth++] = count
+        count += 4
+    }
+
+    /**
+     * 结束当前帧，回填长度（不含长度字段本身），返回帧数据长度
+     */
+    fun endFrame(): Int {
+        check(frameDepth > 0) { "No open frame" }
+        val start = frameStarts[--frameDepth]
+        val length = count - start - 4
+        buffer[start] = (length ushr 24).toByte()
+        buffer[start + 1] = (length ushr 16).toByte()
+        buffer[start + 2] = (length ushr 8).toByte()
+        buffer[start + 3] = length.toByte()
+        return length
+    }
+
+    /**
+     * 放弃当前帧，丢弃帧内已写入的数据（包括长度字段）
+     */
+    fun abortFrame() {
+        check(frameDepth > 0) { "No open frame" }
+        count = frameStarts[--frameDepth]
+    }
+
+    /**
+     * 写入一个长度前缀帧，block 抛出异常时丢弃已写入的部分
+     */
+    inline fun frame(block: () -> Unit): Int {
+        beginFrame()
+        try {
+            block()
+        } catch (e: Throwable) {
+            abortFrame()
+            throw e
+        }
+        return endFrame()
+    }
+
+    // ========== OutputStream ==========
+
+    override fun write(b: Int) {
+        ensureCapacity(1)
+        buffer[count++] = b.toByte()
+    }
+
+    override fun write(b: ByteArray, off: Int, len: Int) {
+        if (sink != null && frameDepth == 0 && len >= buffer.size) {
+            // 大块数据直接写出，不经过缓冲区
+            drain()
+            sink.write(b, off, len)
+            return
+        }
+        ensureCapacity(len)
+        System.arraycopy(b, off, buffer, count, len)
+        count += len
+    }
+
+    /**
+     * 写出缓冲的数据并刷新 sink；没有 sink 时不做任何操作
+     * 大帧（如截图）使缓冲区扩容后，写出时恢复为初始大小，避免每个连接长期占用大块内存
+     */
+    override fun flush() {
+        if (sink == null) return
+        check(frameDepth == 0) { "Cannot flush inside a frame" }
+        drain()
+        if (buffer.size > initialSize) buffer = ByteArray(initialSize)
+        sink.flush()
+    }
+
+    override fun close() {
+        if (sink == null) return
+        try {
+            flush()
+        } finally {
+            sink.close()
+        }
+    }
+
+    // ========== 内存模式 ==========
+
+    /** 复制缓冲的数据 */
+    fun toByteArray(): ByteArray = buffer.copyOf(count)
+
+    /** 将缓冲的数据写入另一个流 */
+    fun writeTo(output: OutputStream) {
+        output.write(buffer, 0, count)
+    }
+
+    /** 清空缓冲区（保留容量），丢弃未结束的帧 */
+    fun reset() {
+        count = 0
+        frameDepth = 0
+    }
+
+    // ========== 内部实现 ==========
+
+    private fun putInt(value: Int) {
+        val bytes = buffer
+        val position = count
+        bytes[position] = (value ushr 24).toByte()
+        bytes[position + 1] = (value ushr 16).toByte()
+        bytes[position + 2] = (value ushr 8).toByte()
+        bytes[position + 3] = value.toByte()
+        count = position + 4
+    }
+
+    /**
+     * 保证还能写入 length 字节：有 sink 且不在帧内时先写出已缓冲的数据，否则扩容
+     */
+    private fun ensureCapacity(length: Int) {
+        if (count + length <= buffer.size) return
+        if (sink != null && frameDepth == 0) {
+            drain()
+            if (length <= buffer.size) return
+        }
+        var capacity = buffer.size * 2
+        if (capacity < count + length) capacity = count + length
+        buffer = buffer.copyOf(capacity)
+    }
+
+    private fun drain() {
+        if (count > 0) {
+            sink!!.write(buffer, 0, count)
+            count = 0
+        }
+    }
+
+    companion object {
+        const val DEFAULT_BUFFER_SIZE = 8192
+
+        /** 字符串 UTF-8 编码后的字节数 */
+        fun utf8Length(value: String): Int {
+            var length = 0
+            var i = 0
+            val end = value.length
+            while (i < end) {
+                val c = value[i].code
+                length += if (c < 0x80) {
+                    1
+                } else if (c < 0x800) {
+                    2
+                } else if (c in 0xD800..0xDBFF && i + 1 < end && value[i + 1].code in 0xDC00..0xDFFF) {
+                    i++
+                    4
+                } else if (c in 0xD800..0xDFFF) {
+                    1
+                } else {
+                    3
+                }
+                i++
+            }
+            return length
+        }
+    }
+}
@@ -0,0 +1,47 @@
+package com.panda.utils
+
+import java.nio.ByteBuffer
+import java.util.concurrent.ConcurrentLinkedQueue
+import java.util.concurrent.atomic.AtomicInteger
+
+/**
+ * 定长直接缓冲区池
+ * 连接只在有数据在途时持有缓冲区，空闲连接不占用缓冲内存；
+ * 直接缓冲区可被 NIO / Os.read 直接读写，避免 JNI 层再拷贝一次
+ *
+ * 线程安全：可在多个线程中借出和归还
+ */
+class BufferPool(val bufferSize: Int, private val maxPooled: Int) {
+
+    private val buffers = ConcurrentLinkedQueue<ByteBuffer>()
+    private val pooled = AtomicInteger(0)
+    private val allocated = AtomicInteger(0)
+
+    /** 借出一个已清空的缓冲区，池为空时新分配 */
+    fun acquire(): ByteBuffer {
+        val buffer = buffers.poll()
+        if (buffer != null) {
+            pooled.decrementAndGet()
+            return buffer
+        }
+        allocated.incrementAndGet()
+        return ByteBuffer.allocateDirect(bufferSize)
+    }
+
+    /** 归还缓冲区，池已满时丢弃（由 GC 回收） */
+    fun release(buffer: ByteBuffer) {
+        buffer.clear()
+        if (pooled.incrementAndGet() <= maxPooled) {
+            buffers.offer(buffer)
+        } else {
+            pooled.decrementAndGet()
+            allocated.decrementAndGet()
+        }
+    }
+
+    /** 已分配且未被丢弃的缓冲区数量（在途 + 池中） */
+    fun allocatedCount(): Int = allocated.get()
+
+    /** 池中空闲的缓冲区数量 */
+    fun pooledCount(): Int = pooled.get()
+}
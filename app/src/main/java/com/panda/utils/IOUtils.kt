@@ -2,12 +2,12 @@ package com.panda.utils
 
 import java.io.InputStream
 import java.io.OutputStream
-import java.nio.ByteBuffer
-import java.nio.ByteOrder
 
 /**
  * IO 工具类
  * 处理客户端通信的数据序列化和反序列化
+ * 连接上的读写由 BinaryEncoder / BinaryDecoder 完成；这里的函数遇到它们时直接委托，
+ * 其他流按字段编码（不分配 ByteBuffer）
  */
 object IOUtils {
     
@@ -15,19 +15,20 @@ object IOUtils {
      * 写入 32 位整数 (Big Endian)
      */
     fun writeInt(output: OutputStream, value: Int) {
-        val buffer = ByteBuffer.allocate(4)
-        buffer.order(ByteOrder.BIG_ENDIAN)  // 设置为 Big Endian
-        buffer.putInt(value)
-        buffer.flip()  // 准备读取
-        val bytes = ByteArray(4)
-        buffer.get(bytes)
-        output.write(bytes)
+        if (output is BinaryEncoder) {
+            output.writeInt(value)
+            return
+        }
+        output.write(byteArrayOf(
+            (value ushr 24).toByte(), (value ushr 16).toByte(), (value ushr 8).toByte(), value.toByte()
+        ))
     }
     
     /**
      * 读取 32 位整数 (Big Endian)
      */
     fun readInt(input: InputStream): Int {
+        if (input is BinaryDecoder) return input.readInt()
         val bytes = ByteArray(4)
         var offset = 0
         while (offset < 4) {
@@ -45,35 +46,31 @@ object IOUtils {
      * 写入 64 位长整数 (Big Endian)
      */
     fun writeLong(output: OutputStream, value: Long) {
-        val buffer = ByteBuffer.allocate(8)
-        buffer.order(ByteOrder.BIG_ENDIAN)  // 设置为 Big Endian
-        buffer.putLong(value)
-        buffer.flip()  // 准备读取
-        val bytes = ByteArray(8)
-        buffer.get(bytes)
-        output.write(bytes)
+        if (output is BinaryEncoder) {
+            output.writeLong(value)
+            return
+        }
+        writeInt(output, (value ushr 32).toInt())
+        writeInt(output, value.toInt())
     }
     
     /**
      * 读取 64 位长整数 (Big Endian)
      */
     fun readLong(input: InputStream): Long {
-        val bytes = ByteArray(8)
-        var offset = 0
-        while (offset < 8) {
-            val read = input.read(bytes, offset, 8 - offset)
-            if (read == -1) throw java.io.EOFException("Unexpected end of stream")
-            offset += read
-        }
-        val buffer = ByteBuffer.wrap(bytes)
-        buffer.order(ByteOrder.BIG_ENDIAN)  // 设置为 Big Endian
-        return buffer.long
+        if (input is BinaryDecoder) return input.readLong()
+        val high = readInt(input).toLong()
+        return (high shl 32) or (readInt(input).toLong() and 0xFFFFFFFFL)
     }
     
     /**
      * 写入字符串 (长度 + UTF-8 数据)
      */
     fun writeString(output: OutputStream, value: String) {
+        if (output is BinaryEncoder) {
+            output.writeString(value)
+            return
+        }
         val bytes = value.toByteArray(Charsets.UTF_8)
         writeInt(output, bytes.size)
         output.write(bytes)
@@ -83,6 +80,7 @@ object IOUtils {
      * 读取字符串
      */
     fun readString(input: InputStream): String {
+        if (input is BinaryDecoder) return input.readString()
         val length = readInt(input)
         if (length == 0) return ""
         
@@ -108,6 +106,7 @@ object IOUtils {
      * 读取字节数组
      */
     fun readBytes(input: InputStream): ByteArray {
+        if (input is BinaryDecoder) return input.readBytes()
         val length = readInt(input)
         val bytes = ByteArray(length)
         var offset = 0
@@ -152,29 +151,14 @@ object IOUtils {
      * 写入 32 位浮点数 (Big Endian)
      */
     fun writeFloat(output: OutputStream, value: Float) {
-        val buffer = ByteBuffer.allocate(4)
-        buffer.order(ByteOrder.BIG_ENDIAN)  // 设置为 Big Endian
-        buffer.putFloat(value)
-        buffer.flip()  // 准备读取
-        val bytes = ByteArray(4)
-        buffer.get(bytes)
-        output.write(bytes)
+        writeInt(output, java.lang.Float.floatToIntBits(value))
     }
     
     /**
      * 读取 32 位浮点数 (Big Endian)
      */
     fun readFloat(input: InputStream): Float {
-        val bytes = ByteArray(4)
-        var offset = 0
-        while (offset < 4) {
-            val read = input.read(bytes, offset, 4 - offset)
-            if (read == -1) throw java.io.EOFException("Unexpected end of stream")
-            offset += read
-        }
-        val buffer = ByteBuffer.wrap(bytes)
-        buffer.order(ByteOrder.BIG_ENDIAN)  // 设置为 Big Endian
-        return buffer.float
+        return java.lang.Float.intBitsToFloat(readInt(input))
     }
     
     /**
@@ -0,0 +1,150 @@
+package com.panda.utils
+
+import java.io.DataInputStream
+import java.io.DataOutputStream
+import java.io.File
+import java.io.FileInputStream
+import java.io.FileOutputStream
+
+/**
+ * 应用图标 PNG 缓存，按 (包名, 版本号, 图标尺寸) 索引
+ * - 内存层：按访问顺序淘汰，总大小不超过 memoryBytes
+ * - 磁盘层：每个 (包名, 图标尺寸) 一个文件，文件头记录版本号，服务重启后仍然有效；
+ *   应用升级后版本号不一致视为未命中，新图标覆盖旧文件
+ *
+ * 线程安全：图标渲染线程并发读写
+ */
+class IconCache(
+    private val directory: File,
+    private val memoryBytes: Int = DEFAULT_MEMORY_BYTES
+) {
+
+    private class Entry(val versionCode: Long, val data: ByteArray)
+
+    private val memory = LinkedHashMap<String, Entry>(64, 0.75f, true)
+    private var memorySize = 0
+
+    @Volatile
+    private var diskEnabled = true
+
+    /**
+     * 读取缓存的图标，未命中返回 null
+     */
+    fun get(packageName: String, versionCode: Long, iconSize: Int): ByteArray? {
+        val key = key(packageName, iconSize)
+        synchronized(memory) {
+            val entry = memory[key]
+            if (entry != null && entry.versionCode == versionCode) return entry.data
+        }
+        val data = readFile(key, versionCode) ?: return null
+        remember(key, Entry(versionCode, data))
+        return data
+    }
+
+    /**
+     * 写入图标（内存与磁盘）
+     */
+    fun put(packageName: String, versionCode: Long, iconSize: Int, data: ByteArray) {
+        val key = key(packageName, iconSize)
+        remember(key, Entry(versionCode, data))
+        writeFile(key, versionCode, data)
+    }
+
+    /**
+     * 删除已卸载应用的缓存文件
+     * 临时文件可能正被渲染线程写入，只删除进程中途退出留下的过期临时文件
+     */
+    fun prune(installed: Set<String>) {
+        val files = directory.listFiles() ?: return
+        var removed = 0
+        val now = System.currentTimeMillis()
+        for (file in files) {
+            val name = file.name
+            if (name.startsWith(".") && name.endsWith(TEMP_SUFFIX)) {
+                if (now - file.lastModified() > STALE_TEMP_MILLIS && file.delete()) removed++
+                continue
+            }
+            val separator = name.lastIndexOf(KEY_SEPARATOR)
+            if (separator <= 0 || name.substring(0, separator) !in installed) {
+                if (file.delete()) removed++
+            }
+        }
+        synchronized(memory) {
+            val iterator = memory.entries.iterator()
+            while (iterator.hasNext()) {
+                val entry = iterator.next()
+                if (entry.key.substring(0, entry.key.lastIndexOf(KEY_SEPARATOR)) !in installed) {
+                    memorySize -= entry.value.data.size
+                    iterator.remove()
+                }
+            }
+        }
+        if (removed > 0) Logger.log("Icon cache: pruned $removed files")
+    }
+
+    private fun key(packageName: String, iconSize: Int): String = "$packageName$KEY_SEPARATOR$iconSize"
+
+    private fun remember(key: String, entry: Entry) {
+        if (entry.data.size > memoryBytes) return
+        synchronized(memory) {
+            memory.put(key, entry)?.let { memorySize -= it.data.size }
+            memorySize += entry.data.size
+            val iterator = memory.values.iterator()
+            while (memorySize > memoryBytes && iterator.hasNext()) {
+                memorySize -= iterator.next().data.size
+                iterator.remove()
+            }
+        }
+    }
+
+    private fun readFile(key: String, versionCode: Long): ByteArray? {
+        if (!diskEnabled) return null
+        val file = File(directory, key)
+        if (!file.isFile) return null
+        return try {
+            DataInputStream(FileInputStream(file).buffered()).use { input ->
+                if (input.readInt() != MAGIC || input.readLong() != versionCode) return null
+                val length = input.readInt()
+                if (length <= 0 || length > MAX_ICON_BYTES) return null
+                ByteArray(length).also { input.readFully(it) }
+            }
+        } catch (e: Exception) {
+            // 文件损坏：视为未命中，之后会被覆盖
+            null
+        }
+    }
+
+    /**
+     * 先写临时文件再重命名，进程中途退出不会留下不完整的缓存文件
+     */
+    private fun writeFile(key: String, versionCode: Long, data: ByteArray) {
+        if (!diskEnabled) return
+        try {
+            if (!directory.isDirectory && !directory.mkdirs()) {
+                diskEnabled = false
+                Logger.warn("Icon cache disabled: cannot create $directory")
+                return
+            }
+            val temp = File(directory, ".$key.${Thread.currentThread().id}$TEMP_SUFFIX")
+            DataOutputStream(FileOutputStream(temp).buffered()).use { output ->
+                output.writeInt(MAGIC)
+                output.writeLong(versionCode)
+                output.writeInt(data.size)
+                output.write(data)
+            }
+            if (!temp.renameTo(File(directory, key))) temp.delete()
+        } catch (e: Exception) {
+            Logger.debug { "Icon cache write failed for $key: ${e.message}" }
+        }
+    }
+
+    companion object {
+        const val DEFAULT_DIRECTORY = "/data/local/tmp/panda-icons"
+        const val DEFAULT_MEMORY_BYTES = 16 shl 20
+        private const val MAGIC = 0x50494331   // "PIC1"
+        private const val MAX_ICON_BYTES = 4 shl 20
+        private const val KEY_SEPARATOR = '@'
+        private const val TEMP_SUFFIX = ".tmp"
+        private const val STALE_TEMP_MILLIS = 60_000L
+    }
+}
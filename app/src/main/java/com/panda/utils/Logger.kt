@@ -1,25 +1,293 @@
 package com.panda.utils
 
+import java.io.File
+import java.io.FileOutputStream
+import java.io.OutputStreamWriter
+import java.io.Writer
 import java.text.SimpleDateFormat
 import java.util.*
+import java.util.concurrent.atomic.AtomicInteger
+import java.util.concurrent.atomic.AtomicLong
+import java.util.concurrent.atomic.AtomicReferenceArray
+import java.util.concurrent.locks.LockSupport
 
+/**
+ * 异步日志
+ * 调用线程只把日志项放入无锁环形缓冲区（多生产者），由后台线程 panda-logger 统一格式化并写出：
+ * - 日志级别由启动参数 --log-level 设置，低于该级别的日志不进入缓冲区；
+ *   debug { } 形式在级别关闭时不拼接消息字符串
+ * - 按调用点限流：同一个 RateLimit 在间隔内只输出一条，其余计数后附在下一条输出中
+ * - 输出到控制台，以及 /data/local/tmp 下按大小滚动的日志文件
+ * - 缓冲区满时丢弃新日志（计数并在下次写出时报告），不阻塞调用线程
+ */
 object Logger {
-    private val dateFormat = SimpleDateFormat("yyyy-MM-dd HH:mm:ss.SSS", Locale.US)
-    
+
+    enum class Level { DEBUG, INFO, WARN, ERROR, OFF }
+
+    const val DEFAULT_LOG_FILE = "/data/local/tmp/panda.log"
+    private const val MAX_FILE_BYTES = 1L shl 20   // 1MB 后滚动
+    private const val MAX_FILES = 3                // panda.log, panda.log.1, panda.log.2
+    private const val CAPACITY = 4096              // 2 的幂
+    private const val MASK = CAPACITY - 1
+    private const val IDLE_PARK_NANOS = 50_000_000L
+
+    private class Entry(
+        val level: Level,
+        val time: Long,
+        val message: String,
+        val throwable: Throwable?
+    )
+
+    /**
+     * 调用点限流：intervalMs 内只允许输出一次
+     */
+    class RateLimit(private val intervalMs: Long) {
+        private val nextAt = AtomicLong(0L)
+        private val suppressed = AtomicInteger(0)
+
+        /**
+         * 返回 -1 表示本次被限流；否则返回上次输出以来被限流的次数
+         */
+        fun acquire(): Int {
+            val now = System.nanoTime() / 1_000_000
+            val next = nextAt.get()
+            if ((next != 0L && now < next) || !nextAt.compareAndSet(next, now + intervalMs)) {
+                suppressed.incrementAndGet()
+                return -1
+            }
+            return suppressed.getAndSet(0)
+        }
+    }
+
+    @Volatile
+    var level = Level.INFO
+        private set
+
+    private val slots = AtomicReferenceArray<Entry>(CAPACITY)
+    private val head = AtomicLong(0L)     // 下一个写入位置（生产者）
+    @Volatile
+    private var tail = 0L                 // 下一个读取位置（只有写出线程修改）
+    private val dropped = AtomicLong(0L)
+
+    @Volatile
+    private var console = true
+    @Volatile
+    private var logFile: File? = null
+    @Volatile
+    private var writerThread: Thread? = null
+    private val writerLock = Any()
+
+    /**
+     * 启动时配置（在输出任何日志前调用）
+     * @param level 日志级别
+     * @param filePath 日志文件路径，null 或空字符串表示不写文件
+     * @param console 是否同时输出到控制台
+     */
+    fun configure(level: Level, filePath: String? = DEFAULT_LOG_FILE, console: Boolean = true) {
+        this.level = level
+        this.console = console
+        logFile = filePath?.takeIf { it.isNotEmpty() }?.let { File(it) }
+    }
+
+    /**
+     * 解析日志级别参数（debug/info/warn/error/off），无法识别时返回 null
+     */
+    fun parseLevel(value: String): Level? {
+        return Level.values().firstOrNull { it.name.equals(value.trim(), ignoreCase = true) }
+    }
+
+    fun isEnabled(level: Level): Boolean = level != Level.OFF && level >= this.level
+
     fun log(message: String) {
-        val timestamp = dateFormat.format(Date())
-        println("[$timestamp] [INFO] $message")
+        write(Level.INFO, message, null)
+    }
+
+    fun warn(message: String) {
+        write(Level.WARN, message, null)
     }
-    
+
     fun error(message: String, throwable: Throwable? = null) {
-        val timestamp = dateFormat.format(Date())
-        println("[$timestamp] [ERROR] $message")
-        throwable?.printStackTrace()
+        write(Level.ERROR, message, throwable)
     }
-    
+
     fun debug(message: String) {
-        val timestamp = dateFormat.format(Date())
-        println("[$timestamp] [DEBUG] $message")
+        write(Level.DEBUG, message, null)
+    }
+
+    /** DEBUG 级别未开启时不构造消息 */
+    inline fun debug(message: () -> String) {
+        if (isEnabled(Level.DEBUG)) write(Level.DEBUG, message(), null)
     }
-}
 
+    /** 按调用点限流的 INFO 日志 */
+    inline fun log(limit: RateLimit, message: () -> String) {
+        write(Level.INFO, limit, message)
+    }
+
+    /** 按调用点限流的 DEBUG 日志 */
+    inline fun debug(limit: RateLimit, message: () -> String) {
+        write(Level.DEBUG, limit, message)
+    }
+
+    inline fun write(level: Level, limit: RateLimit, message: () -> String) {
+        if (!isEnabled(level)) return
+        val suppressed = limit.acquire()
+        if (suppressed < 0) return
+        write(level, if (suppressed > 0) "${message()} (+$suppressed suppressed)" else message(), null)
+    }
+
+    /**
+     * 放入环形缓冲区，不阻塞；ERROR 立即唤醒写出线程
+     */
+    fun write(level: Level, message: String, throwable: Throwable?) {
+        if (!isEnabled(level)) return
+        val entry = Entry(level, System.currentTimeMillis(), message, throwable)
+        while (true) {
+            val position = head.get()
+            if (position - tail >= CAPACITY) {
+                dropped.incrementAndGet()
+                return
+            }
+            if (head.compareAndSet(position, position + 1)) {
+                slots.set((position and MASK.toLong()).toInt(), entry)
+                break
+            }
+        }
+        val writer = writerThread ?: startWriter()
+        if (level == Level.ERROR) LockSupport.unpark(writer)
+    }
+
+    /**
+     * 等待已放入缓冲区的日志写出（进程退出前调用）
+     */
+    fun flush(timeoutMs: Long = 1000) {
+        val target = head.get()
+        val deadline = System.nanoTime() + timeoutMs * 1_000_000
+        writerThread?.let { LockSupport.unpark(it) }
+        while (tail < target && System.nanoTime() < deadline) {
+            Thread.sleep(5)
+        }
+    }
+
+    // ========== 写出线程 ==========
+
+    private fun startWriter(): Thread {
+        synchronized(writerLock) {
+            writerThread?.let { return it }
+            val thread = Thread({ runWriter() }, "panda-logger")
+            thread.isDaemon = true
+            thread.priority = Thread.MIN_PRIORITY
+            writerThread = thread
+            thread.start()
+            Runtime.getRuntime().addShutdownHook(Thread { flush() })
+            return thread
+        }
+    }
+
+    private fun runWriter() {
+        // 只在本线程使用，SimpleDateFormat 无需同步
+        val dateFormat = SimpleDateFormat("yyyy-MM-dd HH:mm:ss.SSS", Locale.US)
+        val date = Date()
+        val line = StringBuilder(256)
+        var file: FileSink? = null
+        var fileFailed = false
+
+        while (true) {
+            var wrote = false
+            while (true) {
+                val index = (tail and MASK.toLong()).toInt()
+                val entry = slots.get(index) ?: break  // 为空：已读完，或生产者已占位但尚未写入
+                slots.set(index, null)
+                tail++
+
+                date.time = entry.time
+                line.setLength(0)
+                line.append('[').append(dateFormat.format(date)).append("] [")
+                    .append(entry.level.name).append("] ").append(entry.message)
+                entry.throwable?.let { line.append('\n').append(it.stackTraceToString().trimEnd()) }
+                val text = line.toString()
+
+                if (console) println(text)
+                val path = logFile
+                if (path != null && !fileFailed) {
+                    if (file == null || file.path != path) {
+                        file?.close()
+                        file = FileSink.open(path)
+                        fileFailed = file == null
+                    }
+                    file?.writeLine(text)
+                }
+                wrote = true
+            }
+
+            val lost = dropped.getAndSet(0)
+            if (lost > 0) {
+                val text = "[${dateFormat.format(Date())}] [WARN] Logger: dropped $lost messages (buffer full)"
+                if (console) println(text)
+                file?.writeLine(text)
+            }
+            if (wrote) file?.flush()
+            LockSupport.parkNanos(IDLE_PARK_NANOS)
+        }
+    }
+
+    /**
+     * 按大小滚动的日志文件：超过上限时 panda.log -> panda.log.1 -> panda.log.2
+     */
+    private class FileSink private constructor(val path: File) {
+        private var writer: Writer = openWriter()
+        private var size = path.length()
+
+        fun writeLine(text: String) {
+            try {
+                writer.write(text)
+                writer.write("\n")
+                size += text.length + 1
+                if (size >= MAX_FILE_BYTES) rotate()
+            } catch (e: Exception) {
+                // 写文件失败不影响服务
+            }
+        }
+
+        fun flush() {
+            try {
+                writer.flush()
+            } catch (e: Exception) {
+                // Ignore
+            }
+        }
+
+        fun close() {
+            try {
+                writer.close()
+            } catch (e: Exception) {
+                // Ignore
+            }
+        }
+
+        private fun rotate() {
+            close()
+            for (i in MAX_FILES - 1 downTo 1) {
+                val source = if (i == 1) path else File("${path.path}.${i - 1}")
+                if (source.exists()) source.renameTo(File("${path.path}.$i"))
+            }
+            writer = openWriter()
+            size = 0
+        }
+
+        private fun openWriter(): Writer {
+            return OutputStreamWriter(FileOutputStream(path, true), Charsets.UTF_8).buffered(8192)
+        }
+
+        companion object {
+            fun open(path: File): FileSink? {
+                return try {
+                    FileSink(path)
+                } catch (e: Exception) {
+                    println("Logger: cannot open log file $path: ${e.message}")
+                    null
+                }
+            }
+        }
+    }
+}
@@ -0,0 +1,273 @@
+package com.panda.utils
+
+import java.io.IOException
+import java.io.RandomAccessFile
+
+/**
+ * /proc 与 sysfs 文件读取器
+ * 用于采样热路径，读取和解析过程不产生垃圾对象：
+ * - 文件用 RandomAccessFile 打开后保持打开，每次读取 seek(0) 重读（procfs/sysfs 在偏移 0 处重新生成内容）
+ * - 内容读入复用的字节缓冲区，文件超过当前容量时才扩容
+ * - 数字直接从字节解析，不创建 String
+ * - 不存在的路径记录下来，一段时间内不再尝试打开（避免每次采样都抛出 FileNotFoundException）
+ *
+ * 非线程安全：每个模块持有自己的实例，并在 synchronized(reader) 中使用
+ *
+ * 用法：
+ *     if (reader.read("/proc/stat")) {
+ *         while (reader.startsWith(PREFIX)) { ...; reader.nextLine() }
+ *     }
+ */
+class ProcReader(initialCapacity: Int = 4096, private val maxOpenFiles: Int = 64) {
+
+    /** 最近一次读取的内容，有效范围 [0, limit) */
+    var buffer = ByteArray(initialCapacity)
+        private set
+    var limit = 0
+        private set
+    /** 解析位置 */
+    var position = 0
+
+    private val files = object : LinkedHashMap<String, RandomAccessFile>(16, 0.75f, true) {
+        override fun removeEldestEntry(eldest: MutableMap.MutableEntry<String, RandomAccessFile>): Boolean {
+            if (size <= maxOpenFiles) return false
+            closeQuietly(eldest.value)
+            return true
+        }
+    }
+
+    // 不存在的路径 -> 下次重试时间（System.nanoTime()），热插拔核心的 cpufreq 等节点可能稍后出现
+    private val missing = HashMap<String, Long>()
+
+    /**
+     * 读取整个文件到缓冲区，成功后解析位置归零
+     * 文件不存在、不可读或进程/线程已退出时返回 false
+     */
+    fun read(path: String): Boolean {
+        limit = 0
+        position = 0
+        var file = files[path]
+        if (file == null) {
+            val retryAt = missing[path]
+            if (retryAt != null) {
+                if (System.nanoTime() < retryAt) return false
+                missing.remove(path)
+            }
+            try {
+                file = RandomAccessFile(path, "r")
+            } catch (e: IOException) {
+                // 已退出的进程/线程路径不会再出现，数量过多时整体清空
+                if (missing.size >= MAX_MISSING) missing.clear()
+                missing[path] = System.nanoTime() + MISSING_RETRY_NANOS
+                return false
+            }
+            files[path] = file
+        }
+        try {
+            file.seek(0)
+            while (true) {
+                if (limit == buffer.size) {
+                    buffer = buffer.copyOf(buffer.size * 2)
+                }
+                val read = file.read(buffer, limit, buffer.size - limit)
+                if (read <= 0) break
+                limit += read
+            }
+            return true
+        } catch (e: IOException) {
+            // 进程/线程已退出（ESRCH）或节点暂时不可读：关闭后下次重新打开
+            files.remove(path)
+            closeQuietly(file)
+            limit = 0
+            return false
+        }
+    }
+
+    /**
+     * 读取文件开头的整数，失败时返回 default
+     */
+    fun readLong(path: String, default: Long = 0L): Long {
+        return if (read(path)) nextLong(default) else default
+    }
+
+    /**
+     * 读取文件开头的数字（可带小数，如 "45.5" 或 kgsl 的 "45 %"），失败时返回 default
+     */
+    fun readFloat(path: String, default: Float = 0f): Float {
+        return if (read(path)) nextFloat(default) else default
+    }
+
+    // ========== 解析 ==========
+
+    fun hasRemaining(): Boolean = position < limit
+
+    /** 当前位置是否以 prefix 开头 */
+    fun startsWith(prefix: ByteArray): Boolean {
+        if (limit - position < prefix.size) return false
+        for (i in prefix.indices) {
+            if (buffer[position + i] != prefix[i]) return false
+        }
+        return true
+    }
+
+    /** 当前字节是否为数字 */
+    fun peekDigit(): Boolean {
+        return position < limit && buffer[position] >= DIGIT_0 && buffer[position] <= DIGIT_9
+    }
+
+    fun skipSpaces() {
+        while (position < limit && (buffer[position] == SPACE || buffer[position] == TAB)) {
+            position++
+        }
+    }
+
+    /** 跳过 count 个以空白分隔的字段 */
+    fun skipTokens(count: Int) {
+        for (i in 0 until count) {
+            skipSpaces()
+            while (position < limit && !isSeparator(buffer[position])) {
+                position++
+            }
+        }
+    }
+
+    /** 移动到下一行开头 */
+    fun nextLine() {
+        while (position < limit && buffer[position] != NEWLINE) {
+            position++
+        }
+        if (position < limit) position++
+    }
+
+    /** 跳过空白后是否已到行尾（或内容结尾） */
+    fun atLineEnd(): Boolean {
+        skipSpaces()
+        return position >= limit || buffer[position] == NEWLINE
+    }
+
+    /**
+     * 解析下一个整数（跳过前导空白，支持负号），没有数字时返回 default 且不移动位置
+     * 小数部分被跳过
+     */
+    fun nextLong(default: Long = 0L): Long {
+        skipSpaces()
+        val start = position
+        val negative = position < limit && buffer[position] == MINUS
+        if (negative) position++
+        val digits = position
+        var value = 0L
+        while (position < limit) {
+            val digit = buffer[position] - DIGIT_0
+            if (digit < 0 || digit > 9) break
+            value = value * 10 + digit
+            position++
+        }
+        if (position == digits) {
+            position = start
+            return default
+        }
+        if (position < limit && buffer[position] == DOT) {
+            position++
+            while (peekDigit()) position++
+        }
+        return if (negative) -value else value
+    }
+
+    fun nextInt(default: Int = 0): Int = nextLong(default.toLong()).toInt()
+
+    /**
+     * 解析下一个数字（可带小数），没有数字时返回 default 且不移动位置
+     */
+    fun nextFloat(default: Float = 0f): Float {
+        skipSpaces()
+        val start = position
+        val negative = position < limit && buffer[position] == MINUS
+        if (negative) position++
+        val digits = position
+        var value = 0.0
+        while (peekDigit()) {
+            value = value * 10 + (buffer[position] - DIGIT_0)
+            position++
+        }
+        if (position < limit && buffer[position] == DOT) {
+            position++
+            var scale = 0.1
+            while (peekDigit()) {
+                value += (buffer[position] - DIGIT_0) * scale
+                scale /= 10
+                position++
+            }
+        }
+        if (position == digits) {
+            position = start
+            return default
+        }
+        return (if (negative) -value else value).toFloat()
+    }
+
+    /** 缓冲区中第一个 value 的位置，不存在时返回 -1 */
+    fun indexOf(value: Byte): Int {
+        for (i in 0 until limit) {
+            if (buffer[i] == value) return i
+        }
+        return -1
+    }
+
+    /** 缓冲区中最后一个 value 的位置，不存在时返回 -1 */
+    fun lastIndexOf(value: Byte): Int {
+        for (i in limit - 1 downTo 0) {
+            if (buffer[i] == value) return i
+        }
+        return -1
+    }
+
+    /** 内容是否包含 needle（needle 须为小写 ASCII，按 ASCII 忽略大小写比较） */
+    fun containsIgnoreCase(needle: ByteArray): Boolean {
+        outer@ for (start in 0..limit - needle.size) {
+            for (i in needle.indices) {
+                var b = buffer[start + i].toInt()
+                if (b >= UPPER_A && b <= UPPER_Z) b += 32
+                if (b != needle[i].toInt()) continue@outer
+            }
+            return true
+        }
+        return false
+    }
+
+    /** 关闭所有缓存的文件 */
+    fun close() {
+        for (file in files.values) {
+            closeQuietly(file)
+        }
+        files.clear()
+        missing.clear()
+    }
+
+    private fun isSeparator(b: Byte): Boolean = b == SPACE || b == TAB || b == NEWLINE
+
+    private fun closeQuietly(file: RandomAccessFile) {
+        try {
+            file.close()
+        } catch (e: IOException) {
+            // 忽略
+        }
+    }
+
+    companion object {
+        private const val SPACE: Byte = 0x20
+        private const val TAB: Byte = 0x09
+        private const val NEWLINE: Byte = 0x0A
+        private const val MINUS: Byte = 0x2D
+        private const val DOT: Byte = 0x2E
+        private const val DIGIT_0: Byte = 0x30
+        private const val DIGIT_9: Byte = 0x39
+        private const val UPPER_A = 0x41
+        private const val UPPER_Z = 0x5A
+
+        private const val MISSING_RETRY_NANOS = 5_000_000_000L
+        private const val MAX_MISSING = 256
+
+        /** ASCII 字符串转为字节，用于预先构造 startsWith / containsIgnoreCase 的参数 */
+        fun ascii(value: String): ByteArray = value.toByteArray(Charsets.US_ASCII)
+    }
+}
@@ -8,6 +8,7 @@ import android.hardware.display.DisplayManager
 import android.view.Display
 import android.view.Surface
 import java.io.ByteArrayOutputStream
+import java.io.OutputStream
 import java.lang.reflect.Method
 
 /**
@@ -257,6 +258,51 @@ object ScreenCaptureHelper {
      * @return PNG 格式的字节数组，失败返回 null
      */
     fun captureScreen(context: android.content.Context, maxSize: Int = 0): ByteArray? {
+        val bitmap = captureBitmap(context, maxSize) ?: return null
+        try {
+            // 压缩为 PNG
+            val byteStream = ByteArrayOutputStream()
+            bitmap.compress(Bitmap.CompressFormat.PNG, 100, byteStream)
+            return byteStream.toByteArray()
+        } finally {
+            bitmap.recycle()
+        }
+    }
+    
+    /**
+     * 获取屏幕截图 Bitmap（ARGB_8888），由调用方 recycle
+     * @param context Android Context
+     * @param maxSize 最长边上限（0 表示不缩放），在截图时由 SurfaceFlinger 缩放
+     * @return 失败返回 null
+     */
+    fun captureBitmap(context: android.content.Context, maxSize: Int = 0): Bitmap? {
+        val target = resolveDisplay(context) ?: return null
+        return captureBitmap(target, maxSize)
+    }
+    
+    /**
+     * 截图目标：物理显示的 Token 与当前方向下的逻辑尺寸
+     * 连续截图时可复用，省去每帧的 DisplayInfo 反射与 Token 查询
+     */
+    class DisplayTarget(val token: IBinder, val width: Int, val height: Int, val rotation: Int)
+    
+    // DisplayInfo 反射缓存
+    private var displayInfoClass: Class<*>? = null
+    private var getDisplayInfoMethod: Method? = null
+    private var logicalWidthField: java.lang.reflect.Field? = null
+    private var logicalHeightField: java.lang.reflect.Field? = null
+    private var rotationField: java.lang.reflect.Field? = null
+    private var uniqueIdField: java.lang.reflect.Field? = null
+    
+    // 物理显示 ID -> Token
+    private val displayTokens = HashMap<Long, IBinder>()
+    
+    /**
+     * 查询默认显示的截图目标
+     * @return 失败返回 null
+     */
+    @Synchronized
+    fun resolveDisplay(context: android.content.Context): DisplayTarget? {
         try {
             // 初始化 DisplayControl
             if (!isDisplayControlInitialized) {
@@ -277,31 +323,28 @@ object ScreenCaptureHelper {
                 return null
             }
             
-            // 获取 DisplayInfo（使用反射）
-            val displayInfoClass = Class.forName("android.view.DisplayInfo")
-            val displayInfo = displayInfoClass.newInstance()
-            val getDisplayInfoMethod = Display::class.java.getMethod("getDisplayInfo", displayInfoClass)
-            val getDisplayInfoResult = getDisplayInfoMethod.invoke(display, displayInfo) as? Boolean
+            // 获取 DisplayInfo（使用反射，Method/Field 只查找一次）
+            if (displayInfoClass == null) {
+                val infoClass = Class.forName("android.view.DisplayInfo")
+                getDisplayInfoMethod = Display::class.java.getMethod("getDisplayInfo", infoClass)
+                logicalWidthField = infoClass.getDeclaredField("logicalWidth").apply { isAccessible = true }
+                logicalHeightField = infoClass.getDeclaredField("logicalHeight").apply { isAccessible = true }
+                rotationField = infoClass.getDeclaredField("rotation").apply { isAccessible = true }
+                uniqueIdField = infoClass.getDeclaredField("uniqueId").apply { isAccessible = true }
+                displayInfoClass = infoClass
+            }
+            val displayInfo = displayInfoClass!!.newInstance()
+            val getDisplayInfoResult = getDisplayInfoMethod!!.invoke(display, displayInfo) as? Boolean
             
             if (getDisplayInfoResult != true) {
                 Logger.error("getDisplayInfo returned false", null)
                 return null
             }
             
-            // 获取 DisplayInfo 字段
-            val logicalWidthField = displayInfoClass.getDeclaredField("logicalWidth")
-            logicalWidthField.isAccessible = true
-            val logicalHeightField = displayInfoClass.getDeclaredField("logicalHeight")
-            logicalHeightField.isAccessible = true
-            val rotationField = displayInfoClass.getDeclaredField("rotation")
-            rotationField.isAccessible = true
-            val uniqueIdField = displayInfoClass.getDeclaredField("uniqueId")
-            uniqueIdField.isAccessible = true
-            
-            val logicalWidth = logicalWidthField.getInt(displayInfo)
-            val logicalHeight = logicalHeightField.getInt(displayInfo)
-            val rotation = rotationField.getInt(displayInfo)
-            val uniqueId = uniqueIdField.get(displayInfo) as? String
+            val logicalWidth = logicalWidthField!!.getInt(displayInfo)
+            val logicalHeight = logicalHeightField!!.getInt(displayInfo)
+            val rotation = rotationField!!.getInt(displayInfo)
+            val uniqueId = uniqueIdField!!.get(displayInfo) as? String
             
             // 解析 uniqueId 获取物理显示 ID
             if (uniqueId == null || !uniqueId.contains(":")) {
@@ -317,22 +360,40 @@ object ScreenCaptureHelper {
             }
             
             // 获取 Display Token
-            val displayToken = getPhysicalDisplayTokenMethod!!.invoke(null, physicalDisplayId) as? IBinder
+            var displayToken = displayTokens[physicalDisplayId]
             if (displayToken == null) {
-                Logger.error("getDisplayToken returned null", null)
-                return null
+                displayToken = getPhysicalDisplayTokenMethod!!.invoke(null, physicalDisplayId) as? IBinder
+                if (displayToken == null) {
+                    Logger.error("getDisplayToken returned null", null)
+                    return null
+                }
+                displayTokens[physicalDisplayId] = displayToken
             }
             
+            return DisplayTarget(displayToken, logicalWidth, logicalHeight, rotation)
+        } catch (e: Exception) {
+            Logger.error("Error resolving display", e)
+            return null
+        }
+    }
+    
+    /**
+     * 按已查询的截图目标截图，由调用方 recycle
+     * @param maxSize 最长边上限（0 表示不缩放）
+     * @return 失败返回 null
+     */
+    fun captureBitmap(target: DisplayTarget, maxSize: Int = 0): Bitmap? {
+        try {
             // 计算截图尺寸
             val (width, height) = calculateScreenshotSize(
-                logicalWidth,
-                logicalHeight,
-                rotation,
+                target.width,
+                target.height,
+                target.rotation,
                 maxSize
             )
             
             // 获取 HardwareBuffer
-            val hardwareBuffer = getHardwareBuffer(displayToken, width, height)
+            val hardwareBuffer = getHardwareBuffer(target.token, width, height)
             if (hardwareBuffer == null) {
                 Logger.error("getHardwareBuffer returned null", null)
                 return null
@@ -343,17 +404,8 @@ object ScreenCaptureHelper {
                 val bitmap = hardwareBufferToBitmap(hardwareBuffer)
                 if (bitmap == null) {
                     Logger.error("Failed to convert HardwareBuffer to Bitmap", null)
-                    return null
-                }
-                
-                try {
-                    // 压缩为 PNG
-                    val byteStream = ByteArrayOutputStream()
-                    bitmap.compress(Bitmap.CompressFormat.PNG, 100, byteStream)
-                    return byteStream.toByteArray()
-                } finally {
-                    bitmap.recycle()
                 }
+                return bitmap
             } finally {
                 // 关闭 HardwareBuffer
                 try {
@@ -370,3 +422,113 @@ object ScreenCaptureHelper {
     }
 }
 
+/**
+ * 以 Bitmap 表示的截图，按请求的格式编码
+ */
+class BitmapImage(private val bitmap: Bitmap) : CapturedImage {
+
+    override val width: Int get() = bitmap.width
+    override val height: Int get() = bitmap.height
+
+    override fun encode(format: ImageFormat, quality: Int, output: OutputStream): Boolean {
+        return when (format) {
+            ImageFormat.PNG -> bitmap.compress(Bitmap.CompressFormat.PNG, 100, output)
+            ImageFormat.JPEG -> bitmap.compress(Bitmap.CompressFormat.JPEG, quality, output)
+            ImageFormat.WEBP -> bitmap.compress(webpFormat(quality), quality, output)
+            ImageFormat.RGBA -> writeRgba(output)
+        }
+    }
+
+    override fun release() {
+        bitmap.recycle()
+    }
+
+    /**
+     * ARGB_8888 在内存中按 R, G, B, A 字节顺序存放，直接复制像素即为 RGBA
+     */
+    override fun copyPixels(buffer: ByteArray): Boolean {
+        val pixels = if (bitmap.config == Bitmap.Config.ARGB_8888) bitmap else bitmap.copy(Bitmap.Config.ARGB_8888, false)
+            ?: return false
+        try {
+            val rowBytes = pixels.width * 4
+            if (pixels.rowBytes == rowBytes) {
+                pixels.copyPixelsToBuffer(java.nio.ByteBuffer.wrap(buffer, 0, rowBytes * pixels.height))
+            } else {
+                // 去掉行尾填充
+                val padded = java.nio.ByteBuffer.allocate(pixels.byteCount)
+                pixels.copyPixelsToBuffer(padded)
+                for (row in 0 until pixels.height) {
+                    System.arraycopy(padded.array(), row * pixels.rowBytes, buffer, row * rowBytes, rowBytes)
+                }
+            }
+            return true
+        } finally {
+            if (pixels !== bitmap) pixels.recycle()
+        }
+    }
+
+    private fun writeRgba(output: OutputStream): Boolean {
+        val buffer = ByteArray(width * height * 4)
+        if (!copyPixels(buffer)) return false
+        output.write(buffer)
+        return true
+    }
+
+    @Suppress("DEPRECATION")
+    private fun webpFormat(quality: Int): Bitmap.CompressFormat {
+        if (Build.VERSION.SDK_INT >= Build.VERSION_CODES.R) {
+            return if (quality >= 100) Bitmap.CompressFormat.WEBP_LOSSLESS else Bitmap.CompressFormat.WEBP_LOSSY
+        }
+        return Bitmap.CompressFormat.WEBP
+    }
+
+    companion object {
+        /**
+         * 按最长边缩放（用于不支持截图时缩放的来源），返回新 Bitmap 时回收原图
+         */
+        fun scaled(bitmap: Bitmap, maxSize: Int): Bitmap {
+            val longest = maxOf(bitmap.width, bitmap.height)
+            if (maxSize <= 0 || longest <= maxSize) return bitmap
+            val ratio = maxSize.toFloat() / longest
+            val scaled = Bitmap.createScaledBitmap(
+                bitmap,
+                maxOf(1, (bitmap.width * ratio).toInt()),
+                maxOf(1, (bitmap.height * ratio).toInt()),
+                true
+            )
+            if (scaled !== bitmap) bitmap.recycle()
+            return scaled
+        }
+    }
+}
+
+/**
+ * ScreenCapture API 截图来源，缩放在截图时完成
+ * @param refreshMs 截图目标（Token、尺寸、方向）的复用时间，0 表示每次重新查询；
+ *                  连续截图时复用可省去每帧的反射与 Token 查询，超时后重新查询以跟随屏幕旋转
+ */
+class DisplayCaptureSource(
+    private val context: android.content.Context,
+    private val refreshMs: Long = 0
+) : CaptureSource {
+
+    private var target: ScreenCaptureHelper.DisplayTarget? = null
+    private var resolvedAt = 0L
+
+    override fun capture(maxSize: Int): CapturedImage? {
+        val now = System.nanoTime() / 1_000_000
+        var current = target
+        if (current == null || now - resolvedAt >= refreshMs) {
+            current = ScreenCaptureHelper.resolveDisplay(context) ?: return null
+            target = current
+            resolvedAt = now
+        }
+        val bitmap = ScreenCaptureHelper.captureBitmap(current, maxSize)
+        if (bitmap == null) {
+            // 显示可能已变化，下次重新查询
+            target = null
+            return null
+        }
+        return BitmapImage(bitmap)
+    }
+}
@@ -0,0 +1,218 @@
+package com.panda.utils
+
+import java.io.OutputStream
+import java.util.zip.CRC32
+
+/**
+ * 截图编码格式（命令 121 的格式参数）
+ */
+enum class ImageFormat(val code: Int) {
+    PNG(0),
+    JPEG(1),
+    WEBP(2),
+    /** 原始像素：RGBA_8888，逐行紧密排列（每行 width * 4 字节） */
+    RGBA(3);
+
+    companion object {
+        fun fromCode(code: Int): ImageFormat? = values().firstOrNull { it.code == code }
+    }
+}
+
+/**
+ * 一次截图得到的图像，由截图来源创建
+ */
+interface CapturedImage {
+    val width: Int
+    val height: Int
+
+    /**
+     * 按格式编码并写入 output，编码失败返回 false
+     * @param quality JPEG/WebP 质量（0-100），PNG 与 RGBA 忽略
+     */
+    fun encode(format: ImageFormat, quality: Int, output: OutputStream): Boolean
+
+    /**
+     * 以 RGBA_8888（逐行紧密排列）复制像素到 buffer，长度至少为 width * height * 4
+     * 失败返回 false
+     */
+    fun copyPixels(buffer: ByteArray): Boolean
+
+    /** 释放图像内存 */
+    fun release()
+}
+
+/**
+ * 截图来源：设备上为 ScreenCapture / UiAutomation，JVM 上可用假来源测试编码流程
+ */
+interface CaptureSource {
+    /**
+     * 截取一帧
+     * @param maxSize 最长边上限（0 表示原始分辨率），由来源在截图时缩放
+     * @return 失败返回 null
+     */
+    fun capture(maxSize: Int): CapturedImage?
+}
+
+/**
+ * 截图编码流程：截图 -> 编码 -> 写入响应，分别计时
+ * 不依赖 Android API
+ */
+object ScreenshotEncoder {
+
+    /**
+     * 一次截图的结果，用于日志
+     */
+    class Result(
+        val width: Int,
+        val height: Int,
+        val bytes: Int,
+        val captureMicros: Long,
+        val encodeMicros: Long
+    )
+
+    /**
+     * 截图并写入命令 121 的响应：
+     *   状态(int 0), 宽(int), 高(int), 格式(int), 截图耗时(int μs),
+     *   数据长度(int) + 数据, 编码耗时(int μs)
+     * 截图失败时为 writeError；编码失败时数据长度位置为 writeError（-1 + 错误信息），之后没有编码耗时
+     * @return 成功时的结果，失败返回 null
+     */
+    fun write(
+        sources: List<CaptureSource>,
+        format: ImageFormat,
+        quality: Int,
+        maxSize: Int,
+        output: BinaryEncoder
+    ): Result? {
+        val start = System.nanoTime()
+        val image = capture(sources, maxSize)
+        if (image == null) {
+            output.writeError(-1, "Screen capture failed")
+            return null
+        }
+
+        try {
+            val captureMicros = (System.nanoTime() - start) / 1000
+            output.writeSuccess()
+            output.writeInt(image.width)
+            output.writeInt(image.height)
+            output.writeInt(format.code)
+            output.writeInt(captureMicros.toInt())
+
+            val encodeStart = System.nanoTime()
+            val bytes = try {
+                output.frame {
+                    check(image.encode(format, quality.coerceIn(0, 100), output)) { "Encoding $format failed" }
+                }
+            } catch (e: Exception) {
+                Logger.error("Error encoding screenshot", e)
+                output.writeError(-1, e.message ?: "Encoding failed")
+                return null
+            }
+            val encodeMicros = (System.nanoTime() - encodeStart) / 1000
+            output.writeInt(encodeMicros.toInt())
+            return Result(image.width, image.height, bytes, captureMicros, encodeMicros)
+        } finally {
+            image.release()
+        }
+    }
+
+    /**
+     * 依次尝试各个来源，返回第一个成功的截图
+     */
+    fun capture(sources: List<CaptureSource>, maxSize: Int): CapturedImage? {
+        for (source in sources) {
+            try {
+                source.capture(maxSize)?.let { return it }
+            } catch (e: Exception) {
+                Logger.error("Screenshot source ${source.javaClass.simpleName} failed", e)
+            }
+        }
+        return null
+    }
+}
+
+/**
+ * 连续截图编码（命令 122 推送流）
+ * 像素缓冲区与帧缓冲区在整个推送期间复用；与上一次发送的帧内容（像素 CRC32）相同的帧不编码，
+ * 只计数并附在下一帧中
+ *
+ * 非线程安全：只由推送线程使用
+ */
+class FrameStream(
+    private val sources: List<CaptureSource>,
+    private val format: ImageFormat,
+    private val quality: Int,
+    private val maxSize: Int
+) {
+    /** 最近一次编码的帧（帧长度 + 内容），在下次 next 前有效 */
+    val frame = BinaryEncoder(bufferSize = 64 * 1024)
+
+    private var pixels = ByteArray(0)
+    private val crc = CRC32()
+    private var lastHash = -1L
+    private var lastWidth = 0
+    private var lastHeight = 0
+    private var sequence = 0
+    private var unchanged = 0
+
+    /**
+     * 截取一帧并编码到 frame：
+     *   帧长度(int) + 时间戳(long ms) + 序号(int) + 跳过的未变化帧数(int) + 跳过的周期数(int)
+     *   + 宽(int) + 高(int) + 格式(int) + 截图耗时(int μs) + 数据长度(int) + 数据 + 编码耗时(int μs)
+     * @param late 自上一帧以来因推送跟不上而跳过的周期数
+     * @return 编码了新帧返回 true；内容未变化或截图失败返回 false
+     */
+    fun next(late: Int): Boolean {
+        val timestamp = System.currentTimeMillis()
+        val start = System.nanoTime()
+        val image = ScreenshotEncoder.capture(sources, maxSize) ?: return false
+        try {
+            val width = image.width
+            val height = image.height
+            val length = width * height * 4
+            if (pixels.size < length) pixels = ByteArray(length)
+            if (!image.copyPixels(pixels)) return false
+
+            crc.reset()
+            crc.update(pixels, 0, length)
+            val hash = crc.value
+            if (hash == lastHash && width == lastWidth && height == lastHeight) {
+                unchanged++
+                return false
+            }
+            val captureMicros = (System.nanoTime() - start) / 1000
+
+            val encodeStart = System.nanoTime()
+            frame.reset()
+            frame.frame {
+                frame.writeLong(timestamp)
+                frame.writeInt(sequence)
+                frame.writeInt(unchanged)
+                frame.writeInt(late)
+                frame.writeInt(width)
+                frame.writeInt(height)
+                frame.writeInt(format.code)
+                frame.writeInt(captureMicros.toInt())
+                frame.frame {
+                    if (format == ImageFormat.RGBA) {
+                        // 像素已在缓冲区中，不再经过 Bitmap
+                        frame.write(pixels, 0, length)
+                    } else {
+                        check(image.encode(format, quality.coerceIn(0, 100), frame)) { "Encoding $format failed" }
+                    }
+                }
+                frame.writeInt(((System.nanoTime() - encodeStart) / 1000).toInt())
+            }
+
+            lastHash = hash
+            lastWidth = width
+            lastHeight = height
+            sequence++
+            unchanged = 0
+            return true
+        } finally {
+            image.release()
+        }
+    }
+}
@@ -0,0 +1,110 @@
+package com.panda.bench
+
+import org.junit.Assume
+import java.io.OutputStream
+
+/**
+ * 纯 JVM 微基准工具：预热后按固定时长循环执行，输出每次耗时、吞吐量和每次分配的字节数
+ * 分配量来自 HotSpot 的线程分配计数（com.sun.management.ThreadMXBean），不可用时为 -1
+ *
+ * 基准测试默认跳过，需要时运行：
+ *     ./gradlew :app:testDebugUnitTest -Pbench --tests '*Benchmark'
+ */
+object Bench {
+
+    val enabled: Boolean = System.getProperty("panda.bench") == "true"
+
+    class Result(val name: String, val nanosPerOp: Double, val bytesPerOp: Double) {
+        val opsPerSecond: Double get() = 1e9 / nanosPerOp
+
+        override fun toString(): String = String.format(
+            "%-52s %12.1f ns/op %14.0f ops/s %12.1f B/op",
+            name, nanosPerOp, opsPerSecond, bytesPerOp
+        )
+    }
+
+    /** 只计数的输出流：基准中代替 socket，不计入写出的开销 */
+    class CountingSink : OutputStream() {
+        var bytes = 0L
+
+        override fun write(b: Int) {
+            bytes++
+        }
+
+        override fun write(b: ByteArray, off: Int, len: Int) {
+            bytes += len
+        }
+    }
+
+    /** 未启用基准测试（没有 -Pbench）时跳过当前测试 */
+    fun assumeEnabled() {
+        Assume.assumeTrue("Benchmarks are disabled, run with -Pbench", enabled)
+    }
+
+    /**
+     * 运行一个基准并打印结果
+     * @param batch 每次检查时间前连续执行的次数，单次很慢的操作（如图像编码）用较小的值
+     */
+    fun run(
+        name: String,
+        warmupMillis: Long = 500,
+        measureMillis: Long = 1000,
+        batch: Int = 64,
+        block: () -> Unit
+    ): Result {
+        loop(warmupMillis, batch, block)
+        val allocatedBefore = allocatedBytes()
+        val start = System.nanoTime()
+        val ops = loop(measureMillis, batch, block)
+        val elapsed = System.nanoTime() - start
+        val allocatedAfter = allocatedBytes()
+        val bytesPerOp = if (allocatedBefore < 0) -1.0 else (allocatedAfter - allocatedBefore).toDouble() / ops
+        return Result(name, elapsed.toDouble() / ops, bytesPerOp).also { println(it) }
+    }
+
+    /** 打印两组结果的对比（耗时与分配量之比） */
+    fun compare(before: Result, after: Result) {
+        val speedup = before.nanosPerOp / after.nanosPerOp
+        val allocation = if (before.bytesPerOp > 0 && after.bytesPerOp >= 0) {
+            String.format("%.1f%%", after.bytesPerOp * 100 / before.bytesPerOp)
+        } else {
+            "n/a"
+        }
+        println(String.format("  -> %s vs %s: %.2fx throughput, allocation %s", after.name, before.name, speedup, allocation))
+    }
+
+    private fun loop(millis: Long, batch: Int, block: () -> Unit): Long {
+        val deadline = System.nanoTime() + millis * 1_000_000L
+        var ops = 0L
+        do {
+            for (i in 0 until batch) block()
+            ops += batch
+        } while (System.nanoTime() < deadline)
+        return ops
+    }
+
+    // 通过反射访问：单元测试按 android.jar 编译，没有 java.lang.management
+    private val threadBean: Any? = try {
+        Class.forName("java.lang.management.ManagementFactory").getMethod("getThreadMXBean").invoke(null)
+    } catch (e: Exception) {
+        null
+    }
+
+    private val allocatedBytesMethod = try {
+        Class.forName("com.sun.management.ThreadMXBean")
+            .getMethod("getThreadAllocatedBytes", Long::class.javaPrimitiveType)
+    } catch (e: Exception) {
+        null
+    }
+
+    /** 当前线程累计分配的字节数，不支持时返回 -1 */
+    private fun allocatedBytes(): Long {
+        val bean = threadBean ?: return -1L
+        val method = allocatedBytesMethod ?: return -1L
+        return try {
+            method.invoke(bean, Thread.currentThread().id) as Long
+        } catch (e: Exception) {
+            -1L
+        }
+    }
+}
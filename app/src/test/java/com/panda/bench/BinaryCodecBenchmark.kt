@@ -0,0 +1,216 @@
+package com.panda.bench
+
+import com.panda.utils.BinaryDecoder
+import com.panda.utils.BinaryEncoder
+import org.junit.Assert.assertArrayEquals
+import org.junit.Assert.assertEquals
+import org.junit.Before
+import org.junit.Test
+import java.io.BufferedOutputStream
+import java.io.ByteArrayInputStream
+import java.io.ByteArrayOutputStream
+import java.io.InputStream
+import java.io.OutputStream
+import java.nio.ByteBuffer
+import java.nio.ByteOrder
+
+/**
+ * BinaryEncoder / BinaryDecoder 与原来的 IOUtils 路径对比
+ * 旧实现为改用编码器之前的 IOUtils（每个定长字段分配 ByteBuffer + 临时数组）写入 64KB 的 BufferedOutputStream，
+ * 读取时每个字段分配新数组；两边写出的字节在运行前先校验一致
+ */
+class BinaryCodecBenchmark {
+
+    private var sink = 0L
+
+    @Before
+    fun setUp() {
+        Bench.assumeEnabled()
+    }
+
+    /** 每核 CPU 使用率（201）：状态 + 数量 + 8 个 float */
+    @Test
+    fun encodeCoreUsage() {
+        val usage = FloatArray(8) { 12.5f + it * 7.25f }
+        val writeLegacy = { output: OutputStream ->
+            LegacyIOUtils.writeInt(output, 0)
+            LegacyIOUtils.writeInt(output, usage.size)
+            for (value in usage) LegacyIOUtils.writeFloat(output, value)
+        }
+        val writeEncoder = { output: BinaryEncoder ->
+            output.writeSuccess()
+            output.writeInt(usage.size)
+            output.writeFloatArray(usage)
+        }
+        compareEncoders("core usage (201)", writeLegacy, writeEncoder)
+    }
+
+    /** 应用列表：每个应用包名、名称、版本号、是否系统应用 */
+    @Test
+    fun encodeAppList() {
+        val apps = (0 until 50).map { index ->
+            Triple("com.example.package$index", "示例应用 $index", 1_000_000L + index)
+        }
+        val writeLegacy = { output: OutputStream ->
+            LegacyIOUtils.writeInt(output, 0)
+            LegacyIOUtils.writeInt(output, apps.size)
+            for ((packageName, label, version) in apps) {
+                LegacyIOUtils.writeString(output, packageName)
+                LegacyIOUtils.writeString(output, label)
+                LegacyIOUtils.writeLong(output, version)
+                LegacyIOUtils.writeInt(output, if (version % 2 == 0L) 1 else 0)
+            }
+        }
+        val writeEncoder = { output: BinaryEncoder ->
+            output.writeSuccess()
+            output.writeInt(apps.size)
+            for ((packageName, label, version) in apps) {
+                output.writeString(packageName)
+                output.writeString(label)
+                output.writeLong(version)
+                output.writeBoolean(version % 2 == 0L)
+            }
+        }
+        compareEncoders("app list x${apps.size}", writeLegacy, writeEncoder, batch = 16)
+    }
+
+    /** 请求解析：命令号 + 参数（int、long、字符串） */
+    @Test
+    fun decodeRequests() {
+        val request = BinaryEncoder().apply {
+            for (i in 0 until 16) {
+                writeInt(300 + i)
+                writeInt(i)
+                writeLong(System.currentTimeMillis())
+                writeString("com.example.package$i")
+            }
+        }.toByteArray()
+
+        val legacyInput = ByteArrayInputStream(request)
+        val before = Bench.run("decode 16 requests IOUtils (old)") {
+            legacyInput.reset()
+            for (i in 0 until 16) {
+                sink += LegacyIOUtils.readInt(legacyInput) + LegacyIOUtils.readInt(legacyInput)
+                sink += LegacyIOUtils.readLong(legacyInput)
+                sink += LegacyIOUtils.readString(legacyInput).length
+            }
+        }
+        val decoderInput = ByteArrayInputStream(request)
+        val decoder = BinaryDecoder(decoderInput)
+        val after = Bench.run("decode 16 requests BinaryDecoder") {
+            decoderInput.reset()
+            for (i in 0 until 16) {
+                sink += decoder.readInt() + decoder.readInt()
+                sink += decoder.readLong()
+                sink += decoder.readString().length
+            }
+        }
+        Bench.compare(before, after)
+    }
+
+    private fun compareEncoders(
+        name: String,
+        writeLegacy: (OutputStream) -> Unit,
+        writeEncoder: (BinaryEncoder) -> Unit,
+        batch: Int = 64
+    ) {
+        // 两种实现写出的字节必须相同
+        val expected = ByteArrayOutputStream().also { writeLegacy(it) }.toByteArray()
+        val actual = BinaryEncoder().also { writeEncoder(it) }.toByteArray()
+        assertArrayEquals(expected, actual)
+
+        // 与连接上相同：写入带缓冲的输出流，每条响应后 flush
+        val legacyOutput = BufferedOutputStream(Bench.CountingSink(), CONNECTION_BUFFER_SIZE)
+        val before = Bench.run("$name IOUtils + BufferedOutputStream (old)", batch = batch) {
+            writeLegacy(legacyOutput)
+            legacyOutput.flush()
+        }
+        val countingSink = Bench.CountingSink()
+        val encoder = BinaryEncoder(countingSink, CONNECTION_BUFFER_SIZE)
+        val after = Bench.run("$name BinaryEncoder", batch = batch) {
+            writeEncoder(encoder)
+            encoder.flush()
+        }
+        assertEquals(0L, countingSink.bytes % expected.size)
+        Bench.compare(before, after)
+    }
+
+    /** 改用 BinaryEncoder / BinaryDecoder 之前的 IOUtils（只保留基准用到的函数） */
+    private object LegacyIOUtils {
+
+        fun writeInt(output: OutputStream, value: Int) {
+            val buffer = ByteBuffer.allocate(4)
+            buffer.order(ByteOrder.BIG_ENDIAN)
+            buffer.putInt(value)
+            buffer.flip()
+            val bytes = ByteArray(4)
+            buffer.get(bytes)
+            output.write(bytes)
+        }
+
+        fun readInt(input: InputStream): Int {
+            val bytes = ByteArray(4)
+            readFully(input, bytes)
+            return ((bytes[0].toInt() and 0xFF) shl 24) or
+                   ((bytes[1].toInt() and 0xFF) shl 16) or
+                   ((bytes[2].toInt() and 0xFF) shl 8) or
+                   (bytes[3].toInt() and 0xFF)
+        }
+
+        fun writeLong(output: OutputStream, value: Long) {
+            val buffer = ByteBuffer.allocate(8)
+            buffer.order(ByteOrder.BIG_ENDIAN)
+            buffer.putLong(value)
+            buffer.flip()
+            val bytes = ByteArray(8)
+            buffer.get(bytes)
+            output.write(bytes)
+        }
+
+        fun readLong(input: InputStream): Long {
+            val bytes = ByteArray(8)
+            readFully(input, bytes)
+            val buffer = ByteBuffer.wrap(bytes)
+            buffer.order(ByteOrder.BIG_ENDIAN)
+            return buffer.long
+        }
+
+        fun writeFloat(output: OutputStream, value: Float) {
+            val buffer = ByteBuffer.allocate(4)
+            buffer.order(ByteOrder.BIG_ENDIAN)
+            buffer.putFloat(value)
+            buffer.flip()
+            val bytes = ByteArray(4)
+            buffer.get(bytes)
+            output.write(bytes)
+        }
+
+        fun writeString(output: OutputStream, value: String) {
+            val bytes = value.toByteArray(Charsets.UTF_8)
+            writeInt(output, bytes.size)
+            output.write(bytes)
+        }
+
+        fun readString(input: InputStream): String {
+            val length = readInt(input)
+            if (length == 0) return ""
+            val bytes = ByteArray(length)
+            readFully(input, bytes)
+            return String(bytes, Charsets.UTF_8)
+        }
+
+        private fun readFully(input: InputStream, bytes: ByteArray) {
+            var offset = 0
+            while (offset < bytes.size) {
+                val read = input.read(bytes, offset, bytes.size - offset)
+                if (read == -1) throw java.io.EOFException("Unexpected end of stream")
+                offset += read
+            }
+        }
+    }
+
+    companion object {
+        // SocketTransport 的缓冲区大小
+        private const val CONNECTION_BUFFER_SIZE = 65536
+    }
+}
@@ -0,0 +1,98 @@
+package com.panda.bench
+
+import com.panda.utils.Logger
+import org.junit.After
+import org.junit.Before
+import org.junit.Test
+import java.io.BufferedOutputStream
+import java.io.File
+import java.io.FileOutputStream
+import java.io.PrintStream
+import java.nio.file.Files
+import java.text.SimpleDateFormat
+import java.util.Date
+import java.util.Locale
+
+/**
+ * 命令处理线程上的日志开销：原来的同步 Logger vs 异步 Logger
+ * 旧实现在调用线程上格式化时间并 println（设备上 stdout 重定向到文件，每行 flush），
+ * 这里写入临时文件上自动 flush 的 PrintStream；新 Logger 只计调用线程的开销，写出由 panda-logger 线程完成
+ */
+class LoggerBenchmark {
+
+    private lateinit var directory: File
+    private lateinit var legacy: LegacyLogger
+    private var command = 0
+
+    @Before
+    fun setUp() {
+        Bench.assumeEnabled()
+        directory = Files.createTempDirectory("logger-bench").toFile()
+        legacy = LegacyLogger(PrintStream(BufferedOutputStream(FileOutputStream(File(directory, "stdout.log"))), true))
+        Logger.configure(Logger.Level.INFO, File(directory, "panda.log").path, console = false)
+    }
+
+    @After
+    fun tearDown() {
+        if (!::directory.isInitialized) return
+        Logger.flush()
+        Logger.configure(Logger.Level.INFO, null, console = true)
+        legacy.out.close()
+        directory.deleteRecursively()
+    }
+
+    /** 每条命令一行日志（Main / TcpProxyServer 的命令日志） */
+    @Test
+    fun perCommandLog() {
+        val before = Bench.run("per-command log, sync println (old)") {
+            legacy.log("Client #1 - Command: ${command++ and 0xFF}")
+        }
+        val commandLog = Logger.RateLimit(1000)
+        val after = Bench.run("per-command log, async + RateLimit") {
+            Logger.log(commandLog) { "Client #1 - Command: ${command++ and 0xFF}" }
+        }
+        Bench.compare(before, after)
+    }
+
+    /** 每次采样的调试日志，默认 INFO 级别下关闭 */
+    @Test
+    fun perSampleDebugLog() {
+        val before = Bench.run("per-sample debug, sync println (old)") {
+            legacy.debug("CPU usage: ${command++ % 100}%")
+        }
+        val after = Bench.run("per-sample debug { }, level INFO") {
+            Logger.debug { "CPU usage: ${command++ % 100}%" }
+        }
+        Bench.compare(before, after)
+    }
+
+    /**
+     * 不限流的 INFO 日志：只在调用线程放入环形缓冲区
+     * 调用速度远高于写出速度时缓冲区写满，之后的日志被丢弃（计数），这里同时包含两种情况
+     */
+    @Test
+    fun unthrottledLog() {
+        val before = Bench.run("unthrottled log, sync println (old)") {
+            legacy.log("Client #1 disconnected")
+        }
+        val after = Bench.run("unthrottled log, async ring buffer") {
+            Logger.log("Client #1 disconnected")
+        }
+        Bench.compare(before, after)
+    }
+
+    /** 改为异步之前的 Logger（println 改为写入指定的流） */
+    class LegacyLogger(val out: PrintStream) {
+        private val dateFormat = SimpleDateFormat("yyyy-MM-dd HH:mm:ss.SSS", Locale.US)
+
+        fun log(message: String) {
+            val timestamp = dateFormat.format(Date())
+            out.println("[$timestamp] [INFO] $message")
+        }
+
+        fun debug(message: String) {
+            val timestamp = dateFormat.format(Date())
+            out.println("[$timestamp] [DEBUG] $message")
+        }
+    }
+}
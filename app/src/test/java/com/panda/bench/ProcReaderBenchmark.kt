@@ -0,0 +1,86 @@
+package com.panda.bench
+
+import com.panda.utils.ProcReader
+import org.junit.Assume
+import org.junit.Before
+import org.junit.Test
+import java.io.BufferedReader
+import java.io.File
+import java.io.FileReader
+
+/**
+ * ProcReader 与原来的按行读取 + split 解析对比（主机上的真实 /proc）
+ * 旧实现与 CpuModule 改用 ProcReader 之前相同：
+ * - /proc/stat: BufferedReader 按行读取 cpu 行，split 后 toLongOrNull
+ * - 线程 stat: File.readText + split(Regex)
+ */
+class ProcReaderBenchmark {
+
+    private val reader = ProcReader()
+    private var sink = 0L
+
+    @Before
+    fun setUp() {
+        Bench.assumeEnabled()
+        Assume.assumeTrue(File(PROC_STAT).canRead())
+    }
+
+    @Test
+    fun procStat() {
+        val before = Bench.run("/proc/stat BufferedReader + split") {
+            val lines = BufferedReader(FileReader(PROC_STAT)).use { input ->
+                input.lineSequence().takeWhile { it.startsWith("cpu") }.toList()
+            }
+            for (line in lines) {
+                val parts = line.trim().split(WHITESPACE)
+                for (i in 1..minOf(8, parts.size - 1)) sink += parts[i].toLongOrNull() ?: 0L
+            }
+        }
+        val after = Bench.run("/proc/stat ProcReader") {
+            if (reader.read(PROC_STAT)) {
+                while (reader.startsWith(CPU_PREFIX)) {
+                    reader.position += CPU_PREFIX.size
+                    if (reader.peekDigit()) reader.nextInt()
+                    for (i in 0 until 8) {
+                        if (reader.atLineEnd()) break
+                        sink += reader.nextLong()
+                    }
+                    reader.nextLine()
+                }
+            }
+        }
+        Bench.compare(before, after)
+    }
+
+    @Test
+    fun threadStats() {
+        val tasks = File("/proc/self/task").listFiles()?.map { File(it, "stat").path }
+        Assume.assumeTrue(tasks != null && tasks.isNotEmpty())
+        val paths = tasks!!
+
+        val before = Bench.run("thread stat x${paths.size} readText + split", batch = 8) {
+            for (path in paths) {
+                val file = File(path)
+                if (!file.exists()) continue
+                val parts = file.readText().split(WHITESPACE)
+                if (parts.size >= 15) sink += (parts[13].toLongOrNull() ?: 0L) + (parts[14].toLongOrNull() ?: 0L)
+            }
+        }
+        val after = Bench.run("thread stat x${paths.size} ProcReader", batch = 8) {
+            for (path in paths) {
+                if (!reader.read(path)) continue
+                reader.position = reader.lastIndexOf(CLOSE_PAREN) + 1
+                reader.skipTokens(11)
+                sink += reader.nextLong() + reader.nextLong()
+            }
+        }
+        Bench.compare(before, after)
+    }
+
+    companion object {
+        private const val PROC_STAT = "/proc/stat"
+        private val CPU_PREFIX = ProcReader.ascii("cpu")
+        private const val CLOSE_PAREN: Byte = 0x29  // ')'
+        private val WHITESPACE = Regex("\\s+")
+    }
+}
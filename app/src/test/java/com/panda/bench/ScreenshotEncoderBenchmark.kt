@@ -0,0 +1,87 @@
+package com.panda.bench
+
+import com.panda.utils.BinaryEncoder
+import com.panda.utils.FakeCaptureSource
+import com.panda.utils.FrameStream
+import com.panda.utils.ImageFormat
+import com.panda.utils.ScreenshotEncoder
+import org.junit.Assert.assertNotNull
+import org.junit.Before
+import org.junit.Test
+import java.io.ByteArrayOutputStream
+
+/**
+ * 截图编码流程按格式、质量和缩放计时（FakeCaptureSource，1080x2400 合成画面）
+ * 旧路径为命令 120：原始分辨率 PNG 先压缩到 ByteArrayOutputStream，再复制为数组写入响应
+ * 编码器是 FakeCaptureSource 中基于 Deflater 的替代实现，用于比较流程开销和相对趋势，真实编码耗时以设备为准
+ */
+class ScreenshotEncoderBenchmark {
+
+    private val source = FakeCaptureSource()
+    private val sink = Bench.CountingSink()
+    private val output = BinaryEncoder(sink, CONNECTION_BUFFER_SIZE)
+
+    @Before
+    fun setUp() {
+        Bench.assumeEnabled()
+    }
+
+    @Test
+    fun formatsAndQuality() {
+        val before = Bench.run("120 PNG full size via byte array (old)", batch = 1) {
+            val image = source.capture(0)!!
+            try {
+                val bytes = ByteArrayOutputStream()
+                image.encode(ImageFormat.PNG, 100, bytes)
+                output.writeBytes(bytes.toByteArray())
+                output.flush()
+            } finally {
+                image.release()
+            }
+        }
+
+        for ((format, quality, maxSize) in VARIANTS) {
+            var result: ScreenshotEncoder.Result? = null
+            val after = Bench.run("121 $format q=$quality max=$maxSize", batch = 1) {
+                result = ScreenshotEncoder.write(listOf(source), format, quality, maxSize, output)
+                output.flush()
+            }
+            val last = result
+            assertNotNull(last)
+            println(String.format(
+                "  %dx%d, %d bytes, capture %d us, encode %d us",
+                last!!.width, last.height, last.bytes, last.captureMicros, last.encodeMicros
+            ))
+            Bench.compare(before, after)
+        }
+    }
+
+    /** 命令 122 的连续帧：内容每帧变化（全部编码）与静止画面（跳过未变化的帧） */
+    @Test
+    fun frameStream() {
+        val animated = FrameStream(listOf(FakeCaptureSource(animate = true)), ImageFormat.JPEG, 70, 720)
+        Bench.run("122 JPEG q=70 max=720, changing frames", batch = 1) {
+            animated.next(0)
+        }
+        val still = FrameStream(listOf(FakeCaptureSource()), ImageFormat.JPEG, 70, 720)
+        Bench.run("122 JPEG q=70 max=720, unchanged frames", batch = 1) {
+            still.next(0)
+        }
+    }
+
+    companion object {
+        private const val CONNECTION_BUFFER_SIZE = 65536
+
+        private val VARIANTS = listOf(
+            Triple(ImageFormat.PNG, 100, 0),
+            Triple(ImageFormat.PNG, 100, 1280),
+            Triple(ImageFormat.JPEG, 90, 0),
+            Triple(ImageFormat.JPEG, 70, 0),
+            Triple(ImageFormat.JPEG, 70, 1280),
+            Triple(ImageFormat.JPEG, 50, 720),
+            Triple(ImageFormat.WEBP, 80, 1280),
+            Triple(ImageFormat.RGBA, 100, 0),
+            Triple(ImageFormat.RGBA, 100, 720)
+        )
+    }
+}
@@ -0,0 +1,182 @@
+package com.panda.modules
+
+import org.junit.Assert.assertArrayEquals
+import org.junit.Assert.assertEquals
+import org.junit.Assert.assertNotNull
+import org.junit.Assert.assertNull
+import org.junit.Assert.assertTrue
+import org.junit.Test
+
+/**
+ * SurfaceFlinger --latency / --list 解析与帧统计，数据为录制的 dump（src/test/resources/surfaceflinger）
+ */
+class FrameStatsTest {
+
+    private fun fixture(name: String): String =
+        FrameStatsTest::class.java.getResource("/surfaceflinger/$name")!!.readText()
+
+    // ========== --latency 解析 ==========
+
+    @Test
+    fun parsesCompletedFramesAndSkipsPendingFences() {
+        val dump = SurfaceFlingerLatency.parse(fixture("latency_60hz.txt"))
+        assertNotNull(dump)
+        dump!!
+        assertEquals(16_666_666L, dump.refreshPeriodNanos)
+        // 22 行未使用的 0 行和 2 行 INT64_MAX（未完成的 present fence）均被跳过
+        assertEquals(104, dump.presentTimes.size)
+        assertEquals(FIRST_60HZ, dump.presentTimes.first())
+        assertEquals(LAST_60HZ, dump.presentTimes.last())
+        assertTrue(dump.presentTimes.none { it == Long.MAX_VALUE || it <= 0L })
+        for (i in 1 until dump.presentTimes.size) {
+            assertTrue(dump.presentTimes[i] > dump.presentTimes[i - 1])
+        }
+    }
+
+    @Test
+    fun readsRefreshPeriodLine() {
+        val dump = SurfaceFlingerLatency.parse(fixture("latency_120hz_jank.txt"))!!
+        assertEquals(8_333_333L, dump.refreshPeriodNanos)
+        assertEquals(123, dump.presentTimes.size)
+    }
+
+    @Test
+    fun missingLayerHasOnlyRefreshPeriod() {
+        assertNull(SurfaceFlingerLatency.parse(fixture("latency_missing_layer.txt")))
+        assertNull(SurfaceFlingerLatency.parse(""))
+        assertNull(SurfaceFlingerLatency.parse("not a number\n1 2 3\n"))
+    }
+
+    @Test
+    fun sortsOutOfOrderRows() {
+        val dump = SurfaceFlingerLatency.parse("16666666\n0 300 0\n0 100 0\n0 200 0\n")!!
+        assertArrayEquals(longArrayOf(100, 200, 300), dump.presentTimes)
+    }
+
+    // ========== 图层选择 ==========
+
+    @Test
+    fun selectsAppAndSurfaceViewCandidates() {
+        val candidates = SurfaceFlingerLatency.candidates(fixture("list.txt"), "")
+        assertEquals(
+            listOf(
+                "com.android.launcher3/com.android.launcher3.uioverrides.QuickstepLauncher#0",
+                "com.example.game/com.example.game.MainActivity#0",
+                "SurfaceView[com.example.game/com.example.game.MainActivity]#0",
+                "SurfaceView[com.example.game/com.example.game.MainActivity](BLAST)#1"
+            ),
+            candidates
+        )
+    }
+
+    @Test
+    fun selectsCandidatesMatchingTarget() {
+        val candidates = SurfaceFlingerLatency.candidates(fixture("list.txt"), "com.example.game")
+        assertEquals(4, candidates.size)
+        assertTrue(candidates.all { it.contains("com.example.game") })
+        assertTrue(candidates.contains("Splash Screen com.example.game#0"))
+    }
+
+    @Test
+    fun selectsBusiestLayerPreferringSurfaceView() {
+        val active = SurfaceFlingerLatency.parse(fixture("latency_60hz.txt"))!!
+        val idle = SurfaceFlingerLatency.LatencyDump(16_666_666L, longArrayOf(LAST_60HZ - 5_000_000_000L))
+        val now = LAST_60HZ + 1_000_000L
+        val launcher = "com.android.launcher3/com.android.launcher3.uioverrides.QuickstepLauncher#0"
+        val activity = "com.example.game/com.example.game.MainActivity#0"
+        val surfaceView = "SurfaceView[com.example.game/com.example.game.MainActivity](BLAST)#1"
+
+        // 帧数相同时选 SurfaceView
+        val tie = listOf(Pair(launcher, idle), Pair(activity, active), Pair(surfaceView, active))
+        assertEquals(2, SurfaceFlingerLatency.selectBusiest(tie, now, 1_000_000_000L))
+
+        // 帧数更多的图层优先
+        val busier = listOf(Pair(surfaceView, idle), Pair(activity, active), Pair(launcher, idle))
+        assertEquals(1, SurfaceFlingerLatency.selectBusiest(busier, now, 1_000_000_000L))
+
+        assertEquals(-1, SurfaceFlingerLatency.selectBusiest(emptyList(), now, 1_000_000_000L))
+    }
+
+    // ========== 帧统计 ==========
+
+    @Test
+    fun computesSteadyFrameRate() {
+        val dump = SurfaceFlingerLatency.parse(fixture("latency_60hz.txt"))!!
+        val tracker = FrameTracker(FrameTracker.capacityFor(60_000))
+        val now = LAST_60HZ + 1_000_000L
+        assertEquals(104, tracker.ingest(dump.presentTimes, now))
+        // 同一次 dump 再次接收时没有新帧
+        assertEquals(0, tracker.ingest(dump.presentTimes, now))
+
+        val stats = tracker.stats(now, 1_000_000_000L)
+        assertEquals(60, stats.frames)
+        assertEquals(60f, stats.fps, 0.01f)
+        assertEquals(16.666666f, stats.p50, 0.001f)
+        assertEquals(16.666666f, stats.max, 0.001f)
+        assertEquals(0, stats.jank)
+        assertEquals(0, stats.bigJank)
+    }
+
+    @Test
+    fun countsJankAndBigJank() {
+        val dump = SurfaceFlingerLatency.parse(fixture("latency_120hz_jank.txt"))!!
+        val tracker = FrameTracker(FrameTracker.capacityFor(60_000))
+        val now = dump.presentTimes.last() + 1_000_000L
+        tracker.ingest(dump.presentTimes, now)
+
+        val stats = tracker.stats(now, 2_000_000_000L)
+        assertEquals(123, stats.frames)
+        // 100ms 的帧超过两帧电影帧时间（83.3ms）；150ms 的帧同时超过三帧电影帧时间（125ms）
+        assertEquals(2, stats.jank)
+        assertEquals(1, stats.bigJank)
+        assertEquals(150f, stats.max, 0.001f)
+        assertEquals(8.333333f, stats.p50, 0.001f)
+        // 窗口长于跟踪时长：按跟踪时长计算
+        assertEquals(123 / 1.25099996f, stats.fps, 0.01f)
+    }
+
+    @Test
+    fun holdsMaxWindowAtHighRefreshRate() {
+        // 120Hz 下 60 秒共 7200 帧，超过原来 4096 帧的容量
+        val period = 8_333_333L
+        val base = 1_000_000_000_000L
+        val frames = LongArray(7200) { base + it * period }
+        val now = frames.last() + 1_000_000L
+
+        val tracker = FrameTracker(FrameTracker.capacityFor(60_000))
+        ingestInChunks(tracker, frames)
+        val stats = tracker.stats(now, 60_000_000_000L)
+        assertEquals(7200, stats.frames)
+        assertEquals(120f, stats.fps, 0.1f)
+    }
+
+    @Test
+    fun clampsWindowToBufferedFrames() {
+        val period = 8_333_333L
+        val base = 1_000_000_000_000L
+        val frames = LongArray(7200) { base + it * period }
+        val now = frames.last() + 1_000_000L
+
+        // 缓冲区只保留最近 1000 帧：FPS 按缓冲区覆盖的时长计算，不会被低估
+        val tracker = FrameTracker(1000)
+        ingestInChunks(tracker, frames)
+        val stats = tracker.stats(now, 60_000_000_000L)
+        assertEquals(1000, stats.frames)
+        assertEquals(120f, stats.fps, 0.5f)
+    }
+
+    /** 与 SurfaceFlinger 一样每次最多提供 128 帧 */
+    private fun ingestInChunks(tracker: FrameTracker, frames: LongArray) {
+        var offset = 0
+        while (offset < frames.size) {
+            val end = minOf(offset + 128, frames.size)
+            tracker.ingest(frames.copyOfRange(offset, end), frames[end - 1])
+            offset = end
+        }
+    }
+
+    companion object {
+        private const val FIRST_60HZ = 7_200_000_000_000L
+        private const val LAST_60HZ = 7_201_716_666_598L
+    }
+}
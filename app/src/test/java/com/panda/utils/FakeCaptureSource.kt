@@ -0,0 +1,142 @@
+package com.panda.utils
+
+import java.io.OutputStream
+import java.util.zip.Deflater
+import java.util.zip.DeflaterOutputStream
+
+/**
+ * JVM 上的假截图来源：生成合成画面（渐变背景 + 纯色块，近似 UI 截图），按 maxSize 缩放
+ * 主机 JVM 上没有 Bitmap（android.jar 只有桩），编码用 Deflater 代替：
+ * - PNG: 每行加过滤字节后 Deflater 默认级别（与 PNG 的 IDAT 相同，不含文件头和 CRC）
+ * - JPEG/WebP: 按质量去掉像素低位（有损）后 Deflater，WebP 用更高的压缩级别
+ * - RGBA: 原始像素
+ * 编码耗时和大小随格式、质量和分辨率的变化趋势与真实编码器一致，绝对值以设备上的测量为准
+ *
+ * @param animate 为 true 时每次截图移动色块，画面内容不同
+ */
+class FakeCaptureSource(
+    private val width: Int = 1080,
+    private val height: Int = 2400,
+    private val animate: Boolean = false
+) : CaptureSource {
+
+    /** 截图次数 */
+    var captures = 0
+        private set
+
+    /** 已释放的图像数 */
+    var releases = 0
+        private set
+
+    /** 为 true 时 capture 返回 null（截图失败） */
+    var failCapture = false
+
+    /** 为 true 时 encode 返回 false（编码失败） */
+    var failEncode = false
+
+    private var cached: ByteArray? = null
+    private var cachedWidth = 0
+    private var cachedHeight = 0
+
+    override fun capture(maxSize: Int): CapturedImage? {
+        if (failCapture) return null
+        val longest = maxOf(width, height)
+        val scale = if (maxSize in 1 until longest) maxSize.toFloat() / longest else 1f
+        val w = maxOf(1, (width * scale).toInt())
+        val h = maxOf(1, (height * scale).toInt())
+        val offset = if (animate) captures * 8 else 0
+        captures++
+
+        val pixels = if (!animate && cached != null && cachedWidth == w && cachedHeight == h) {
+            cached!!
+        } else {
+            render(w, h, offset).also {
+                cached = it
+                cachedWidth = w
+                cachedHeight = h
+            }
+        }
+        return Image(w, h, pixels)
+    }
+
+    private inner class Image(
+        override val width: Int,
+        override val height: Int,
+        private val pixels: ByteArray
+    ) : CapturedImage {
+
+        override fun encode(format: ImageFormat, quality: Int, output: OutputStream): Boolean {
+            if (failEncode) return false
+            val stride = width * 4
+            when (format) {
+                ImageFormat.RGBA -> output.write(pixels, 0, stride * height)
+                ImageFormat.PNG -> deflate(output, Deflater.DEFAULT_COMPRESSION) { stream ->
+                    for (y in 0 until height) {
+                        stream.write(0)  // 过滤类型 None
+                        stream.write(pixels, y * stride, stride)
+                    }
+                }
+                ImageFormat.JPEG, ImageFormat.WEBP -> {
+                    // 质量越低去掉的低位越多：100 -> 0 位，0 -> 6 位
+                    val mask = (0xFF shl ((100 - quality) / 17)).toByte()
+                    val level = if (format == ImageFormat.WEBP) Deflater.DEFAULT_COMPRESSION else Deflater.BEST_SPEED
+                    val row = ByteArray(stride)
+                    deflate(output, level) { stream ->
+                        for (y in 0 until height) {
+                            val start = y * stride
+                            for (i in 0 until stride) row[i] = (pixels[start + i].toInt() and mask.toInt()).toByte()
+                            stream.write(row, 0, stride)
+                        }
+                    }
+                }
+            }
+            return true
+        }
+
+        override fun copyPixels(buffer: ByteArray): Boolean {
+            System.arraycopy(pixels, 0, buffer, 0, width * height * 4)
+            return true
+        }
+
+        override fun release() {
+            releases++
+        }
+    }
+
+    private inline fun deflate(output: OutputStream, level: Int, block: (DeflaterOutputStream) -> Unit) {
+        val deflater = Deflater(level)
+        try {
+            val stream = DeflaterOutputStream(output, deflater, 8192)
+            block(stream)
+            // finish 而不是 close：output 由调用方管理
+            stream.finish()
+        } finally {
+            deflater.end()
+        }
+    }
+
+    companion object {
+        /** 渐变背景上的若干纯色块（卡片、按钮），offset 使色块水平移动 */
+        fun render(width: Int, height: Int, offset: Int): ByteArray {
+            val pixels = ByteArray(width * height * 4)
+            val block = maxOf(1, width / 6)
+            for (y in 0 until height) {
+                for (x in 0 until width) {
+                    val index = (y * width + x) * 4
+                    val inBlock = ((x + offset) / block + y / block) % 3 == 0 && (y / block) % 2 == 0
+                    if (inBlock) {
+                        pixels[index] = 0x33
+                        pixels[index + 1] = 0x99.toByte()
+                        pixels[index + 2] = 0xFF.toByte()
+                    } else {
+                        pixels[index] = (x * 255 / width).toByte()
+                        pixels[index + 1] = (y * 255 / height).toByte()
+                        pixels[index + 2] = 0x80.toByte()
+                    }
+                    pixels[index + 3] = 0xFF.toByte()
+                }
+            }
+            return pixels
+        }
+    }
+}
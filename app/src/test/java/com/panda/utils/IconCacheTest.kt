@@ -0,0 +1,40 @@
+package com.panda.utils
+
+import org.junit.Assert.assertArrayEquals
+import org.junit.Assert.assertFalse
+import org.junit.Assert.assertNull
+import org.junit.Assert.assertTrue
+import org.junit.Rule
+import org.junit.Test
+import org.junit.rules.TemporaryFolder
+import java.io.File
+
+class IconCacheTest {
+
+    @get:Rule
+    val folder = TemporaryFolder()
+
+    @Test
+    fun pruneKeepsInstalledAndInFlightFiles() {
+        val directory = folder.newFolder("icons")
+        val cache = IconCache(directory)
+        val icon = byteArrayOf(1, 2, 3)
+        cache.put("com.example.kept", 1, 96, icon)
+        cache.put("com.example.removed", 1, 96, icon)
+
+        // 渲染线程正在写入的临时文件，以及进程退出留下的过期临时文件
+        val inFlight = File(directory, ".com.example.new@96.7.tmp").apply { writeBytes(icon) }
+        val stale = File(directory, ".com.example.old@96.8.tmp").apply {
+            writeBytes(icon)
+            setLastModified(System.currentTimeMillis() - 120_000L)
+        }
+
+        cache.prune(setOf("com.example.kept"))
+
+        assertTrue(inFlight.exists())
+        assertFalse(stale.exists())
+        assertFalse(File(directory, "com.example.removed@96").exists())
+        assertNull(cache.get("com.example.removed", 1, 96))
+        assertArrayEquals(icon, IconCache(directory).get("com.example.kept", 1, 96))
+    }
+}
@@ -0,0 +1,208 @@
+package com.panda.utils
+
+import org.junit.After
+import org.junit.Assert.assertEquals
+import org.junit.Assert.assertFalse
+import org.junit.Assert.assertTrue
+import org.junit.Assume
+import org.junit.Before
+import org.junit.Test
+import java.io.File
+import java.nio.file.Files
+
+class ProcReaderTest {
+
+    private lateinit var directory: File
+    private val reader = ProcReader(initialCapacity = 16)
+
+    @Before
+    fun setUp() {
+        directory = Files.createTempDirectory("proc-reader").toFile()
+    }
+
+    @After
+    fun tearDown() {
+        reader.close()
+        directory.deleteRecursively()
+    }
+
+    @Test
+    fun rereadsFromStartAfterContentChanges() {
+        val file = File(directory, "value")
+        file.writeText("100\n")
+        assertEquals(100L, reader.readLong(file.path))
+
+        // 文件保持打开，第二次读取 seek(0) 后应得到新内容
+        file.writeText("2500\n")
+        assertEquals(2500L, reader.readLong(file.path))
+        file.writeText("7\n")
+        assertEquals(7L, reader.readLong(file.path))
+    }
+
+    @Test
+    fun growsBufferForLargeFiles() {
+        val file = File(directory, "large")
+        val content = (1..500).joinToString(" ")
+        file.writeText(content)
+
+        assertTrue(reader.read(file.path))
+        assertEquals(content.length, reader.limit)
+        var sum = 0L
+        while (reader.hasRemaining() && !reader.atLineEnd()) {
+            sum += reader.nextLong()
+        }
+        assertEquals(500L * 501 / 2, sum)
+    }
+
+    @Test
+    fun backsOffMissingPaths() {
+        val file = File(directory, "hotplug")
+        assertFalse(reader.read(file.path))
+        assertEquals(0, reader.limit)
+
+        // 退避期内即使文件已出现也不再尝试打开
+        file.writeText("1")
+        assertFalse(reader.read(file.path))
+        assertEquals(-1L, reader.readLong(file.path, -1L))
+
+        // 新的读取器没有退避记录
+        val fresh = ProcReader()
+        try {
+            assertEquals(1L, fresh.readLong(file.path))
+        } finally {
+            fresh.close()
+        }
+    }
+
+    @Test
+    fun parsesNumbers() {
+        val file = File(directory, "numbers")
+        file.writeText("  42 -17 3.75 45 %\tabc 9\n12")
+        assertTrue(reader.read(file.path))
+
+        assertEquals(42L, reader.nextLong())
+        assertEquals(-17L, reader.nextLong())
+        // nextLong 跳过小数部分
+        val mark = reader.position
+        assertEquals(3L, reader.nextLong())
+        reader.position = mark
+        assertEquals(3.75f, reader.nextFloat(), 1e-6f)
+        assertEquals(45f, reader.nextFloat(), 0f)
+
+        // 没有数字时返回默认值且不移动位置
+        reader.skipTokens(1)   // "%"
+        reader.skipSpaces()
+        val before = reader.position
+        assertEquals(-1L, reader.nextLong(-1L))
+        assertEquals(-2f, reader.nextFloat(-2f), 0f)
+        assertEquals(before, reader.position)
+
+        reader.skipTokens(1)   // "abc"
+        assertEquals(9, reader.nextInt())
+        assertTrue(reader.atLineEnd())
+        reader.nextLine()
+        assertEquals(12L, reader.nextLong())
+        assertFalse(reader.hasRemaining())
+    }
+
+    @Test
+    fun readsFloatFiles() {
+        val file = File(directory, "gpubusy")
+        file.writeText("45 %\n")
+        assertEquals(45f, reader.readFloat(file.path), 0f)
+        file.writeText("12.5\n")
+        assertEquals(12.5f, reader.readFloat(file.path), 1e-6f)
+        assertEquals(-1f, reader.readFloat(File(directory, "absent").path, -1f), 0f)
+    }
+
+    @Test
+    fun matchesPrefixesAndText() {
+        val file = File(directory, "thermal_type")
+        file.writeText("CPU-Therm-0\n")
+        assertTrue(reader.read(file.path))
+        assertTrue(reader.startsWith(ProcReader.ascii("CPU")))
+        assertFalse(reader.startsWith(ProcReader.ascii("GPU")))
+        assertTrue(reader.containsIgnoreCase(ProcReader.ascii("therm")))
+        assertFalse(reader.containsIgnoreCase(ProcReader.ascii("tsens")))
+        assertEquals(3, reader.indexOf('-'.code.toByte()))
+        assertEquals(9, reader.lastIndexOf('-'.code.toByte()))
+    }
+
+    @Test
+    fun evictsLeastRecentlyUsedFiles() {
+        val limited = ProcReader(maxOpenFiles = 2)
+        try {
+            val files = (0 until 4).map { File(directory, "f$it").apply { writeText("$it") } }
+            for (round in 0 until 3) {
+                for ((i, file) in files.withIndex()) {
+                    assertEquals(i.toLong(), limited.readLong(file.path))
+                }
+            }
+        } finally {
+            limited.close()
+        }
+    }
+
+    // ========== 主机上的真实 /proc ==========
+
+    @Test
+    fun parsesHostProcStat() {
+        Assume.assumeTrue(File(PROC_STAT).canRead())
+        assertTrue(reader.read(PROC_STAT))
+        assertTrue(reader.startsWith(CPU_PREFIX))
+
+        var lines = 0
+        while (reader.startsWith(CPU_PREFIX)) {
+            reader.position += CPU_PREFIX.size
+            val core = if (reader.peekDigit()) reader.nextInt() else -1
+            assertTrue(core >= -1)
+            var total = 0L
+            var fields = 0
+            while (!reader.atLineEnd()) {
+                val value = reader.nextLong(-1L)
+                assertTrue("Unexpected field in /proc/stat cpu line", value >= 0)
+                total += value
+                fields++
+            }
+            assertTrue("Expected at least user/nice/system/idle, got $fields", fields >= 4)
+            assertTrue(total > 0)
+            reader.nextLine()
+            lines++
+        }
+        // 汇总行 + 至少一个核心
+        assertTrue(lines >= 2)
+    }
+
+    @Test
+    fun parsesHostThreadStats() {
+        val tasks = File("/proc/self/task").listFiles()
+        Assume.assumeTrue(tasks != null && tasks.isNotEmpty())
+
+        var parsed = 0
+        for (task in tasks!!) {
+            // 线程可能在遍历期间退出
+            if (!reader.read(File(task, "stat").path)) continue
+            val commEnd = reader.lastIndexOf(CLOSE_PAREN)
+            assertTrue(commEnd > 0)
+            reader.position = commEnd + 1
+            reader.skipSpaces()
+            val state = reader.buffer[reader.position].toInt().toChar()
+            assertTrue("Unexpected state $state", state in "RSDZTtWXxKPI")
+            // 跳过字段 3-13（state 起 11 个）后为 utime(14), stime(15)
+            reader.skipTokens(11)
+            assertTrue(reader.nextLong(-1L) >= 0)
+            assertTrue(reader.nextLong(-1L) >= 0)
+            // 字段 16-38 之后为 processor(39)
+            reader.skipTokens(23)
+            assertTrue(reader.nextInt(-1) >= 0)
+            parsed++
+        }
+        assertTrue(parsed > 0)
+    }
+
+    companion object {
+        private const val PROC_STAT = "/proc/stat"
+        private val CPU_PREFIX = ProcReader.ascii("cpu")
+        private const val CLOSE_PAREN: Byte = 0x29  // ')'
+    }
+}
@@ -0,0 +1,111 @@
+package com.panda.utils
+
+import org.junit.Assert.assertEquals
+import org.junit.Assert.assertFalse
+import org.junit.Assert.assertNotNull
+import org.junit.Assert.assertNull
+import org.junit.Assert.assertTrue
+import org.junit.Test
+import java.io.ByteArrayInputStream
+
+class ScreenshotEncoderTest {
+
+    private fun decode(output: BinaryEncoder) = BinaryDecoder(ByteArrayInputStream(output.toByteArray()))
+
+    @Test
+    fun writesResponseWithScaledImage() {
+        val source = FakeCaptureSource(width = 200, height = 400)
+        val output = BinaryEncoder()
+        val result = ScreenshotEncoder.write(listOf(source), ImageFormat.RGBA, 100, 100, output)
+        assertNotNull(result)
+
+        val input = decode(output)
+        assertEquals(0, input.readInt())
+        assertEquals(50, input.readInt())
+        assertEquals(100, input.readInt())
+        assertEquals(ImageFormat.RGBA.code, input.readInt())
+        assertTrue(input.readInt() >= 0)
+        val data = input.readBytes()
+        assertEquals(50 * 100 * 4, data.size)
+        assertEquals(data.size, result!!.bytes)
+        assertTrue(input.readInt() >= 0)
+        assertEquals(-1, input.read())
+        assertEquals(1, source.releases)
+    }
+
+    @Test
+    fun lowerQualityProducesSmallerOutput() {
+        val source = FakeCaptureSource(width = 120, height = 240)
+        val sizes = listOf(100, 70, 30).map { quality ->
+            ScreenshotEncoder.write(listOf(source), ImageFormat.JPEG, quality, 0, BinaryEncoder())!!.bytes
+        }
+        assertTrue(sizes.toString(), sizes[0] > sizes[1] && sizes[1] > sizes[2])
+    }
+
+    @Test
+    fun fallsBackToNextSource() {
+        val failing = FakeCaptureSource().apply { failCapture = true }
+        val throwing = object : CaptureSource {
+            override fun capture(maxSize: Int): CapturedImage? = throw IllegalStateException("no display")
+        }
+        val working = FakeCaptureSource(width = 10, height = 20)
+        val output = BinaryEncoder()
+        val result = ScreenshotEncoder.write(listOf(failing, throwing, working), ImageFormat.PNG, 100, 0, output)
+        assertEquals(10, result!!.width)
+        assertEquals(1, working.captures)
+    }
+
+    @Test
+    fun reportsCaptureFailure() {
+        val source = FakeCaptureSource().apply { failCapture = true }
+        val output = BinaryEncoder()
+        assertNull(ScreenshotEncoder.write(listOf(source), ImageFormat.PNG, 100, 0, output))
+
+        val input = decode(output)
+        assertEquals(-1, input.readInt())
+        assertEquals("Screen capture failed", input.readString())
+    }
+
+    @Test
+    fun reportsEncodingFailureAndReleasesImage() {
+        val source = FakeCaptureSource(width = 10, height = 20).apply { failEncode = true }
+        val output = BinaryEncoder()
+        assertNull(ScreenshotEncoder.write(listOf(source), ImageFormat.WEBP, 80, 0, output))
+        assertEquals(1, source.releases)
+
+        // 头部之后数据长度位置为错误码 + 信息，帧已被丢弃
+        val input = decode(output)
+        assertEquals(0, input.readInt())
+        assertEquals(10, input.readInt())
+        assertEquals(20, input.readInt())
+        assertEquals(ImageFormat.WEBP.code, input.readInt())
+        input.readInt()
+        assertEquals(-1, input.readInt())
+        assertEquals("Encoding WEBP failed", input.readString())
+        assertEquals(-1, input.read())
+    }
+
+    @Test
+    fun frameStreamSkipsUnchangedFrames() {
+        val source = FakeCaptureSource(width = 16, height = 32)
+        val stream = FrameStream(listOf(source), ImageFormat.JPEG, 70, 0)
+        assertTrue(stream.next(0))
+        assertFalse(stream.next(0))
+        assertFalse(stream.next(0))
+        assertEquals(3, source.releases)
+
+        // 内容变化后的帧带上跳过的未变化帧数
+        val animated = FrameStream(listOf(FakeCaptureSource(width = 64, height = 32, animate = true)), ImageFormat.RGBA, 100, 0)
+        assertTrue(animated.next(0))
+        assertTrue(animated.next(2))
+        val input = decode(animated.frame)
+        val length = input.readInt()
+        assertEquals(animated.frame.size() - 4, length)
+        input.readLong()
+        assertEquals(1, input.readInt())   // 序号
+        assertEquals(0, input.readInt())   // 未变化帧数
+        assertEquals(2, input.readInt())   // 跳过的周期数
+        assertEquals(64, input.readInt())
+        assertEquals(32, input.readInt())
+    }
+}
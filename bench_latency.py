@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+按命令测量往返延迟的基准测试（取代 test_fps_stress.py）
+
+对每个传输路径、每个命令：
+  - 单连接逐条请求 --count 次，统计 p50/p90/p99/max/mean 延迟
+  - --concurrency 条连接并发请求 --seconds 秒，统计吞吐量 (req/s)
+结果可保存为 JSON，并与另一次（如上一个服务端版本）的结果比较。
+
+传输路径用 --target 指定，可重复：
+  adb=tcp:localhost:9999        adb forward tcp:9999 localabstract:panda-1.1.0
+  proxy=tcp:192.168.1.10:43305  TcpProxyServer（或 adb forward tcp:43305 tcp:43305）
+  local=unix                    LocalSocket，需在设备上运行（如 Termux）
+
+    python3 bench_latency.py --target adb=tcp:localhost:9999 --target proxy=tcp:localhost:43305 \\
+        --json build-42.json
+    python3 bench_latency.py --compare build-41.json --json build-42.json --threshold 20
+    python3 bench_latency.py --mock                # 使用 panda.mock 自检
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+
+from bench_load import summarize
+from panda import PandaClient, PandaError
+from panda.mock import MockPandaServer
+from panda.protocol import Command
+
+# 212 的测量负载：一次取回仪表盘常用的一组指标
+DASHBOARD_BATCH = [
+    Command.CPU_USAGE, Command.CPU_CORE_USAGE, Command.CPU_FREQ, Command.GPU_USAGE, Command.FPS,
+    (Command.MEMORY_USAGE, 1), Command.CPU_TEMPERATURE, Command.BATTERY_INFO, (Command.NETWORK_USAGE, 1000),
+]
+
+# 可测量的命令：命令码 -> 在客户端上执行一次
+COMMANDS = {
+    Command.WIFI_STATE: lambda c: c.wifi_state(),
+    Command.WIFI_INFO: lambda c: c.wifi_info(),
+    Command.CLIPBOARD_GET: lambda c: c.clipboard(),
+    Command.CLICKABLE_TEXTS: lambda c: c.clickable_texts(),
+    Command.AUTO_CLICK_STATUS: lambda c: c.auto_click_status(),
+    Command.SCREENSHOT: lambda c: c.screenshot(),
+    Command.CPU_USAGE: lambda c: c.cpu_usage(),
+    Command.CPU_CORE_USAGE: lambda c: c.cpu_core_usage(),
+    Command.CPU_FREQ: lambda c: c.cpu_freq(),
+    Command.GPU_USAGE: lambda c: c.gpu_usage(),
+    Command.FPS: lambda c: c.fps(),
+    Command.MEMORY_USAGE: lambda c: c.memory_usage(1),
+    Command.CPU_TEMPERATURE: lambda c: c.cpu_temperature(),
+    Command.BATTERY_INFO: lambda c: c.battery_info(),
+    Command.BATTERY_LEVEL: lambda c: c.battery_level(),
+    Command.NETWORK_USAGE: lambda c: c.network_usage(1000),
+    Command.NETWORK_TOTAL: lambda c: c.network_total(),
+    Command.METRICS_BATCH: lambda c: c.metrics_batch(DASHBOARD_BATCH),
+}
+
+# 默认测量指标热路径
+DEFAULT_COMMANDS = "200,201,202,203,204,205,206,220,221,230,231"
+
+
+def parse_target(text):
+    """name=tcp:host:port 或 name=unix[:socket_name]"""
+    name, _, spec = text.partition("=")
+    if not spec:
+        name, spec = text, text
+    kind, _, rest = spec.partition(":")
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return {"name": name, "spec": spec, "kind": "tcp", "host": host or "localhost", "port": int(port)}
+    if kind == "unix":
+        return {"name": name, "spec": spec, "kind": "unix", "socket": rest or None}
+    raise argparse.ArgumentTypeError(f"invalid target: {text}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-command latency benchmark")
+    parser.add_argument("--target", action="append", type=parse_target, default=[],
+                        help="name=tcp:host:port or name=unix (repeatable, default: adb=tcp:localhost:9999)")
+    parser.add_argument("--mock", action="store_true", help="benchmark the local panda.mock server")
+    parser.add_argument("--commands", default=DEFAULT_COMMANDS,
+                        help=f"comma separated command ids (default: {DEFAULT_COMMANDS}), "
+                             f"available: {','.join(str(int(c)) for c in COMMANDS)}")
+    parser.add_argument("--count", type=int, default=500, help="sequential requests per command (default: 500)")
+    parser.add_argument("--warmup", type=int, default=20, help="warm-up requests per command (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="connections for the throughput phase, 0 to skip (default: 4)")
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="duration of the throughput phase per command (default: 2)")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a previous JSON result")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="regression threshold in percent for --compare (default: 20)")
+    args = parser.parse_args()
+    try:
+        args.commands = [Command(int(c)) for c in args.commands.split(",") if c.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    unsupported = [c for c in args.commands if c not in COMMANDS]
+    if unsupported:
+        parser.error(f"unsupported command(s): {', '.join(str(int(c)) for c in unsupported)}")
+    return args
+
+
+def open_client(target):
+    if target["kind"] == "unix":
+        if target["socket"]:
+            return PandaClient.connect_unix(target["socket"], timeout=10)
+        return PandaClient.connect_unix(timeout=10)
+    return PandaClient.connect_tcp(target["host"], target["port"], timeout=10)
+
+
+def measure_latency(client, call, count, warmup):
+    """单连接逐条请求，返回 (延迟列表, 返回值列表, 错误数)"""
+    for _ in range(warmup):
+        try:
+            call(client)
+        except PandaError:
+            pass
+    latencies = []
+    values = []
+    errors = 0
+    clock = time.perf_counter
+    for _ in range(count):
+        start = clock()
+        try:
+            value = call(client)
+        except PandaError:
+            errors += 1
+            continue
+        latencies.append(clock() - start)
+        values.append(value)
+    return latencies, values, errors
+
+
+def measure_throughput(target, call, concurrency, seconds):
+    """concurrency 条连接并发请求 seconds 秒，返回 req/s"""
+    clients = [open_client(target) for _ in range(concurrency)]
+    counts = [0] * concurrency
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index):
+        client = clients[index]
+        barrier.wait()
+        deadline = time.perf_counter() + seconds
+        done = 0
+        while time.perf_counter() < deadline:
+            try:
+                call(client)
+            except PandaError:
+                pass
+            done += 1
+        counts[index] = done
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+    return sum(counts) / elapsed if elapsed > 0 else 0.0
+
+
+def bench_target(target, args):
+    results = {}
+    with open_client(target) as client:
+        for command in args.commands:
+            call = COMMANDS[command]
+            if command == Command.FPS:
+                # FPS 依赖性能分析线程
+                client.start_profiling(100)
+            latencies, values, errors = measure_latency(client, call, args.count, args.warmup)
+            entry = {"name": command.name, "errors": errors}
+            entry.update(summarize(latencies))
+            entry["mean_ms"] = statistics.fmean(latencies) * 1000 if latencies else 0.0
+            if args.concurrency > 0:
+                entry["concurrency"] = args.concurrency
+                entry["throughput_rps"] = measure_throughput(target, call, args.concurrency, args.seconds)
+            if command == Command.FPS:
+                client.stop_profiling()
+                if values:
+                    entry["fps"] = {"min": min(values), "max": max(values),
+                                    "mean": statistics.fmean(values), "unique": len(set(values))}
+            results[str(int(command))] = entry
+            print_entry(target["name"], command, entry)
+    return results
+
+
+def print_entry(target_name, command, entry):
+    throughput = f"{entry['throughput_rps']:10.1f} req/s" if "throughput_rps" in entry else ""
+    print(f"{target_name:<8} {int(command):>4} {command.name:<18} "
+          f"p50={entry['p50_ms']:7.3f} p90={entry['p90_ms']:7.3f} p99={entry['p99_ms']:7.3f} "
+          f"max={entry['max_ms']:8.3f} ms  {throughput}"
+          + (f"  errors={entry['errors']}" if entry["errors"] else ""))
+
+
+def compare(previous, current, threshold):
+    """逐项比较 p50/p99，返回回归项数量"""
+    regressions = 0
+    print(f"\n=== Compare with {previous.get('timestamp_iso', 'previous run')} (threshold {threshold:g}%) ===")
+    for target_name, commands in current["targets"].items():
+        old_commands = previous.get("targets", {}).get(target_name)
+        if not old_commands:
+            continue
+        for command_id, entry in commands.items():
+            old = old_commands.get(command_id)
+            if not old:
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                if old[key] <= 0:
+                    continue
+                change = (entry[key] - old[key]) / old[key] * 100
+                flag = ""
+                if change > threshold:
+                    flag = "  REGRESSION"
+                    regressions += 1
+                print(f"{target_name:<8} {command_id:>4} {entry['name']:<18} {key:<7} "
+                      f"{old[key]:8.3f} -> {entry[key]:8.3f} ms ({change:+6.1f}%){flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    mock = None
+    targets = args.target
+    if args.mock:
+        mock = MockPandaServer(port=0).run_in_thread()
+        targets = targets + [{"name": "mock", "spec": f"tcp:127.0.0.1:{mock.port}", "kind": "tcp",
+                              "host": "127.0.0.1", "port": mock.port}]
+    if not targets:
+        targets = [parse_target("adb=tcp:localhost:9999")]
+
+    now = time.time()
+    report = {
+        "timestamp": now,
+        "timestamp_iso": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "count": args.count,
+        "concurrency": args.concurrency,
+        "targets": {},
+        "specs": {t["name"]: t["spec"] for t in targets},
+    }
+    try:
+        for target in targets:
+            try:
+                report["targets"][target["name"]] = bench_target(target, args)
+            except OSError as e:
+                print(f"{target['name']}: 连接失败 ({target['spec']}): {e}")
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{regressions} latency regression(s) above {args.threshold:g}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
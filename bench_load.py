@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+端到端吞吐量基准测试
+
+默认在子进程中启动 panda.mock 模拟服务端，无需手机即可测量客户端与协议的性能；
+指定 --port 时改为压测已有的服务端（adb forward / TcpProxyServer）。
+
+    python3 bench_load.py --clients 16 --depth 8 --commands cpu_usage,fps
+    python3 bench_load.py --commands app_list --icon-bytes 16384 --latency 0.001
+    python3 bench_load.py --port 9999 --clients 4          # 真机
+
+每个客户端一条连接，循环发送 depth 条流水线请求；单条请求的延迟记为其所在批次的往返时间。
+输出每秒请求数和延迟分位数（p50/p90/p99/max）。
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import sys
+import time
+
+from panda import AsyncPandaClient
+
+# 可压测的命令：名称 -> 在客户端或流水线上排队该命令
+COMMANDS = {
+    "cpu_usage": lambda t: t.cpu_usage(),
+    "cpu_core_usage": lambda t: t.cpu_core_usage(),
+    "cpu_freq": lambda t: t.cpu_freq(),
+    "gpu_usage": lambda t: t.gpu_usage(),
+    "fps": lambda t: t.fps(),
+    "memory_usage": lambda t: t.memory_usage(1),
+    "cpu_temperature": lambda t: t.cpu_temperature(),
+    "battery_info": lambda t: t.battery_info(),
+    "network_usage": lambda t: t.network_usage(10000),
+    "network_total": lambda t: t.network_total(),
+    "wifi_scan": lambda t: t.wifi_scan(),
+    "clickable_texts": lambda t: t.clickable_texts(),
+    "app_list": lambda t: t.app_list(),
+    "screenshot": lambda t: t.screenshot(),
+}
+
+
+def percentile(sorted_values, fraction):
+    """已排序序列的分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(latencies):
+    """延迟列表（秒）-> 毫秒分位数"""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p90_ms": percentile(values, 0.90) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Panda end-to-end load generator")
+    parser.add_argument("--host", default="127.0.0.1", help="server host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=0,
+                        help="benchmark an existing server on this port instead of the mock")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent connections (default: 8)")
+    parser.add_argument("--depth", type=int, default=1, help="requests per pipeline batch (default: 1)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration in seconds (default: 5)")
+    parser.add_argument("--commands", default="cpu_usage",
+                        help="comma separated commands cycled within a batch: " + ",".join(COMMANDS))
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-batch timeout (default: 10)")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+
+    mock = parser.add_argument_group("mock server (ignored with --port)")
+    mock.add_argument("--latency", type=float, default=0.0, help="per-command latency in seconds")
+    mock.add_argument("--jitter", type=float, default=0.0, help="extra random latency in seconds")
+    mock.add_argument("--cores", type=int, default=8, help="cores reported by 201/202")
+    mock.add_argument("--apps", type=int, default=20, help="apps returned by command 10")
+    mock.add_argument("--icon-bytes", type=int, default=4096, help="icon payload size")
+    mock.add_argument("--screenshot-bytes", type=int, default=256 * 1024, help="screenshot payload size")
+    args = parser.parse_args()
+    args.commands = [name.strip() for name in args.commands.split(",") if name.strip()]
+    unknown = [name for name in args.commands if name not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s): {', '.join(unknown)}")
+    return args
+
+
+def start_mock(args):
+    """在子进程中启动模拟服务端，返回 (进程, 端口)"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "panda.mock", "--host", args.host, "--port", "0",
+         "--latency", str(args.latency), "--jitter", str(args.jitter),
+         "--cores", str(args.cores), "--apps", str(args.apps),
+         "--icon-bytes", str(args.icon_bytes), "--screenshot-bytes", str(args.screenshot_bytes)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline()
+    if not line:
+        process.kill()
+        raise RuntimeError("mock server failed to start")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+async def run_client(client, args, deadline, latencies):
+    pipe = client.pipeline()
+    for i in range(args.depth):
+        COMMANDS[args.commands[i % len(args.commands)]](pipe)
+    loop = asyncio.get_running_loop()
+    errors = 0
+    while loop.time() < deadline:
+        start = loop.time()
+        try:
+            await pipe.execute(reset=False)
+        except Exception:
+            errors += 1
+            continue
+        elapsed = loop.time() - start
+        latencies.extend([elapsed] * args.depth)
+    await client.close()
+    return errors
+
+
+async def run(args, port):
+    clients = [AsyncPandaClient(args.host, port, timeout=args.timeout) for _ in range(args.clients)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    latencies = []
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + args.seconds
+    errors = await asyncio.gather(*(run_client(c, args, deadline, latencies) for c in clients))
+    return latencies, sum(errors), loop.time() - start
+
+
+def main():
+    args = parse_args()
+    process = None
+    port = args.port
+    if not port:
+        process, port = start_mock(args)
+    try:
+        latencies, errors, elapsed = asyncio.run(run(args, port))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    stats = summarize(latencies)
+    rps = stats["count"] / elapsed if elapsed > 0 else 0.0
+    print("=== Load Benchmark ===")
+    print(f"Target     : {args.host}:{port}{' (mock)' if process else ''}")
+    print(f"Commands   : {','.join(args.commands)}  clients={args.clients} depth={args.depth}")
+    print(f"Requests   : {stats['count']} in {elapsed:.2f}s, errors={errors}")
+    print(f"Throughput : {rps:,.1f} req/s")
+    print(f"Latency    : p50={stats['p50_ms']:.3f}ms p90={stats['p90_ms']:.3f}ms "
+          f"p99={stats['p99_ms']:.3f}ms max={stats['max_ms']:.3f}ms")
+
+    if args.json:
+        result = {
+            "timestamp": time.time(),
+            "target": f"{args.host}:{port}",
+            "mock": process is not None,
+            "clients": args.clients,
+            "depth": args.depth,
+            "commands": args.commands,
+            "seconds": elapsed,
+            "errors": errors,
+            "requests_per_second": rps,
+            "latency": stats,
+        }
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+流水线 vs 逐条请求基准测试
+
+一次「采样」= 依次获取 200, 201, 202, 203, 204, 206（指定 --pid 时再加 205）。
+  - lockstep: 每条命令发送后等待响应，再发送下一条（N 次往返）
+  - pipeline: 一次 sendall 发送全部命令，再按顺序解码（1 次往返）
+
+输出两种方式的每秒采样数、每秒命令数和加速比。
+"""
+
+import argparse
+import sys
+import time
+
+from panda import connect
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pipelined vs lockstep polling benchmark")
+    parser.add_argument("--host", default="localhost", help="TCP host (default: localhost)")
+    parser.add_argument("--port", type=int, default=9999,
+                        help="TCP port, adb forward or TcpProxyServer (default: 9999)")
+    parser.add_argument("--unix", action="store_true",
+                        help="use abstract UNIX domain socket instead of TCP")
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="duration of each mode in seconds (default: 5)")
+    parser.add_argument("--depth", type=int, default=1,
+                        help="samples batched into one pipeline round trip (default: 1)")
+    parser.add_argument("--pid", type=int, default=0,
+                        help="also poll command 205 for this pid")
+    return parser.parse_args()
+
+
+def queue_sample(target, pid):
+    """把一次采样的命令排入 target（客户端或流水线）"""
+    target.cpu_usage()
+    target.cpu_core_usage()
+    target.cpu_freq()
+    target.gpu_usage()
+    target.fps()
+    target.cpu_temperature()
+    if pid:
+        target.memory_usage(pid)
+
+
+def run_lockstep(client, seconds, pid):
+    samples = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        queue_sample(client, pid)
+        samples += 1
+    return samples, time.perf_counter() - start
+
+
+def run_pipeline(client, seconds, pid, depth):
+    pipe = client.pipeline()
+    for _ in range(depth):
+        queue_sample(pipe, pid)
+    samples = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        pipe.execute(reset=False)
+        samples += depth
+    return samples, time.perf_counter() - start
+
+
+def report(name, samples, elapsed, commands_per_sample):
+    rate = samples / elapsed if elapsed > 0 else 0.0
+    print(f"{name:<10}: {samples:>8} samples in {elapsed:6.2f}s  "
+          f"{rate:10.1f} samples/s  {rate * commands_per_sample:10.1f} cmds/s  "
+          f"{elapsed / max(samples, 1) * 1000:8.3f} ms/sample")
+    return rate
+
+
+def main():
+    args = parse_args()
+    try:
+        client = connect(args.host, args.port, unix=args.unix)
+    except OSError as e:
+        print(f"连接失败: {e}")
+        print("提示: 请确保已运行 'adb forward tcp:9999 localabstract:panda-1.1.0'")
+        sys.exit(1)
+
+    commands_per_sample = 7 if args.pid else 6
+    with client:
+        # 预热：CPU 使用率首次调用只做初始化
+        queue_sample(client, args.pid)
+
+        print("=== Pipeline Benchmark ===")
+        print(f"Commands/sample: {commands_per_sample}, pipeline depth: {args.depth}")
+        lockstep_rate = report("lockstep", *run_lockstep(client, args.seconds, args.pid),
+                               commands_per_sample)
+        pipeline_rate = report("pipeline", *run_pipeline(client, args.seconds, args.pid, args.depth),
+                               commands_per_sample)
+
+    if lockstep_rate > 0:
+        print(f"Speedup        : {pipeline_rate / lockstep_rate:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+TCP 反向代理并发基准测试：每连接内存开销与多客户端吞吐量
+
+分三个阶段对服务端进程采样 /proc/<pid>/status（VmRSS、线程数）：
+  1. 基线：尚未建立任何连接
+  2. 空闲：--clients 条连接全部建立后静置 --settle 秒，得到每连接的内存和线程开销
+  3. 负载：所有连接并发发送 --seconds 秒流水线请求，取采样期间的峰值
+
+    python3 bench_proxy.py --port 43305 --clients 64                 # 真机（adb forward tcp:43305 tcp:43305）
+    python3 bench_proxy.py --port 43305 --clients 100 --commands screenshot --depth 1
+    python3 bench_proxy.py --clients 64                              # panda.mock 自检（采样本机进程）
+
+真机模式下服务端 PID 通过 `adb shell pgrep -n -f com.panda.Main` 查找，也可用 --pid 指定；
+多台设备时用 --serial 选择设备。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+
+from bench_load import COMMANDS, run_client, start_mock, summarize
+from panda import AsyncPandaClient
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Panda TCP proxy concurrency benchmark")
+    parser.add_argument("--host", default="127.0.0.1", help="proxy host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=0,
+                        help="benchmark the proxy on this port instead of the mock")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent TCP connections (default: 64)")
+    parser.add_argument("--depth", type=int, default=4, help="requests per pipeline batch (default: 4)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration in seconds (default: 10)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="idle time before sampling connected clients (default: 2)")
+    parser.add_argument("--commands", default="cpu_usage,fps,memory_usage,battery_info",
+                        help="comma separated commands cycled within a batch: " + ",".join(COMMANDS))
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-batch timeout (default: 30)")
+    parser.add_argument("--pid", type=int, default=0, help="server process id (default: auto-detect)")
+    parser.add_argument("--serial", help="adb device serial")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    args = parser.parse_args()
+    args.commands = [name.strip() for name in args.commands.split(",") if name.strip()]
+    unknown = [name for name in args.commands if name not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s): {', '.join(unknown)}")
+    # start_mock 使用的模拟服务端参数
+    args.latency = args.jitter = 0.0
+    args.cores, args.apps, args.icon_bytes, args.screenshot_bytes = 8, 20, 4096, 256 * 1024
+    return args
+
+
+class ProcessSampler:
+    """读取服务端进程的 /proc/<pid>/status：本机直接读取，真机通过 adb shell"""
+
+    def __init__(self, pid, adb=None):
+        self.pid = pid
+        self.adb = adb
+
+    def sample(self):
+        path = f"/proc/{self.pid}/status"
+        if self.adb is None:
+            with open(path) as f:
+                text = f.read()
+        else:
+            text = subprocess.run(self.adb + ["shell", "cat", path],
+                                  capture_output=True, text=True, timeout=10).stdout
+        values = {}
+        for line in text.splitlines():
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "Threads"):
+                values[key] = int(value.split()[0])
+        if len(values) != 2:
+            raise RuntimeError(f"cannot read {path}")
+        return {"rss_kb": values["VmRSS"], "threads": values["Threads"]}
+
+
+def find_device_pid(adb):
+    out = subprocess.run(adb + ["shell", "pgrep", "-n", "-f", "com.panda.Main"],
+                         capture_output=True, text=True, timeout=10).stdout.split()
+    if not out:
+        raise SystemExit("server process not found, pass --pid")
+    return int(out[0])
+
+
+async def sample_peak(sampler, stop, interval=0.5):
+    """负载期间周期性采样，返回峰值"""
+    peak = {"rss_kb": 0, "threads": 0}
+    while not stop.is_set():
+        current = await asyncio.to_thread(sampler.sample)
+        peak = {key: max(peak[key], current[key]) for key in peak}
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+    return peak
+
+
+async def run(args, port, sampler):
+    baseline = sampler.sample()
+
+    clients = [AsyncPandaClient(args.host, port, timeout=args.timeout) for _ in range(args.clients)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    # 每条连接先完成一次往返，确保服务端已为连接创建命令分发器
+    await asyncio.gather(*(client.cpu_usage() for client in clients))
+    await asyncio.sleep(args.settle)
+    idle = sampler.sample()
+
+    latencies = []
+    stop = asyncio.Event()
+    peak_task = asyncio.create_task(sample_peak(sampler, stop))
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    errors = await asyncio.gather(*(run_client(c, args, start + args.seconds, latencies) for c in clients))
+    elapsed = loop.time() - start
+    stop.set()
+    peak = await peak_task
+    return baseline, idle, peak, latencies, sum(errors), elapsed
+
+
+def main():
+    args = parse_args()
+    process = None
+    port = args.port
+    if port:
+        adb = ["adb"] + (["-s", args.serial] if args.serial else [])
+        sampler = ProcessSampler(args.pid or find_device_pid(adb), adb)
+    else:
+        process, port = start_mock(args)
+        sampler = ProcessSampler(args.pid or process.pid)
+    try:
+        baseline, idle, peak, latencies, errors, elapsed = asyncio.run(run(args, port, sampler))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    stats = summarize(latencies)
+    rps = stats["count"] / elapsed if elapsed > 0 else 0.0
+    per_client_kb = (idle["rss_kb"] - baseline["rss_kb"]) / args.clients
+    per_client_threads = (idle["threads"] - baseline["threads"]) / args.clients
+    print("=== TCP Proxy Benchmark ===")
+    print(f"Target      : {args.host}:{port}{' (mock)' if process else ''}  pid={sampler.pid}")
+    print(f"Clients     : {args.clients}  depth={args.depth}  commands={','.join(args.commands)}")
+    print(f"Baseline    : rss={baseline['rss_kb']} KB threads={baseline['threads']}")
+    print(f"Connected   : rss={idle['rss_kb']} KB threads={idle['threads']}  "
+          f"-> {per_client_kb:.1f} KB and {per_client_threads:.2f} threads per connection")
+    print(f"Load peak   : rss={peak['rss_kb']} KB threads={peak['threads']}")
+    print(f"Requests    : {stats['count']} in {elapsed:.2f}s, errors={errors}")
+    print(f"Throughput  : {rps:,.1f} req/s")
+    print(f"Latency     : p50={stats['p50_ms']:.3f}ms p90={stats['p90_ms']:.3f}ms "
+          f"p99={stats['p99_ms']:.3f}ms max={stats['max_ms']:.3f}ms")
+
+    if args.json:
+        result = {
+            "timestamp": time.time(),
+            "target": f"{args.host}:{port}",
+            "mock": process is not None,
+            "clients": args.clients,
+            "depth": args.depth,
+            "commands": args.commands,
+            "baseline": baseline,
+            "connected": idle,
+            "load_peak": peak,
+            "rss_kb_per_connection": per_client_kb,
+            "threads_per_connection": per_client_threads,
+            "seconds": elapsed,
+            "errors": errors,
+            "requests_per_second": rps,
+            "latency": stats,
+        }
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Panda Python 客户端
+封装 Panda 二进制协议，提供类型化的命令接口
+"""
+
+from .aio import AsyncPandaClient, AsyncPipeline, DeviceFarm, DeviceStats
+from .client import PandaClient, Pipeline, connect
+from .pool import SLOW_COMMANDS, PandaPool
+from .protocol import (
+    DEFAULT_FORWARD_PORT,
+    DEFAULT_TCP_PORT,
+    SOCKET_NAME,
+    AppInfo,
+    AppList,
+    AppListDelta,
+    BatteryInfo,
+    Clipboard,
+    ClusterUsage,
+    Command,
+    CoreUsage,
+    CpuTopologyUsage,
+    FrameStats,
+    GpuUsage,
+    ImageFormat,
+    KnownApp,
+    MemoryUsage,
+    MetricSnapshot,
+    MonitorStatus,
+    NetworkSnapshot,
+    NetworkUsage,
+    Notification,
+    NotificationAction,
+    PackageNetworkUsage,
+    PandaError,
+    ScreenFrame,
+    Screenshot,
+    ThreadCpu,
+    ThreadCpuTable,
+    TotalNetworkUsage,
+    UidNetworkUsage,
+    WifiInfo,
+    WifiNetwork,
+    WifiScanResult,
+)
+
+__version__ = '1.1.0'
@@ -0,0 +1,302 @@
+"""
+Panda asyncio 客户端
+
+单个事件循环即可同时轮询大量设备（每台设备一个 adb forward 端口），
+无需为每台设备开线程或进程：
+
+    async def main():
+        farm = DeviceFarm.from_ports(range(9001, 9101), timeout=1.0)
+        stats = await farm.poll(lambda c: c.cpu_usage(), interval=0.1, duration=60,
+                                on_sample=lambda name, ts, value: ...)
+        await farm.close()
+
+同一连接上的并发请求会直接依次写出，响应按 FIFO 顺序匹配，
+因此 asyncio.gather(client.cpu_usage(), client.fps()) 只需一次往返。
+"""
+
+import asyncio
+import collections
+import time
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+from . import protocol as p
+from .client import Pipeline
+from .commands import PandaCommands
+from .protocol import BufferReader, Incomplete, PandaError
+
+DEFAULT_TIMEOUT = 2.0
+MAX_RECONNECT_BACKOFF = 5.0
+
+
+class _PandaProtocol(asyncio.Protocol):
+    """按请求顺序解码响应的 asyncio 传输层"""
+
+    def __init__(self):
+        self.transport: Optional[asyncio.Transport] = None
+        self.pending = collections.deque()  # (decoder, future, ack)
+        self.closed = False
+        self._buffer = bytearray()
+        self._needed = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.closed = True
+        error = ConnectionError('Connection to Panda server lost')
+        if exc is not None:
+            error.__cause__ = exc
+        while self.pending:
+            _, future, _ = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    def data_received(self, data):
+        buffer = self._buffer
+        buffer += data
+        if len(buffer) < self._needed:
+            return
+        pos = 0
+        while self.pending:
+            decoder, future, ack = self.pending[0]
+            reader = BufferReader(buffer, pos)
+            try:
+                result = decoder(reader)
+            except Incomplete as e:
+                # 等待到足够的数据后再从消息开头重新解码
+                self._needed = e.needed - pos
+                break
+            except PandaError as e:
+                result = e
+            except Exception as e:
+                # 解码失败说明数据已错位，只能断开
+                if not future.done():
+                    future.set_exception(e)
+                self.transport.close()
+                return
+            pos = reader.pos
+            self._needed = 0
+            self.pending.popleft()
+            if ack is not None:
+                self.transport.write(ack)
+            if not future.done():
+                if isinstance(result, PandaError):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        if pos:
+            del buffer[:pos]
+
+
+class AsyncPandaClient(PandaCommands):
+    """
+    单设备异步客户端
+    - 首次调用或连接断开后的下一次调用会自动（重新）连接
+    - 每个请求受 timeout 限制；超时后连接已无法对齐，会被关闭并在下次调用时重连
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = p.DEFAULT_FORWARD_PORT,
+                 unix: bool = False, timeout: float = DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.unix = unix
+        self.timeout = timeout
+        self._protocol: Optional[_PandaProtocol] = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._protocol is not None and not self._protocol.closed
+
+    async def connect(self) -> _PandaProtocol:
+        async with self._connect_lock:
+            if self.connected:
+                return self._protocol
+            loop = asyncio.get_running_loop()
+            if self.unix:
+                coro = loop.create_unix_connection(_PandaProtocol, '\0' + p.SOCKET_NAME)
+            else:
+                coro = loop.create_connection(_PandaProtocol, self.host, self.port)
+            _, protocol = await asyncio.wait_for(coro, self.timeout)
+            self._protocol = protocol
+            return protocol
+
+    async def close(self):
+        protocol, self._protocol = self._protocol, None
+        if protocol is not None and protocol.transport is not None:
+            protocol.transport.close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def pipeline(self) -> 'AsyncPipeline':
+        """创建流水线，await pipe.execute() 一次写出全部排队命令"""
+        return AsyncPipeline(self)
+
+    async def _ensure_connected(self) -> _PandaProtocol:
+        protocol = self._protocol
+        if protocol is None or protocol.closed:
+            protocol = await self.connect()
+        return protocol
+
+    async def _wait(self, futures):
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), self.timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise
+
+    async def _call(self, request: bytes, decoder=None, ack: Optional[bytes] = None):
+        protocol = await self._ensure_connected()
+        if decoder is None:
+            async with self._write_lock:
+                protocol.transport.write(request)
+            return None
+        future = asyncio.get_running_loop().create_future()
+        if ack is None:
+            async with self._write_lock:
+                protocol.pending.append((decoder, future, None))
+                protocol.transport.write(request)
+            return (await self._wait((future,)))[0]
+        # 需要确认字节的命令：确认字节写出之前不允许其它请求写入
+        async with self._write_lock:
+            protocol.pending.append((decoder, future, ack))
+            protocol.transport.write(request)
+            return (await self._wait((future,)))[0]
+
+
+class AsyncPipeline(Pipeline):
+    """AsyncPandaClient 的流水线，execute 为协程"""
+
+    async def execute(self, reset: bool = True, raise_on_error: bool = True) -> list:
+        if not self._requests:
+            return []
+        if self._payload is None:
+            self._payload = b''.join(self._requests)
+        client = self._client
+        protocol = await client._ensure_connected()
+        loop = asyncio.get_running_loop()
+        futures = []
+        slots = []
+        async with client._write_lock:
+            for decoder in self._decoders:
+                if decoder is None:
+                    slots.append(None)
+                    continue
+                future = loop.create_future()
+                protocol.pending.append((decoder, future, None))
+                slots.append(len(futures))
+                futures.append(future)
+            protocol.transport.write(self._payload)
+        if reset:
+            self.reset()
+        try:
+            values = await asyncio.wait_for(
+                asyncio.gather(*futures, return_exceptions=True), client.timeout)
+        except asyncio.TimeoutError:
+            await client.close()
+            raise
+        results = []
+        for slot in slots:
+            value = None if slot is None else values[slot]
+            if isinstance(value, PandaError):
+                if raise_on_error:
+                    raise value
+            elif isinstance(value, BaseException):
+                raise value
+            results.append(value)
+        return results
+
+
+class DeviceStats(NamedTuple):
+    samples: int
+    errors: int
+    reconnects: int
+    last_error: Optional[BaseException]
+
+
+class DeviceFarm:
+    """
+    设备群轮询
+    每台设备一个协程，按固定节拍采样；失败时指数退避并自动重连，
+    单台设备超时或掉线不会影响其它设备。
+    """
+
+    def __init__(self, devices: Dict[str, AsyncPandaClient]):
+        self.devices = devices
+
+    @classmethod
+    def from_ports(cls, ports: Iterable[int], host: str = 'localhost',
+                   timeout: float = DEFAULT_TIMEOUT) -> 'DeviceFarm':
+        """每台设备对应一个 adb forward 端口，设备名为 host:port"""
+        return cls({f'{host}:{port}': AsyncPandaClient(host, port, timeout=timeout) for port in ports})
+
+    async def close(self):
+        await asyncio.gather(*(client.close() for client in self.devices.values()))
+
+    async def poll(self, sample: Callable, interval: float = 0.1, duration: Optional[float] = None,
+                   on_sample: Optional[Callable] = None,
+                   on_error: Optional[Callable] = None) -> Dict[str, DeviceStats]:
+        """
+        并发轮询所有设备
+        sample(client) 返回协程（如 lambda c: c.cpu_usage()），结果通过
+        on_sample(name, timestamp, value) 回调；失败通过 on_error(name, exc) 回调。
+        单台设备的任何异常（包括回调抛出的异常）只记入该设备的 DeviceStats。
+        duration 为 None 时一直运行直到任务被取消。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if duration is None else loop.time() + duration
+        tasks = [
+            self._poll_device(name, client, sample, interval, deadline, on_sample, on_error)
+            for name, client in self.devices.items()
+        ]
+        # 回调抛出的异常也只结束对应设备的轮询
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return {
+            name: DeviceStats(0, 1, 0, result) if isinstance(result, BaseException) else result
+            for name, result in zip(self.devices.keys(), results)
+        }
+
+    @staticmethod
+    async def _poll_device(name, client, sample, interval, deadline, on_sample, on_error) -> DeviceStats:
+        loop = asyncio.get_running_loop()
+        samples = errors = reconnects = 0
+        last_error = None
+        backoff = interval
+        next_tick = loop.time()
+        while deadline is None or next_tick < deadline:
+            was_connected = client.connected
+            try:
+                value = await sample(client)
+            except Exception as e:
+                # 任何异常都只记入本设备（含 struct.error 等解码错误），不能中断其它设备的轮询
+                errors += 1
+                last_error = e
+                if on_error is not None:
+                    on_error(name, e)
+                if not isinstance(e, PandaError):
+                    # 连接失败、超时或解码错位（连接已被关闭）：退避后由下一次调用自动重连
+                    if was_connected and not client.connected:
+                        reconnects += 1
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, MAX_RECONNECT_BACKOFF)
+                    next_tick = loop.time()
+                    continue
+            else:
+                samples += 1
+                backoff = interval
+                if on_sample is not None:
+                    on_sample(name, time.time(), value)
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # 落后于节拍时不追赶，避免突发请求
+                next_tick = loop.time()
+        return DeviceStats(samples, errors, reconnects, last_error)
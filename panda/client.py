@@ -0,0 +1,229 @@
+"""
+Panda 同步客户端
+
+    from panda import connect
+
+    with connect() as client:                  # adb forward tcp:9999
+        print(client.cpu_usage())
+        print(client.memory_usage(pid))
+"""
+
+import socket
+from typing import Iterable, Iterator, List, Optional
+
+from . import protocol as p
+from .commands import PandaCommands
+from .protocol import Command, FrameReader, PandaError
+
+
+class PandaClient(PandaCommands):
+    """单连接同步客户端，命令在该连接上严格按顺序收发"""
+
+    def __init__(self, sock: socket.socket, buffer_size: int = p.DEFAULT_BUFFER_SIZE):
+        self._sock = sock
+        self._reader = FrameReader(sock, buffer_size)
+
+    @classmethod
+    def connect_tcp(cls, host: str = 'localhost', port: int = p.DEFAULT_FORWARD_PORT,
+                    timeout: Optional[float] = None) -> 'PandaClient':
+        """通过 TCP 连接（adb forward 或设备上的 TcpProxyServer）"""
+        sock = socket.create_connection((host, port), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(sock)
+
+    @classmethod
+    def connect_unix(cls, name: str = p.SOCKET_NAME,
+                     timeout: Optional[float] = None) -> 'PandaClient':
+        """通过抽象命名空间 Unix socket 连接（需在设备上运行）"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect('\0' + name)
+        return cls(sock)
+
+    @property
+    def socket(self) -> socket.socket:
+        return self._sock
+
+    def close(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _call(self, request: bytes, decoder=None, ack: Optional[bytes] = None):
+        self._sock.sendall(request)
+        if decoder is None:
+            return None
+        result = decoder(self._reader)
+        if ack is not None:
+            self._sock.sendall(ack)
+        return result
+
+    def pipeline(self) -> 'Pipeline':
+        """创建流水线：排队多条命令，一次 sendall 发送，按顺序解码响应"""
+        return Pipeline(self)
+
+    def watch_clipboard(self) -> Iterator[p.Clipboard]:
+        """
+        命令 72: 监听剪贴板变化
+        服务端注册监听后会在该连接上持续推送，连接此后只能用于接收变化
+        """
+        self._sock.sendall(p.CMD.pack(Command.CLIPBOARD_WATCH))
+        while True:
+            yield p.read_clipboard_change(self._reader)
+
+    def subscribe_metrics(self, metrics: Iterable[int], interval_ms: int = 100,
+                          pid: int = 0, uid: int = -1) -> Iterator[p.MetricSnapshot]:
+        """
+        命令 210: 订阅指标，服务端按固定间隔采样并推送 MetricSnapshot
+        metrics 为指标命令码（见 protocol.METRIC_DECODERS），pid 用于 205，uid 用于 230；
+        interval_ms 不小于 50，每帧的样本距推送时不超过半个间隔（分辨率见 README「指标订阅推送」）；
+        生成器关闭时发送命令 211 并读完剩余帧，连接之后可继续正常使用
+
+            for snap in client.subscribe_metrics([Command.CPU_USAGE, Command.FPS], 100):
+                print(snap.timestamp_ms, snap.values[Command.FPS])
+        """
+        metrics = tuple(Command(m) for m in metrics)
+        if not 1 <= len(metrics) <= len(p.METRIC_DECODERS):
+            raise ValueError(f'Expected 1-{len(p.METRIC_DECODERS)} metrics, got {len(metrics)}')
+        unsupported = [m for m in metrics if m not in p.METRIC_DECODERS]
+        if unsupported:
+            raise ValueError(f'Unsupported metric(s): {", ".join(m.name for m in unsupported)}')
+        self._sock.sendall(p.encode_subscribe(metrics, interval_ms, pid, uid))
+        p.read_status(self._reader)
+        ended = False
+        try:
+            while True:
+                snapshot = p.read_metric_frame(self._reader, metrics)
+                if snapshot is None:
+                    ended = True
+                    return
+                yield snapshot
+        finally:
+            if not ended:
+                self._sock.sendall(p.CMD.pack(Command.METRICS_UNSUBSCRIBE))
+                while True:
+                    try:
+                        if p.read_metric_frame(self._reader, metrics) is None:
+                            break
+                    except p.PandaError:
+                        # 推送已因采样出错结束，结束帧随后到达
+                        pass
+
+    def stream_screen(self, format: int = p.ImageFormat.JPEG, quality: int = 80, max_size: int = 0,
+                      fps: int = 10, sink=None) -> Iterator[p.ScreenFrame]:
+        """
+        命令 122: 屏幕帧推送，服务端按目标帧率截图，内容未变化的帧不发送
+        format / quality / max_size 同 screenshot_ex，fps 为 1-60；
+        sink 见 protocol.read_screen_frame，用于把数据直接读入预分配的缓冲区。
+        读取跟不上时服务端写入阻塞并跳过周期（ScreenFrame.late），不会堆积帧；
+        生成器关闭时发送命令 123 并读完剩余帧，连接之后可继续正常使用
+
+            for frame in client.stream_screen(ImageFormat.JPEG, 70, max_size=720, fps=15):
+                save(frame.sequence, frame.data)
+        """
+        self._sock.sendall(p.encode_command(Command.SCREEN_STREAM_START, int(format), quality, max_size, fps))
+        p.read_status(self._reader)
+        ended = False
+        try:
+            while True:
+                frame = p.read_screen_frame(self._reader, sink)
+                if frame is None:
+                    ended = True
+                    return
+                yield frame
+        finally:
+            if not ended:
+                self._sock.sendall(p.CMD.pack(Command.SCREEN_STREAM_STOP))
+                while p.read_screen_frame(self._reader) is not None:
+                    pass
+
+
+class Pipeline(PandaCommands):
+    """
+    命令流水线
+    服务端按连接顺序逐条处理命令，因此可以把多条请求合并为一次发送，
+    再按同样的顺序读取响应，N 条命令只需一次往返。
+
+        with client.pipeline() as pipe:
+            pipe.cpu_usage().cpu_core_usage().fps().memory_usage(pid)
+            usage, cores, fps, memory = pipe.execute()
+
+    排队方法返回流水线本身以便链式调用；无返回值的命令在结果中为 None。
+    """
+
+    def __init__(self, client: PandaClient):
+        self._client = client
+        self._requests: List[bytes] = []
+        self._decoders: list = []
+        self._payload: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.reset()
+
+    def _call(self, request: bytes, decoder=None, ack: Optional[bytes] = None):
+        if ack is not None:
+            # 命令 80 需要在读取响应后回写确认字节，后续排队的请求会被当作确认字节读走
+            raise ValueError('Command requires an acknowledgement and cannot be pipelined')
+        self._requests.append(request)
+        self._decoders.append(decoder)
+        self._payload = None
+        return self
+
+    def reset(self):
+        """清空已排队的命令"""
+        self._requests.clear()
+        self._decoders.clear()
+        self._payload = None
+
+    def execute(self, reset: bool = True, raise_on_error: bool = True) -> list:
+        """
+        发送所有排队命令并按顺序返回结果
+        reset=False 时保留队列，轮询同一组指标时可重复执行而无需重新编码
+        某条命令返回 PandaError 时仍会读完其余响应以保持连接可用；
+        raise_on_error=False 时错误以 PandaError 对象出现在结果中
+        """
+        if not self._requests:
+            return []
+        if self._payload is None:
+            self._payload = b''.join(self._requests)
+        client = self._client
+        client._sock.sendall(self._payload)
+        reader = client._reader
+        results = []
+        first_error = None
+        for decoder in self._decoders:
+            if decoder is None:
+                results.append(None)
+                continue
+            try:
+                results.append(decoder(reader))
+            except PandaError as e:
+                results.append(e)
+                if first_error is None:
+                    first_error = e
+        if reset:
+            self.reset()
+        if first_error is not None and raise_on_error:
+            raise first_error
+        return results
+
+
+def connect(host: str = 'localhost', port: int = p.DEFAULT_FORWARD_PORT,
+            unix: bool = False, timeout: Optional[float] = None) -> PandaClient:
+    """连接到 Panda 服务，unix=True 时使用 LocalSocket（设备本地）"""
+    if unix:
+        return PandaClient.connect_unix(timeout=timeout)
+    return PandaClient.connect_tcp(host, port, timeout=timeout)
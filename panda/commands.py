@@ -0,0 +1,318 @@
+"""
+Panda 命令的类型化接口
+
+PandaCommands 只负责把方法调用编码为请求字节并指定响应解码函数，
+真正的收发由子类的 _call 实现（同步客户端立即收发）。
+"""
+
+import functools
+from typing import Iterable, List, Optional, Tuple, Union
+
+from . import protocol as p
+from .protocol import Command
+
+# 无参数命令的请求字节预先编码
+_REQ_CPU_USAGE = p.CMD.pack(Command.CPU_USAGE)
+_REQ_CPU_CORE_USAGE = p.CMD.pack(Command.CPU_CORE_USAGE)
+_REQ_CPU_FREQ = p.CMD.pack(Command.CPU_FREQ)
+_REQ_GPU_USAGE = p.CMD.pack(Command.GPU_USAGE)
+_REQ_FPS = p.CMD.pack(Command.FPS)
+_REQ_CPU_TEMPERATURE = p.CMD.pack(Command.CPU_TEMPERATURE)
+_REQ_PROFILING_STOP = p.CMD.pack(Command.PROFILING_STOP)
+_REQ_CPU_TOPOLOGY_USAGE = p.CMD.pack(Command.CPU_TOPOLOGY_USAGE)
+_REQ_BATTERY_INFO = p.CMD.pack(Command.BATTERY_INFO)
+_REQ_BATTERY_LEVEL = p.CMD.pack(Command.BATTERY_LEVEL)
+_REQ_BATTERY_SUPPORTED = p.CMD.pack(Command.BATTERY_SUPPORTED)
+_REQ_NETWORK_TOTAL = p.CMD.pack(Command.NETWORK_TOTAL)
+_REQ_WIFI_STATE = p.CMD.pack(Command.WIFI_STATE)
+_REQ_WIFI_SCAN = p.CMD.pack(Command.WIFI_SCAN)
+_REQ_WIFI_INFO = p.CMD.pack(Command.WIFI_INFO)
+_REQ_WIFI_CONFIGURED = p.CMD.pack(Command.WIFI_CONFIGURED_NETWORKS)
+_REQ_CLIPBOARD_GET = p.CMD.pack(Command.CLIPBOARD_GET)
+_REQ_CLIPBOARD_OPERATION = p.CMD.pack(Command.CLIPBOARD_OPERATION)
+_REQ_NOTIFICATION_LIST = p.CMD.pack(Command.NOTIFICATION_LIST)
+_REQ_NOTIFICATION_CLEAR_ALL = p.CMD.pack(Command.NOTIFICATION_CLEAR_ALL)
+_REQ_CLICKABLE_TEXTS = p.CMD.pack(Command.CLICKABLE_TEXTS)
+_REQ_AUTO_CLICK_STOP = p.CMD.pack(Command.AUTO_CLICK_STOP)
+_REQ_AUTO_CLICK_STATUS = p.CMD.pack(Command.AUTO_CLICK_STATUS)
+_REQ_PRESS_BACK = p.CMD.pack(Command.PRESS_BACK)
+_REQ_PRESS_HOME = p.CMD.pack(Command.PRESS_HOME)
+_REQ_SCREENSHOT = p.CMD.pack(Command.SCREENSHOT)
+
+# 命令 80 在发送列表后会阻塞等待客户端回写 1 字节
+NOTIFICATION_ACK = b'\x00'
+
+
+class PandaCommands:
+    """所有命令的类型化方法，子类实现 _call(request, decoder, ack)"""
+
+    def _call(self, request: bytes, decoder=None, ack: Optional[bytes] = None):
+        raise NotImplementedError
+
+    # ========== 应用管理 (10) ==========
+
+    def app_list(self, flags: int = 7, icon_size: int = 96) -> p.AppList:
+        """
+        命令 10: 获取应用列表（含图标）
+        flags: bit0=包含系统应用, bit1=包含第三方应用, bit2=包含无启动器应用
+        """
+        return self._call(p.CMD_INT_INT.pack(Command.APP_LIST, flags, icon_size), p.read_app_list)
+
+    def app_list_delta(self, known: Iterable[p.KnownApp], flags: int = 7,
+                       icon_size: int = 96) -> p.AppListDelta:
+        """
+        命令 15: 增量获取应用列表
+        known 为本地已缓存的应用，服务端只返回新增/变化的应用和已卸载的包名，
+        图标 CRC32 与 known 一致时不重复发送（见 panda.icons.IconCache）
+        """
+        return self._call(p.encode_app_list_delta(flags, icon_size, known), p.read_app_list_delta)
+
+    # ========== WiFi (50-58) ==========
+
+    def wifi_state(self) -> int:
+        """命令 50: WiFi 状态 (WifiManager.WIFI_STATE_*)"""
+        return self._call(_REQ_WIFI_STATE, p.read_wifi_state)
+
+    def set_wifi_enabled(self, enabled: bool) -> None:
+        """命令 51: 打开/关闭 WiFi（无返回）"""
+        return self._call(p.CMD_INT.pack(Command.WIFI_SET_ENABLED, 1 if enabled else 0))
+
+    def wifi_scan(self) -> List[p.WifiScanResult]:
+        """命令 52: 扫描 WiFi（服务端会等待约 2 秒）"""
+        return self._call(_REQ_WIFI_SCAN, p.read_wifi_scan)
+
+    def wifi_info(self) -> p.WifiInfo:
+        """命令 53: 当前连接的 WiFi 信息"""
+        return self._call(_REQ_WIFI_INFO, p.read_wifi_info)
+
+    def wifi_configured_networks(self) -> List[p.WifiNetwork]:
+        """命令 54: 已保存的网络"""
+        return self._call(_REQ_WIFI_CONFIGURED, p.read_configured_networks)
+
+    def wifi_connect(self, network_id: int) -> None:
+        """命令 55: 连接到已保存的网络（无返回）"""
+        return self._call(p.CMD_INT.pack(Command.WIFI_CONNECT, network_id))
+
+    def wifi_add_network(self, ssid: str, password: str, auto_join: bool = True) -> None:
+        """命令 56: 添加网络并连接（无返回）"""
+        return self._call(p.encode_command(Command.WIFI_ADD_NETWORK, ssid, password, auto_join))
+
+    def wifi_set_auto_join(self, network_id: int, auto_join: bool) -> None:
+        """命令 57: 设置自动加入（无返回）"""
+        return self._call(p.CMD_INT_INT.pack(Command.WIFI_SET_AUTO_JOIN, network_id, 1 if auto_join else 0))
+
+    def wifi_remove_network(self, network_id: int) -> None:
+        """命令 58: 删除已保存的网络（无返回）"""
+        return self._call(p.CMD_INT.pack(Command.WIFI_REMOVE_NETWORK, network_id))
+
+    # ========== 剪贴板 (70-73) ==========
+
+    def clipboard(self) -> Optional[p.Clipboard]:
+        """命令 70: 读取剪贴板，为空时返回 None"""
+        return self._call(_REQ_CLIPBOARD_GET, p.read_clipboard)
+
+    def set_clipboard(self, data, mime_type: str = 'text/plain') -> int:
+        """命令 71: 设置剪贴板，data 为 str 时按 UTF-8 编码"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return self._call(p.encode_command(Command.CLIPBOARD_SET, mime_type, data), p.read_status)
+
+    def clipboard_operation(self) -> None:
+        """命令 73: 剪贴板扩展操作（服务端暂未实现，无返回）"""
+        return self._call(_REQ_CLIPBOARD_OPERATION)
+
+    # ========== 通知 (80-83) ==========
+
+    def notifications(self) -> List[p.Notification]:
+        """命令 80: 获取活动通知（读取完成后自动回写确认字节）"""
+        return self._call(_REQ_NOTIFICATION_LIST, p.read_notifications, ack=NOTIFICATION_ACK)
+
+    def cancel_notification(self, key: str) -> None:
+        """命令 81: 取消通知（无返回）"""
+        return self._call(p.encode_command(Command.NOTIFICATION_CANCEL, key))
+
+    def open_notification(self, key: str, action_index: Optional[int] = None, input_text: str = '') -> None:
+        """命令 82: 打开通知；指定 action_index 时执行对应动作（无返回）"""
+        if action_index is None:
+            return self._call(p.encode_command(Command.NOTIFICATION_OPEN, key, 0))
+        return self._call(p.encode_command(Command.NOTIFICATION_OPEN, key, 1, action_index, input_text))
+
+    def clear_notifications(self) -> None:
+        """命令 83: 清除所有可清除通知（无返回）"""
+        return self._call(_REQ_NOTIFICATION_CLEAR_ALL)
+
+    # ========== 自动点击 / 截图 (110-121) ==========
+
+    def click_by_text(self, text: str, timeout_ms: int = 0) -> bool:
+        """命令 110: 点击包含指定文本的控件"""
+        return self._call(p.encode_command(Command.CLICK_BY_TEXT, text, timeout_ms), p.read_bool)
+
+    def click_by_exact_text(self, text: str, timeout_ms: int = 0) -> bool:
+        """命令 111: 点击文本完全匹配的控件"""
+        return self._call(p.encode_command(Command.CLICK_BY_EXACT_TEXT, text, timeout_ms), p.read_bool)
+
+    def click_at(self, x: int, y: int) -> bool:
+        """命令 112: 点击坐标"""
+        return self._call(p.CMD_INT_INT.pack(Command.CLICK_AT, x, y), p.read_bool)
+
+    def clickable_texts(self) -> List[str]:
+        """命令 113: 屏幕上所有可点击控件的文本"""
+        return self._call(_REQ_CLICKABLE_TEXTS, p.read_string_list)
+
+    def start_auto_click(self, keywords: List[str]) -> bool:
+        """命令 114: 启动自动点击监控"""
+        return self._call(p.encode_command(Command.AUTO_CLICK_START, len(keywords), *keywords), p.read_bool)
+
+    def stop_auto_click(self) -> bool:
+        """命令 115: 停止自动点击监控"""
+        return self._call(_REQ_AUTO_CLICK_STOP, p.read_bool)
+
+    def auto_click_status(self) -> p.MonitorStatus:
+        """命令 116: 自动点击监控状态"""
+        return self._call(_REQ_AUTO_CLICK_STATUS, p.read_monitor_status)
+
+    def press_back(self) -> bool:
+        """命令 117: 返回键"""
+        return self._call(_REQ_PRESS_BACK, p.read_bool)
+
+    def press_home(self) -> bool:
+        """命令 118: Home 键"""
+        return self._call(_REQ_PRESS_HOME, p.read_bool)
+
+    def has_text(self, text: str) -> bool:
+        """命令 119: 屏幕上是否存在指定文本"""
+        return self._call(p.encode_command(Command.HAS_TEXT, text), p.read_bool)
+
+    def screenshot(self) -> bytes:
+        """命令 120: 全屏截图，返回 PNG 数据"""
+        return self._call(_REQ_SCREENSHOT, p.read_screenshot)
+
+    def screenshot_ex(self, format: int = p.ImageFormat.JPEG, quality: int = 80,
+                      max_size: int = 0) -> p.Screenshot:
+        """
+        命令 121: 按格式截图
+        format 为 ImageFormat（PNG/JPEG/WEBP/RGBA），quality 用于 JPEG/WebP (0-100)，
+        max_size 为最长边上限（0 表示原始分辨率），返回数据及截图/编码耗时
+        """
+        return self._call(p.encode_command(Command.SCREENSHOT_EX, int(format), quality, max_size),
+                          p.read_screenshot_ex)
+
+    # ========== 性能监控 (200-209) ==========
+
+    def cpu_usage(self) -> float:
+        """命令 200: 整体 CPU 使用率 (0-100)"""
+        return self._call(_REQ_CPU_USAGE, p.read_float)
+
+    def cpu_core_usage(self) -> Tuple[float, ...]:
+        """命令 201: 每个核心的使用率 (0-100)"""
+        return self._call(_REQ_CPU_CORE_USAGE, p.read_cpu_core_usage)
+
+    def cpu_freq(self) -> Tuple[int, ...]:
+        """命令 202: 每个核心的频率 (kHz)"""
+        return self._call(_REQ_CPU_FREQ, p.read_cpu_freq)
+
+    def gpu_usage(self) -> p.GpuUsage:
+        """命令 203: GPU 使用率和频率"""
+        return self._call(_REQ_GPU_USAGE, p.read_gpu_usage)
+
+    def fps(self) -> int:
+        """命令 204: 当前 FPS"""
+        return self._call(_REQ_FPS, p.read_int)
+
+    def memory_usage(self, pid: int) -> p.MemoryUsage:
+        """命令 205: 进程内存 (KB)"""
+        return self._call(p.CMD_INT.pack(Command.MEMORY_USAGE, pid), p.read_memory_usage)
+
+    def cpu_temperature(self) -> float:
+        """命令 206: CPU 温度 (°C)，<= 0 表示不可用"""
+        return self._call(_REQ_CPU_TEMPERATURE, p.read_float)
+
+    def thread_cpu_usage(self, pid: int, tid: int) -> float:
+        """命令 207: 线程 CPU 使用率（与上一次查询之间，占全部在线核心的百分比，首次为 0）"""
+        return self._call(p.CMD_INT_INT.pack(Command.THREAD_CPU_USAGE, pid, tid), p.read_float)
+
+    def start_profiling(self, interval_ms: int = 1000) -> bool:
+        """命令 208: 开始性能分析（FPS 监控）"""
+        return self._call(p.CMD_INT.pack(Command.PROFILING_START, interval_ms), p.read_bool)
+
+    def stop_profiling(self) -> bool:
+        """命令 209: 停止性能分析"""
+        return self._call(_REQ_PROFILING_STOP, p.read_bool)
+
+    def cpu_topology_usage(self) -> p.CpuTopologyUsage:
+        """命令 213: 按核心（含离线核心）与按 cpufreq 簇的使用率和频率"""
+        return self._call(_REQ_CPU_TOPOLOGY_USAGE, p.read_cpu_topology_usage)
+
+    def thread_cpu_table(self, pid: int, limit: int = 0) -> p.ThreadCpuTable:
+        """
+        命令 214: 进程所有线程的 CPU 使用率（类似 top -H），按使用率降序
+        使用率为与上一次扫描之间的值，首次调用 interval_ms 为 0；limit > 0 时只返回前 limit 个线程；
+        pid 为 0 时扫描 Panda 服务进程自身
+        """
+        return self._call(p.CMD_INT_INT.pack(Command.THREAD_CPU_TABLE, pid, limit), p.read_thread_cpu_table)
+
+    def frame_stats(self, window_ms: int = 1000) -> p.FrameStats:
+        """
+        命令 215: 最近 window_ms 内目标图层的帧统计（FPS、帧时间百分位、Jank/BigJank）
+        数据来自 SurfaceFlinger 的帧延迟记录，目标图层由 set_fps_target 指定，默认自动选择
+        """
+        return self._call(p.CMD_INT.pack(Command.FRAME_STATS, window_ms), p.read_frame_stats)
+
+    def set_fps_target(self, target: str = '') -> int:
+        """命令 216: 设置帧率跟踪的包名或图层名，空字符串表示自动选择；切换后统计重新开始"""
+        return self._call(p.encode_command(Command.FPS_TARGET, target), p.read_status)
+
+    # ========== 批量查询 (212) ==========
+
+    def metrics_batch(self, queries: Iterable[Union[int, Tuple[int, ...]]]) -> list:
+        """
+        命令 212: 一次请求查询多个指标，按请求顺序返回各指标的值
+        queries 中无参数的指标直接写命令码，带参数的写为元组：
+            (Command.MEMORY_USAGE, pid), (Command.THREAD_CPU_USAGE, pid, tid), (Command.FRAME_STATS, window_ms),
+            (Command.NETWORK_USAGE, uid)
+        服务端在同一批次中只读取一次 /proc/stat
+        """
+        queries = [tuple(q) if isinstance(q, tuple) else (q,) for q in queries]
+        metrics = tuple(Command(q[0]) for q in queries)
+        unsupported = [m for m in metrics if m not in p.BATCH_DECODERS]
+        if unsupported:
+            raise ValueError(f'Unsupported metric(s): {", ".join(m.name for m in unsupported)}')
+        return self._call(p.encode_metrics_batch(queries),
+                          functools.partial(p.read_metrics_batch, metrics=metrics))
+
+    # ========== 电池 (220-222) ==========
+
+    def battery_info(self) -> p.BatteryInfo:
+        """命令 220: 电流、电压、电量、充电状态、时间戳"""
+        return self._call(_REQ_BATTERY_INFO, p.read_battery_info)
+
+    def battery_level(self) -> int:
+        """命令 221: 电量 (0-100)"""
+        return self._call(_REQ_BATTERY_LEVEL, p.read_int)
+
+    def battery_supported(self) -> bool:
+        """命令 222: 是否支持电流监控"""
+        return self._call(_REQ_BATTERY_SUPPORTED, p.read_bool)
+
+    # ========== 网络流量 (230-233) ==========
+
+    def network_usage(self, uid: int) -> p.NetworkUsage:
+        """命令 230: 指定 UID 的流量 (字节)"""
+        return self._call(p.CMD_INT.pack(Command.NETWORK_USAGE, uid), p.read_network_usage)
+
+    def network_total(self) -> p.TotalNetworkUsage:
+        """命令 231: 所有 UID 的总流量 (字节)"""
+        return self._call(_REQ_NETWORK_TOTAL, p.read_network_total)
+
+    def network_usage_by_package(self, package: str) -> p.PackageNetworkUsage:
+        """命令 232: 指定包名的流量 (字节)"""
+        return self._call(p.encode_command(Command.NETWORK_BY_PACKAGE, package), p.read_network_by_package)
+
+    def network_bulk(self, uids: Optional[Iterable[int]] = None) -> p.NetworkSnapshot:
+        """
+        命令 233: 多个 UID 的流量 (字节) 及相对上一快照的速率 (字节/秒)
+        uids 为 None 或为空时返回服务端快照中的全部 UID，否则按请求顺序返回（没有流量的 UID 计数为 0）
+        """
+        uids = tuple(uids) if uids is not None else ()
+        return self._call(p.CMD_INT.pack(Command.NETWORK_BULK, len(uids)) + p.array_codec('i', len(uids)).pack(*uids),
+                          p.read_network_bulk)
@@ -0,0 +1,81 @@
+"""
+屏幕帧推送的 NumPy 消费端（依赖 NumPy；解码 PNG/JPEG/WebP 帧另需 Pillow）
+
+命令 122 推送的帧直接解码为 (height, width, 4) 的 uint8 RGBA 数组：
+
+    from panda import ImageFormat
+    from panda.frames import iter_arrays
+
+    for frame, image in iter_arrays(client, ImageFormat.RGBA, max_size=720, fps=10):
+        print(frame.sequence, frame.unchanged, image.mean(axis=(0, 1)))
+
+RGBA 帧由 socket 直接 recv_into 预分配的数组，不经过中间 bytes；
+数组按 buffers 个一组轮换复用，保留超过 buffers 帧的图像时需要 copy()。
+"""
+
+import io
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .protocol import ImageFormat, ScreenFrame
+
+
+class FrameDecoder:
+    """
+    把推送帧解码为 RGBA 数组
+    作为 stream_screen 的 sink 使用时，RGBA 数据直接读入轮换的预分配数组
+    """
+
+    def __init__(self, buffers: int = 2):
+        if buffers <= 0:
+            raise ValueError('buffers must be positive')
+        self._buffers: List[Optional[np.ndarray]] = [None] * buffers
+        self._next = 0
+
+    def __call__(self, frame: ScreenFrame, size: int):
+        """read_screen_frame 的 sink：RGBA 帧返回预分配数组，其余格式按 bytes 读取"""
+        if frame.format != ImageFormat.RGBA or size != frame.width * frame.height * 4:
+            return None
+        shape = (frame.height, frame.width, 4)
+        index = self._next
+        self._next = (index + 1) % len(self._buffers)
+        array = self._buffers[index]
+        if array is None or array.shape != shape:
+            array = np.empty(shape, dtype=np.uint8)
+            self._buffers[index] = array
+        return array
+
+    def decode(self, frame: ScreenFrame) -> np.ndarray:
+        """返回 (height, width, 4) uint8 数组"""
+        if isinstance(frame.data, np.ndarray):
+            return frame.data
+        if frame.format == ImageFormat.RGBA:
+            return np.frombuffer(frame.data, dtype=np.uint8).reshape(frame.height, frame.width, 4)
+        try:
+            from PIL import Image
+        except ImportError:
+            raise ImportError('Decoding PNG/JPEG/WebP frames requires Pillow; '
+                              'use ImageFormat.RGBA to avoid it') from None
+        with Image.open(io.BytesIO(frame.data)) as image:
+            return np.asarray(image.convert('RGBA'))
+
+
+def iter_arrays(client, format: int = ImageFormat.RGBA, quality: int = 80, max_size: int = 0,
+                fps: int = 10, buffers: int = 2) -> Iterator[Tuple[ScreenFrame, np.ndarray]]:
+    """
+    命令 122: 接收屏幕帧并解码为 NumPy 数组，client 为 PandaClient 或 PandaPool
+    生成器关闭时停止推送
+    """
+    decoder = FrameDecoder(buffers)
+    for frame in client.stream_screen(format, quality, max_size, fps, sink=decoder):
+        yield frame, decoder.decode(frame)
+
+
+def changed_fraction(previous: np.ndarray, current: np.ndarray, threshold: int = 8) -> float:
+    """两帧之间任一通道差值超过 threshold 的像素比例（用于视觉检查）"""
+    if previous.shape != current.shape:
+        return 1.0
+    diff = np.abs(previous.astype(np.int16) - current.astype(np.int16)).max(axis=2)
+    return float(np.count_nonzero(diff > threshold)) / diff.size
+
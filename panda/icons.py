@@ -0,0 +1,152 @@
+"""
+应用列表的本地缓存（命令 15）
+
+图标按内容的 SHA-256 存放在磁盘上，相同的图标（如大量系统应用共用的默认图标）只存一份；
+每次同步只把本地已知的 (包名, 版本号, 更新时间, 图标尺寸, 图标 CRC32) 发给服务端，
+服务端只返回新增/变化的应用和已卸载的包名，图标未变时也不重复发送，
+重复盘点的传输量从 MB 级降到 KB 级：
+
+    from panda.icons import IconCache
+
+    cache = IconCache('~/.cache/panda/emulator-5554')
+    apps = cache.sync(client)                 # 首次全量，之后增量
+    print(cache.last_delta.removed)           # 本次同步的变化
+    path = cache.icon_path('com.android.settings')
+
+目录结构：
+    icons/<sha256 前两位>/<sha256>.png
+    apps-<flags>-<icon_size>.json            每种查询参数一份清单
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from .protocol import AppInfo, AppList, AppListDelta, KnownApp, icon_crc
+
+MANIFEST_VERSION = 1
+
+
+class IconCache:
+    """按内容哈希存储图标的应用列表缓存，通过命令 15 增量同步"""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.icon_directory = os.path.join(self.directory, 'icons')
+        self.last_delta: Optional[AppListDelta] = None
+        os.makedirs(self.icon_directory, exist_ok=True)
+
+    # ========== 图标存储 ==========
+
+    def _icon_file(self, digest: str) -> str:
+        return os.path.join(self.icon_directory, digest[:2], digest + '.png')
+
+    def store_icon(self, data: bytes) -> str:
+        """保存图标，返回其 SHA-256，内容已存在时不重复写入"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._icon_file(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, data)
+        return digest
+
+    def load_icon(self, digest: Optional[str]) -> Optional[bytes]:
+        if not digest:
+            return None
+        try:
+            with open(self._icon_file(digest), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    # ========== 清单 ==========
+
+    def _manifest_file(self, flags: int, icon_size: int) -> str:
+        return os.path.join(self.directory, f'apps-{flags}-{icon_size}.json')
+
+    def _load_manifest(self, flags: int, icon_size: int) -> dict:
+        try:
+            with open(self._manifest_file(flags, icon_size)) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = None
+        if not manifest or manifest.get('version') != MANIFEST_VERSION:
+            manifest = {'version': MANIFEST_VERSION, 'default_icon': None, 'apps': {}}
+        return manifest
+
+    def _save_manifest(self, flags: int, icon_size: int, manifest: dict):
+        data = json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        _write_atomic(self._manifest_file(flags, icon_size), data)
+
+    def _manifests(self):
+        for name in os.listdir(self.directory):
+            if name.startswith('apps-') and name.endswith('.json'):
+                flags, icon_size = name[5:-5].split('-')
+                yield self._load_manifest(int(flags), int(icon_size))
+
+    # ========== 同步 ==========
+
+    def sync(self, client, flags: int = 7, icon_size: int = 96, load_icons: bool = True) -> AppList:
+        """
+        用命令 15 增量同步并返回完整的应用列表（与 app_list() 相同的结构）
+        load_icons=False 时 AppInfo.icon 为 None，需要时用 icon_path() 按需读取
+        """
+        manifest = self._load_manifest(flags, icon_size)
+        entries: Dict[str, dict] = manifest['apps']
+        known = [
+            KnownApp(package, entry['info'][2], entry['info'][5], icon_size, entry['crc'])
+            for package, entry in entries.items()
+        ]
+        delta = client.app_list_delta(known, flags, icon_size)
+
+        if delta.default_icon is not None:
+            manifest['default_icon'] = self.store_icon(delta.default_icon)
+        for app in delta.apps:
+            previous = entries.get(app.package)
+            if app.package in delta.unchanged_icons and previous is not None:
+                digest, crc = previous['icon'], previous['crc']
+            elif app.icon is not None:
+                digest, crc = self.store_icon(app.icon), icon_crc(app.icon)
+            else:
+                digest, crc = None, 0
+            entries[app.package] = {'info': list(app[:-1]), 'icon': digest, 'crc': crc}
+        for package in delta.removed:
+            entries.pop(package, None)
+
+        if delta.apps or delta.removed or delta.default_icon is not None:
+            self._save_manifest(flags, icon_size, manifest)
+        self.last_delta = delta
+
+        load = self.load_icon if load_icons else (lambda digest: None)
+        apps = [AppInfo(*entry['info'], load(entry['icon'])) for entry in entries.values()]
+        return AppList(load(manifest['default_icon']), apps)
+
+    def icon_path(self, package: str, flags: int = 7, icon_size: int = 96) -> Optional[str]:
+        """已缓存图标的文件路径，没有图标时返回 None"""
+        entry = self._load_manifest(flags, icon_size)['apps'].get(package)
+        if entry is None or not entry['icon']:
+            return None
+        return self._icon_file(entry['icon'])
+
+    def prune(self) -> int:
+        """删除不再被任何清单引用的图标文件，返回删除数量"""
+        referenced = set()
+        for manifest in self._manifests():
+            referenced.add(manifest['default_icon'])
+            referenced.update(entry['icon'] for entry in manifest['apps'].values())
+        removed = 0
+        for root, _, files in os.walk(self.icon_directory):
+            for name in files:
+                if name[:-4] not in referenced:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+
+def _write_atomic(path: str, data: bytes):
+    """先写临时文件再重命名，进程中断时不会留下半个文件"""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
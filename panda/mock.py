@@ -0,0 +1,782 @@
+"""
+Panda 模拟服务端
+
+按 CommandDispatcher / IOUtils 的二进制协议应答，返回确定性的合成数据，
+用于在没有手机的机器上做客户端回归测试和性能基准：
+
+    python3 -m panda.mock --port 9999 --latency 0.002 --icon-bytes 8192
+
+    # 或在代码中启动（后台线程运行事件循环）
+    with MockPandaServer(port=0).run_in_thread() as server:
+        with connect('127.0.0.1', server.port) as client:
+            client.cpu_usage()
+
+可注入的参数：
+- latency / jitter: 每条命令应答前的延迟（秒），latency_by_command 可按命令覆盖
+- cores / app_count / icon_bytes / screenshot_bytes / scan_count / notification_count:
+  各类响应的负载大小
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from . import protocol as p
+from .protocol import Command, encode_bytes, encode_string
+
+_INT = p.INT.pack
+_LONG = p.LONG.pack
+_FLOAT = p.FLOAT.pack
+_SUCCESS = _INT(0)
+_TRUE = _INT(1)
+_FALSE = _INT(0)
+
+# 命令 233 未指定 UID 时返回的 UID
+_MOCK_UIDS = (0, 1000, 1013, 10050, 10123)
+
+# 合成 PNG 数据的文件头，便于客户端按图片保存查看
+_PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+def _payload(size: int, seed: int) -> bytes:
+    """确定性的指定大小负载"""
+    if size <= 0:
+        return b''
+    body = bytes((seed + i) & 0xFF for i in range(min(size, 256)))
+    data = _PNG_HEADER + body * (size // len(body) + 1)
+    return data[:size]
+
+
+def _error(message: str, code: int = -1) -> bytes:
+    return _INT(code) + encode_string(message)
+
+
+class MockPandaServer:
+    """asyncio 实现的 Panda 模拟服务端，每个连接按顺序处理命令"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = p.DEFAULT_FORWARD_PORT,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 latency_by_command: Optional[Dict[int, float]] = None,
+                 cores: int = 8, app_count: int = 20, icon_bytes: int = 4096,
+                 screenshot_bytes: int = 256 * 1024, scan_count: int = 10,
+                 notification_count: int = 5, seed: int = 0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_by_command = dict(latency_by_command or {})
+        self.cores = cores
+        self.app_count = app_count
+        self.icon_bytes = icon_bytes
+        self.screenshot_bytes = screenshot_bytes
+        self.scan_count = scan_count
+        self.notification_count = notification_count
+        self.seed = seed
+        self.commands_served = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._clipboard = (b'text/plain', b'panda')
+        self._clipboard_watchers: Set[asyncio.StreamWriter] = set()
+        self._client_tasks: Set[asyncio.Task] = set()
+        self._subscriptions: Dict[asyncio.StreamWriter, asyncio.Future] = {}
+        self._screen_streams: Dict[asyncio.StreamWriter, asyncio.Future] = {}
+        self._auto_click_keywords = []
+        self._auto_click_running = False
+        self._profiling = False
+        self._fps_target = ''
+        self._cache: Dict[tuple, bytes] = {}
+
+        self._handlers = {
+            Command.APP_LIST: self._app_list,
+            Command.APP_LIST_DELTA: self._app_list_delta,
+            Command.WIFI_STATE: self._static(_INT(3)),
+            Command.WIFI_SET_ENABLED: self._consume_ints(1),
+            Command.WIFI_SCAN: self._wifi_scan,
+            Command.WIFI_INFO: self._wifi_info,
+            Command.WIFI_CONFIGURED_NETWORKS: self._configured_networks,
+            Command.WIFI_CONNECT: self._consume_ints(1),
+            Command.WIFI_ADD_NETWORK: self._wifi_add_network,
+            Command.WIFI_SET_AUTO_JOIN: self._consume_ints(2),
+            Command.WIFI_REMOVE_NETWORK: self._consume_ints(1),
+            Command.CLIPBOARD_GET: self._clipboard_get,
+            Command.CLIPBOARD_SET: self._clipboard_set,
+            Command.CLIPBOARD_WATCH: self._clipboard_watch,
+            Command.CLIPBOARD_OPERATION: self._static(None),
+            Command.NOTIFICATION_LIST: self._notifications,
+            Command.NOTIFICATION_CANCEL: self._consume_string,
+            Command.NOTIFICATION_OPEN: self._notification_open,
+            Command.NOTIFICATION_CLEAR_ALL: self._static(None),
+            Command.CLICK_BY_TEXT: self._click_by_text,
+            Command.CLICK_BY_EXACT_TEXT: self._click_by_text,
+            Command.CLICK_AT: self._click_at,
+            Command.CLICKABLE_TEXTS: self._clickable_texts,
+            Command.AUTO_CLICK_START: self._auto_click_start,
+            Command.AUTO_CLICK_STOP: self._auto_click_stop,
+            Command.AUTO_CLICK_STATUS: self._auto_click_status,
+            Command.PRESS_BACK: self._static(_TRUE),
+            Command.PRESS_HOME: self._static(_TRUE),
+            Command.HAS_TEXT: self._has_text,
+            Command.SCREENSHOT: self._screenshot,
+            Command.SCREENSHOT_EX: self._screenshot_ex,
+            Command.SCREEN_STREAM_START: self._screen_stream_start,
+            Command.SCREEN_STREAM_STOP: self._screen_stream_stop,
+            Command.CPU_USAGE: self._metric_handler(Command.CPU_USAGE),
+            Command.CPU_CORE_USAGE: self._metric_handler(Command.CPU_CORE_USAGE),
+            Command.CPU_FREQ: self._metric_handler(Command.CPU_FREQ),
+            Command.CPU_TOPOLOGY_USAGE: self._metric_handler(Command.CPU_TOPOLOGY_USAGE),
+            Command.GPU_USAGE: self._metric_handler(Command.GPU_USAGE),
+            Command.FPS: self._metric_handler(Command.FPS),
+            Command.MEMORY_USAGE: self._memory_usage,
+            Command.CPU_TEMPERATURE: self._metric_handler(Command.CPU_TEMPERATURE),
+            Command.THREAD_CPU_USAGE: self._thread_cpu_usage,
+            Command.THREAD_CPU_TABLE: self._thread_cpu_table,
+            Command.FRAME_STATS: self._frame_stats,
+            Command.FPS_TARGET: self._set_fps_target,
+            Command.PROFILING_START: self._profiling_start,
+            Command.PROFILING_STOP: self._profiling_stop,
+            Command.METRICS_SUBSCRIBE: self._subscribe,
+            Command.METRICS_UNSUBSCRIBE: self._unsubscribe,
+            Command.METRICS_BATCH: self._metrics_batch,
+            Command.BATTERY_INFO: self._metric_handler(Command.BATTERY_INFO),
+            Command.BATTERY_LEVEL: self._metric_handler(Command.BATTERY_LEVEL),
+            Command.BATTERY_SUPPORTED: self._static(_TRUE),
+            Command.NETWORK_USAGE: self._network_usage,
+            Command.NETWORK_TOTAL: self._metric_handler(Command.NETWORK_TOTAL),
+            Command.NETWORK_BY_PACKAGE: self._network_by_package,
+            Command.NETWORK_BULK: self._network_bulk,
+        }
+
+    # ========== 生命周期 ==========
+
+    async def start(self) -> 'MockPandaServer':
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        tasks = list(self._client_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run_in_thread(self) -> 'MockPandaServer':
+        """在后台线程中运行事件循环，返回时端口已就绪（port=0 时可读取实际端口）"""
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            self._loop = loop
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.close())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name='panda-mock', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """停止 run_in_thread 启动的服务端"""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ========== 连接处理 ==========
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._client_tasks.add(task)
+        rng = random.Random(self.seed)
+        tick = 0
+        try:
+            while True:
+                command = p.INT.unpack(await reader.readexactly(4))[0]
+                delay = self.latency_by_command.get(command, self.latency)
+                if self.jitter:
+                    delay += rng.random() * self.jitter
+                handler = self._handlers.get(command)
+                if handler is None:
+                    response = _error(f'Unknown command: {command}')
+                else:
+                    response = await handler(reader, writer, tick)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if response:
+                    writer.write(response)
+                    await writer.drain()
+                if command == Command.NOTIFICATION_LIST:
+                    # 与服务端一致：发送列表后等待客户端回写 1 字节确认
+                    await reader.readexactly(1)
+                tick += 1
+                self.commands_served += 1
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # 客户端断开或服务端关闭
+            pass
+        finally:
+            self._clipboard_watchers.discard(writer)
+            self._stop_subscription(writer)
+            self._stop_screen_stream(writer)
+            self._client_tasks.discard(task)
+            writer.close()
+
+    # ========== 参数读取 ==========
+
+    @staticmethod
+    async def _read_int(reader) -> int:
+        return p.INT.unpack(await reader.readexactly(4))[0]
+
+    async def _read_bytes(self, reader) -> bytes:
+        length = await self._read_int(reader)
+        return await reader.readexactly(length) if length > 0 else b''
+
+    async def _read_string(self, reader) -> str:
+        return (await self._read_bytes(reader)).decode('utf-8')
+
+    @staticmethod
+    def _static(response: Optional[bytes]):
+        async def handler(reader, writer, tick):
+            return response
+        return handler
+
+    def _consume_ints(self, count: int):
+        async def handler(reader, writer, tick):
+            await reader.readexactly(4 * count)
+            return None
+        return handler
+
+    async def _consume_string(self, reader, writer, tick):
+        await self._read_string(reader)
+        return None
+
+    def _cached(self, key: tuple, build) -> bytes:
+        data = self._cache.get(key)
+        if data is None:
+            data = self._cache[key] = build()
+        return data
+
+    # ========== 应用列表 (10) ==========
+
+    async def _app_list(self, reader, writer, tick):
+        flags, icon_size = p.array_codec('i', 2).unpack(await reader.readexactly(8))
+        return self._cached(('apps', self.app_count, self.icon_bytes), self._build_app_list)
+
+    def _build_app_list(self) -> bytes:
+        icon = _payload(self.icon_bytes, 1)
+        parts = [encode_bytes(icon), _INT(self.app_count)]
+        for i in range(self.app_count):
+            parts += [self._app_record(i), encode_bytes(self._app_icon(i))]
+        return b''.join(parts)
+
+    @staticmethod
+    def _app_record(i: int) -> bytes:
+        """第 i 个模拟应用的元数据（不含图标），版本号 1000+i，更新时间 1700000000+i"""
+        return b''.join([
+            encode_string(f'com.panda.mock.app{i}'), encode_string(f'1.{i}.0'), _LONG(1000 + i),
+            encode_string(f'Mock App {i}'),
+            p.APP_TIMES.pack(1600000000 + i, 1700000000 + i, 0),
+            encode_string('com.android.vending'), encode_string('arm64-v8a'),
+            p.APP_SDK.pack(33, 23, 0, 0, 1),
+            p.APP_SIZES.pack(10_000_000 + i, 2_000_000, 100_000),
+        ])
+
+    def _app_icon(self, i: int) -> bytes:
+        return _payload(self.icon_bytes, i + 2)
+
+    async def _app_list_delta(self, reader, writer, tick):
+        flags, icon_size, count = p.array_codec('i', 3).unpack(await reader.readexactly(12))
+        known = {}
+        for _ in range(count):
+            package = await self._read_string(reader)
+            known[package] = p.KNOWN_APP.unpack(await reader.readexactly(p.KNOWN_APP.size))
+        parts = []
+        changed = 0
+        for i in range(self.app_count):
+            entry = known.pop(f'com.panda.mock.app{i}', None)
+            if entry is not None and entry[:3] == (1000 + i, 1700000000 + i, icon_size):
+                continue
+            icon = self._app_icon(i)
+            changed += 1
+            parts.append(self._app_record(i))
+            if entry is not None and entry[3] != 0 and entry[3] == p.icon_crc(icon):
+                parts.append(_INT(p.ICON_UNCHANGED))
+            else:
+                parts.append(encode_bytes(icon))
+        default_icon = encode_bytes(_payload(self.icon_bytes, 1)) if count == 0 else _INT(0)
+        removed = [encode_string(package) for package in known]
+        return b''.join([default_icon, _INT(changed)] + parts + [_INT(len(removed))] + removed)
+
+    # ========== WiFi (50-58) ==========
+
+    async def _wifi_scan(self, reader, writer, tick):
+        return self._cached(('scan', self.scan_count), self._build_wifi_scan)
+
+    def _build_wifi_scan(self) -> bytes:
+        parts = [_INT(self.scan_count)]
+        for i in range(self.scan_count):
+            parts += [
+                encode_string(f'MockAP-{i}'), encode_string(f'02:00:00:00:00:{i & 0xFF:02x}'),
+                p.WIFI_SCAN_TAIL.pack(2412 + 5 * (i % 13), 4, -40 - i),
+            ]
+        return b''.join(parts)
+
+    async def _wifi_info(self, reader, writer, tick):
+        return encode_string('MockAP-0') + encode_string('02:00:00:00:00:00') + p.WIFI_INFO_TAIL.pack(0, 866, -42)
+
+    async def _configured_networks(self, reader, writer, tick):
+        return _INT(2) + _INT(0) + encode_string('MockAP-0') + _INT(1) + encode_string('MockAP-1')
+
+    async def _wifi_add_network(self, reader, writer, tick):
+        await self._read_string(reader)
+        await self._read_string(reader)
+        await reader.readexactly(4)
+        return None
+
+    # ========== 剪贴板 (70-73) ==========
+
+    async def _clipboard_get(self, reader, writer, tick):
+        mime_type, data = self._clipboard
+        return _SUCCESS + encode_bytes(mime_type) + encode_bytes(data)
+
+    async def _clipboard_set(self, reader, writer, tick):
+        mime_type = await self._read_bytes(reader)
+        data = await self._read_bytes(reader)
+        if (mime_type, data) != self._clipboard:
+            self._clipboard = (mime_type, data)
+            change = encode_bytes(mime_type) + encode_bytes(data)
+            for watcher in list(self._clipboard_watchers):
+                watcher.write(change)
+        return _SUCCESS
+
+    async def _clipboard_watch(self, reader, writer, tick):
+        # 与服务端一致：只注册监听，之后在该连接上推送变化
+        self._clipboard_watchers.add(writer)
+        return None
+
+    # ========== 通知 (80-83) ==========
+
+    async def _notifications(self, reader, writer, tick):
+        return self._cached(('notifications', self.notification_count), self._build_notifications)
+
+    def _build_notifications(self) -> bytes:
+        parts = [_INT(self.notification_count)]
+        for i in range(self.notification_count):
+            parts += [
+                encode_string(f'0|com.panda.mock.app{i}|{i}|null|10000'),
+                encode_string(f'com.panda.mock.app{i}'),
+                encode_string(f'Title {i}'), encode_string(f'Notification text {i}'),
+                p.NOTIFICATION_TAIL.pack(1700000000000 + i, 1, 1),
+                encode_string('Reply'), _TRUE,
+            ]
+        return b''.join(parts)
+
+    async def _notification_open(self, reader, writer, tick):
+        await self._read_string(reader)
+        if await self._read_int(reader) == 1:
+            await self._read_int(reader)
+            await self._read_string(reader)
+        return None
+
+    # ========== 自动点击 / 截图 (110-120) ==========
+
+    async def _click_by_text(self, reader, writer, tick):
+        text = await self._read_string(reader)
+        await self._read_int(reader)
+        return _TRUE if text else _FALSE
+
+    async def _click_at(self, reader, writer, tick):
+        await reader.readexactly(8)
+        return _TRUE
+
+    async def _clickable_texts(self, reader, writer, tick):
+        return _INT(3) + encode_string('OK') + encode_string('Cancel') + encode_string('Settings')
+
+    async def _auto_click_start(self, reader, writer, tick):
+        count = await self._read_int(reader)
+        keywords = [await self._read_string(reader) for _ in range(count)]
+        if self._auto_click_running:
+            return _FALSE
+        self._auto_click_running = True
+        self._auto_click_keywords = keywords
+        return _TRUE
+
+    async def _auto_click_stop(self, reader, writer, tick):
+        running, self._auto_click_running = self._auto_click_running, False
+        return _TRUE if running else _FALSE
+
+    async def _auto_click_status(self, reader, writer, tick):
+        keywords = self._auto_click_keywords if self._auto_click_running else []
+        return p.MONITOR_HEAD.pack(1 if self._auto_click_running else 0, len(keywords)) + \
+            b''.join(encode_string(k) for k in keywords)
+
+    async def _has_text(self, reader, writer, tick):
+        return _TRUE if await self._read_string(reader) else _FALSE
+
+    async def _screenshot(self, reader, writer, tick):
+        return self._cached(('screenshot', self.screenshot_bytes),
+                            lambda: encode_bytes(_payload(self.screenshot_bytes, 0)))
+
+    async def _screenshot_ex(self, reader, writer, tick):
+        fmt, quality, max_size = p.CMD_INT_INT.unpack(await reader.readexactly(12))
+        if fmt not in p.ImageFormat.__members__.values():
+            return _INT(-1) + encode_string(f"Unsupported image format: {fmt}")
+        return self._cached(('screenshot_ex', fmt, quality, max_size, self.screenshot_bytes),
+                            lambda: self._build_screenshot_ex(fmt, quality, max_size))
+
+    def _build_screenshot_ex(self, fmt: int, quality: int, max_size: int) -> bytes:
+        """按 1080x2400 屏幕缩放；PNG 大小为 screenshot_bytes，JPEG/WebP 按质量缩小"""
+        width, height = 1080, 2400
+        if 0 < max_size < height:
+            width, height = max(1, width * max_size // height), max_size
+        area = width * height / (1080 * 2400)
+        if fmt == p.ImageFormat.RGBA:
+            size = width * height * 4
+        elif fmt == p.ImageFormat.PNG:
+            size = int(self.screenshot_bytes * area)
+        else:
+            size = int(self.screenshot_bytes * area * max(10, min(quality, 100)) / 400)
+        return _INT(0) + p.SCREENSHOT_HEAD.pack(width, height, fmt, 8000) + \
+            encode_bytes(_payload(size, fmt)) + _INT(size // 100)
+
+    async def _screen_stream_start(self, reader, writer, tick):
+        fmt, quality, max_size, fps = p.array_codec('i', 4).unpack(await reader.readexactly(16))
+        if fmt not in p.ImageFormat.__members__.values():
+            return _error(f'Unsupported image format: {fmt}')
+        if not 1 <= fps <= 60:
+            return _error(f'Invalid frame rate: {fps}')
+        self._stop_screen_stream(writer)
+        writer.write(_SUCCESS)
+        self._screen_streams[writer] = asyncio.ensure_future(
+            self._push_screen_frames(writer, fmt, quality, max_size, 1.0 / fps))
+        return None
+
+    async def _push_screen_frames(self, writer, fmt, quality, max_size, interval):
+        """
+        模拟屏幕每 3 个周期变化一次，未变化的周期不发送，计入下一帧的 unchanged；
+        drain 等待客户端读取时错过的周期不补发，计入下一帧的 late
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        sequence = tick = unchanged = late = 0
+        try:
+            while True:
+                if tick % 3 == 0:
+                    shot = self._cached(('screenshot_ex', fmt, quality, max_size, self.screenshot_bytes),
+                                        lambda: self._build_screenshot_ex(fmt, quality, max_size))
+                    width, height, _, capture_us = p.SCREENSHOT_HEAD.unpack_from(shot, 4)
+                    # 数据（int 长度 + 数据 + 编码耗时）沿用 121 的合成结果，首字节改为序号使相邻帧内容不同
+                    tail = bytearray(shot[4 + p.SCREENSHOT_HEAD.size:])
+                    size = len(tail) - 8
+                    if size > 0:
+                        tail[4] = sequence & 0xFF
+                    frame = p.SCREEN_FRAME_HEAD.pack(int(time.time() * 1000), sequence, unchanged, late,
+                                                     width, height, fmt, capture_us, size) + tail[4:]
+                    writer.write(_INT(len(frame)) + frame)
+                    await writer.drain()
+                    sequence += 1
+                    unchanged = late = 0
+                else:
+                    unchanged += 1
+                tick += 1
+                missed = int((loop.time() - start) / interval) - tick
+                if missed > 0:
+                    late += missed
+                    tick += missed
+                await asyncio.sleep(max(0.0, start + tick * interval - loop.time()))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    def _stop_screen_stream(self, writer):
+        task = self._screen_streams.pop(writer, None)
+        if task is not None:
+            task.cancel()
+
+    async def _screen_stream_stop(self, reader, writer, tick):
+        self._stop_screen_stream(writer)
+        return _INT(0)
+
+    # ========== 性能监控 (200-209) ==========
+    # 指标按连接上的命令序号变化，相同序号总是得到相同结果
+
+    def _metric(self, metric: int, tick: int, pid: int = 0, uid: int = 0) -> bytes:
+        """单个指标的响应数据，逐条请求与订阅推送（210）共用"""
+        if metric == Command.CPU_USAGE:
+            return _FLOAT(30.0 + 20.0 * math.sin(tick / 10.0))
+        if metric == Command.CPU_CORE_USAGE:
+            values = [25.0 + 20.0 * math.sin((tick + core) / 7.0) for core in range(self.cores)]
+            return _INT(self.cores) + p.array_codec('f', self.cores).pack(*values)
+        if metric == Command.CPU_FREQ:
+            values = [1_000_000 + 200_000 * ((tick + core) % 5) for core in range(self.cores)]
+            return _INT(self.cores) + p.array_codec('i', self.cores).pack(*values)
+        if metric == Command.GPU_USAGE:
+            return p.GPU.pack(40.0 + 10.0 * math.cos(tick / 9.0), 585_000)
+        if metric == Command.FPS:
+            return _INT(60 - tick % 4)
+        if metric == Command.MEMORY_USAGE:
+            if pid <= 0:
+                return p.MEMORY.pack(0, 0, 0)
+            return p.MEMORY.pack(120_000 + tick % 100, 80_000, 20_000)
+        if metric == Command.CPU_TEMPERATURE:
+            return _FLOAT(42.5)
+        if metric == Command.CPU_TOPOLOGY_USAGE:
+            # 前半为 policy0 小核簇，后半为大核簇
+            split = self.cores // 2
+            usages = [25.0 + 20.0 * math.sin((tick + core) / 7.0) for core in range(self.cores)]
+            freqs = [1_000_000 + 200_000 * ((tick + core) % 5) for core in range(self.cores)]
+            data = [_INT(self.cores)]
+            data += [p.CPU_CORE.pack(usages[core], 1, 0 if core < split else 1, freqs[core])
+                     for core in range(self.cores)]
+            clusters = [(0, range(0, split)), (split, range(split, self.cores))]
+            clusters = [(policy, cores) for policy, cores in clusters if cores]
+            data.append(_INT(len(clusters)))
+            for policy, cores in clusters:
+                usage = sum(usages[core] for core in cores) / len(cores)
+                data.append(p.CPU_CLUSTER.pack(policy, usage, len(cores), len(cores), freqs[cores[0]], 1_800_000))
+            return b''.join(data)
+        if metric == Command.BATTERY_INFO:
+            return p.BATTERY.pack(-350, 4200, 80, 0, 1700000000000 + tick * 100)
+        if metric == Command.BATTERY_LEVEL:
+            return _INT(80)
+        if metric == Command.NETWORK_USAGE:
+            base = uid * 1000 + tick
+            return p.NETWORK.pack(base * 3, base * 2, base * 2, base, base, base)
+        if metric == Command.NETWORK_TOTAL:
+            return p.NETWORK_TOTAL.pack(10_000_000 + tick, 5_000_000 + tick)
+        raise ValueError(f'Unsupported metric: {metric}')
+
+    def _metric_handler(self, metric: int):
+        async def handler(reader, writer, tick):
+            return self._metric(metric, tick)
+        return handler
+
+    async def _memory_usage(self, reader, writer, tick):
+        pid = await self._read_int(reader)
+        return self._metric(Command.MEMORY_USAGE, tick, pid=pid)
+
+    async def _thread_cpu_usage(self, reader, writer, tick):
+        await reader.readexactly(8)
+        return _FLOAT(5.0 + tick % 10)
+
+    async def _thread_cpu_table(self, reader, writer, tick):
+        pid, limit = p.CMD_INT.unpack(await reader.readexactly(8))
+        if pid <= 0:
+            pid = os.getpid()
+        names = ['main', 'RenderThread', 'UnityMain', 'UnityGfxDevice', 'Binder:1', 'Binder:2',
+                 'HeapTaskDaemon', 'FinalizerDaemon', 'AudioTrack', 'Jit thread pool', 'JobWorker', 'JobWorker']
+        interval = 1000 if tick else 0
+        rows = []
+        for i, name in enumerate(names):
+            usage = max(0.0, 12.0 / (i + 1) + 2.0 * math.sin((tick + i) / 3.0)) if interval else 0.0
+            rows.append((usage, pid + i, name, 'R' if i < 2 else 'S', i % self.cores))
+        rows.sort(key=lambda row: (-row[0], row[1]))
+        if limit > 0:
+            rows = rows[:limit]
+        data = [_INT(len(names)), p.THREAD_TABLE_HEAD.pack(interval, len(rows))]
+        for usage, tid, name, state, cpu in rows:
+            data += [_INT(tid), encode_string(name), p.THREAD_ROW_TAIL.pack(ord(state), usage, cpu)]
+        return b''.join(data)
+
+    def _frame_stats_data(self, window_ms: int, tick: int) -> bytes:
+        """60Hz 屏幕上约 58 FPS 的帧统计，每 20 个周期出现一次 Jank"""
+        window_ms = min(max(window_ms, 100), 60_000)
+        frames = int(58 * window_ms / 1000)
+        jank = 1 if tick % 20 == 0 else 0
+        layer = f'SurfaceView[{self._fps_target or "com.example.game"}/com.example.game.MainActivity]#0'
+        return (p.FRAME_STATS.pack(frames * 1000 / window_ms, frames, 16.7, 16.8, 17.2, 33.3 if jank else 18.1,
+                                   100.2 if jank else 20.5, jank, 0, 16.67)
+                + encode_string(layer))
+
+    async def _frame_stats(self, reader, writer, tick):
+        return self._frame_stats_data(await self._read_int(reader), tick)
+
+    async def _set_fps_target(self, reader, writer, tick):
+        self._fps_target = await self._read_string(reader)
+        return _INT(0)
+
+    async def _profiling_start(self, reader, writer, tick):
+        await reader.readexactly(4)
+        self._profiling = True
+        return _TRUE
+
+    async def _profiling_stop(self, reader, writer, tick):
+        self._profiling = False
+        return _TRUE
+
+    # ========== 指标订阅与批量查询 (210-212) ==========
+
+    async def _subscribe(self, reader, writer, tick):
+        interval, pid, uid, count = p.array_codec('i', 4).unpack(await reader.readexactly(16))
+        # 与服务端相同：先校验数量再读取指标
+        if count < 1 or count > len(p.METRIC_DECODERS):
+            return _error(f'Invalid metric count: {count}')
+        metrics = p.array_codec('i', count).unpack(await reader.readexactly(4 * count))
+        unsupported = [m for m in metrics if m not in p.METRIC_DECODERS]
+        if unsupported:
+            return _error(f'Unsupported metric: {unsupported[0]}')
+        if interval < 50:
+            return _error(f'Invalid subscription interval: {interval}ms')
+        self._stop_subscription(writer)
+        # 先写入订阅成功，再由推送任务按固定间隔写入帧
+        writer.write(_SUCCESS)
+        self._subscriptions[writer] = asyncio.ensure_future(
+            self._push_metrics(writer, metrics, interval / 1000.0, pid, uid))
+        return None
+
+    async def _push_metrics(self, writer, metrics, interval, pid, uid):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        sequence = 0
+        try:
+            while True:
+                try:
+                    body = b''.join(self._metric(m, sequence, pid, uid) for m in metrics)
+                except Exception as e:
+                    # 与服务端相同：采样出错时在帧长度位置写入错误并结束推送
+                    writer.write(_error(f'Sampling failed: {e}'))
+                    await writer.drain()
+                    return
+                frame = p.SNAPSHOT_HEAD.pack(int(time.time() * 1000), sequence)
+                writer.write(_INT(len(frame) + len(body)) + frame + body)
+                await writer.drain()
+                sequence += 1
+                await asyncio.sleep(max(0.0, start + sequence * interval - loop.time()))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    def _stop_subscription(self, writer):
+        task = self._subscriptions.pop(writer, None)
+        if task is not None:
+            task.cancel()
+
+    async def _unsubscribe(self, reader, writer, tick):
+        self._stop_subscription(writer)
+        return _INT(0)
+
+    async def _metrics_batch(self, reader, writer, tick):
+        # 请求体整体读入后再解析：出错时不会在连接中留下未读的参数
+        length = await self._read_int(reader)
+        if length < 4 or length > 64 * 1024:
+            if length > 0:
+                await reader.readexactly(length)
+            return _error(f'Invalid batch request size: {length}')
+        request = p.BufferReader(await reader.readexactly(length))
+        try:
+            count = request.unpack(p.INT)[0]
+            if not 0 <= count <= (length - 4) // 4:
+                return _error(f'Invalid metric count: {count}')
+            queries = []
+            for _ in range(count):
+                metric = request.unpack(p.INT)[0]
+                if metric not in p.BATCH_DECODERS:
+                    return _error(f'Unsupported metric: {metric}')
+                queries.append((metric, request.read_array('i', p.BATCH_PARAMS.get(metric, 0))))
+        except p.Incomplete:
+            return _error('Truncated batch request')
+        parts = []
+        for metric, params in queries:
+            if metric == Command.THREAD_CPU_USAGE:
+                parts.append(_FLOAT(5.0 + tick % 10))
+            elif metric == Command.MEMORY_USAGE:
+                parts.append(self._metric(metric, tick, pid=params[0]))
+            elif metric == Command.NETWORK_USAGE:
+                parts.append(self._metric(metric, tick, uid=params[0]))
+            elif metric == Command.FRAME_STATS:
+                parts.append(self._frame_stats_data(params[0], tick))
+            else:
+                parts.append(self._metric(metric, tick))
+        body = b''.join(parts)
+        return _INT(len(body)) + body
+
+    # ========== 网络流量 (230-233) ==========
+
+    async def _network_usage(self, reader, writer, tick):
+        uid = await self._read_int(reader)
+        return self._metric(Command.NETWORK_USAGE, tick, uid=uid)
+
+    async def _network_by_package(self, reader, writer, tick):
+        package = await self._read_string(reader)
+        if not package:
+            return _INT(-1) + _LONG(0) + _LONG(0)
+        uid = 10000 + sum(package.encode('utf-8')) % 1000
+        return p.NETWORK_PACKAGE.pack(uid, 1000 + tick, 500 + tick)
+
+    async def _network_bulk(self, reader, writer, tick):
+        count = await self._read_int(reader)
+        if count < 0:
+            return _error(f'Invalid UID count: {count}')
+        uids = p.array_codec('i', count).unpack(await reader.readexactly(4 * count)) if count else _MOCK_UIDS
+        # 计数与命令 230 相同，假定每个请求间隔 1 秒
+        interval = 1000 if tick else 0
+        rows = []
+        for uid in uids:
+            base = uid * 1000 + tick
+            rates = (3.0, 2.0) if tick else (0.0, 0.0)
+            rows.append(p.NETWORK_UID_ROW.pack(uid, base * 2, base, base, base, *rates))
+        return _INT(len(uids)) + p.NETWORK_BULK_HEAD.pack(int(time.time() * 1000), interval) + b''.join(rows)
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Panda mock server")
+    parser.add_argument("--host", default="127.0.0.1", help="bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=p.DEFAULT_FORWARD_PORT,
+                        help="TCP port, 0 for any free port (default: 9999)")
+    parser.add_argument("--latency", type=float, default=0.0, help="per-command latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency in seconds")
+    parser.add_argument("--cores", type=int, default=8, help="CPU cores reported by 201/202")
+    parser.add_argument("--apps", type=int, default=20, help="apps returned by command 10")
+    parser.add_argument("--icon-bytes", type=int, default=4096, help="icon payload size")
+    parser.add_argument("--screenshot-bytes", type=int, default=256 * 1024, help="screenshot payload size")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    server = MockPandaServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                             cores=args.cores, app_count=args.apps, icon_bytes=args.icon_bytes,
+                             screenshot_bytes=args.screenshot_bytes)
+
+    async def run():
+        await server.start()
+        # 便于父进程解析实际监听端口
+        print(f"Panda mock server listening on {server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
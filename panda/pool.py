@@ -0,0 +1,182 @@
+"""
+Panda 单设备连接池
+
+服务端同一连接上的命令严格串行（LocalSocket 每个连接一个线程；TCP 连接由事件循环和
+固定大小的分发线程池处理，但每个连接同时只执行一条命令）：
+一次 WiFi 扫描（52，服务端等待约 2 秒）、截图（120）或带图标的应用列表（10）
+会阻塞排在其后的 200/204 指标轮询。连接池把这类耗时命令路由到独立连接，
+指标命令始终走同一条主连接，轮询延迟不受影响：
+
+    pool = PandaPool.connect_tcp('localhost', 9999)
+    threading.Thread(target=pool.screenshot).start()
+    pool.cpu_usage()                       # 不会等待截图完成
+
+指标不依赖连接：服务端所有连接共用进程内唯一的 MetricSampler，增量状态（如 CPU 时间）
+由它维护，结果按指标缓存一个短 TTL（CPU/GPU/频率/网络 50ms，FPS 100ms，内存/电池信息 200ms，
+温度/电量 1s），TTL 内多个连接的相同请求共享同一次采样。
+因此主连接只是为了避免指标请求排在耗时命令之后，换用其它连接得到的值相同。
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, FrozenSet, Iterable, Iterator, List, Optional
+
+from . import protocol as p
+from .client import PandaClient, Pipeline
+from .commands import PandaCommands
+from .protocol import Command
+
+# 默认路由到独立连接的耗时命令
+SLOW_COMMANDS: FrozenSet[int] = frozenset({
+    Command.APP_LIST,
+    Command.APP_LIST_DELTA,
+    Command.WIFI_SCAN,
+    Command.CLICKABLE_TEXTS,
+    Command.SCREENSHOT,
+    Command.SCREENSHOT_EX,
+})
+
+
+class PandaPool(PandaCommands):
+    """
+    单设备连接池
+    - 普通命令共享一条主连接（加锁，线程安全）
+    - SLOW_COMMANDS 中的命令从最多 max_slow 条独立连接中借用，用完归还
+    - 剪贴板监听（72）独占一条新连接，监听结束后关闭
+    连接在首次使用时建立；发生 socket 错误的连接直接丢弃，下次使用时重建。
+    """
+
+    def __init__(self, factory: Callable[[], PandaClient], max_slow: int = 2,
+                 slow_commands: FrozenSet[int] = SLOW_COMMANDS):
+        self._factory = factory
+        self._slow_commands = slow_commands
+        self._primary: Optional[PandaClient] = None
+        self._primary_lock = threading.Lock()
+        self._idle: List[PandaClient] = []
+        self._idle_lock = threading.Lock()
+        self._slow_slots = threading.BoundedSemaphore(max_slow)
+        self._closed = False
+
+    @classmethod
+    def connect_tcp(cls, host: str = 'localhost', port: int = p.DEFAULT_FORWARD_PORT,
+                    timeout: Optional[float] = None, **kwargs) -> 'PandaPool':
+        return cls(lambda: PandaClient.connect_tcp(host, port, timeout=timeout), **kwargs)
+
+    @classmethod
+    def connect_unix(cls, name: str = p.SOCKET_NAME,
+                     timeout: Optional[float] = None, **kwargs) -> 'PandaPool':
+        return cls(lambda: PandaClient.connect_unix(name, timeout=timeout), **kwargs)
+
+    def close(self):
+        self._closed = True
+        with self._primary_lock:
+            if self._primary is not None:
+                self._primary.close()
+                self._primary = None
+        with self._idle_lock:
+            for client in self._idle:
+                client.close()
+            self._idle.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _new_client(self) -> PandaClient:
+        if self._closed:
+            raise ConnectionError('Pool is closed')
+        return self._factory()
+
+    @contextmanager
+    def _primary_client(self) -> Iterator[PandaClient]:
+        with self._primary_lock:
+            if self._primary is None:
+                self._primary = self._new_client()
+            try:
+                yield self._primary
+            except p.PandaError:
+                raise
+            except BaseException:
+                # socket 错误或解码中途中断，连接上的数据已无法对齐
+                self._primary.close()
+                self._primary = None
+                raise
+
+    @contextmanager
+    def _slow_client(self) -> Iterator[PandaClient]:
+        with self._slow_slots:
+            with self._idle_lock:
+                client = self._idle.pop() if self._idle else None
+            if client is None:
+                client = self._new_client()
+            try:
+                yield client
+            except p.PandaError:
+                self._release(client)
+                raise
+            except BaseException:
+                client.close()
+                raise
+            self._release(client)
+
+    def _release(self, client: PandaClient):
+        with self._idle_lock:
+            if self._closed:
+                client.close()
+            else:
+                self._idle.append(client)
+
+    def _call(self, request: bytes, decoder=None, ack: Optional[bytes] = None):
+        if p.CMD.unpack_from(request)[0] in self._slow_commands:
+            with self._slow_client() as client:
+                return client._call(request, decoder, ack)
+        with self._primary_client() as client:
+            return client._call(request, decoder, ack)
+
+    def pipeline(self) -> '_PoolPipeline':
+        """在主连接上执行的流水线"""
+        return _PoolPipeline(self)
+
+    def subscribe_metrics(self, metrics: Iterable[int], interval_ms: int = 100,
+                          pid: int = 0, uid: int = -1) -> Iterator[p.MetricSnapshot]:
+        """命令 210: 在独占连接上订阅指标推送，生成器关闭时断开该连接"""
+        client = self._new_client()
+        try:
+            yield from client.subscribe_metrics(metrics, interval_ms, pid, uid)
+        finally:
+            client.close()
+
+    def stream_screen(self, format: int = p.ImageFormat.JPEG, quality: int = 80, max_size: int = 0,
+                      fps: int = 10, sink=None) -> Iterator[p.ScreenFrame]:
+        """命令 122: 在独占连接上接收屏幕帧推送，生成器关闭时断开该连接"""
+        client = self._new_client()
+        try:
+            yield from client.stream_screen(format, quality, max_size, fps, sink)
+        finally:
+            client.close()
+
+    def watch_clipboard(self) -> Iterator[p.Clipboard]:
+        """命令 72: 在独占连接上监听剪贴板变化，生成器关闭时断开该连接"""
+        client = self._new_client()
+        try:
+            yield from client.watch_clipboard()
+        finally:
+            client.close()
+
+
+class _PoolPipeline(Pipeline):
+    """执行时持有连接池主连接的流水线"""
+
+    def __init__(self, pool: PandaPool):
+        super().__init__(None)
+        self._pool = pool
+
+    def execute(self, reset: bool = True, raise_on_error: bool = True) -> list:
+        with self._pool._primary_client() as client:
+            self._client = client
+            try:
+                return super().execute(reset, raise_on_error)
+            finally:
+                self._client = None
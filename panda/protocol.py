@@ -0,0 +1,983 @@
+"""
+Panda 二进制协议编解码
+
+与 CommandDispatcher / IOUtils 保持一致：
+  - 所有整数、浮点数均为大端 (Big Endian)
+  - int = 4 字节有符号, long = 8 字节有符号, float = 4 字节 IEEE754
+  - string = int 长度 + UTF-8 数据
+  - bytes  = int 长度 + 原始数据
+  - 出错时服务端通常写入 int 错误码 (-1) + string 错误信息
+
+本模块只做编解码，不关心连接方式：解码函数接收一个 reader，
+reader 需提供 unpack / read_bytes / read_string / read_array 四个方法，
+FrameReader 是基于 socket.recv_into 的实现。
+"""
+
+import functools
+import struct
+import zlib
+from enum import IntEnum
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+VERSION = '1.1.0'
+SOCKET_NAME = f'panda-{VERSION}'
+DEFAULT_TCP_PORT = 43305      # 设备上 TcpProxyServer 的默认端口
+DEFAULT_FORWARD_PORT = 9999   # adb forward tcp:9999 localabstract:panda-1.1.0
+DEFAULT_BUFFER_SIZE = 65536
+
+
+class Command(IntEnum):
+    """CommandDispatcher.dispatch 中的命令码"""
+    APP_LIST = 10
+    APP_LIST_DELTA = 15
+
+    WIFI_STATE = 50
+    WIFI_SET_ENABLED = 51
+    WIFI_SCAN = 52
+    WIFI_INFO = 53
+    WIFI_CONFIGURED_NETWORKS = 54
+    WIFI_CONNECT = 55
+    WIFI_ADD_NETWORK = 56
+    WIFI_SET_AUTO_JOIN = 57
+    WIFI_REMOVE_NETWORK = 58
+
+    CLIPBOARD_GET = 70
+    CLIPBOARD_SET = 71
+    CLIPBOARD_WATCH = 72
+    CLIPBOARD_OPERATION = 73
+
+    NOTIFICATION_LIST = 80
+    NOTIFICATION_CANCEL = 81
+    NOTIFICATION_OPEN = 82
+    NOTIFICATION_CLEAR_ALL = 83
+
+    CLICK_BY_TEXT = 110
+    CLICK_BY_EXACT_TEXT = 111
+    CLICK_AT = 112
+    CLICKABLE_TEXTS = 113
+    AUTO_CLICK_START = 114
+    AUTO_CLICK_STOP = 115
+    AUTO_CLICK_STATUS = 116
+    PRESS_BACK = 117
+    PRESS_HOME = 118
+    HAS_TEXT = 119
+    SCREENSHOT = 120
+    SCREENSHOT_EX = 121
+    SCREEN_STREAM_START = 122
+    SCREEN_STREAM_STOP = 123
+
+    CPU_USAGE = 200
+    CPU_CORE_USAGE = 201
+    CPU_FREQ = 202
+    GPU_USAGE = 203
+    FPS = 204
+    MEMORY_USAGE = 205
+    CPU_TEMPERATURE = 206
+    THREAD_CPU_USAGE = 207
+    PROFILING_START = 208
+    PROFILING_STOP = 209
+    METRICS_SUBSCRIBE = 210
+    METRICS_UNSUBSCRIBE = 211
+    METRICS_BATCH = 212
+    CPU_TOPOLOGY_USAGE = 213
+    THREAD_CPU_TABLE = 214
+    FRAME_STATS = 215
+    FPS_TARGET = 216
+
+    BATTERY_INFO = 220
+    BATTERY_LEVEL = 221
+    BATTERY_SUPPORTED = 222
+
+    NETWORK_USAGE = 230
+    NETWORK_TOTAL = 231
+    NETWORK_BY_PACKAGE = 232
+    NETWORK_BULK = 233
+
+
+class ImageFormat(IntEnum):
+    """命令 121 的截图格式"""
+    PNG = 0
+    JPEG = 1
+    WEBP = 2
+    RGBA = 3    # 原始 RGBA_8888 像素，逐行紧密排列
+
+
+class PandaError(Exception):
+    """服务端通过 IOUtils.writeError 返回的错误"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f'[{code}] {message}')
+        self.code = code
+        self.message = message
+
+
+# ========== 预编译的编解码器 ==========
+
+INT = struct.Struct('>i')
+LONG = struct.Struct('>q')
+FLOAT = struct.Struct('>f')
+
+# 请求：命令码 + 若干 int 参数
+CMD = INT
+CMD_INT = struct.Struct('>ii')
+CMD_INT_INT = struct.Struct('>iii')
+
+# 响应：多字段一次解包
+GPU = struct.Struct('>fi')                  # 203
+MEMORY = struct.Struct('>qqq')              # 205
+BATTERY = struct.Struct('>iiiiq')           # 220
+NETWORK = struct.Struct('>qqqqqq')          # 230
+NETWORK_TOTAL = struct.Struct('>qq')        # 231
+NETWORK_PACKAGE = struct.Struct('>iqq')     # 232
+NETWORK_BULK_HEAD = struct.Struct('>qi')    # 233 行数之后: 快照时间戳(ms), 与上一快照的间隔(ms)
+NETWORK_UID_ROW = struct.Struct('>iqqqqff')  # 233 每行: UID, WiFi 接收/发送, 移动接收/发送, 接收/发送速率(字节/秒)
+WIFI_SCAN_TAIL = struct.Struct('>iii')      # 52: 频率, 标准, 信号等级
+WIFI_INFO_TAIL = struct.Struct('>iii')      # 53: networkId, linkSpeed, rssi
+APP_TIMES = struct.Struct('>iii')           # 10: 安装时间, 更新时间, 最后使用时间
+APP_SDK = struct.Struct('>iiiii')           # 10: targetSdk, minSdk, flags, 有分包, 可启动
+APP_SIZES = struct.Struct('>qqq')           # 10: 应用大小, 数据大小, 缓存大小
+KNOWN_APP = struct.Struct('>qiii')          # 15: 版本号, 更新时间, 图标尺寸, 图标 CRC32
+NOTIFICATION_TAIL = struct.Struct('>qii')   # 80: postTime, 可清除, 动作数量
+MONITOR_HEAD = struct.Struct('>ii')         # 116: 运行状态, 关键词数量
+SCREENSHOT_HEAD = struct.Struct('>iiii')    # 121 状态之后: 宽, 高, 格式, 截图耗时(μs)
+SCREEN_FRAME_HEAD = struct.Struct('>qiiiiiiii')  # 122 推送帧: 时间戳(ms), 序号, 未变化帧数, 跳过周期数, 宽, 高, 格式, 截图耗时(μs), 数据长度
+SUBSCRIBE_HEAD = struct.Struct('>iiiii')    # 210: 命令码, 间隔, PID, UID, 指标数量
+SNAPSHOT_HEAD = struct.Struct('>qi')        # 210 推送帧: 时间戳(ms), 序号
+CPU_CORE = struct.Struct('>fiii')          # 213 核心: 使用率, 在线, 簇序号, 频率
+CPU_CLUSTER = struct.Struct('>ifiiii')     # 213 簇: 策略, 使用率, 在线核心数, 核心数, 频率, 最高频率
+THREAD_TABLE_HEAD = struct.Struct('>ii')    # 214: 采样间隔(ms), 行数（线程总数由 _read_head_or_error 读取）
+THREAD_ROW_TAIL = struct.Struct('>ifi')     # 214 每行线程名之后: 状态, 使用率, 最近运行的 CPU
+FRAME_STATS = struct.Struct('>fifffffiif')  # 215 图层名之前: FPS, 帧数, P50/P90/P95/P99/最大帧时间, Jank, BigJank, 刷新周期
+
+
+@functools.lru_cache(maxsize=64)
+def array_codec(type_code: str, count: int) -> struct.Struct:
+    """同类型定长数组的编解码器（按长度缓存）"""
+    return struct.Struct(f'>{count}{type_code}')
+
+
+# ========== 响应数据类型 ==========
+
+class GpuUsage(NamedTuple):
+    usage: float
+    freq_khz: int
+
+
+class CoreUsage(NamedTuple):
+    usage: float
+    online: bool
+    cluster: int        # CpuTopologyUsage.clusters 的下标，-1 表示未知
+    freq_khz: int
+
+
+class ClusterUsage(NamedTuple):
+    policy: int         # cpufreq 策略编号（policyN），-1 表示无法归属的核心
+    usage: float
+    online_cores: int
+    cores: int
+    freq_khz: int
+    max_freq_khz: int
+
+
+class CpuTopologyUsage(NamedTuple):
+    """命令 213 的响应：按核心编号（含离线核心）与按簇的使用率"""
+    cores: List[CoreUsage]
+    clusters: List[ClusterUsage]
+
+
+class ThreadCpu(NamedTuple):
+    tid: int
+    name: str
+    state: str          # 'R' 运行, 'S' 睡眠, 'D' 不可中断等
+    usage: float        # 占 (间隔 × 在线核心数) 的百分比
+    last_cpu: int
+
+
+class ThreadCpuTable(NamedTuple):
+    """命令 214 的响应：按使用率降序排列的线程，interval_ms 为 0 表示首次扫描（使用率均为 0）"""
+    total_threads: int
+    interval_ms: int
+    threads: List[ThreadCpu]
+
+
+class FrameStats(NamedTuple):
+    """命令 215 的响应：窗口内目标图层的帧统计，帧时间单位 ms，layer 为空表示未找到图层"""
+    fps: float
+    frames: int
+    p50_ms: float
+    p90_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    jank: int
+    big_jank: int
+    refresh_period_ms: float
+    layer: str
+
+
+class MemoryUsage(NamedTuple):
+    pss_kb: int
+    private_dirty_kb: int
+    shared_dirty_kb: int
+
+
+class BatteryInfo(NamedTuple):
+    current_ma: int
+    voltage_mv: int
+    level: int
+    charging: bool
+    timestamp_ms: int
+
+
+class NetworkUsage(NamedTuple):
+    total_rx: int
+    total_tx: int
+    wifi_rx: int
+    wifi_tx: int
+    mobile_rx: int
+    mobile_tx: int
+
+
+class TotalNetworkUsage(NamedTuple):
+    rx: int
+    tx: int
+
+
+class PackageNetworkUsage(NamedTuple):
+    uid: int
+    rx: int
+    tx: int
+
+
+class UidNetworkUsage(NamedTuple):
+    uid: int
+    wifi_rx: int
+    wifi_tx: int
+    mobile_rx: int
+    mobile_tx: int
+    rx_rate: float      # 字节/秒，相对上一快照；上一快照中没有该 UID 时为 0
+    tx_rate: float
+
+    @property
+    def rx(self) -> int:
+        return self.wifi_rx + self.mobile_rx
+
+    @property
+    def tx(self) -> int:
+        return self.wifi_tx + self.mobile_tx
+
+
+class NetworkSnapshot(NamedTuple):
+    """命令 233: 全部（或指定）UID 的流量，interval_ms 为 0 表示没有上一快照，速率均为 0"""
+    timestamp: int      # ms
+    interval_ms: int
+    uids: List[UidNetworkUsage]
+
+
+class WifiScanResult(NamedTuple):
+    ssid: str
+    bssid: str
+    frequency: int
+    standard: int
+    level: int
+
+
+class WifiInfo(NamedTuple):
+    ssid: str
+    bssid: str
+    network_id: int
+    link_speed: int
+    rssi: int
+
+
+class WifiNetwork(NamedTuple):
+    network_id: int
+    ssid: str
+
+
+class AppInfo(NamedTuple):
+    package: str
+    version_name: str
+    version_code: int
+    label: str
+    first_install_time: int
+    last_update_time: int
+    last_used_time: int
+    installer: str
+    abi: str
+    target_sdk: int
+    min_sdk: int
+    flags: int
+    has_splits: bool
+    can_launch: bool
+    apk_size: int
+    data_size: int
+    cache_size: int
+    icon: Optional[bytes]
+
+
+class AppList(NamedTuple):
+    default_icon: Optional[bytes]
+    apps: List[AppInfo]
+
+
+class KnownApp(NamedTuple):
+    """命令 15 请求中客户端已缓存的应用"""
+    package: str
+    version_code: int
+    last_update_time: int
+    icon_size: int
+    icon_crc: int = 0
+
+
+class AppListDelta(NamedTuple):
+    """
+    命令 15 的响应
+    apps 为新增/变化的应用；unchanged_icons 中的应用图标与客户端缓存相同，icon 为 None
+    default_icon 只在首次同步（未发送已知应用）时返回
+    """
+    default_icon: Optional[bytes]
+    apps: List[AppInfo]
+    removed: List[str]
+    unchanged_icons: FrozenSet[str]
+
+
+class Clipboard(NamedTuple):
+    mime_type: str
+    data: bytes
+
+
+class NotificationAction(NamedTuple):
+    title: str
+    has_input: bool
+
+
+class Notification(NamedTuple):
+    key: str
+    package: str
+    title: str
+    text: str
+    post_time: int
+    clearable: bool
+    actions: List[NotificationAction]
+
+
+class MonitorStatus(NamedTuple):
+    running: bool
+    keywords: List[str]
+
+
+class Screenshot(NamedTuple):
+    """命令 121 的截图：data 为 format 编码后的数据（RGBA 时为 width * height * 4 字节像素）"""
+    width: int
+    height: int
+    format: ImageFormat
+    data: bytes
+    capture_us: int
+    encode_us: int
+
+
+class ScreenFrame(NamedTuple):
+    """
+    命令 122 推送的一帧
+    unchanged 为上一帧之后内容未变化而未发送的帧数，late 为推送跟不上目标帧率而跳过的周期数
+    """
+    timestamp_ms: int
+    sequence: int
+    unchanged: int
+    late: int
+    width: int
+    height: int
+    format: ImageFormat
+    data: Any
+    capture_us: int
+    encode_us: int
+
+
+class MetricSnapshot(NamedTuple):
+    """命令 210 推送的一帧：服务端采样时间 (ms)、序号、按指标命令码索引的值"""
+    timestamp_ms: int
+    sequence: int
+    values: Dict[int, Any]
+
+
+# ========== 请求编码 ==========
+
+def encode_string(value: str) -> bytes:
+    """string = int 长度 + UTF-8 数据"""
+    data = value.encode('utf-8')
+    return INT.pack(len(data)) + data
+
+
+def encode_bytes(value: bytes) -> bytes:
+    """bytes = int 长度 + 原始数据"""
+    return INT.pack(len(value)) + value
+
+
+def encode_command(command: int, *args) -> bytes:
+    """
+    编码命令及参数：int 直接写入，str 按 string 写入，bytes 按 bytes 写入
+    仅用于不常用的命令，高频命令请直接使用预编译的 CMD_INT 等编解码器
+    """
+    parts = [CMD.pack(command)]
+    for arg in args:
+        if isinstance(arg, bool):
+            parts.append(INT.pack(1 if arg else 0))
+        elif isinstance(arg, int):
+            parts.append(INT.pack(arg))
+        elif isinstance(arg, str):
+            parts.append(encode_string(arg))
+        else:
+            parts.append(encode_bytes(bytes(arg)))
+    return b''.join(parts)
+
+
+def icon_crc(data: bytes) -> int:
+    """图标 PNG 的 CRC32，按服务端 java.util.zip.CRC32.value.toInt() 转为有符号 int"""
+    crc = zlib.crc32(data)
+    return crc - (1 << 32) if crc >= 1 << 31 else crc
+
+
+def encode_app_list_delta(flags: int, icon_size: int, known: Iterable[KnownApp]) -> bytes:
+    """命令 15: flags, iconSize, 已知数量, 每个为 string 包名 + KNOWN_APP"""
+    known = list(known)
+    parts = [CMD_INT_INT.pack(Command.APP_LIST_DELTA, flags, icon_size), INT.pack(len(known))]
+    for app in known:
+        parts.append(encode_string(app.package))
+        parts.append(KNOWN_APP.pack(app.version_code, app.last_update_time, app.icon_size, app.icon_crc))
+    return b''.join(parts)
+
+
+def encode_subscribe(metrics: Iterable[int], interval_ms: int, pid: int = 0, uid: int = -1) -> bytes:
+    """命令 210: 间隔, PID, UID, 指标数量, 指标命令码"""
+    metrics = [int(m) for m in metrics]
+    return (SUBSCRIBE_HEAD.pack(Command.METRICS_SUBSCRIBE, interval_ms, pid, uid, len(metrics))
+            + array_codec('i', len(metrics)).pack(*metrics))
+
+
+# 命令 212 中带参数的指标及参数个数：205 PID, 207 PID + TID, 215 窗口(ms), 230 UID
+BATCH_PARAMS = {
+    Command.MEMORY_USAGE: 1,
+    Command.THREAD_CPU_USAGE: 2,
+    Command.FRAME_STATS: 1,
+    Command.NETWORK_USAGE: 1,
+}
+
+
+def encode_metrics_batch(queries: Iterable[Tuple[int, ...]]) -> bytes:
+    """
+    命令 212: 请求体长度 + 请求体（指标数量, 每个为 命令码 + BATCH_PARAMS 中规定个数的 int 参数）
+    请求体带长度前缀，服务端遇到不支持的指标时也能读完整个请求，连接不会错位
+    """
+    queries = list(queries)
+    values = []
+    for query in queries:
+        metric, params = query[0], query[1:]
+        if len(params) != BATCH_PARAMS.get(metric, 0):
+            raise ValueError(f'Metric {metric} takes {BATCH_PARAMS.get(metric, 0)} parameter(s), got {len(params)}')
+        values.extend(query)
+    body = INT.pack(len(queries)) + array_codec('i', len(values)).pack(*values)
+    return CMD_INT.pack(Command.METRICS_BATCH, len(body)) + body
+
+
+# ========== 缓冲读取 ==========
+
+class FrameReader:
+    """
+    基于 recv_into 的缓冲读取器
+    - 每次系统调用尽量读满缓冲区，多个字段共享一次 recv
+    - 严格按长度读取，短读不会导致数据错位
+    - 定长字段直接在缓冲区上 unpack_from，不产生中间 bytes
+    """
+
+    def __init__(self, sock, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self._sock = sock
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._pos = 0
+        self._end = 0
+
+    @property
+    def buffered(self) -> int:
+        """缓冲区中尚未消费的字节数"""
+        return self._end - self._pos
+
+    def _fill(self, size: int):
+        """保证缓冲区中至少有 size 个可读字节"""
+        available = self._end - self._pos
+        if available == 0:
+            self._pos = self._end = 0
+        if size > len(self._buf):
+            # 单个字段超过缓冲区，扩容
+            buf = bytearray(max(size, len(self._buf) * 2))
+            buf[:available] = self._view[self._pos:self._end]
+            self._buf = buf
+            self._view = memoryview(buf)
+            self._pos, self._end = 0, available
+        elif self._pos + size > len(self._buf):
+            # 尾部空间不足，把未消费数据移到开头
+            self._view[:available] = self._view[self._pos:self._end]
+            self._pos, self._end = 0, available
+        while self._end - self._pos < size:
+            received = self._sock.recv_into(self._view[self._end:])
+            if not received:
+                raise ConnectionError('Connection closed by Panda server')
+            self._end += received
+
+    def unpack(self, codec: struct.Struct) -> tuple:
+        """按预编译的 Struct 读取一组定长字段"""
+        size = codec.size
+        if self._end - self._pos < size:
+            self._fill(size)
+        values = codec.unpack_from(self._buf, self._pos)
+        self._pos += size
+        return values
+
+    def read_array(self, type_code: str, count: int) -> tuple:
+        """读取 count 个同类型字段（如 201 的 float[]）"""
+        if count <= 0:
+            return ()
+        return self.unpack(array_codec(type_code, count))
+
+    def read_bytes(self, size: int) -> bytes:
+        """读取定长原始数据；大块数据直接 recv_into 目标缓冲区"""
+        if size <= 0:
+            return b''
+        available = self._end - self._pos
+        if size <= available or size <= len(self._buf):
+            self._fill(size)
+            data = bytes(self._view[self._pos:self._pos + size])
+            self._pos += size
+            return data
+        out = bytearray(size)
+        out[:available] = self._view[self._pos:self._end]
+        self._pos = self._end = 0
+        view = memoryview(out)
+        received = available
+        while received < size:
+            count = self._sock.recv_into(view[received:])
+            if not count:
+                raise ConnectionError('Connection closed by Panda server')
+            received += count
+        return bytes(out)
+
+    def read_into(self, target) -> None:
+        """读满可写缓冲区 target（bytearray / memoryview / numpy 数组），大块数据直接 recv_into"""
+        view = memoryview(target).cast('B')
+        size = len(view)
+        available = min(self._end - self._pos, size)
+        view[:available] = self._view[self._pos:self._pos + available]
+        self._pos += available
+        received = available
+        while received < size:
+            count = self._sock.recv_into(view[received:])
+            if not count:
+                raise ConnectionError('Connection closed by Panda server')
+            received += count
+
+    def read_string(self) -> str:
+        """读取 string（int 长度 + UTF-8），直接从缓冲区解码"""
+        length = self.unpack(INT)[0]
+        if length <= 0:
+            return ''
+        self._fill(length)
+        value = str(self._view[self._pos:self._pos + length], 'utf-8')
+        self._pos += length
+        return value
+
+
+class Incomplete(Exception):
+    """BufferReader 数据不足，needed 为从缓冲区开头算起所需的总字节数"""
+
+    def __init__(self, needed: int):
+        super().__init__(needed)
+        self.needed = needed
+
+
+class BufferReader:
+    """
+    在内存缓冲区上解码（用于 asyncio 等非阻塞场景）
+    数据不足时抛出 Incomplete，调用方在收到更多数据后从消息开头重新解码
+    """
+
+    __slots__ = ('_buf', '_end', 'pos')
+
+    def __init__(self, buf, pos: int = 0):
+        self._buf = buf
+        self._end = len(buf)
+        self.pos = pos
+
+    def unpack(self, codec: struct.Struct) -> tuple:
+        end = self.pos + codec.size
+        if end > self._end:
+            raise Incomplete(end)
+        values = codec.unpack_from(self._buf, self.pos)
+        self.pos = end
+        return values
+
+    def read_array(self, type_code: str, count: int) -> tuple:
+        if count <= 0:
+            return ()
+        return self.unpack(array_codec(type_code, count))
+
+    def read_bytes(self, size: int) -> bytes:
+        if size <= 0:
+            return b''
+        end = self.pos + size
+        if end > self._end:
+            raise Incomplete(end)
+        data = bytes(self._buf[self.pos:end])
+        self.pos = end
+        return data
+
+    def read_string(self) -> str:
+        length = self.unpack(INT)[0]
+        if length <= 0:
+            return ''
+        return self.read_bytes(length).decode('utf-8')
+
+
+# ========== 响应解码 ==========
+
+def read_int(reader) -> int:
+    return reader.unpack(INT)[0]
+
+
+def read_long(reader) -> int:
+    return reader.unpack(LONG)[0]
+
+
+def read_float(reader) -> float:
+    return reader.unpack(FLOAT)[0]
+
+
+def read_bool(reader) -> bool:
+    return reader.unpack(INT)[0] != 0
+
+
+def read_status(reader) -> int:
+    """读取 writeSuccess / writeError：0 表示成功，负数后跟错误信息"""
+    code = reader.unpack(INT)[0]
+    if code < 0:
+        raise PandaError(code, reader.read_string())
+    return code
+
+
+def _read_head_or_error(reader) -> int:
+    """
+    读取响应的首个 int（数量 / 长度 / 状态）
+    服务端在失败时用 writeError 写入 -1 + 错误信息，两者共用同一位置
+    """
+    value = reader.unpack(INT)[0]
+    if value == -1:
+        raise PandaError(value, reader.read_string())
+    return value
+
+
+def _read_blob(reader) -> Optional[bytes]:
+    """读取 int 大小 + 数据，大小为 0 表示无数据"""
+    size = reader.unpack(INT)[0]
+    if size <= 0:
+        return None
+    return reader.read_bytes(size)
+
+
+def _read_string_list(reader) -> List[str]:
+    count = reader.unpack(INT)[0]
+    return [reader.read_string() for _ in range(count)]
+
+
+# 性能监控 (200-209)
+
+def read_cpu_core_usage(reader) -> Tuple[float, ...]:
+    count = reader.unpack(INT)[0]
+    return reader.read_array('f', count)
+
+
+def read_cpu_freq(reader) -> Tuple[int, ...]:
+    count = reader.unpack(INT)[0]
+    return reader.read_array('i', count)
+
+
+def read_cpu_topology_usage(reader) -> CpuTopologyUsage:
+    cores = []
+    for _ in range(reader.unpack(INT)[0]):
+        usage, online, cluster, freq = reader.unpack(CPU_CORE)
+        cores.append(CoreUsage(usage, online != 0, cluster, freq))
+    clusters = [ClusterUsage(*reader.unpack(CPU_CLUSTER)) for _ in range(reader.unpack(INT)[0])]
+    return CpuTopologyUsage(cores, clusters)
+
+
+def read_thread_cpu_table(reader) -> ThreadCpuTable:
+    total = _read_head_or_error(reader)
+    interval, count = reader.unpack(THREAD_TABLE_HEAD)
+    threads = []
+    for _ in range(count):
+        tid = reader.unpack(INT)[0]
+        name = reader.read_string()
+        state, usage, last_cpu = reader.unpack(THREAD_ROW_TAIL)
+        threads.append(ThreadCpu(tid, name, chr(state), usage, last_cpu))
+    return ThreadCpuTable(total, interval, threads)
+
+
+def read_frame_stats(reader) -> FrameStats:
+    return FrameStats(*reader.unpack(FRAME_STATS), reader.read_string())
+
+
+def read_gpu_usage(reader) -> GpuUsage:
+    return GpuUsage(*reader.unpack(GPU))
+
+
+def read_memory_usage(reader) -> MemoryUsage:
+    return MemoryUsage(*reader.unpack(MEMORY))
+
+
+# 电池 (220-222)
+
+def read_battery_info(reader) -> BatteryInfo:
+    current, voltage, level, charging, timestamp = reader.unpack(BATTERY)
+    return BatteryInfo(current, voltage, level, charging != 0, timestamp)
+
+
+# 网络流量 (230-233)
+
+def read_network_usage(reader) -> NetworkUsage:
+    return NetworkUsage(*reader.unpack(NETWORK))
+
+
+def read_network_total(reader) -> TotalNetworkUsage:
+    return TotalNetworkUsage(*reader.unpack(NETWORK_TOTAL))
+
+
+def read_network_by_package(reader) -> PackageNetworkUsage:
+    return PackageNetworkUsage(*reader.unpack(NETWORK_PACKAGE))
+
+
+def read_network_bulk(reader) -> NetworkSnapshot:
+    count = _read_head_or_error(reader)
+    timestamp, interval = reader.unpack(NETWORK_BULK_HEAD)
+    rows = reader.read_bytes(count * NETWORK_UID_ROW.size)
+    return NetworkSnapshot(timestamp, interval, [UidNetworkUsage._make(row) for row in NETWORK_UID_ROW.iter_unpack(rows)])
+
+
+# 指标订阅与批量查询 (210-212)
+
+# 可订阅的指标及其解码函数，推送帧中每个指标的格式与对应命令的响应相同
+METRIC_DECODERS = {
+    Command.CPU_USAGE: read_float,
+    Command.CPU_CORE_USAGE: read_cpu_core_usage,
+    Command.CPU_FREQ: read_cpu_freq,
+    Command.GPU_USAGE: read_gpu_usage,
+    Command.FPS: read_int,
+    Command.MEMORY_USAGE: read_memory_usage,
+    Command.CPU_TEMPERATURE: read_float,
+    Command.CPU_TOPOLOGY_USAGE: read_cpu_topology_usage,
+    Command.BATTERY_INFO: read_battery_info,
+    Command.BATTERY_LEVEL: read_int,
+    Command.NETWORK_USAGE: read_network_usage,
+    Command.NETWORK_TOTAL: read_network_total,
+}
+
+
+# 批量查询（212）额外支持线程 CPU 使用率和帧统计
+BATCH_DECODERS = dict(METRIC_DECODERS)
+BATCH_DECODERS[Command.THREAD_CPU_USAGE] = read_float
+BATCH_DECODERS[Command.FRAME_STATS] = read_frame_stats
+
+
+def read_metric_frame(reader, metrics: Tuple[int, ...]) -> Optional[MetricSnapshot]:
+    """
+    读取一帧推送，长度为 0 的结束帧（命令 211 的响应）返回 None
+    服务端采样出错时在长度位置写入错误并结束推送，此时抛出 PandaError（之后仍需发送 211 读取结束帧）
+    """
+    length = _read_head_or_error(reader)
+    if length == 0:
+        return None
+    timestamp, sequence = reader.unpack(SNAPSHOT_HEAD)
+    return MetricSnapshot(timestamp, sequence, {m: METRIC_DECODERS[m](reader) for m in metrics})
+
+
+def read_metrics_batch(reader, metrics: Tuple[int, ...]) -> list:
+    """命令 212 的响应：数据长度 + 各指标数据，按请求顺序返回"""
+    _read_head_or_error(reader)
+    return [BATCH_DECODERS[m](reader) for m in metrics]
+
+
+# 应用列表 (10)
+
+# 命令 15 中图标与客户端缓存相同时，图标大小字段写入此值
+ICON_UNCHANGED = -2
+
+
+def _read_app_info(reader) -> Tuple[AppInfo, int]:
+    """读取单个应用记录，返回 (AppInfo, 图标大小字段)"""
+    package = reader.read_string()
+    version_name = reader.read_string()
+    version_code = reader.unpack(LONG)[0]
+    label = reader.read_string()
+    first_install, last_update, last_used = reader.unpack(APP_TIMES)
+    installer = reader.read_string()
+    abi = reader.read_string()
+    target_sdk, min_sdk, flags, has_splits, can_launch = reader.unpack(APP_SDK)
+    apk_size, data_size, cache_size = reader.unpack(APP_SIZES)
+    icon_size = reader.unpack(INT)[0]
+    icon = reader.read_bytes(icon_size) if icon_size > 0 else None
+    return AppInfo(
+        package, version_name, version_code, label,
+        first_install, last_update, last_used,
+        installer, abi, target_sdk, min_sdk, flags,
+        has_splits != 0, can_launch != 0,
+        apk_size, data_size, cache_size, icon,
+    ), icon_size
+
+
+def read_app_list(reader) -> AppList:
+    default_size = _read_head_or_error(reader)
+    default_icon = reader.read_bytes(default_size) if default_size > 0 else None
+    count = reader.unpack(INT)[0]
+    return AppList(default_icon, [_read_app_info(reader)[0] for _ in range(count)])
+
+
+def read_app_list_delta(reader) -> AppListDelta:
+    default_size = _read_head_or_error(reader)
+    default_icon = reader.read_bytes(default_size) if default_size > 0 else None
+    count = reader.unpack(INT)[0]
+    apps = []
+    unchanged = set()
+    for _ in range(count):
+        app, icon_size = _read_app_info(reader)
+        if icon_size == ICON_UNCHANGED:
+            unchanged.add(app.package)
+        apps.append(app)
+    removed = _read_string_list(reader)
+    return AppListDelta(default_icon, apps, removed, frozenset(unchanged))
+
+
+# WiFi (50-58)
+
+def read_wifi_state(reader) -> int:
+    return _read_head_or_error(reader)
+
+
+def read_wifi_scan(reader) -> List[WifiScanResult]:
+    count = reader.unpack(INT)[0]
+    results = []
+    for _ in range(count):
+        ssid = reader.read_string()
+        bssid = reader.read_string()
+        results.append(WifiScanResult(ssid, bssid, *reader.unpack(WIFI_SCAN_TAIL)))
+    return results
+
+
+def read_wifi_info(reader) -> WifiInfo:
+    length = _read_head_or_error(reader)
+    ssid = reader.read_bytes(length).decode('utf-8') if length > 0 else ''
+    bssid = reader.read_string()
+    return WifiInfo(ssid, bssid, *reader.unpack(WIFI_INFO_TAIL))
+
+
+def read_configured_networks(reader) -> List[WifiNetwork]:
+    count = reader.unpack(INT)[0]
+    networks = []
+    for _ in range(count):
+        network_id = reader.unpack(INT)[0]
+        networks.append(WifiNetwork(network_id, reader.read_string()))
+    return networks
+
+
+# 剪贴板 (70-73)
+
+def read_clipboard(reader) -> Optional[Clipboard]:
+    status = reader.unpack(INT)[0]
+    if status == -1:
+        return None  # 剪贴板为空
+    if status != 0:
+        raise PandaError(status, reader.read_string())
+    mime_type = reader.read_string()
+    return Clipboard(mime_type, reader.read_bytes(reader.unpack(INT)[0]))
+
+
+def read_clipboard_change(reader) -> Clipboard:
+    """命令 72 推送的单条剪贴板变化（无状态码）"""
+    mime_type = reader.read_string()
+    return Clipboard(mime_type, reader.read_bytes(reader.unpack(INT)[0]))
+
+
+# 通知 (80-83)
+
+def read_notifications(reader) -> List[Notification]:
+    count = reader.unpack(INT)[0]
+    notifications = []
+    for _ in range(count):
+        key = reader.read_string()
+        package = reader.read_string()
+        title = reader.read_string()
+        text = reader.read_string()
+        post_time, clearable, action_count = reader.unpack(NOTIFICATION_TAIL)
+        actions = []
+        for _ in range(action_count):
+            action_title = reader.read_string()
+            actions.append(NotificationAction(action_title, reader.unpack(INT)[0] != 0))
+        notifications.append(Notification(
+            key, package, title, text, post_time, clearable != 0, actions
+        ))
+    return notifications
+
+
+# 自动点击 / 截图 (110-120)
+
+def read_string_list(reader) -> List[str]:
+    return _read_string_list(reader)
+
+
+def read_monitor_status(reader) -> MonitorStatus:
+    running, count = reader.unpack(MONITOR_HEAD)
+    return MonitorStatus(running != 0, [reader.read_string() for _ in range(count)])
+
+
+def read_screenshot(reader) -> bytes:
+    """命令 120: int 大小 + PNG 数据；大小为 0 时后跟错误信息"""
+    size = reader.unpack(INT)[0]
+    if size <= 0:
+        raise PandaError(size, reader.read_string())
+    return reader.read_bytes(size)
+
+
+def read_screenshot_ex(reader) -> Screenshot:
+    """
+    命令 121: 状态, 宽, 高, 格式, 截图耗时(μs), int 大小 + 数据, 编码耗时(μs)
+    截图失败时状态为 -1 + 错误信息；编码失败时大小位置为 -1 + 错误信息
+    """
+    read_status(reader)
+    width, height, fmt, capture_us = reader.unpack(SCREENSHOT_HEAD)
+    size = _read_head_or_error(reader)
+    data = reader.read_bytes(size)
+    encode_us = reader.unpack(INT)[0]
+    return Screenshot(width, height, ImageFormat(fmt), data, capture_us, encode_us)
+
+
+def read_screen_frame(reader, sink: Optional[Callable[['ScreenFrame', int], Any]] = None) -> Optional[ScreenFrame]:
+    """
+    读取命令 122 的一帧推送，长度为 0 的结束帧（命令 123 的响应）返回 None
+    sink(frame, size) 返回可写缓冲区时，数据直接读入该缓冲区（frame.data 为该缓冲区），
+    返回 None 时按 bytes 读取；缓冲区大小必须恰好为 size 字节，否则读完本帧后抛出 ValueError
+    """
+    length = reader.unpack(INT)[0]
+    if length == 0:
+        return None
+    timestamp, sequence, unchanged, late, width, height, fmt, capture_us, size = reader.unpack(SCREEN_FRAME_HEAD)
+    frame = ScreenFrame(timestamp, sequence, unchanged, late, width, height, ImageFormat(fmt), b'', capture_us, 0)
+    target = sink(frame, size) if sink is not None else None
+    if target is None:
+        data = reader.read_bytes(size)
+    else:
+        view = memoryview(target).cast('B')
+        if len(view) != size:
+            # 先读完本帧，连接保持同步
+            reader.read_bytes(size)
+            reader.unpack(INT)
+            raise ValueError(f'sink buffer is {len(view)} bytes, frame data is {size} bytes')
+        reader.read_into(view)
+        data = target
+    encode_us = reader.unpack(INT)[0]
+    return frame._replace(data=data, encode_us=encode_us)
@@ -0,0 +1,334 @@
+"""
+会话录制文件（依赖 NumPy）
+
+长时间、多设备的性能会话以紧凑的二进制格式追加写入，读取时用 numpy.memmap
+按时间范围随机访问，无需把整个文件读入内存：
+
+    from panda.recording import SessionWriter, SessionReader, standard_columns
+
+    with SessionWriter.create('run.pnr', standard_columns(cores=8), {'device': serial}) as rec:
+        while running:
+            rec.capture(client, pid=pid)
+
+    rec = SessionReader('run.pnr')
+    window = rec.slice(t0, t0 + 30)            # 结构化数组视图（memmap），毫秒级
+    print(window['cpu'].mean(), window['fps'].min())
+
+文件布局（小端序）：
+
+    头部   4096 字节  magic 'PANDAREC' + 版本 + JSON（列定义、元数据、索引步长），补零对齐到页
+    数据   N 条定长记录，列按 JSON 中的顺序排列，首列 't' 为 float64 时间戳（秒）
+    尾部   稀疏时间索引（每 index_stride 条记录一个时间戳，float64）+ 48 字节 trailer
+
+trailer 只在正常关闭时写入。进程崩溃后没有 trailer，读取时按文件大小推算记录数
+（丢弃末尾不完整的记录）并从数据重建稀疏索引；以追加方式重新打开时会截掉旧的尾部。
+时间戳须单调不减，时间范围查询依赖此顺序。
+"""
+
+import json
+import os
+import struct
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b'PANDAREC'
+FOOTER_MAGIC = b'PANDAEND'
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+DEFAULT_INDEX_STRIDE = 4096
+
+_PREAMBLE = struct.Struct('<8sII')              # magic, version, json 长度
+_TRAILER = struct.Struct('<8sqqqdd')            # magic, 记录数, 索引步长, 索引数, 首/末时间戳
+
+
+def standard_columns(cores: int) -> List[Tuple[str, str, tuple]]:
+    """SessionWriter.capture 写入的列，cores 为 CPU 核心数"""
+    return [
+        ('cpu', '<f4', ()),
+        ('cpu_cores', '<f4', (cores,)),
+        ('cpu_freq', '<i4', (cores,)),
+        ('gpu_usage', '<f4', ()),
+        ('gpu_freq', '<i4', ()),
+        ('fps', '<i4', ()),
+        ('temperature', '<f4', ()),
+        ('battery_current', '<i4', ()),
+        ('battery_voltage', '<i4', ()),
+        ('battery_level', '<i4', ()),
+        ('pss', '<i8', ()),
+        ('private_dirty', '<i8', ()),
+        ('shared_dirty', '<i8', ()),
+        ('net_rx', '<i8', ()),
+        ('net_tx', '<i8', ()),
+    ]
+
+
+def _record_dtype(columns: Sequence[Tuple[str, str, tuple]]) -> np.dtype:
+    fields = [('t', '<f8')]
+    for name, dtype, shape in columns:
+        if name == 't':
+            raise ValueError("column name 't' is reserved for timestamps")
+        fields.append((name, dtype, tuple(shape)) if shape else (name, dtype))
+    return np.dtype(fields)
+
+
+def _read_header(f) -> dict:
+    head = f.read(HEADER_SIZE)
+    if len(head) < _PREAMBLE.size:
+        raise ValueError('Not a Panda recording (file too short)')
+    magic, version, length = _PREAMBLE.unpack_from(head)
+    if magic != MAGIC:
+        raise ValueError('Not a Panda recording (bad magic)')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported recording version {version}')
+    return json.loads(head[_PREAMBLE.size:_PREAMBLE.size + length].decode('utf-8'))
+
+
+def _scan(path: str, header: dict, dtype: np.dtype) -> Tuple[int, Optional[np.ndarray], int]:
+    """返回 (记录数, 稀疏索引或 None, 有效数据末尾偏移)；trailer 无效时按文件大小恢复"""
+    size = os.path.getsize(path)
+    stride = header['index_stride']
+    if size >= HEADER_SIZE + _TRAILER.size:
+        with open(path, 'rb') as f:
+            f.seek(size - _TRAILER.size)
+            magic, count, trailer_stride, index_count, _, _ = _TRAILER.unpack(f.read(_TRAILER.size))
+            data_end = HEADER_SIZE + count * dtype.itemsize
+            if (magic == FOOTER_MAGIC and trailer_stride == stride
+                    and data_end + index_count * 8 + _TRAILER.size == size):
+                f.seek(data_end)
+                index = np.frombuffer(f.read(index_count * 8), dtype='<f8')
+                return count, index, data_end
+    count = max(0, size - HEADER_SIZE) // dtype.itemsize
+    return count, None, HEADER_SIZE + count * dtype.itemsize
+
+
+class SessionWriter:
+    """
+    追加写入器
+    记录先写入预分配的批量缓冲区，满 batch 条或 flush() 时一次写入文件
+    """
+
+    def __init__(self, path: str, header: dict, mode: str, batch: int = 256):
+        self.path = path
+        self.header = header
+        self.dtype = _record_dtype(header['columns'])
+        self.index_stride = header['index_stride']
+        self._file = open(path, mode)
+        self._batch = np.zeros(batch, dtype=self.dtype)
+        self._empty = np.zeros((), dtype=self.dtype)
+        self._pending = 0
+        self.count = 0
+        self._index: List[float] = []
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+
+    @classmethod
+    def create(cls, path: str, columns: Sequence[Tuple[str, str, tuple]],
+               metadata: Optional[dict] = None, index_stride: int = DEFAULT_INDEX_STRIDE,
+               batch: int = 256) -> 'SessionWriter':
+        """创建新的录制文件（已存在时覆盖）"""
+        header = {
+            'columns': [[name, np.dtype(dtype).str, list(shape)] for name, dtype, shape in columns],
+            'metadata': metadata or {},
+            'created': time.time(),
+            'index_stride': index_stride,
+        }
+        payload = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        if _PREAMBLE.size + len(payload) > HEADER_SIZE:
+            raise ValueError('Recording header too large')
+        writer = cls(path, header, 'wb', batch)
+        head = bytearray(HEADER_SIZE)
+        _PREAMBLE.pack_into(head, 0, MAGIC, FORMAT_VERSION, len(payload))
+        head[_PREAMBLE.size:_PREAMBLE.size + len(payload)] = payload
+        writer._file.write(head)
+        writer._file.flush()
+        return writer
+
+    @classmethod
+    def append_to(cls, path: str, batch: int = 256) -> 'SessionWriter':
+        """打开已有文件继续追加（包括崩溃后未写 trailer 的文件）"""
+        with open(path, 'rb') as f:
+            header = _read_header(f)
+        dtype = _record_dtype(header['columns'])
+        count, _, data_end = _scan(path, header, dtype)
+        writer = cls(path, header, 'r+b', batch)
+        writer._file.truncate(data_end)
+        writer._file.seek(data_end)
+        writer.count = count
+        if count:
+            records = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+            writer._index = records['t'][::writer.index_stride].tolist()
+            writer._first = float(records['t'][0])
+            writer._last = float(records['t'][-1])
+            del records
+        return writer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, timestamp: float, **values):
+        """追加一条记录，未给出的列为 0"""
+        self._batch[self._pending] = self._empty
+        row = self._batch[self._pending]
+        row['t'] = timestamp
+        for name, value in values.items():
+            row[name] = value
+        self._commit_row(timestamp)
+
+    def append_many(self, records: np.ndarray):
+        """批量追加结构化数组（dtype 须与文件一致）"""
+        if records.dtype != self.dtype:
+            records = records.astype(self.dtype)
+        self.flush()
+        times = records['t']
+        start = self.count
+        self._file.write(records.tobytes())
+        self.count += len(records)
+        # 补齐落在本批中的稀疏索引
+        first_index = -start % self.index_stride
+        self._index.extend(times[first_index::self.index_stride].tolist())
+        if len(records):
+            if self._first is None:
+                self._first = float(times[0])
+            self._last = float(times[-1])
+
+    def _commit_row(self, timestamp: float):
+        if self.count % self.index_stride == 0:
+            self._index.append(timestamp)
+        if self._first is None:
+            self._first = timestamp
+        self._last = timestamp
+        self.count += 1
+        self._pending += 1
+        if self._pending == len(self._batch):
+            self.flush()
+
+    def flush(self, sync: bool = False):
+        """把缓冲的记录写入文件；sync=True 时同时 fsync"""
+        if self._pending:
+            self._file.write(self._batch[:self._pending].data)
+            self._pending = 0
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """写入稀疏索引和 trailer 后关闭"""
+        if self._file.closed:
+            return
+        self.flush()
+        index = np.asarray(self._index, dtype='<f8')
+        self._file.write(index.tobytes())
+        self._file.write(_TRAILER.pack(
+            FOOTER_MAGIC, self.count, self.index_stride, len(index),
+            self._first or 0.0, self._last or 0.0,
+        ))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def capture(self, client, pid: int = 0, uid: int = -1, timestamp: Optional[float] = None):
+        """一次流水线采集 standard_columns 中的指标并追加一条记录"""
+        pipe = client.pipeline()
+        pipe.cpu_usage().cpu_core_usage().cpu_freq().gpu_usage().fps().cpu_temperature().battery_info()
+        if pid:
+            pipe.memory_usage(pid)
+        if uid >= 0:
+            pipe.network_usage(uid)
+        results = pipe.execute()
+        cpu, cores, freqs, gpu, fps, temperature, battery = results[:7]
+        now = time.time() if timestamp is None else timestamp
+        self._batch[self._pending] = self._empty
+        row = self._batch[self._pending]
+        row['t'] = now
+        row['cpu'] = cpu
+        width = min(len(cores), row['cpu_cores'].shape[0])
+        row['cpu_cores'][:width] = cores[:width]
+        width = min(len(freqs), row['cpu_freq'].shape[0])
+        row['cpu_freq'][:width] = freqs[:width]
+        row['gpu_usage'], row['gpu_freq'] = gpu
+        row['fps'] = fps
+        row['temperature'] = temperature
+        row['battery_current'] = battery.current_ma
+        row['battery_voltage'] = battery.voltage_mv
+        row['battery_level'] = battery.level
+        rest = results[7:]
+        if pid:
+            row['pss'], row['private_dirty'], row['shared_dirty'] = rest.pop(0)
+        if uid >= 0:
+            network = rest.pop(0)
+            row['net_rx'] = network.total_rx
+            row['net_tx'] = network.total_tx
+        self._commit_row(now)
+
+
+class SessionReader:
+    """
+    只读访问录制文件
+    records 是整个文件数据区的 numpy.memmap，按需分页读取
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.header = _read_header(f)
+        self.dtype = _record_dtype(self.header['columns'])
+        self.index_stride = self.header['index_stride']
+        count, index, _ = _scan(path, self.header, self.dtype)
+        # 崩溃恢复：trailer 缺失
+        self.recovered = index is None
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def metadata(self) -> dict:
+        return self.header['metadata']
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.dtype.names)
+
+    @property
+    def index(self) -> np.ndarray:
+        """稀疏时间索引；恢复的文件在首次使用时从数据重建"""
+        if self._index is None:
+            self._index = np.ascontiguousarray(self.records['t'][::self.index_stride])
+        return self._index
+
+    @property
+    def time_range(self) -> Tuple[float, float]:
+        if not len(self.records):
+            return (0.0, 0.0)
+        return float(self.records['t'][0]), float(self.records['t'][-1])
+
+    def _locate(self, timestamp: float) -> int:
+        """第一条 t >= timestamp 的记录位置：先查稀疏索引，再在一个索引块内二分"""
+        block = int(np.searchsorted(self.index, timestamp, side='left'))
+        lo = max(0, (block - 1) * self.index_stride)
+        hi = min(len(self.records), block * self.index_stride + 1)
+        times = self.records['t'][lo:hi]
+        return lo + int(np.searchsorted(times, timestamp, side='left'))
+
+    def slice(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """时间范围 [start, end) 内的记录（memmap 视图，不拷贝）"""
+        lo = 0 if start is None else self._locate(start)
+        hi = len(self.records) if end is None else self._locate(end)
+        return self.records[lo:hi]
+
+    def column(self, name: str, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        return self.slice(start, end)[name]
+
+    def iter_chunks(self, size: int = 65536) -> Iterable[np.ndarray]:
+        """按块遍历全部记录，用于流式汇总超大文件"""
+        for offset in range(0, len(self.records), size):
+            yield self.records[offset:offset + size]
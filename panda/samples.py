@@ -0,0 +1,270 @@
+"""
+定长采样存储（依赖 NumPy）
+
+每个指标一个预分配的环形缓冲区，长时间浸泡测试中内存保持恒定，
+统计查询直接在 NumPy 数组上向量化计算：
+
+    from panda.samples import SampleStore
+
+    store = SampleStore(capacity=36000)            # 10Hz 下保留最近 1 小时
+    while running:
+        store.capture(client, pid=pid)             # 一次流水线采集全部指标
+    print(store.summary())
+    print(store['cpu'].rolling_mean(50)[-1], store['fps'].percentile(1))
+
+缓冲区采用双写布局（容量 2N，每个样本同时写入 i 和 i+N），
+任意时刻最近 N 个样本在内存中都是连续的，读取按时间排序的数据无需拷贝。
+"""
+
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# PerfDog 卡顿判定：帧耗时 > 前三帧平均的 2 倍，且大于两帧电影帧耗时（1000/24*2 ms）
+JANK_THRESHOLD_MS = 1000.0 / 24 * 2
+BIG_JANK_THRESHOLD_MS = 1000.0 / 24 * 3
+
+
+class RingBuffer:
+    """
+    带时间戳的定长环形缓冲区
+    width=1 时每个样本是标量，否则是长度为 width 的向量（如每核使用率）
+    """
+
+    def __init__(self, capacity: int, width: int = 1, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+        self.capacity = capacity
+        self.width = width
+        shape = (2 * capacity,) if width == 1 else (2 * capacity, width)
+        self._times = np.zeros(2 * capacity, dtype=np.float64)
+        self._values = np.zeros(shape, dtype=dtype)
+        self._pos = 0
+        self._size = 0
+        self.total = 0  # 累计写入的样本数（含已被覆盖的）
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def full(self) -> bool:
+        return self._size == self.capacity
+
+    def clear(self):
+        self._pos = self._size = self.total = 0
+
+    def append(self, timestamp: float, value):
+        pos = self._pos
+        cap = self.capacity
+        self._times[pos] = self._times[pos + cap] = timestamp
+        self._values[pos] = self._values[pos + cap] = value
+        self._pos = pos + 1 if pos + 1 < cap else 0
+        if self._size < cap:
+            self._size += 1
+        self.total += 1
+
+    def extend(self, timestamps: Sequence[float], values):
+        """批量写入，超出容量时只保留最后 capacity 个"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=self._values.dtype)
+        count = len(timestamps)
+        if count == 0:
+            return
+        if len(values) != count:
+            raise ValueError('timestamps and values differ in length')
+        cap = self.capacity
+        self.total += count
+        if count > cap:
+            timestamps, values = timestamps[-cap:], values[-cap:]
+            count = cap
+        indices = (self._pos + np.arange(count)) % cap
+        self._times[indices] = timestamps
+        self._times[indices + cap] = timestamps
+        self._values[indices] = values
+        self._values[indices + cap] = values
+        self._pos = int((self._pos + count) % cap)
+        self._size = min(self._size + count, cap)
+
+    # ========== 读取（返回只读视图，无拷贝） ==========
+
+    def _window(self, count: int) -> slice:
+        end = self._pos + self.capacity
+        return slice(end - count, end)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        view = self._times[self._window(self._size)]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def values(self) -> np.ndarray:
+        view = self._values[self._window(self._size)]
+        view.flags.writeable = False
+        return view
+
+    def last(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """最近 count 个样本 (timestamps, values)"""
+        window = self._window(min(count, self._size))
+        return self._times[window], self._values[window]
+
+    def since(self, start: float, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """时间范围 [start, end) 内的样本，时间戳单调递增时二分查找"""
+        times = self.timestamps
+        lo = int(np.searchsorted(times, start, side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side='left'))
+        return times[lo:hi], self.values[lo:hi]
+
+    def latest(self):
+        if not self._size:
+            return None
+        return self._values[self._pos + self.capacity - 1]
+
+    # ========== 向量化统计 ==========
+
+    def mean(self):
+        return self.values.mean(axis=0) if self._size else np.nan
+
+    def min(self):
+        return self.values.min(axis=0) if self._size else np.nan
+
+    def max(self):
+        return self.values.max(axis=0) if self._size else np.nan
+
+    def percentile(self, q):
+        """q 为 0-100 的标量或序列，按样本轴计算"""
+        if not self._size:
+            return np.nan
+        return np.percentile(self.values, q, axis=0)
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """长度为 window 的滑动平均（基于累加和，O(n)）"""
+        values = self.values
+        if window <= 0 or len(values) < window:
+            return values[:0].astype(np.float64)
+        cumsum = np.cumsum(values, axis=0, dtype=np.float64)
+        result = cumsum[window - 1:].copy()
+        result[1:] -= cumsum[:-window]
+        return result / window
+
+    def deltas(self) -> np.ndarray:
+        """相邻样本差值（如累计字节数 -> 每次采样的增量）"""
+        return np.diff(self.values, axis=0)
+
+    def rates(self) -> np.ndarray:
+        """每秒变化率：相邻差值除以时间间隔（如累计流量 -> 字节/秒）"""
+        if self._size < 2:
+            return self.deltas().astype(np.float64)
+        dt = np.diff(self.timestamps)
+        dt[dt <= 0] = np.nan
+        if self.width == 1:
+            return self.deltas() / dt
+        return self.deltas() / dt[:, None]
+
+    def count_below(self, threshold) -> int:
+        """低于阈值的样本数（如 FPS 跌落计数）"""
+        return int(np.count_nonzero(self.values < threshold))
+
+    def jank_count(self, threshold_ms: float = JANK_THRESHOLD_MS) -> int:
+        """
+        卡顿计数，缓冲区中的值为帧耗时（毫秒）
+        帧耗时大于前三帧平均值的 2 倍且大于 threshold_ms 记为一次卡顿
+        """
+        frame_times = self.values
+        if len(frame_times) < 4:
+            return 0
+        previous = (frame_times[:-3] + frame_times[1:-2] + frame_times[2:-1]) / 3.0
+        current = frame_times[3:]
+        return int(np.count_nonzero((current > previous * 2) & (current > threshold_ms)))
+
+    def summary(self) -> Dict[str, object]:
+        """count/mean/min/max/p50/p90/p99，向量指标按列计算"""
+        if not self._size:
+            return {'count': 0}
+        p50, p90, p99 = np.percentile(self.values, (50, 90, 99), axis=0)
+        return {
+            'count': self._size,
+            'mean': self.mean(),
+            'min': self.min(),
+            'max': self.max(),
+            'p50': p50,
+            'p90': p90,
+            'p99': p99,
+        }
+
+
+class SampleStore:
+    """
+    按指标名称管理 RingBuffer
+    缓冲区在指标首次写入时按样本宽度创建（如每核指标的宽度为核心数），之后宽度固定
+    """
+
+    # capture() 写入的指标
+    METRICS = ('cpu', 'cpu_cores', 'cpu_freq', 'gpu', 'fps', 'temperature',
+               'memory', 'battery', 'network')
+
+    def __init__(self, capacity: int = 36000):
+        self.capacity = capacity
+        self._buffers: Dict[str, RingBuffer] = {}
+
+    def __getitem__(self, metric: str) -> RingBuffer:
+        return self._buffers[metric]
+
+    def __contains__(self, metric: str) -> bool:
+        return metric in self._buffers
+
+    def __iter__(self):
+        return iter(self._buffers)
+
+    def buffer(self, metric: str, width: int = 1, dtype=np.float64) -> RingBuffer:
+        """获取指标缓冲区，不存在时创建"""
+        buffer = self._buffers.get(metric)
+        if buffer is None:
+            buffer = self._buffers[metric] = RingBuffer(self.capacity, width, dtype)
+        return buffer
+
+    def add(self, metric: str, timestamp: float, value):
+        if np.ndim(value) == 0:
+            width = 1
+        else:
+            width = len(value)
+        buffer = self.buffer(metric, width)
+        if buffer.width != width:
+            raise ValueError(f'{metric}: sample width {width} != {buffer.width}')
+        buffer.append(timestamp, value)
+
+    def capture(self, client, pid: int = 0, uid: int = -1, timestamp: Optional[float] = None):
+        """
+        用一次流水线往返采集常用指标并写入：
+        cpu, cpu_cores, cpu_freq, gpu(usage, freq), fps, temperature, battery(current, voltage, level)，
+        指定 pid 时写入 memory(pss, private_dirty, shared_dirty)，
+        指定 uid 时写入 network(rx, tx 累计字节数，用 rates() 得到速率)
+        """
+        pipe = client.pipeline()
+        pipe.cpu_usage().cpu_core_usage().cpu_freq().gpu_usage().fps().cpu_temperature().battery_info()
+        if pid:
+            pipe.memory_usage(pid)
+        if uid >= 0:
+            pipe.network_usage(uid)
+        results = pipe.execute()
+        now = time.time() if timestamp is None else timestamp
+        cpu, cores, freqs, gpu, fps, temperature, battery = results[:7]
+        self.add('cpu', now, cpu)
+        if cores:
+            self.add('cpu_cores', now, cores)
+        if freqs:
+            self.add('cpu_freq', now, freqs)
+        self.add('gpu', now, gpu)
+        self.add('fps', now, fps)
+        self.add('temperature', now, temperature)
+        self.add('battery', now, (battery.current_ma, battery.voltage_mv, battery.level))
+        rest = results[7:]
+        if pid:
+            self.add('memory', now, rest.pop(0))
+        if uid >= 0:
+            network = rest.pop(0)
+            self.add('network', now, (network.total_rx, network.total_tx))
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        return {metric: buffer.summary() for metric, buffer in self._buffers.items()}
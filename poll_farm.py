@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+设备群轮询工具
+
+每台设备通过 adb forward 映射到本机一个端口，例如：
+    adb -s <serial1> forward tcp:9001 localabstract:panda-1.1.0
+    adb -s <serial2> forward tcp:9002 localabstract:panda-1.1.0
+
+然后在单个事件循环中以固定频率轮询所有设备：
+    python3 poll_farm.py --ports 9001-9100 --hz 10 --seconds 30
+"""
+
+import argparse
+import asyncio
+import time
+
+from panda import DeviceFarm
+
+
+def parse_ports(text):
+    ports = []
+    for part in text.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ports.extend(range(int(start), int(end) + 1))
+        elif part:
+            ports.append(int(part))
+    return ports
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Poll many Panda devices concurrently")
+    parser.add_argument("--host", default="localhost", help="TCP host (default: localhost)")
+    parser.add_argument("--ports", default="9999",
+                        help="forwarded ports, e.g. 9001-9100 or 9001,9003 (default: 9999)")
+    parser.add_argument("--hz", type=float, default=10.0, help="samples per second per device (default: 10)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration in seconds (default: 10)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-request timeout (default: 1.0)")
+    parser.add_argument("--verbose", action="store_true", help="print every sample")
+    return parser.parse_args()
+
+
+async def sample(client):
+    """一次采样：CPU 使用率 + FPS，流水线合并为一次往返"""
+    pipe = client.pipeline()
+    pipe.cpu_usage().fps()
+    return await pipe.execute()
+
+
+async def run(args):
+    ports = parse_ports(args.ports)
+    farm = DeviceFarm.from_ports(ports, args.host, timeout=args.timeout)
+
+    def on_sample(name, timestamp, value):
+        if args.verbose:
+            cpu, fps = value
+            print(f"{timestamp:.3f} {name:<20} cpu={cpu:6.2f}% fps={fps}")
+
+    def on_error(name, error):
+        print(f"[{name}] {type(error).__name__}: {error}")
+
+    print(f"Polling {len(ports)} device(s) at {args.hz:g} Hz for {args.seconds:g}s ...")
+    start = time.perf_counter()
+    try:
+        stats = await farm.poll(sample, interval=1.0 / args.hz, duration=args.seconds,
+                                on_sample=on_sample, on_error=on_error)
+    finally:
+        await farm.close()
+    elapsed = time.perf_counter() - start
+
+    total_samples = sum(s.samples for s in stats.values())
+    total_errors = sum(s.errors for s in stats.values())
+    print("\n=== Summary ===")
+    for name, s in stats.items():
+        if s.errors:
+            print(f"{name:<20} samples={s.samples} errors={s.errors} reconnects={s.reconnects} "
+                  f"last_error={s.last_error!r}")
+    print(f"Devices    : {len(stats)}")
+    print(f"Samples    : {total_samples} ({total_samples / elapsed:.1f}/s, "
+          f"target {len(stats) * args.hz:.1f}/s)")
+    print(f"Errors     : {total_errors}")
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
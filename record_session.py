@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+会话录制工具（依赖 NumPy）
+
+录制：以固定频率采集指标并追加写入录制文件，Ctrl+C 或 --seconds 到期后正常关闭
+    python3 record_session.py record run.pnr --hz 10 --pid 1234 --uid 10086
+    python3 record_session.py record run.pnr --append      # 崩溃或中断后继续追加
+
+查看：输出元数据、记录数、时间范围，以及指定时间窗口的统计
+    python3 record_session.py info run.pnr --start 60 --end 90    # 相对开始时间（秒）
+"""
+
+import argparse
+import signal
+import sys
+import time
+
+from panda import connect
+from panda.recording import SessionReader, SessionWriter, standard_columns
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Record and inspect Panda sessions")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    record = sub.add_parser("record", help="record metrics into a session file")
+    record.add_argument("path")
+    record.add_argument("--host", default="localhost", help="TCP host (default: localhost)")
+    record.add_argument("--port", type=int, default=9999, help="TCP port (default: 9999)")
+    record.add_argument("--hz", type=float, default=10.0, help="samples per second (default: 10)")
+    record.add_argument("--seconds", type=float, default=0, help="stop after this many seconds (default: until Ctrl+C)")
+    record.add_argument("--pid", type=int, default=0, help="also record PSS of this pid")
+    record.add_argument("--uid", type=int, default=-1, help="also record network bytes of this uid")
+    record.add_argument("--device", default="", help="device name stored in the metadata")
+    record.add_argument("--append", action="store_true", help="append to an existing file")
+
+    info = sub.add_parser("info", help="show a session summary")
+    info.add_argument("path")
+    info.add_argument("--start", type=float, help="window start, seconds from the first sample")
+    info.add_argument("--end", type=float, help="window end, seconds from the first sample")
+    return parser.parse_args()
+
+
+def record(args):
+    client = connect(args.host, args.port, timeout=5)
+    if args.append:
+        writer = SessionWriter.append_to(args.path)
+    else:
+        cores = len(client.cpu_core_usage())
+        metadata = {"device": args.device or f"{args.host}:{args.port}", "pid": args.pid, "uid": args.uid}
+        writer = SessionWriter.create(args.path, standard_columns(cores), metadata)
+
+    stop = []
+    signal.signal(signal.SIGINT, lambda *_: stop.append(True))
+    interval = 1.0 / args.hz
+    deadline = time.monotonic() + args.seconds if args.seconds > 0 else None
+    next_tick = time.monotonic()
+    with client, writer:
+        while not stop and (deadline is None or next_tick < deadline):
+            writer.capture(client, pid=args.pid, uid=args.uid)
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+        print(f"Recorded {writer.count} samples to {args.path}")
+
+
+def info(args):
+    reader = SessionReader(args.path)
+    first, last = reader.time_range
+    print(f"File       : {args.path}{' (recovered, no footer)' if reader.recovered else ''}")
+    print(f"Metadata   : {reader.metadata}")
+    print(f"Records    : {len(reader)} x {reader.dtype.itemsize} bytes")
+    print(f"Time range : {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))} + {last - first:.1f}s")
+    start = None if args.start is None else first + args.start
+    end = None if args.end is None else first + args.end
+    window = reader.slice(start, end)
+    if not len(window):
+        print("Window     : no samples")
+        return
+    print(f"Window     : {len(window)} samples")
+    for name in reader.columns[1:]:
+        column = window[name]
+        if column.ndim > 1:
+            column = column.mean(axis=1)
+        print(f"  {name:<16} mean={column.mean():12.2f} min={column.min():12.2f} max={column.max():12.2f}")
+
+
+def main():
+    args = parse_args()
+    try:
+        if args.action == "record":
+            record(args)
+        else:
+            info(args)
+    except OSError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
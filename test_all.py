@@ -1,86 +1,306 @@
 #!/usr/bin/env python3
 """
-综合测试脚本 - 测试所有功能模块
+综合测试脚本 - 并行测试所有功能模块
+
+各模块套件在同一进程内运行，不再逐个启动子进程：
+  - 每台设备共享一个 PandaPool（指标命令走主连接，WiFi 扫描等耗时命令走独立连接）
+  - 相互独立的套件（CPU、GPU、FPS、内存、电池、网络、WiFi）并发执行
+  - 多台设备同时测试
+  - 每个请求受 --timeout 限制，设备无响应时该套件立即失败，不会拖住整轮测试
+
+    python3 test_all.py                                   # localhost:9999
+    python3 test_all.py --ports 9001-9004                 # 4 台设备（各自 adb forward）
+    python3 test_all.py --suites cpu memory --fail-fast
 """
 
-import subprocess
+import argparse
+import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from panda import PandaPool
+
+
+# ========== 测试套件 ==========
+# 每个检查接收 PandaPool，抛出异常或断言失败即为失败，返回值作为详情输出
+
+def check_cpu_usage(client):
+    client.cpu_usage()  # 首次调用只做初始化
+    usage = client.cpu_usage()
+    assert 0.0 <= usage <= 100.0, f"usage out of range: {usage}"
+    return f"{usage:.2f}%"
+
+
+def check_cpu_core_usage(client):
+    cores = client.cpu_core_usage()
+    assert cores, "no cores reported"
+    return f"{len(cores)} cores"
+
+
+def check_cpu_freq(client):
+    freqs = client.cpu_freq()
+    assert freqs, "no frequencies reported"
+    return f"{min(freqs) // 1000}-{max(freqs) // 1000} MHz"
+
+
+def check_cpu_temperature(client):
+    return f"{client.cpu_temperature():.1f}°C"
+
+
+def check_thread_cpu_usage(client):
+    pid = os.getpid()
+    return f"{client.thread_cpu_usage(pid, pid):.2f}%"
+
+
+def check_thread_cpu_table(client):
+    # PID 0 为 Panda 服务自身；扫描期间用另一个线程连续截图，保证有线程在运行
+    client.thread_cpu_table(0)  # 首次扫描只建立基准
+    stop = threading.Event()
+
+    def load():
+        while not stop.is_set():
+            client.screenshot_ex(quality=80)
 
-def run_test(script_name, description):
-    """运行测试脚本"""
-    print(f"\n{'=' * 60}")
-    print(f"运行测试: {description}")
-    print(f"脚本: {script_name}")
-    print('=' * 60)
-    
+    worker = threading.Thread(target=load, daemon=True)
+    worker.start()
     try:
-        result = subprocess.run(
-            [sys.executable, script_name],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        
-        print(result.stdout)
-        if result.stderr:
-            print("错误输出:", result.stderr)
-        
-        return result.returncode == 0
-    except subprocess.TimeoutExpired:
-        print(f"测试超时: {script_name}")
-        return False
-    except Exception as e:
-        print(f"运行测试失败: {e}")
-        return False
+        time.sleep(0.5)  # 超过服务端 200ms 的最短扫描间隔，否则复用上一次扫描
+    finally:
+        stop.set()
+        worker.join()
+    table = client.thread_cpu_table(0, limit=5)
+    assert table.total_threads > 0, "no threads reported"
+    assert table.interval_ms > 0, "scan reused the baseline (interval_ms == 0)"
+    assert len(table.threads) <= 5, f"limit ignored: {len(table.threads)} rows"
+    top = table.threads[0]
+    assert top.usage > 0, f"top thread {top.name} idle under screenshot load"
+    return f"{table.total_threads} threads in {table.interval_ms} ms, top {top.name} {top.usage:.2f}%"
+
+
+def check_gpu_usage(client):
+    gpu = client.gpu_usage()
+    return f"{gpu.usage:.1f}% @ {gpu.freq_khz // 1000} MHz"
+
+
+def check_fps(client):
+    assert client.start_profiling(500), "start profiling failed"
+    try:
+        time.sleep(1.0)  # 等待至少一个统计周期
+        fps = client.fps()
+        assert fps >= 0, f"invalid fps: {fps}"
+    finally:
+        client.stop_profiling()
+    return f"{fps} fps"
+
+
+def check_frame_stats(client):
+    assert client.set_fps_target("") == 0, "set fps target failed"
+    client.frame_stats(1000)  # 首次调用选择图层并开始跟踪
+    time.sleep(1.0)
+    stats = client.frame_stats(1000)
+    assert stats.fps >= 0 and stats.frames >= 0, f"invalid frame stats: {stats}"
+    assert stats.p50_ms <= stats.p99_ms <= stats.max_ms, f"unordered percentiles: {stats}"
+    return f"{stats.fps:.1f} fps, p99 {stats.p99_ms:.1f}ms, jank {stats.jank} ({stats.layer or 'no layer'})"
+
+
+def check_memory_usage(client):
+    memory = client.memory_usage(1)
+    return f"PSS {memory.pss_kb} KB"
+
+
+def check_battery_supported(client):
+    return "supported" if client.battery_supported() else "not supported"
+
+
+def check_battery_level(client):
+    level = client.battery_level()
+    assert 0 <= level <= 100, f"level out of range: {level}"
+    return f"{level}%"
+
+
+def check_battery_info(client):
+    info = client.battery_info()
+    return f"{info.current_ma} mA, {info.voltage_mv} mV"
+
+
+def check_network_total(client):
+    total = client.network_total()
+    return f"rx={total.rx} tx={total.tx}"
+
+
+def check_network_uid(client):
+    usage = client.network_usage(1000)
+    return f"rx={usage.total_rx} tx={usage.total_tx}"
+
+
+def check_network_package(client):
+    usage = client.network_usage_by_package("com.android.settings")
+    return f"uid={usage.uid}"
+
+
+def check_wifi_state(client):
+    return f"state={client.wifi_state()}"
+
+
+def check_wifi_scan(client):
+    return f"{len(client.wifi_scan())} networks"
+
+
+def check_wifi_info(client):
+    return client.wifi_info().ssid or "(not connected)"
+
+
+def check_wifi_configured(client):
+    return f"{len(client.wifi_configured_networks())} saved"
+
+
+SUITES = {
+    "cpu": ("CPU 性能监控", [
+        ("CPU 使用率", check_cpu_usage),
+        ("CPU 核心使用率", check_cpu_core_usage),
+        ("CPU 频率", check_cpu_freq),
+        ("CPU 温度", check_cpu_temperature),
+        ("线程 CPU 使用率", check_thread_cpu_usage),
+        ("线程 CPU 表 (Panda 服务)", check_thread_cpu_table),
+    ]),
+    "gpu": ("GPU 性能监控", [
+        ("GPU 使用率", check_gpu_usage),
+    ]),
+    "fps": ("FPS 性能监控", [
+        ("FPS", check_fps),
+        ("帧时间统计", check_frame_stats),
+    ]),
+    "memory": ("内存监控", [
+        ("内存使用 (PID 1)", check_memory_usage),
+    ]),
+    "battery": ("电池信息", [
+        ("电池监控支持", check_battery_supported),
+        ("电池电量", check_battery_level),
+        ("电池信息", check_battery_info),
+    ]),
+    "network": ("网络流量统计", [
+        ("总网络流量", check_network_total),
+        ("UID 1000 网络流量", check_network_uid),
+        ("com.android.settings 网络流量", check_network_package),
+    ]),
+    "wifi": ("WiFi 管理", [
+        ("WiFi 状态", check_wifi_state),
+        ("扫描 WiFi", check_wifi_scan),
+        ("当前 WiFi 信息", check_wifi_info),
+        ("已配置网络", check_wifi_configured),
+    ]),
+}
+
+
+# ========== 运行器 ==========
+
+def parse_ports(text):
+    ports = []
+    for part in text.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ports.extend(range(int(start), int(end) + 1))
+        elif part:
+            ports.append(int(part))
+    return ports
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run Panda test suites in parallel")
+    parser.add_argument("--host", default="localhost", help="TCP host (default: localhost)")
+    parser.add_argument("--ports", default="9999",
+                        help="one forwarded port per device, e.g. 9001-9004 (default: 9999)")
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES),
+                        help="suites to run (default: all)")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="per-request timeout in seconds (default: 10)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="max concurrent suites (default: devices x suites)")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="skip suites not yet started after the first failure")
+    return parser.parse_args()
+
+
+def run_suite(device, pool, suite, stop):
+    """顺序执行套件中的检查，返回 [(检查名, 是否通过, 详情, 耗时)]"""
+    results = []
+    for name, check in SUITES[suite][1]:
+        if stop.is_set():
+            results.append((name, False, "skipped", 0.0))
+            continue
+        start = time.perf_counter()
+        try:
+            detail = check(pool)
+            ok = True
+        except Exception as e:
+            # 任何异常（超时、解码错误、检查代码的 bug）只算该项失败，继续执行其余检查
+            detail = f"{type(e).__name__}: {e}"
+            ok = False
+        results.append((name, ok, detail, time.perf_counter() - start))
+    return results
+
 
 def main():
+    args = parse_args()
+    devices = [f"{args.host}:{port}" for port in parse_ports(args.ports)]
+    pools = {
+        device: PandaPool.connect_tcp(args.host, int(device.rsplit(":", 1)[1]), timeout=args.timeout)
+        for device in devices
+    }
+
     print("=" * 60)
     print("Panda 设备工具包 - 综合测试")
+    print(f"设备: {', '.join(devices)}  套件: {', '.join(args.suites)}")
     print("=" * 60)
-    
-    # 定义所有测试
-    tests = [
-        ("test_cpu.py", "CPU 性能监控"),
-        ("test_gpu.py", "GPU 性能监控"),
-        ("test_fps.py", "FPS 性能监控"),
-        ("test_memory.py", "内存监控"),
-        ("test_battery.py", "电池信息"),
-        ("test_network_stats.py", "网络流量统计"),
-        ("test_wifi.py", "WiFi 管理"),
-    ]
-    
-    results = []
-    
-    for script, description in tests:
-        success = run_test(script, description)
-        results.append((description, success))
-        time.sleep(1)  # 测试间隔
-    
+
+    stop = threading.Event()
+    jobs = [(device, suite) for device in devices for suite in args.suites]
+    workers = args.workers or len(jobs)
+    report = {}
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(run_suite, device, pools[device], suite, stop): (device, suite)
+                for device, suite in jobs
+            }
+            for future in as_completed(futures):
+                device, suite = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # run_suite 本身出错：整个套件记为失败，其余设备和套件继续
+                    results = [("(suite)", False, f"{type(e).__name__}: {e}", 0.0)]
+                report[(device, suite)] = results
+                passed = all(ok for _, ok, _, _ in results)
+                elapsed = sum(t for _, _, _, t in results)
+                print(f"[{device}] {SUITES[suite][0]}: {'✓ 通过' if passed else '✗ 失败'} ({elapsed:.2f}s)")
+                for name, ok, detail, t in results:
+                    print(f"    {'✓' if ok else '✗'} {name:<32} {t * 1000:8.1f} ms  {detail}")
+                if not passed and args.fail_fast:
+                    stop.set()
+    finally:
+        wall = time.perf_counter() - start
+        for pool in pools.values():
+            pool.close()
+
     # 打印汇总
+    total = passed = 0
+    for device, suite in jobs:
+        for _, ok, _, _ in report[(device, suite)]:
+            total += 1
+            passed += ok
     print("\n" + "=" * 60)
-    print("测试结果汇总")
-    print("=" * 60)
-    
-    passed = 0
-    failed = 0
-    
-    for description, success in results:
-        status = "✓ 通过" if success else "✗ 失败"
-        print(f"{description}: {status}")
-        if success:
-            passed += 1
-        else:
-            failed += 1
-    
-    print("\n" + "=" * 60)
-    print(f"总计: {len(results)} 个测试")
+    print(f"总计: {total} 个检查 ({len(devices)} 台设备 x {len(args.suites)} 个套件)")
     print(f"通过: {passed}")
-    print(f"失败: {failed}")
+    print(f"失败: {total - passed}")
+    print(f"耗时: {wall:.2f}s")
     print("=" * 60)
-    
-    sys.exit(0 if failed == 0 else 1)
+
+    sys.exit(0 if passed == total else 1)
+
 
 if __name__ == '__main__':
     main()
-